@@ -0,0 +1,135 @@
+"""
+============
+Cache Module
+============
+
+Small, thread-safe caches used on the hot paths of the library.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class TTLCache:
+    """
+    Bounded least-recently-used cache where every entry also has an expiry time.
+
+    Entries are evicted when they expire or when the cache is full, in which case the least recently used entry is
+    dropped. Hit and miss statistics are available through :py:meth:`TTLCache.cache_info`, which mirrors
+    :py:func:`functools.lru_cache`.
+
+    Args:
+        maxsize: Maximum number of entries. A ``maxsize`` of ``0`` disables the cache.
+        ttl: Default time to live in seconds for new entries, ``None`` means that entries only expire if
+             an explicit expiry time is given to :py:meth:`TTLCache.set`.
+        timer: Clock used to determine expiry, defaults to :py:func:`time.time`.
+    """
+
+    def __init__(
+            self,
+            maxsize: int = 1024,
+            ttl: Optional[float] = None,
+            timer: Callable[[], float] = time.time,
+    ):
+        if maxsize < 0:
+            raise ValueError('maxsize must be a non-negative integer')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the value stored under ``key``, or ``default`` if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= self.timer():
+                del self._entries[key]
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """
+        Stores ``value`` under ``key``.
+
+        Args:
+            key: Cache key.
+            value: Value to store.
+            expires_at: Absolute expiry time, as given by the cache timer. The earliest of ``expires_at``
+                        and the default time to live is used.
+        """
+        if self.maxsize == 0:
+            return
+
+        now = self.timer()
+        deadlines = [deadline for deadline in (
+            expires_at,
+            now + self.ttl if self.ttl is not None else None,
+        ) if deadline is not None]
+        deadline = min(deadlines) if deadlines else float('inf')
+        if deadline <= now:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, deadline)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """ Removes ``key`` from the cache and returns its value, or ``default`` if it is missing. """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+        return default if entry is None else entry[0]
+
+    def expire(self) -> int:
+        """
+        Removes all expired entries.
+
+        Returns:
+            Number of removed entries.
+        """
+        now = self.timer()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+
+        return len(expired)
+
+    def clear(self) -> None:
+        """ Removes all entries and resets the statistics. """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        """ Returns the hit and miss statistics of the cache. """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._entries))
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > self.timer()
+
+    def __len__(self) -> int:
+        return len(self._entries)
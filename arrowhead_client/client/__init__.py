@@ -3,11 +3,14 @@ Client module
 """
 from .client_core import provided_service, ArrowheadClient
 from .client_async import ArrowheadClientAsync
-from .implementations import AsyncClient
+from .client_sync import ArrowheadClientSync
+from .implementations import AsyncClient, SyncClient
 
 __all__ = [
     'provided_service',
     'ArrowheadClient',
     'ArrowheadClientAsync',
+    'ArrowheadClientSync',
     'AsyncClient',
+    'SyncClient',
 ]
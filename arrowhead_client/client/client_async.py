@@ -1,14 +1,29 @@
-import traceback
+import asyncio
+from functools import partial
+from collections import defaultdict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
 import arrowhead_client.client.core_service_forms.client
 from arrowhead_client import errors as errors
 from arrowhead_client.client import core_service_responses as responses
 from arrowhead_client.client.client_core import ArrowheadClient
+from arrowhead_client.client.connection_pool import ConnectionPool, ManagedConnection
 from arrowhead_client.client.core_services import CoreServices
+from arrowhead_client.client.event_publisher import AsyncEventPublisher
+from arrowhead_client.client.event_subscriber import DEFAULT_NOTIFY_URI, EventHandler, EventReceiver
+from arrowhead_client.client.orchestration_cache import OrchestrationEntry
+from arrowhead_client.resilience import ResiliencePolicy
+from arrowhead_client.rules import OrchestrationRule, RegistrationRule
+from arrowhead_client.security.access_policy import AccessPolicy, SystemAccessPolicy, UnrestrictedAccessPolicy
 from arrowhead_client.service import Service
-from arrowhead_client.provider.implementations.fastapi_provider import FastapiProvider
-from arrowhead_client.response import Response, ConnectionResponse
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.response import Response, ConnectionResponse, ConsumeResult
 from arrowhead_client.constants import OrchestrationFlags
 
+DEFAULT_CONSUME_CONCURRENCY = 32
+
+ConsumeItem = Union[str, Tuple[str, Dict[str, Any]]]
+
 
 class ArrowheadClientAsync(ArrowheadClient):
     """
@@ -19,22 +34,232 @@ class ArrowheadClientAsync(ArrowheadClient):
         super().__init__(*args, **kwargs)
         self.provider.add_startup_routine(self.client_setup)
         self.provider.add_shutdown_routine(self.client_cleanup)
+        # Orchestration request in progress, and the task fetching it, by service definition
+        self._orchestration_tasks: Dict[str, Tuple[OrchestrationEntry, asyncio.Future]] = {}
+        self._orchestration_refresher: Optional[asyncio.Task] = None
+        self._event_publisher: Optional[AsyncEventPublisher] = None
+        self._event_receiver: Optional[EventReceiver] = None
+        self._event_routes: Set[str] = set()
+        # Notify URI by subscribed event type
+        self.subscriptions: Dict[str, str] = {}
+        self.connection_pool = ConnectionPool(
+                self._open_connection,
+                self._reorchestrate,
+                logger=self._logger,
+                is_orchestrated=self._is_orchestrated,
+                **self.connection_pool_options,
+        )
 
     async def consume_service(self, service_definition, **kwargs) -> Response:
-        rule = self.orchestration_rules.get(service_definition)
+        policy = self.resilience.policy(service_definition)
+        if policy.enabled:
+            return await self._consume_resilient(service_definition, policy, **kwargs)
+
+        rule = self.orchestration_rules.select(service_definition)
         if rule is None:
             # TODO: Not sure if this should raise an error or just log?
             raise errors.NoAvailableServicesError(
                     f'No services available for'
                     f' service \'{service_definition}\''
             )
-        res = await self.consumer.consume_service(rule, **kwargs)  # type: ignore
+        return await self._consume_rule(rule, **kwargs)
+
+    async def _consume_rule(self, rule: OrchestrationRule, **kwargs) -> Response:
+        with self.tracer.start_span('consume_service', attributes={
+            'arrowhead.service_definition': rule.service_definition,
+            'arrowhead.provider': rule.system_name,
+        }), self.orchestration_rules.strategy.track(rule):
+            res = await self.consumer.consume_service(rule, **kwargs)  # type: ignore
         return res
 
-    async def connect(self, service_definition, **kwargs) -> ConnectionResponse:
-        rule = self.orchestration_rules.get(service_definition)
+    async def _consume_resilient(
+            self,
+            service_definition: str,
+            policy: ResiliencePolicy,
+            preferred: Optional[OrchestrationRule] = None,
+            **kwargs,
+    ) -> Response:
+        """
+        Consumes ``service_definition`` with the timeouts, retries, and circuit breakers of ``policy``.
+
+        The first attempt goes to the ``preferred`` provider if it is given and its circuit breaker lets the request
+        through. Retries go to another provider when there is one, and if the circuit breakers of all providers are
+        open, the service is orchestrated again once.
+        """
+        if policy.timeout is not None:
+            kwargs.setdefault('timeout', policy.timeout)
+
+        failed: Set[str] = set()
+        attempt = 0
+        reorchestrated = False
+        last_error: Optional[Exception] = None
+        while True:
+            rule = self._select_provider(service_definition, failed, preferred)
+            if rule is None:
+                if not reorchestrated and await self._reorchestrate(service_definition):
+                    reorchestrated = True
+                    continue
+                raise self._no_provider_error(service_definition) from last_error
+
+            attempt += 1
+            try:
+                response = await self._consume_rule(rule, **kwargs)
+            except Exception as e:
+                self.resilience.record(rule, None)
+                if policy.retry is None or not policy.retry.should_retry(rule.method, attempt):
+                    raise
+                last_error = e
+            except BaseException:
+                # Cancelled or interrupted, the request neither succeeded nor failed
+                self.resilience.release(rule)
+                raise
+            else:
+                self.resilience.record(rule, response.status_code)
+                if policy.retry is None or not policy.retry.should_retry(rule.method, attempt, response.status_code):
+                    return response
+
+            failed.add(rule.endpoint)
+            self._logger.warning(f'Attempt {attempt} to consume \'{service_definition}\' failed, retrying')
+            await asyncio.sleep(policy.retry.delay(attempt))
+
+    async def _reorchestrate(self, service_definition: str) -> bool:
+        """
+        Orchestrates ``service_definition`` again, bypassing the orchestration cache.
+
+        Returns:
+            ``True`` if the orchestration succeeded, ``False`` if it failed or the service was never orchestrated.
+        """
+        entry = self._orchestration_entries.get(service_definition)
+        if entry is None:
+            return False
+
+        self._logger.warning(f'No provider of \'{service_definition}\' is available, orchestrating again')
+        try:
+            await asyncio.shield(self._orchestration_task(entry))
+        except Exception as e:
+            self._logger.warning(f'Orchestration of \'{service_definition}\' failed: {e}')
+            return False
+
+        return True
+
+    async def consume_many(
+            self,
+            items: Iterable[ConsumeItem],
+            concurrency_limit: int = DEFAULT_CONSUME_CONCURRENCY,
+            timeout: Optional[float] = None,
+            spread_providers: bool = False,
+    ) -> AsyncIterator[ConsumeResult]:
+        """
+        Consumes many services concurrently and yields the results as they complete.
+
+        Items are either a service definition, or a tuple of a service definition and the keyword arguments
+        given to :code:`consume_service`. Results are yielded in completion order, use ``ConsumeResult.index``
+        to match a result with its item. A failing item does not stop the others, its error is stored in
+        ``ConsumeResult.error`` instead.
+
+        Args:
+            items: Items to consume, read lazily as the concurrency limit allows.
+            concurrency_limit: Maximum number of requests in progress at the same time.
+            timeout: Time in seconds before a single request is cancelled with :py:class:`asyncio.TimeoutError`.
+            spread_providers: If ``True``, the items of each service definition are spread evenly over all providers
+                              found by orchestration whose circuit breakers are not open, instead of letting the
+                              load balancing strategy pick one. The resilience policy of the service still applies,
+                              so a failed item is retried on another provider.
+        Returns:
+            Asynchronous iterator of :py:class:`~arrowhead_client.response.ConsumeResult`.
+
+        Example::
+
+            items = [('temperature', {'params': {'sensor': sensor}}) for sensor in sensors]
+
+            async for result in client.consume_many(items, concurrency_limit=10, timeout=2.0):
+                if result.ok:
+                    temperatures[sensors[result.index]] = result.response.read_json()
+        """
+        if concurrency_limit < 1:
+            raise ValueError('concurrency_limit must be a positive integer')
+
+        spread_counters: Dict[str, int] = defaultdict(int)
+        pending: Set[asyncio.Future] = set()
+        indexed_items = enumerate(items)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < concurrency_limit:
+                    try:
+                        index, item = next(indexed_items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+
+                    service_definition, kwargs = (item, {}) if isinstance(item, str) else item
+                    rule = None
+                    if spread_providers:
+                        providers = self.resilience.available(self.orchestration_rules.providers(service_definition))
+                        if providers:
+                            rule = providers[spread_counters[service_definition] % len(providers)]
+                            spread_counters[service_definition] += 1
+
+                    pending.add(asyncio.ensure_future(
+                            self._consume_item(index, service_definition, kwargs, timeout, rule)
+                    ))
+
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _consume_item(
+            self,
+            index: int,
+            service_definition: str,
+            kwargs: Dict[str, Any],
+            timeout: Optional[float],
+            rule: Optional[OrchestrationRule],
+    ) -> ConsumeResult:
+        policy = self.resilience.policy(service_definition)
+        if rule is None:
+            consumption = self.consume_service(service_definition, **kwargs)
+        elif policy.enabled:
+            consumption = self._consume_resilient(service_definition, policy, rule, **kwargs)
+        else:
+            consumption = self._consume_rule(rule, **kwargs)
+
+        try:
+            response = await asyncio.wait_for(consumption, timeout)
+        except Exception as e:
+            return ConsumeResult(index, service_definition, error=e)
+
+        return ConsumeResult(index, service_definition, response=response)
+
+    async def connect(self, service_definition, **kwargs) -> ManagedConnection:
+        """
+        Opens a persistent connection, like a WebSocket, to a provider of ``service_definition``.
+
+        The connection is kept alive with heartbeats, reopened after the service is orchestrated again if it is lost,
+        and returned to :py:attr:`connection_pool` for reuse when it is closed,
+        see :py:mod:`~arrowhead_client.client.connection_pool`.
+
+        Args:
+            service_definition: Service definition of the connected service.
+            kwargs: Keyword arguments given to the ``connect`` method of the consumer.
+        Raises:
+            NoAvailableServicesError: If no provider of the service has been orchestrated.
+        """
+        return await self.connection_pool.connect(service_definition, **kwargs)
+
+    async def _open_connection(
+            self,
+            service_definition: str,
+            kwargs: Dict[str, Any],
+    ) -> Tuple[OrchestrationRule, ConnectionResponse]:
+        rule = self.orchestration_rules.select(service_definition)
         if rule is None:
-            # TODO: Not sure if this should raise an error or just log?
             raise errors.NoAvailableServicesError(
                     f'No services available for'
                     f' service \'{service_definition}\''
@@ -42,12 +267,199 @@ class ArrowheadClientAsync(ArrowheadClient):
 
         connector = await self.consumer.connect(rule, **kwargs)
 
-        return connector
+        return rule, connector
+
+    def _is_orchestrated(self, service_definition: str, rule: OrchestrationRule) -> bool:
+        """ ``True`` if the provider of ``rule`` is one of the orchestrated providers of ``service_definition``. """
+        return any(
+                provider.endpoint == rule.endpoint
+                for provider in self.orchestration_rules.providers(service_definition)
+        )
+
+    @property
+    def event_publisher(self) -> AsyncEventPublisher:
+        """ Publisher of the events sent with :py:meth:`publish_event`, created on first use. """
+        if self._event_publisher is None:
+            self._event_publisher = AsyncEventPublisher(
+                    self._send_event,
+                    logger=self._logger,
+                    **self.event_publisher_options,
+            )
+
+        return self._event_publisher
+
+    async def publish_event(
+            self,
+            event_type: str,
+            payload: str,
+            metadata: Optional[Dict[str, str]] = None,
+            time_stamp: Optional[str] = None,
+    ) -> None:
+        """
+        Publishes an event through the Event Handler.
+
+        The event is buffered and sent by a background task, see
+        :py:mod:`~arrowhead_client.client.event_publisher`. Waits while the buffer is full.
+
+        Args:
+            event_type: Event type.
+            payload: Event payload.
+            metadata: Optional. Event metadata, used by subscribers to filter events.
+            time_stamp: Optional. Time of the event as :code:`'YYYY-MM-DD hh:mm:ss'` in UTC, defaults to now.
+
+        Example::
+
+            await client.publish_event('temperature', '21.5', metadata={'unit': 'celsius'})
+            ...
+            await client.flush_events()
+        """
+        await self.event_publisher.publish(self._event_form(event_type, payload, metadata, time_stamp))
+
+    async def flush_events(self) -> None:
+        """ Waits until all published events have been sent. """
+        if self._event_publisher is not None:
+            await self._event_publisher.flush()
+
+    async def _close_event_publisher(self) -> None:
+        if self._event_publisher is not None:
+            await self._event_publisher.close()
+            self._event_publisher = None
+
+    async def _send_event(self, event: Dict) -> None:
+        event_publish_response = await self.consume_service(
+                CoreServices.EVENT_PUBLISH.service_definition,
+                json=event,
+        )
+
+        responses.process_event_publish(event_publish_response)
+
+    @property
+    def event_receiver(self) -> EventReceiver:
+        """ Receiver of the events delivered to the subscriptions made with :py:meth:`subscribe`. """
+        if self._event_receiver is None:
+            self._event_receiver = EventReceiver(
+                    json_codec=self.provider.json_codec,
+                    logger=self._logger,
+                    **self.event_receiver_options,
+            )
+
+        return self._event_receiver
+
+    def _event_access_policy(self) -> AccessPolicy:
+        """ Access policy of notify URIs, which only lets the Event Handler deliver events in secure mode. """
+        if not self.secure:
+            return UnrestrictedAccessPolicy()
+
+        return SystemAccessPolicy(self.config['event_handler']['system_name'])
+
+    async def subscribe(
+            self,
+            event_type: str,
+            handler: EventHandler,
+            notify_uri: str = DEFAULT_NOTIFY_URI,
+            metadata_filter: Optional[Dict[str, str]] = None,
+            match_metadata: bool = False,
+            sources: Optional[List[ArrowheadSystem]] = None,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None,
+    ) -> None:
+        """
+        Subscribes to events of ``event_type`` and calls ``handler`` with every received event.
+
+        The provider serves ``notify_uri``, where the Event Handler delivers the events. Handlers run after the
+        notification has been acknowledged, see :py:mod:`~arrowhead_client.client.event_subscriber`.
+        Several event types can share a notify URI.
+
+        Args:
+            event_type: Event type.
+            handler: Coroutine function or function called with each :py:class:`~arrowhead_client.client.event_subscriber.Event`.
+            notify_uri: URI of the provider where events are delivered.
+            metadata_filter: Optional. Metadata used to filter events.
+            match_metadata: If ``True``, only events whose metadata contain ``metadata_filter`` are delivered.
+            sources: Optional. Systems whose events are delivered, defaults to all systems.
+            start_date: Optional. Events before this date are not delivered.
+            end_date: Optional. Events after this date are not delivered.
+        Raises:
+            CoreServiceInputError: If the Event Handler rejects the subscription.
+
+        Example::
+
+            async def on_temperature(event: Event):
+                print(event.payload)
+
+            await client.subscribe('temperature', on_temperature)
+        """
+        if notify_uri not in self._event_routes:
+            self.provider.add_event_route(notify_uri, self.event_receiver.receive, self._event_access_policy())
+            self._event_routes.add(notify_uri)
+
+        subscribe_form = arrowhead_client.client.core_service_forms.client.EventSubscribeForm.make(
+                event_type,
+                notify_uri,
+                self.system,
+                filter_meta_data=metadata_filter,
+                match_meta_data=match_metadata,
+                sources=sources,
+                start_date=start_date,
+                end_date=end_date,
+                trusted=True,
+        )
+
+        self.event_receiver.add_handler(event_type, handler)
+        try:
+            event_subscribe_response = await self.consume_service(
+                    CoreServices.EVENT_SUBSCRIBE.service_definition,
+                    json=subscribe_form.dto(),
+            )
+            responses.process_event_subscribe(event_subscribe_response)
+        except BaseException:
+            if event_type not in self.subscriptions:
+                self.event_receiver.remove_handlers(event_type)
+            raise
+
+        self.subscriptions[event_type] = notify_uri
+
+    async def unsubscribe(self, event_type: str) -> None:
+        """
+        Cancels the subscription to ``event_type`` and removes its handlers.
+
+        Args:
+            event_type: Event type.
+        """
+        unsubscribe_payload = {
+            'event_type': event_type,
+            'system_name': self.system.system_name,
+            'address': self.system.address,
+            'port': self.system.port,
+        }
+
+        event_unsubscribe_response = await self.consume_service(
+                CoreServices.EVENT_UNSUBSCRIBE.service_definition,
+                params=unsubscribe_payload,
+        )
+        responses.process_event_unsubscribe(event_unsubscribe_response)
+
+        self.event_receiver.remove_handlers(event_type)
+        self.subscriptions.pop(event_type, None)
+
+    async def _unsubscribe_all(self) -> None:
+        results = await asyncio.gather(
+                *[self.unsubscribe(event_type) for event_type in list(self.subscriptions)],
+                return_exceptions=True,
+        )
+        for error in results:
+            if isinstance(error, Exception):
+                self._logger.warning(f'Unsubscribing failed: {error}')
+
+    async def _close_event_receiver(self) -> None:
+        if self._event_receiver is not None:
+            await self._event_receiver.close()
 
     async def setup(self):
         super().setup()
 
         await self.consumer.async_startup()
+        self._start_orchestration_refresher()
 
     async def add_orchestration_rule(  # type: ignore
             self,
@@ -79,25 +491,104 @@ class ArrowheadClientAsync(ArrowheadClient):
                 self.system,
                 requested_service,
                 orchestration_flags,
+                trusted=True,
                 **kwargs
         )
 
+        entry = OrchestrationEntry(service_definition, method, orchestration_form.dto())
+        with self.tracer.start_span(
+                'add_orchestration_rule',
+                attributes={'arrowhead.service_definition': service_definition},
+        ) as span:
+            cached_entry = self.orchestration_cache.lookup(entry)
+            if not self.orchestration_cache.enabled:
+                await self._fetch_orchestration(entry)
+            elif cached_entry is None:
+                span.set_attribute('arrowhead.orchestration_cache', 'miss')
+                await asyncio.shield(self._orchestration_task(entry))
+            elif self.orchestration_cache.is_stale(cached_entry):
+                span.set_attribute('arrowhead.orchestration_cache', 'stale')
+                self._orchestration_task(cached_entry)
+            else:
+                span.set_attribute('arrowhead.orchestration_cache', 'hit')
+
+    def _orchestration_task(self, entry: OrchestrationEntry) -> asyncio.Future:
+        """
+        Returns the task fetching orchestration rules for ``entry``.
+        Concurrent lookups that send the same request to the Orchestrator share a single request.
+        A lookup of the same service definition with a different request is fetched after the one in progress,
+        so that the rules are decided by the latest request.
+        """
+        in_progress = self._orchestration_tasks.get(entry.service_definition)
+        if in_progress is not None and in_progress[0].same_request(entry):
+            return in_progress[1]
+
+        previous = in_progress[1] if in_progress is not None else None
+        task = asyncio.ensure_future(self._fetch_orchestration_after(previous, entry))
+        self._orchestration_tasks[entry.service_definition] = (entry, task)
+        task.add_done_callback(partial(self._orchestration_done, entry))
+
+        return task
+
+    def _orchestration_done(self, entry: OrchestrationEntry, task: asyncio.Future):
+        in_progress = self._orchestration_tasks.get(entry.service_definition)
+        if in_progress is not None and in_progress[1] is task:
+            del self._orchestration_tasks[entry.service_definition]
+        if not task.cancelled() and task.exception() is not None:
+            self._logger.warning(f'Orchestration of \'{entry.service_definition}\' failed: {task.exception()}')
+
+    async def _fetch_orchestration_after(self, previous: Optional[asyncio.Future], entry: OrchestrationEntry):
+        if previous is not None:
+            await asyncio.wait({previous})
+        await self._fetch_orchestration(entry)
+
+    async def _fetch_orchestration(self, entry: OrchestrationEntry):
         # TODO: Add an argument for arrowhead forms in consume_service, and one for the ssl-files
         orchestration_response = await self.consume_service(
                 CoreServices.ORCHESTRATION.service_definition,
-                json=orchestration_form.dto(),
+                json=entry.orchestration_form,
                 # cert=self.cert,
         )
 
-        rules = responses.process_orchestration(orchestration_response, method)
+        rules = list(responses.iter_orchestration(orchestration_response, entry.method))
+        if not rules:
+            self._logger.warning(f'Orchestration of \'{entry.service_definition}\' returned no providers')
+
+        self.orchestration_rules.replace(entry.service_definition, rules)
+        self.orchestration_cache.mark_fetched(entry)
+        self._orchestration_entries[entry.service_definition] = entry
+
+    async def _refresh_stale_orchestrations(self):
+        while True:
+            await asyncio.sleep(self.orchestration_cache.refresh_interval)
+            await asyncio.gather(
+                    *[self._orchestration_task(entry) for entry in self.orchestration_cache.stale_entries()],
+                    return_exceptions=True,
+            )
+
+    def _start_orchestration_refresher(self):
+        if not self.orchestration_cache.enabled or \
+                (self._orchestration_refresher is not None and not self._orchestration_refresher.done()):
+            return
+
+        self._orchestration_refresher = asyncio.ensure_future(self._refresh_stale_orchestrations())
 
-        for rule in rules:
-            self.orchestration_rules.store(rule)
+    async def _stop_orchestration_refresher(self):
+        if self._orchestration_refresher is None:
+            return
+
+        self._orchestration_refresher.cancel()
+        try:
+            await self._orchestration_refresher
+        except asyncio.CancelledError:
+            pass
+        self._orchestration_refresher = None
 
     async def _register_service(self, service: Service):
         service_registration_form = arrowhead_client.client.core_service_forms.client.ServiceRegistrationForm.make(
                 provided_service=service,
                 provider_system=self.system,
+                trusted=True,
         )
 
         service_registration_response = await self.consume_service(
@@ -107,21 +598,11 @@ class ArrowheadClientAsync(ArrowheadClient):
 
         responses.process_service_register(service_registration_response)
 
-    async def _register_all_services(self):
-        for rule in self.registration_rules:
-            if rule.is_provided:
-                continue
-            try:
-                await self._register_service(rule.provided_service)
-            except errors.CoreServiceInputError as e:
-                if str(e).endswith('already exists.'):
-                    rule.is_provided = True
-                else:
-                    print(f"ERROR: {__name__} failed to register provider: {e}")
-                    traceback.print_exception(type(e), e, e.__traceback__)
+    async def _register_all_services(self) -> Dict[str, Optional[BaseException]]:
+        rules = [rule for rule in self.registration_rules if not rule.is_provided]
+        results = await self._gather_limited(self._register_service, rules)
 
-            else:
-                rule.is_provided = True
+        return self._process_registration_results(rules, results, register=True)
 
     async def _unregister_service(self, service: Service):
         unregistration_payload = {
@@ -138,37 +619,93 @@ class ArrowheadClientAsync(ArrowheadClient):
 
         responses.process_service_unregister(service_unregistration_response)
 
-    async def _unregister_all_services(self):
-        for rule in self.registration_rules:
-            if not rule.is_provided:
-                continue
-            try:
-                await self._unregister_service(rule.provided_service)
-            except errors.CoreServiceInputError as e:
-                print(e)
-            else:
-                rule.is_provided = False
+    async def _unregister_all_services(self) -> Dict[str, Optional[BaseException]]:
+        rules = [rule for rule in self.registration_rules if rule.is_provided]
+        results = await self._gather_limited(self._unregister_service, rules)
+
+        return self._process_registration_results(rules, results, register=False)
+
+    async def _gather_limited(
+            self,
+            func: Callable[[Service], Awaitable[None]],
+            rules: List[RegistrationRule],
+    ) -> List[Optional[BaseException]]:
+        """
+        Calls ``func`` with the provided service of every rule, at most ``registration_concurrency`` at a time.
+
+        Returns:
+            List with the error raised for each rule, or ``None`` if no error was raised.
+        """
+        semaphore = asyncio.Semaphore(self.registration_concurrency)
+
+        async def limited(rule: RegistrationRule):
+            async with semaphore:
+                await func(rule.provided_service)
+
+        results = await asyncio.gather(*[limited(rule) for rule in rules], return_exceptions=True)
+
+        return [error if isinstance(error, BaseException) else None for error in results]
 
     def run_forever(self):
-        self.provider.run_forever(
-                address=self.system.address,
-                port=self.system.port,
-                # TODO: keyfile and certfile should be given in provider.__init__
-                keyfile=self.keyfile,
-                certfile=self.certfile,
-        )
+        """
+        Start the server, publish all provided services, and run until interrupted.
+        Then, unregister all services.
 
-    async def client_setup(self):
+        When the provider runs several worker processes, the services are registered and unregistered by this
+        process, once, while the workers only set up their consumers.
+        """
+        if self.provider.workers > 1:
+            asyncio.run(self._register_before_workers())
+
+        try:
+            self.provider.run_forever(
+                    address=self.system.address,
+                    port=self.system.port,
+                    # TODO: keyfile and certfile should be given in provider.__init__
+                    keyfile=self.keyfile,
+                    certfile=self.certfile,
+            )
+        finally:
+            if self.provider.workers > 1:
+                asyncio.run(self._unregister_after_workers())
+
+    async def _register_before_workers(self):
         await self.setup()
+        try:
+            await self._publish_services()
+        finally:
+            await self._stop_orchestration_refresher()
+            await self.consumer.async_shutdown()
+
+    async def _unregister_after_workers(self):
+        await self.consumer.async_startup()
+        try:
+            await self._unregister_all_services()
+        finally:
+            await self.consumer.async_shutdown()
+            self._logger.info('Server shut down')
+
+    async def _publish_services(self):
         if self.secure:
             authorization_response = await self.consume_service(CoreServices.PUBLICKEY.service_definition)
             self.auth_authentication_info = responses.process_publickey(authorization_response)
         self._initialize_provided_services()
         await self._register_all_services()
 
+    async def client_setup(self):
+        await self.setup()
+        if self.provider.workers == 1:
+            await self._publish_services()
+
     async def client_cleanup(self):
         print('Shutting down Arrowhead Client')
-        await self._unregister_all_services()
+        await self._unsubscribe_all()
+        await self._close_event_receiver()
+        await self._close_event_publisher()
+        await self._stop_orchestration_refresher()
+        if self.provider.workers == 1:
+            await self._unregister_all_services()
+        await self.connection_pool.close()
         await self.consumer.async_shutdown()
         self._logger.info('Server shut down')
 
@@ -178,4 +715,9 @@ class ArrowheadClientAsync(ArrowheadClient):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._unsubscribe_all()
+        await self._close_event_receiver()
+        await self._close_event_publisher()
+        await self._stop_orchestration_refresher()
+        await self.connection_pool.close()
         await self.consumer.async_shutdown()
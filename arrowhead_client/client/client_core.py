@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from functools import partial
-from typing import Any, Dict, Tuple, Callable, Type, List, Optional
+from typing import Any, Dict, Tuple, Callable, Type, List, Union, Optional, Sequence, Set, Mapping
 from abc import ABC, abstractmethod
 
+from arrowhead_client import errors
+import arrowhead_client.client.core_service_forms.client as forms
+from arrowhead_client.codec import JsonCodec, get_json_codec
 from arrowhead_client.system import ArrowheadSystem
 from arrowhead_client.provider.base import BaseProvider
 from arrowhead_client.consumer.base import BaseConsumer
@@ -11,14 +15,22 @@ from arrowhead_client.service import Service, ServiceInterface
 from arrowhead_client.client.core_services import get_core_rules
 from arrowhead_client.logs import get_logger
 from arrowhead_client.client.core_system_defaults import config as ar_config
-from arrowhead_client.security.access_policy import get_access_policy
+from arrowhead_client.client.orchestration_cache import OrchestrationCache, OrchestrationEntry, DEFAULT_ORCHESTRATION_TTL
+from arrowhead_client.security.access_policy import DEFAULT_TOKEN_CACHE_SIZE, get_access_policy
+from arrowhead_client.load_balancing import LoadBalancingStrategy, get_load_balancing_strategy
+from arrowhead_client.metrics import Metrics, get_metrics
+from arrowhead_client.tracing import Tracer, get_tracer
+from arrowhead_client.resilience import Resilience, ResiliencePolicy, get_resilience
 from arrowhead_client.rules import (
+    OrchestrationRule,
     OrchestrationRuleContainer,
     RegistrationRuleContainer,
     RegistrationRule,
 )
 from arrowhead_client import constants
 
+DEFAULT_REGISTRATION_CONCURRENCY = 10
+
 
 def provided_service(
         service_definition: str,
@@ -84,6 +96,9 @@ def provided_service(
             if '__arrowhead_services__' not in dir(owner):
                 raise AttributeError('provided_service can decorate ArrowheadClient methods.')
 
+            if '__arrowhead_services__' not in vars(owner):
+                # Copy the list so that services are not shared with the other subclasses
+                owner.__arrowhead_services__ = list(owner.__arrowhead_services__)
             owner.__arrowhead_services__.append(name)
 
         def __get__(self, instance: ArrowheadClient, owner: Type[ArrowheadClient]):
@@ -121,14 +136,35 @@ class ArrowheadClient(ABC):
         keyfile: PEM keyfile.
         certfile: PEM certfile.
         config: Config dictionary, format not yet decided.
+        load_balancing: Load balancing strategy, or its name, used to pick a provider when orchestration
+                        returns more than one. See :py:func:`~arrowhead_client.load_balancing.get_load_balancing_strategy`.
+        orchestration_ttl: Time in seconds that orchestration results are used before they are refreshed in the
+                           background. ``None`` or ``0`` sends every orchestration lookup to the Orchestrator.
+        registration_concurrency: Maximum number of services registered or unregistered at the same time during
+                                  startup and shutdown.
+        tracer: Tracer used for the spans of client operations, like orchestration, see
+                :py:func:`~arrowhead_client.tracing.get_tracer`. Disabled by default.
+        resilience: Timeouts, retries, and circuit breakers of consumed services, either one
+                    :py:class:`~arrowhead_client.resilience.ResiliencePolicy` for all services or a mapping of service
+                    definitions to policies, see :py:mod:`arrowhead_client.resilience`. Disabled by default.
+        event_publisher_options: Keyword arguments given to the event publisher, for example :code:`batch_size`,
+                                 see :py:mod:`arrowhead_client.client.event_publisher`.
+        event_receiver_options: Keyword arguments given to the event receiver of asynchronous clients, for example
+                                :code:`workers`, see :py:mod:`arrowhead_client.client.event_subscriber`.
+        token_cache_size: Maximum number of verified tokens cached by the token access policies of provided services,
+                          ``0`` disables the cache.
+        connection_pool_options: Keyword arguments given to the connection pool of asynchronous clients, for example
+                                 :code:`heartbeat`, see :py:mod:`arrowhead_client.client.connection_pool`.
 
     In addition to the arguments mentioned above, ``__init__`` also generates the following attributes:
 
     Attributes:
         secure: ``True`` if keyfile and certfile are both given, which means the client will run in secure mode.
         auth_authentication_info: Authorization system certificate string. It is attained when a connection to a secure local cloud is established.
-        orchestration_rules: Mapping containing the rules with the information necessary to perform service consumption.
+        orchestration_rules: Mapping containing the rules with the information necessary to perform service consumption, with one rule per provider.
         registration_rules: Mapping containing the rules with the information necessary to perform service registration.
+        orchestration_cache: Keeps track of when orchestration results need to be refreshed.
+        resilience: Resilience policies and the circuit breakers of the consumed providers.
     """
 
     def __init__(
@@ -140,8 +176,19 @@ class ArrowheadClient(ABC):
             config: Dict = None,
             keyfile: str = '',
             certfile: str = '',
+            load_balancing: Union[str, LoadBalancingStrategy] = constants.LoadBalancing.ROUND_ROBIN,
+            orchestration_ttl: Optional[float] = DEFAULT_ORCHESTRATION_TTL,
+            registration_concurrency: int = DEFAULT_REGISTRATION_CONCURRENCY,
+            tracer: Union[None, bool, Tracer] = None,
+            resilience: Union[None, ResiliencePolicy, Mapping[str, ResiliencePolicy], Resilience] = None,
+            event_publisher_options: Dict = None,
+            event_receiver_options: Dict = None,
+            token_cache_size: int = DEFAULT_TOKEN_CACHE_SIZE,
+            connection_pool_options: Dict = None,
             **kwargs,
     ):
+        if registration_concurrency < 1:
+            raise ValueError('registration_concurrency must be a positive integer')
         self.system = system
         self.consumer = consumer
         self.provider = provider
@@ -151,8 +198,18 @@ class ArrowheadClient(ABC):
         self._logger = logger
         self.config = config or ar_config
         self.auth_authentication_info = None
-        self.orchestration_rules = OrchestrationRuleContainer()
+        self.orchestration_rules = OrchestrationRuleContainer(get_load_balancing_strategy(load_balancing))
         self.registration_rules = RegistrationRuleContainer()
+        self.orchestration_cache = OrchestrationCache(orchestration_ttl)
+        self.registration_concurrency = registration_concurrency
+        self.tracer = get_tracer(tracer)
+        self.resilience = get_resilience(resilience)
+        self.event_publisher_options = event_publisher_options or {}
+        self.event_receiver_options = event_receiver_options or {}
+        self.token_cache_size = token_cache_size
+        self.connection_pool_options = connection_pool_options or {}
+        # Orchestration requests by service definition, sent again when all providers of a service fail
+        self._orchestration_entries: Dict[str, OrchestrationEntry] = {}
         # TODO: Should add_provided_service be exactly the same as the provider's,
         # or should this class do something on top of it?
         # It's currently not even being used so it could likely be removed.
@@ -249,6 +306,10 @@ class ArrowheadClient(ABC):
         """
         Looks up orchestration rules in the Orchestration system.
 
+        Orchestration results are cached for ``orchestration_ttl`` seconds.
+        Looking up a cached service definition again returns immediately, and if the result is older than the time to
+        live it is refreshed in the background while the current rules are still used.
+
         If one of :code:`method`, :code:`access_policy`, and :code:`payload` is given, the other two must be given as well.
 
         Args:
@@ -316,6 +377,12 @@ class ArrowheadClient(ABC):
             certfile: str = '',
             cafile: str = '',
             log_mode: str = 'debug',
+            consumer_options: Dict = None,
+            json_codec: Union[None, str, JsonCodec] = None,
+            provider_options: Dict = None,
+            metrics: Union[None, bool, Metrics] = None,
+            tracer: Union[None, bool, Tracer] = None,
+            logger_options: Dict = None,
             **kwargs,
     ) -> ArrowheadClient:
         """
@@ -335,12 +402,24 @@ class ArrowheadClient(ABC):
             keyfile: Path to a PEM keyfile. If you use pkcs#12 keystores, you need to convert them to PEM format first.
             certfile: Path to a PEM certfile. If you use pkcs#12 keystores, you need to convert them to PEM format first.
             cafile: Path to a PEM certificate authority file. If you use pkcs#12 keystores, you need to convert them to PEM format first.
+            consumer_options: Keyword arguments given to the consumer, for example the connection pool settings of
+                              :py:class:`~arrowhead_client.consumer.implementations.aiohttp_consumer.AiohttpConsumer`.
+            json_codec: JSON codec, or name of the JSON library, used by both the consumer and the provider.
+                        Defaults to :code:`orjson` if it is installed, see :py:func:`~arrowhead_client.codec.get_json_codec`.
+            provider_options: Keyword arguments given to the provider, for example :code:`workers` to serve
+                              requests from several processes.
+            metrics: ``True``, or a :py:class:`~arrowhead_client.metrics.Metrics` instance, to collect request
+                     metrics in both the consumer and the provider, see :py:mod:`arrowhead_client.metrics`.
+            tracer: ``True``, or a :py:class:`~arrowhead_client.tracing.Tracer` instance, to trace orchestration,
+                    consumption and provision, see :py:mod:`arrowhead_client.tracing`.
+            logger_options: Keyword arguments given to :py:func:`~arrowhead_client.logs.get_logger`, for example
+                            :code:`queued=True` to write the log file from a background thread.
         Returns:
             A new ArrowheadClient instance.
 
         Example::
 
-            from arrowhead_client.implementations import AsyncClient
+            from arrowhead_client.client import AsyncClient
 
             example_client = AsyncClient.create(
                     system_name='example_client',
@@ -352,7 +431,10 @@ class ArrowheadClient(ABC):
                     cafile='certificates/example_cloud.ca',
             )
         """
-        logger = get_logger(system_name, log_mode)
+        logger = get_logger(system_name, log_mode, **(logger_options or {}))
+        json_codec = get_json_codec(json_codec)
+        metrics = get_metrics(metrics)
+        tracer = get_tracer(tracer)
         system = ArrowheadSystem.with_certfile(
                 system_name,
                 address,
@@ -361,12 +443,25 @@ class ArrowheadClient(ABC):
         )
         new_instance = cls(
                 system,
-                cls.__arrowhead_consumer__(keyfile, certfile, cafile),
-                cls.__arrowhead_provider__(cafile),
+                cls.__arrowhead_consumer__(
+                        keyfile, certfile, cafile,
+                        json_codec=json_codec,
+                        metrics=metrics,
+                        tracer=tracer,
+                        **(consumer_options or {}),
+                ),
+                cls.__arrowhead_provider__(
+                        cafile,
+                        json_codec=json_codec,
+                        metrics=metrics,
+                        tracer=tracer,
+                        **(provider_options or {}),
+                ),
                 logger,
                 config=config,
                 keyfile=keyfile,
                 certfile=certfile,
+                tracer=tracer,
                 **kwargs
         )
 
@@ -386,6 +481,12 @@ class ArrowheadClient(ABC):
     def _register_all_services(self):
         """
         Registers all provided services of the system with the system registry.
+
+        Up to ``registration_concurrency`` services are registered at the same time.
+
+        Returns:
+            Dictionary mapping the service definition of each registered rule to the error raised while
+            registering it, or ``None`` if the registration succeeded.
         """
         pass
 
@@ -403,16 +504,114 @@ class ArrowheadClient(ABC):
     def _unregister_all_services(self):
         """
         Unregisters all provided services of the system with the system registry.
+
+        Up to ``registration_concurrency`` services are unregistered at the same time.
+
+        Returns:
+            Dictionary mapping the service definition of each unregistered rule to the error raised while
+            unregistering it, or ``None`` if the unregistration succeeded.
         """
         pass
 
+    def _process_registration_results(
+            self,
+            rules: Sequence[RegistrationRule],
+            results: Sequence[Optional[BaseException]],
+            register: bool,
+    ) -> Dict[str, Optional[BaseException]]:
+        """
+        Updates ``rule.is_provided`` of each rule according to the outcome of its (un)registration and logs errors.
+
+        Args:
+            rules: Registration rules that were registered or unregistered.
+            results: Error raised for each rule, ``None`` if no error was raised.
+            register: ``True`` if the rules were registered, ``False`` if they were unregistered.
+        Returns:
+            Dictionary mapping service definitions to errors.
+        """
+        outcome: Dict[str, Optional[BaseException]] = {}
+        for rule, error in zip(rules, results):
+            if register and isinstance(error, errors.CoreServiceInputError) and str(error).endswith('already exists.'):
+                error = None
+
+            if error is None:
+                rule.is_provided = register
+            else:
+                action = 'register' if register else 'unregister'
+                self._logger.error(
+                        f'Failed to {action} service \'{rule.service_definition}\': {error}',
+                        exc_info=error,
+                )
+            outcome[rule.service_definition] = error
+
+        return outcome
+
+    def _select_provider(
+            self,
+            service_definition: str,
+            failed: Set[str],
+            preferred: Optional[OrchestrationRule] = None,
+    ) -> Optional[OrchestrationRule]:
+        """
+        Selects a provider of ``service_definition`` whose circuit breaker lets a request through.
+
+        The ``preferred`` provider is selected if it has not failed the current request, i.e. its endpoint is not in
+        ``failed``, and its circuit breaker lets the request through. Otherwise, providers that have not failed the
+        current request are preferred.
+
+        Returns:
+            Orchestration rule of the selected provider, or ``None`` if no provider is available.
+        """
+        if preferred is not None and preferred.endpoint not in failed:
+            breaker = self.resilience.breaker(preferred)
+            if breaker is None or breaker.allow_request():
+                return preferred
+
+        providers = self.resilience.available(self.orchestration_rules.providers(service_definition))
+        while providers:
+            candidates = [rule for rule in providers if rule.endpoint not in failed] or providers
+            rule = self.orchestration_rules.strategy.select(candidates)
+            breaker = self.resilience.breaker(rule)
+            if breaker is None or breaker.allow_request():
+                return rule
+            # Another request took the trial request of a half-open breaker
+            providers.remove(rule)
+
+        return None
+
+    def _event_form(
+            self,
+            event_type: str,
+            payload: str,
+            metadata: Optional[Dict[str, str]],
+            time_stamp: Optional[str],
+    ) -> Dict[str, Any]:
+        """ Creates the Event Handler publish form of an event sent by this system. """
+        return forms.EventPublishForm.make(
+                event_type,
+                payload,
+                self.system,
+                time_stamp or datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+                metadata,
+                trusted=True,
+        ).dto()
+
+    def _no_provider_error(self, service_definition: str) -> errors.NoAvailableServicesError:
+        if self.orchestration_rules.providers(service_definition):
+            return errors.CircuitOpenError(
+                    f'The circuit breakers of all providers of service \'{service_definition}\' are open'
+            )
+
+        return errors.NoAvailableServicesError(f'No services available for service \'{service_definition}\'')
+
     def _initialize_provided_services(self) -> None:
         for rule in self.registration_rules:
             rule.access_policy = get_access_policy(
                     policy_name=rule.provided_service.access_policy,
                     provided_service=rule.provided_service,
                     privatekey=self.keyfile,
-                    authorization_key=self.auth_authentication_info
+                    authorization_key=self.auth_authentication_info,
+                    token_cache_size=self.token_cache_size,
             )
             self.provider.add_provided_service(rule)
 
@@ -1,5 +1,7 @@
-from typing import Optional
-import warnings
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
 
 import arrowhead_client.client.core_service_forms.client as forms
 from arrowhead_client import errors as errors
@@ -7,8 +9,14 @@ from arrowhead_client.constants import OrchestrationFlags
 from arrowhead_client.client import core_service_responses as responses
 from arrowhead_client.client.client_core import ArrowheadClient
 from arrowhead_client.client.core_services import CoreServices
+from arrowhead_client.client.event_publisher import EventPublisher
+from arrowhead_client.client.orchestration_cache import OrchestrationEntry
+from arrowhead_client.resilience import ResiliencePolicy
+from arrowhead_client.rules import OrchestrationRule, RegistrationRule
+from arrowhead_client.response import Response
 from arrowhead_client.service import Service, ServiceInterface
 
+
 class ArrowheadClientSync(ArrowheadClient):
     """
     Base class for asynchronous Arrowhead Clients.
@@ -16,6 +24,14 @@ class ArrowheadClientSync(ArrowheadClient):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._orchestration_locks: Dict[str, threading.Lock] = {}
+        self._orchestration_locks_guard = threading.Lock()
+        self._orchestration_refresher: Optional[threading.Thread] = None
+        self._refresher_wakeup = threading.Event()
+        self._refresher_stop = threading.Event()
+        self._event_publisher: Optional[EventPublisher] = None
+        self._event_publisher_lock = threading.Lock()
+        self.provider.add_worker_startup_routine(self._worker_setup)
 
     def consume_service(
             self,
@@ -25,12 +41,18 @@ class ArrowheadClientSync(ArrowheadClient):
         """
         Consumes the given provided_service definition
 
+        If a resilience policy is set for the service, the request is sent according to it,
+        see :py:mod:`arrowhead_client.resilience`.
+
         Args:
             service_definition: The provided_service definition of a consumable provided_service
             **kwargs: Collection of keyword arguments passed to the consumer.
         """
+        policy = self.resilience.policy(service_definition)
+        if policy.enabled:
+            return self._consume_resilient(service_definition, policy, **kwargs)
 
-        rule = self.orchestration_rules.get(service_definition)
+        rule = self.orchestration_rules.select(service_definition)
         if rule is None:
             # TODO: Not sure if this should raise an error or just log?
             raise errors.NoAvailableServicesError(
@@ -38,7 +60,141 @@ class ArrowheadClientSync(ArrowheadClient):
                     f' service \'{service_definition}\''
             )
 
-        return self.consumer.consume_service(rule, **kwargs, )
+        return self._consume_rule(rule, **kwargs)
+
+    def _consume_rule(self, rule: OrchestrationRule, **kwargs) -> Response:
+        with self.tracer.start_span('consume_service', attributes={
+            'arrowhead.service_definition': rule.service_definition,
+            'arrowhead.provider': rule.system_name,
+        }), self.orchestration_rules.strategy.track(rule):
+            return self.consumer.consume_service(rule, **kwargs, )
+
+    def _consume_resilient(self, service_definition: str, policy: ResiliencePolicy, **kwargs) -> Response:
+        """
+        Consumes ``service_definition`` with the timeouts, retries, and circuit breakers of ``policy``.
+
+        Retries go to another provider when there is one, and if the circuit breakers of all providers are open,
+        the service is orchestrated again once.
+        """
+        if policy.timeout is not None:
+            kwargs.setdefault('timeout', policy.timeout)
+
+        failed: Set[str] = set()
+        attempt = 0
+        reorchestrated = False
+        last_error: Optional[Exception] = None
+        while True:
+            rule = self._select_provider(service_definition, failed)
+            if rule is None:
+                if not reorchestrated and self._reorchestrate(service_definition):
+                    reorchestrated = True
+                    continue
+                raise self._no_provider_error(service_definition) from last_error
+
+            attempt += 1
+            try:
+                response = self._consume_rule(rule, **kwargs)
+            except Exception as e:
+                self.resilience.record(rule, None)
+                if policy.retry is None or not policy.retry.should_retry(rule.method, attempt):
+                    raise
+                last_error = e
+            except BaseException:
+                # Cancelled or interrupted, the request neither succeeded nor failed
+                self.resilience.release(rule)
+                raise
+            else:
+                self.resilience.record(rule, response.status_code)
+                if policy.retry is None or not policy.retry.should_retry(rule.method, attempt, response.status_code):
+                    return response
+
+            failed.add(rule.endpoint)
+            self._logger.warning(f'Attempt {attempt} to consume \'{service_definition}\' failed, retrying')
+            time.sleep(policy.retry.delay(attempt))
+
+    def _reorchestrate(self, service_definition: str) -> bool:
+        """
+        Orchestrates ``service_definition`` again, bypassing the orchestration cache.
+
+        Returns:
+            ``True`` if the orchestration succeeded, ``False`` if it failed or the service was never orchestrated.
+        """
+        entry = self._orchestration_entries.get(service_definition)
+        if entry is None:
+            return False
+
+        self._logger.warning(f'No provider of \'{service_definition}\' is available, orchestrating again')
+        try:
+            self._orchestrate(entry, force=True)
+        except Exception as e:
+            self._logger.warning(f'Orchestration of \'{service_definition}\' failed: {e}')
+            return False
+
+        return True
+
+    @property
+    def event_publisher(self) -> EventPublisher:
+        """ Publisher of the events sent with :py:meth:`publish_event`, created on first use. """
+        with self._event_publisher_lock:
+            if self._event_publisher is None:
+                self._event_publisher = EventPublisher(
+                        self._send_event,
+                        logger=self._logger,
+                        name=f'{self.system.system_name}-event-publisher',
+                        **self.event_publisher_options,
+                )
+
+        return self._event_publisher
+
+    def publish_event(
+            self,
+            event_type: str,
+            payload: str,
+            metadata: Optional[Dict[str, str]] = None,
+            time_stamp: Optional[str] = None,
+            timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Publishes an event through the Event Handler.
+
+        The event is buffered and sent by a background thread, see
+        :py:mod:`~arrowhead_client.client.event_publisher`. Blocks while the buffer is full.
+
+        Args:
+            event_type: Event type.
+            payload: Event payload.
+            metadata: Optional. Event metadata, used by subscribers to filter events.
+            time_stamp: Optional. Time of the event as :code:`'YYYY-MM-DD hh:mm:ss'` in UTC, defaults to now.
+            timeout: Maximum time in seconds to wait for room in the buffer, ``None`` waits forever.
+        Raises:
+            queue.Full: If the buffer is still full after ``timeout`` seconds.
+
+        Example::
+
+            client.publish_event('temperature', '21.5', metadata={'unit': 'celsius'})
+            ...
+            client.flush_events()
+        """
+        self.event_publisher.publish(self._event_form(event_type, payload, metadata, time_stamp), timeout)
+
+    def flush_events(self) -> None:
+        """ Waits until all published events have been sent. """
+        if self._event_publisher is not None:
+            self._event_publisher.flush()
+
+    def close_event_publisher(self) -> None:
+        """ Sends the buffered events and stops the event publisher threads. """
+        if self._event_publisher is not None:
+            self._event_publisher.close()
+
+    def _send_event(self, event: Dict) -> None:
+        event_publish_response = self.consume_service(
+                CoreServices.EVENT_PUBLISH.service_definition,
+                json=event,
+                cert=self.cert,
+        )
+
+        responses.process_event_publish(event_publish_response)
 
     def add_orchestration_rule(
             self,
@@ -74,20 +230,112 @@ class ArrowheadClientSync(ArrowheadClient):
                 self.system,
                 requested_service,
                 orchestration_flags,
+                trusted=True,
                 **kwargs
         )
 
-        # TODO: Add an argument for arrowhead forms in consume_service, and one for the ssl-files
-        orchestration_response = self.consume_service(
-                CoreServices.ORCHESTRATION.service_definition,
-                json=orchestration_form.dto(),
-                cert=self.cert,
-        )
+        entry = OrchestrationEntry(service_definition, method, orchestration_form.dto())
+        with self.tracer.start_span(
+                'add_orchestration_rule',
+                attributes={'arrowhead.service_definition': service_definition},
+        ) as span:
+            cached_entry = self.orchestration_cache.lookup(entry)
+            if cached_entry is None:
+                span.set_attribute('arrowhead.orchestration_cache', 'miss')
+                self._orchestrate(entry)
+                self._start_orchestration_refresher()
+            elif self.orchestration_cache.is_stale(cached_entry):
+                span.set_attribute('arrowhead.orchestration_cache', 'stale')
+                self._start_orchestration_refresher()
+                self._refresher_wakeup.set()
+            else:
+                span.set_attribute('arrowhead.orchestration_cache', 'hit')
+
+    def _orchestrate(self, entry: OrchestrationEntry, force: bool = False) -> None:
+        """
+        Fetches orchestration rules for ``entry``.
+        Concurrent lookups of the same service definition send a single request to the Orchestrator,
+        unless ``force`` is ``True``.
+        """
+        with self._orchestration_lock(entry.service_definition):
+            # Another thread might have fetched the same rules while this one was waiting for the lock
+            cached_entry = self.orchestration_cache.lookup(entry)
+            if not force and cached_entry is not None and not self.orchestration_cache.is_stale(cached_entry):
+                return
+
+            # TODO: Add an argument for arrowhead forms in consume_service, and one for the ssl-files
+            orchestration_response = self.consume_service(
+                    CoreServices.ORCHESTRATION.service_definition,
+                    json=entry.orchestration_form,
+                    cert=self.cert,
+            )
+
+            rules = list(responses.iter_orchestration(orchestration_response, entry.method))
+            if not rules:
+                self._logger.warning(f'Orchestration of \'{entry.service_definition}\' returned no providers')
+
+            self.orchestration_rules.replace(entry.service_definition, rules)
+            self.orchestration_cache.mark_fetched(entry)
+            self._orchestration_entries[entry.service_definition] = entry
+
+    def _worker_setup(self) -> None:
+        """
+        Resets the state that a worker process must not share with the process it was forked from.
+
+        Locks might have been held by threads that do not exist in the worker, and pooled connections
+        would be shared by both processes.
+        """
+        self._orchestration_locks = {}
+        self._orchestration_locks_guard = threading.Lock()
+        self._orchestration_refresher = None
+        self._refresher_wakeup = threading.Event()
+        self._refresher_stop = threading.Event()
+        # The publisher threads do not exist in the worker
+        self._event_publisher = None
+        self._event_publisher_lock = threading.Lock()
+        self.consumer.close()
+        if len(self.orchestration_cache):
+            self._start_orchestration_refresher()
+
+    def _orchestration_lock(self, service_definition: str) -> threading.Lock:
+        with self._orchestration_locks_guard:
+            return self._orchestration_locks.setdefault(service_definition, threading.Lock())
+
+    def _refresh_stale_orchestrations(self) -> None:
+        while not self._refresher_stop.is_set():
+            self._refresher_wakeup.wait(self.orchestration_cache.refresh_interval)
+            self._refresher_wakeup.clear()
+            if self._refresher_stop.is_set():
+                break
 
-        rules = responses.process_orchestration(orchestration_response, method)
+            for entry in self.orchestration_cache.stale_entries():
+                try:
+                    self._orchestrate(entry)
+                except Exception as e:
+                    self._logger.warning(f'Orchestration of \'{entry.service_definition}\' failed: {e}')
 
-        for rule in rules:
-            self.orchestration_rules.store(rule)
+    def _start_orchestration_refresher(self) -> None:
+        if not self.orchestration_cache.enabled or \
+                (self._orchestration_refresher is not None and self._orchestration_refresher.is_alive()):
+            return
+
+        self._refresher_stop.clear()
+        self._orchestration_refresher = threading.Thread(
+                target=self._refresh_stale_orchestrations,
+                name=f'{self.system.system_name}-orchestration-refresher',
+                daemon=True,
+        )
+        self._orchestration_refresher.start()
+
+    def stop_orchestration_refresher(self) -> None:
+        """
+        Stops the background thread that refreshes orchestration results.
+        """
+        self._refresher_stop.set()
+        self._refresher_wakeup.set()
+        if self._orchestration_refresher is not None:
+            self._orchestration_refresher.join()
+            self._orchestration_refresher = None
 
     def run_forever(self) -> None:
         """
@@ -116,6 +364,8 @@ class ArrowheadClientSync(ArrowheadClient):
             self._logger.info('Shutting down server')
         finally:
             print('Shutting down Arrowhead system')
+            self.close_event_publisher()
+            self.stop_orchestration_refresher()
             self._unregister_all_services()
             self._logger.info('Server shut down')
 
@@ -130,6 +380,7 @@ class ArrowheadClientSync(ArrowheadClient):
         service_registration_form = forms.ServiceRegistrationForm.make(
                 provided_service=service,
                 provider_system=self.system,
+                trusted=True,
         )
 
         service_registration_response = self.consume_service(
@@ -142,18 +393,14 @@ class ArrowheadClientSync(ArrowheadClient):
                 service_registration_response,
         )
 
-    def _register_all_services(self) -> None:
+    def _register_all_services(self) -> Dict[str, Optional[BaseException]]:
         """
         Registers all provided services of the system with the system registry.
         """
-        for rule in self.registration_rules:
-            try:
-                self._register_service(rule.provided_service)
-            except errors.CoreServiceInputError as e:
-                # TODO: Do logging
-                print(e)
-            else:
-                rule.is_provided = True
+        rules = [rule for rule in self.registration_rules if not rule.is_provided]
+        results = self._map_limited(self._register_service, rules)
+
+        return self._process_registration_results(rules, results, register=True)
 
     def _unregister_service(self, service: Service) -> None:
         """
@@ -181,17 +428,33 @@ class ArrowheadClientSync(ArrowheadClient):
 
         responses.process_service_unregister(service_unregistration_response)
 
-    def _unregister_all_services(self) -> None:
+    def _unregister_all_services(self) -> Dict[str, Optional[BaseException]]:
         """
         Unregisters all provided services of the system with the system registry.
         """
+        rules = [rule for rule in self.registration_rules if rule.is_provided]
+        results = self._map_limited(self._unregister_service, rules)
 
-        for rule in self.registration_rules:
-            if not rule.is_provided:
-                continue
-            try:
-                self._unregister_service(rule.provided_service)
-            except errors.CoreServiceInputError as e:
-                print(e)
-            else:
-                rule.is_provided = False
+        return self._process_registration_results(rules, results, register=False)
+
+    def _map_limited(
+            self,
+            func: Callable[[Service], None],
+            rules: List[RegistrationRule],
+    ) -> List[Optional[BaseException]]:
+        """
+        Calls ``func`` with the provided service of every rule, using a pool of ``registration_concurrency`` threads.
+
+        Returns:
+            List with the error raised for each rule, or ``None`` if no error was raised.
+        """
+        if not rules:
+            return []
+
+        with ThreadPoolExecutor(
+                max_workers=min(self.registration_concurrency, len(rules)),
+                thread_name_prefix=f'{self.system.system_name}-registration',
+        ) as executor:
+            futures = [executor.submit(func, rule.provided_service) for rule in rules]
+
+        return [future.exception() for future in futures]
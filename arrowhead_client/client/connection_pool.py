@@ -0,0 +1,389 @@
+"""
+Connection pool module
+
+Persistent connections, like WebSockets, opened by :py:meth:`ArrowheadClientAsync.connect`.
+
+The connections returned by ``connect`` are :py:class:`ManagedConnection` objects, which wrap the connection of the
+consumer and keep it alive:
+
+* Closing a managed connection closes the connection underneath, unless reuse is enabled with ``max_idle``.
+  Then the open connection is returned to the pool instead, and the next ``connect`` to the same service with the
+  same arguments reuses it, which saves the TLS handshake. Idle connections are closed after ``idle_timeout``
+  seconds, when there are more than ``max_idle`` of them, or when their provider is no longer orchestrated.
+  The provider does not see the end of a session on a reused connection, and messages that it sends to an idle
+  connection are received by the next user of the connection, so only enable reuse for services whose
+  connections carry no session state.
+* The connection pings the provider every ``heartbeat`` seconds, and is considered lost if a pong does not arrive
+  in time.
+* When the connection is lost, or the provider closes it with any other code than 1000 (normal closure), the
+  service is orchestrated again and a new connection is opened, with the backoff of the ``reconnect`` retry policy
+  between attempts. Sending and receiving wait while reconnecting, for single messages as well as for batches of
+  records. Messages queued with :py:meth:`~arrowhead_client.response.ConnectionResponse.enqueue` and records given
+  to :py:meth:`~arrowhead_client.response.BatchConnectionResponse.send_record` are kept meanwhile, up to the high
+  watermark of the send queue, after which they wait.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from arrowhead_client import errors
+from arrowhead_client.resilience import RetryPolicy
+from arrowhead_client.response import (
+    DEFAULT_BATCH_WINDOW,
+    DEFAULT_HIGH_WATERMARK,
+    DEFAULT_MAX_BATCH_SIZE,
+    BatchConnectionResponse,
+    ConnectionResponse,
+)
+from arrowhead_client.rules import OrchestrationRule
+
+DEFAULT_HEARTBEAT = 30.0
+DEFAULT_MAX_IDLE = 0
+DEFAULT_IDLE_TIMEOUT = 60.0
+DEFAULT_RECONNECT_POLICY = RetryPolicy(max_attempts=10, backoff=0.5, max_backoff=30.0)
+# WebSocket close code of a connection that was closed on purpose
+NORMAL_CLOSURE = 1000
+
+OpenConnection = Callable[[str, Dict[str, Any]], Awaitable[Tuple[OrchestrationRule, ConnectionResponse]]]
+
+
+class PoolStats(NamedTuple):
+    """
+    Connection pool statistics.
+
+    Attributes:
+        opened: Number of connections opened, including reconnections.
+        reused: Number of ``connect`` calls served by an idle connection.
+        reconnects: Number of connections opened to replace a lost connection.
+        idle: Number of idle connections in the pool.
+    """
+    opened: int
+    reused: int
+    reconnects: int
+    idle: int
+
+
+class _IdleConnection(NamedTuple):
+    kwargs: Dict[str, Any]
+    rule: OrchestrationRule
+    connection: ConnectionResponse
+    released_at: float
+
+
+class ConnectionPool:
+    """
+    Opens, reuses, and reconnects the persistent connections of a client.
+
+    Args:
+        open_connection: Coroutine function that opens a connection to a provider of a service definition,
+                         given the service definition and the keyword arguments of the consumer,
+                         and returns the orchestration rule used together with the connection.
+        reorchestrate: Coroutine function that orchestrates a service definition again.
+        heartbeat: Time in seconds between pings, ``None`` disables them.
+        reconnect: Retry policy with the number of attempts to reconnect and the backoff between them.
+        max_idle: Maximum number of idle connections kept per service definition, ``0`` disables reuse.
+        idle_timeout: Time in seconds that idle connections are kept.
+        high_watermark: Number of messages in the send queue of a managed connection at which queueing waits.
+        low_watermark: Number of queued messages at which waiting producers resume.
+        timer: Clock used for the idle timeout, defaults to :py:func:`time.monotonic`.
+        logger: Optional. Logger used to report failed reconnection attempts.
+        is_orchestrated: Optional. Function that returns ``False`` if the provider of an orchestration rule is no
+                         longer orchestrated for a service definition, given the service definition and the rule.
+                         Idle connections to that provider are then closed instead of reused.
+    """
+
+    def __init__(
+            self,
+            open_connection: OpenConnection,
+            reorchestrate: Callable[[str], Awaitable[bool]],
+            heartbeat: Optional[float] = DEFAULT_HEARTBEAT,
+            reconnect: RetryPolicy = DEFAULT_RECONNECT_POLICY,
+            max_idle: int = DEFAULT_MAX_IDLE,
+            idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+            high_watermark: int = DEFAULT_HIGH_WATERMARK,
+            low_watermark: Optional[int] = None,
+            timer: Callable[[], float] = time.monotonic,
+            logger: Any = None,
+            is_orchestrated: Optional[Callable[[str, OrchestrationRule], bool]] = None,
+    ):
+        if max_idle < 0:
+            raise ValueError('max_idle must not be negative')
+        self._open_connection = open_connection
+        self._reorchestrate = reorchestrate
+        self.heartbeat = heartbeat
+        self.reconnect = reconnect
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.timer = timer
+        self.logger = logger
+        self.is_orchestrated = is_orchestrated
+        self._idle: Dict[str, Deque[_IdleConnection]] = {}
+        self._opened = 0
+        self._reused = 0
+        self._reconnects = 0
+
+    @property
+    def stats(self) -> PoolStats:
+        return PoolStats(
+                self._opened,
+                self._reused,
+                self._reconnects,
+                sum(len(idle) for idle in self._idle.values()),
+        )
+
+    async def connect(self, service_definition: str, **kwargs) -> 'ManagedConnection':
+        """
+        Returns a managed connection to a provider of ``service_definition``, reusing an idle connection
+        to an orchestrated provider opened with the same keyword arguments if there is one.
+
+        Raises:
+            NoAvailableServicesError: If no provider of the service has been orchestrated.
+        """
+        connection = ManagedConnection(self, service_definition, kwargs)
+        idle = await self._acquire_idle(service_definition, kwargs)
+        if idle is not None:
+            self._reused += 1
+            connection._attach(idle.rule, idle.connection)
+        else:
+            await connection._open(reconnecting=False)
+
+        return connection
+
+    async def close(self) -> None:
+        """ Closes all idle connections. """
+        idle = [entry.connection for entries in self._idle.values() for entry in entries]
+        self._idle.clear()
+        await self._close_all(idle)
+
+    async def _open(self, service_definition: str, kwargs: Dict[str, Any], reconnecting: bool) \
+            -> Tuple[OrchestrationRule, ConnectionResponse]:
+        if reconnecting:
+            await self._reorchestrate(service_definition)
+        if self.heartbeat is not None:
+            kwargs = {'heartbeat': self.heartbeat, **kwargs}
+
+        rule, connection = await self._open_connection(service_definition, kwargs)
+        self._opened += 1
+        if reconnecting:
+            self._reconnects += 1
+
+        return rule, connection
+
+    async def _acquire_idle(self, service_definition: str, kwargs: Dict[str, Any]) -> Optional[_IdleConnection]:
+        idle = self._idle.get(service_definition)
+        if not idle:
+            return None
+
+        await self._close_all(self._expire(service_definition, idle))
+        for entry in idle:
+            if entry.kwargs == kwargs:
+                idle.remove(entry)
+                return entry
+
+        return None
+
+    async def _release(
+            self,
+            service_definition: str,
+            kwargs: Dict[str, Any],
+            rule: OrchestrationRule,
+            connection: ConnectionResponse,
+    ) -> None:
+        if connection.closed():
+            return
+
+        idle = self._idle.setdefault(service_definition, deque())
+        idle.append(_IdleConnection(kwargs, rule, connection, self.timer()))
+        closing = self._expire(service_definition, idle)
+        while len(idle) > self.max_idle:
+            closing.append(idle.popleft().connection)
+        await self._close_all(closing)
+
+    def _expire(self, service_definition: str, idle: Deque[_IdleConnection]) -> List[ConnectionResponse]:
+        """
+        Removes the closed and expired connections, and the connections to providers that are no longer
+        orchestrated, from ``idle``, and returns the ones that must be closed.
+        """
+        now = self.timer()
+        expired = []
+        for entry in list(idle):
+            if entry.connection.closed():
+                idle.remove(entry)
+            elif now - entry.released_at >= self.idle_timeout or not self._orchestrated(service_definition, entry.rule):
+                idle.remove(entry)
+                expired.append(entry.connection)
+
+        return expired
+
+    def _orchestrated(self, service_definition: str, rule: OrchestrationRule) -> bool:
+        return self.is_orchestrated is None or self.is_orchestrated(service_definition, rule)
+
+    @staticmethod
+    async def _close_all(connections: List[ConnectionResponse]) -> None:
+        await asyncio.gather(*[connection.close() for connection in connections], return_exceptions=True)
+
+
+class ManagedConnection(BatchConnectionResponse):
+    """
+    Connection to a provider that reconnects when it is lost.
+
+    Created by :py:meth:`ConnectionPool.connect`, see :py:mod:`~arrowhead_client.client.connection_pool`.
+    Closing it closes the connection underneath, or returns it to the pool if reuse is enabled.
+    Batches are sent and received with the batch methods of the connection underneath, and records are collected
+    into batches by the managed connection, with the ``batch_window`` and ``max_batch_size`` given to ``connect``,
+    so that they are kept while reconnecting.
+
+    Attributes:
+        rule: Orchestration rule of the current connection.
+        connection: Current connection of the consumer, ``None`` while reconnecting.
+    """
+
+    def __init__(self, pool: ConnectionPool, service_definition: str, kwargs: Dict[str, Any]):
+        super().__init__(
+                None,
+                pool.high_watermark,
+                pool.low_watermark,
+                kwargs.get('batch_window', DEFAULT_BATCH_WINDOW),
+                kwargs.get('max_batch_size', DEFAULT_MAX_BATCH_SIZE),
+        )
+        self.pool = pool
+        self.service_definition = service_definition
+        self.kwargs = kwargs
+        self.rule: Optional[OrchestrationRule] = None
+        self.connection: Optional[ConnectionResponse] = None
+        self._closed = False
+        self._lock = asyncio.Lock()
+
+    async def send(self, data):
+        """ Sends ``data``, waiting for the connection to be reopened if it is lost. """
+        return await self._send('send', data)
+
+    async def receive(self):
+        """
+        Receives one message, waiting for the connection to be reopened if it is lost.
+
+        Returns:
+            The message, or ``None`` if the provider closed the connection normally or the connection was closed.
+        """
+        return await self._receive('receive')
+
+    async def send_batch(self, records: Sequence[Any]) -> None:
+        """ Sends ``records`` as one batch, waiting for the connection to be reopened if it is lost. """
+        await self._send('send_batch', records)
+
+    async def receive_batch(self) -> Optional[List[Any]]:
+        """
+        Receives one batch, waiting for the connection to be reopened if it is lost.
+
+        Returns:
+            List of records, or ``None`` if the provider closed the connection normally or the connection was closed.
+        """
+        return await self._receive('receive_batch')
+
+    async def _send(self, method: str, data):
+        """ Sends ``data`` with ``method`` of the connection underneath, reconnecting if the connection is lost. """
+        while True:
+            connection = await self._connected()
+            try:
+                return await getattr(connection, method)(data)
+            except Exception as e:
+                if not _is_lost(connection, e):
+                    raise
+                await self._lost(connection, e)
+
+    async def _receive(self, method: str):
+        """ Receives with ``method`` of the connection underneath, reconnecting if the connection is lost. """
+        while True:
+            if self._closed:
+                return None
+            connection = await self._connected()
+            try:
+                message = await getattr(connection, method)()
+            except Exception as e:
+                if not _is_lost(connection, e):
+                    raise
+                await self._lost(connection, e)
+                continue
+
+            if message is not None or not connection.closed():
+                return message
+            if connection.close_code == NORMAL_CLOSURE:
+                self._closed = True
+                return None
+            await self._lost(connection, None)
+
+    async def close(self) -> None:
+        """ Sends the current batch and the queued messages, then closes the connection or returns it to the pool. """
+        if self._closed and self.connection is None:
+            return
+
+        try:
+            if self._send_error is None:
+                await self.flush()
+        finally:
+            self._closed = True
+            await self._stop_sender()
+            connection, self.connection = self.connection, None
+            if connection is not None:
+                await self.pool._release(self.service_definition, self.kwargs, self.rule, connection)  # type: ignore
+
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def close_code(self) -> Optional[int]:
+        """ Close code of the connection underneath, ``None`` while reconnecting. """
+        return None if self.connection is None else self.connection.close_code
+
+    def _attach(self, rule: OrchestrationRule, connection: ConnectionResponse) -> None:
+        self.rule = rule
+        self.connection = connection
+
+    async def _open(self, reconnecting: bool) -> None:
+        self._attach(*await self.pool._open(self.service_definition, self.kwargs, reconnecting))
+
+    async def _connected(self) -> ConnectionResponse:
+        """ Returns the current connection, reconnecting first if it was lost. """
+        if self._closed:
+            raise errors.ConnectionClosedError(f'Connection to \'{self.service_definition}\' is closed')
+        connection = self.connection
+        if connection is not None and not connection.closed():
+            return connection
+
+        async with self._lock:
+            if self.connection is None or self.connection.closed():
+                await self._reconnect()
+
+        return self.connection  # type: ignore
+
+    async def _reconnect(self) -> None:
+        policy = self.pool.reconnect
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                await self._open(reconnecting=True)
+                return
+            except Exception as e:
+                if self._closed or attempt >= policy.max_attempts:
+                    raise
+                if self.pool.logger is not None:
+                    self.pool.logger.warning(
+                            f'Attempt {attempt} to reconnect to \'{self.service_definition}\' failed: {e}'
+                    )
+                await asyncio.sleep(policy.delay(attempt))
+
+    async def _lost(self, connection: ConnectionResponse, error: Optional[Exception]) -> None:
+        if self._closed:
+            raise errors.ConnectionClosedError(f'Connection to \'{self.service_definition}\' is closed') from error
+        if self.connection is connection:
+            self.connection = None
+            await self.pool._close_all([connection])
+
+
+def _is_lost(connection: ConnectionResponse, error: Exception) -> bool:
+    """ ``True`` if ``error`` means that ``connection`` is lost, rather than that the message was invalid. """
+    return connection.closed() or isinstance(error, (ConnectionError, asyncio.TimeoutError))
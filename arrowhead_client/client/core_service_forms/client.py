@@ -30,9 +30,11 @@ class ServiceQueryForm(DTOMixin):
             service: Service,
             max_version_requirement: Optional[Version] = None,
             min_version_requirement: Optional[Version] = None,
-            ping_providers: Optional[bool] = True
+            ping_providers: Optional[bool] = True,
+            trusted: bool = False,
     ) -> 'ServiceQueryForm':
-        return cls(
+        return cls._create(
+                trusted,
                 service_definition_requirement=service.service_definition,
                 interface_requirements=[service.interface.dto() if service.interface else None],
                 security_requirements=[service.access_policy or None],
@@ -104,8 +106,10 @@ class ServiceRegistrationForm(DTOMixin):
             provided_service: Service,
             provider_system: ArrowheadSystem,
             end_of_validity: Optional[str] = None,
+            trusted: bool = False,
     ):
-        return cls(
+        return cls._create(
+                trusted,
                 service_definition=provided_service.service_definition,
                 service_uri=provided_service.service_uri,
                 interfaces=[provided_service.interface.dto()],
@@ -140,8 +144,10 @@ class OrchestrationFlagsForm(DTOMixin):
             override_store: bool = False,
             enable_inter_cloud: bool = False,
             trigger_inter_cloud: bool = False,
+            trusted: bool = False,
     ):
-        return cls(
+        return cls._create(
+                trusted,
                 matchmaking=matchmaking,
                 metadata_search=metadata_search,
                 only_preferred=only_preferred,
@@ -152,8 +158,8 @@ class OrchestrationFlagsForm(DTOMixin):
         )
 
     @classmethod
-    def from_flags(cls, flags: OrchestrationFlags):
-        return cls.make(*[bool(flags & of_flag) for of_flag in OrchestrationFlags])
+    def from_flags(cls, flags: OrchestrationFlags, trusted: bool = False):
+        return cls.make(*[bool(flags & of_flag) for of_flag in OrchestrationFlags], trusted=trusted)
 
     def __and__(self, other: OrchestrationFlagsForm) -> OrchestrationFlagsForm:
         new_flags = {
@@ -191,13 +197,16 @@ class OrchestrationForm(DTOMixin):
             requested_service: Service,
             orchestration_flags: OrchestrationFlags = OrchestrationFlags.OVERRIDE_STORE,
             preferred_providers: Mapping = None,
+            trusted: bool = False,
     ):
-        return cls(
+        return cls._create(
+                trusted,
                 requester_system=requester_system,
                 requested_service=ServiceQueryForm.make(
                         requested_service,
+                        trusted=trusted,
                 ),
-                orchestration_flags=OrchestrationFlagsForm.from_flags(orchestration_flags),
+                orchestration_flags=OrchestrationFlagsForm.from_flags(orchestration_flags, trusted),
                 preferred_providers=preferred_providers,
         )
 
@@ -223,23 +232,69 @@ class OrchestrationResponseList(DTOMixin):
 ################
 
 class EventPublishForm(DTOMixin):
+    """ Event Publish Form """
     event_type: str
-    meta_data: Metadata
+    meta_data: Optional[Metadata] = None
     payload: str
     source: ArrowheadSystem
     time_stamp: str
 
+    @classmethod
+    def make(
+            cls,
+            event_type: str,
+            payload: str,
+            source: ArrowheadSystem,
+            time_stamp: str,
+            meta_data: Optional[Metadata] = None,
+            trusted: bool = False,
+    ) -> 'EventPublishForm':
+        return cls._create(
+                trusted,
+                event_type=event_type,
+                meta_data=meta_data,
+                payload=payload,
+                source=source,
+                time_stamp=time_stamp,
+        )
+
 
 class EventSubscribeForm(DTOMixin):
+    """ Event Subscribe Form """
     event_type: str
-    filter_meta_data: Metadata
-    match_meta_data: bool
+    filter_meta_data: Optional[Metadata] = None
+    match_meta_data: bool = False
     notify_uri: str
-    sources: Sequence[ArrowheadSystem]
-    start_date: str
-    end_date: str
+    sources: Optional[Sequence[ArrowheadSystem]] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
     subscriber_system: ArrowheadSystem
 
+    @classmethod
+    def make(
+            cls,
+            event_type: str,
+            notify_uri: str,
+            subscriber_system: ArrowheadSystem,
+            filter_meta_data: Optional[Metadata] = None,
+            match_meta_data: bool = False,
+            sources: Optional[Sequence[ArrowheadSystem]] = None,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None,
+            trusted: bool = False,
+    ) -> 'EventSubscribeForm':
+        return cls._create(
+                trusted,
+                event_type=event_type,
+                filter_meta_data=filter_meta_data,
+                match_meta_data=match_meta_data,
+                notify_uri=notify_uri,
+                sources=sources,
+                start_date=start_date,
+                end_date=end_date,
+                subscriber_system=subscriber_system,
+        )
+
 
 ##################
 # SYSTEMREGISTRY #
@@ -1,4 +1,5 @@
-from typing import Tuple, List, Callable
+import io
+from typing import Any, Dict, Iterator, Tuple, List, Callable
 from functools import wraps
 
 from arrowhead_client.system import ArrowheadSystem
@@ -10,6 +11,11 @@ from arrowhead_client import errors
 import arrowhead_client.client.core_service_forms.client as client_forms
 from arrowhead_client import constants
 
+try:
+    import ijson  # type: ignore
+except ImportError:
+    ijson = None
+
 
 def core_service_error_handler(func) -> Callable:
     """
@@ -62,6 +68,30 @@ def process_service_query(query_response: Response) -> List[Tuple[Service, Arrow
     return service_and_system
 
 
+@core_service_error_handler
+def iter_service_query(query_response: Response) -> Iterator[Tuple[Service, ArrowheadSystem]]:
+    """
+    Lazy version of :py:func:`process_service_query`.
+
+    Services and systems are created directly from the decoded JSON, one query result at a time,
+    without building the intermediate :py:class:`~arrowhead_client.client.core_service_forms.client.ServiceQueryResponse`.
+    If :code:`ijson` is installed, the payload is also decoded incrementally.
+
+    Returns:
+        Iterator of service and system tuples.
+    Raises:
+        errors.CoreServiceInputError: If return status is 400, raised immediately.
+    """
+    if query_response.status_code == 400:
+        raise errors.CoreServiceInputError(query_response.read_json()[constants.Misc.ERROR_MESSAGE])
+
+    return (
+        (_service_from_dto(query_result, query_result['serviceDefinition']['serviceDefinition'], ''),
+         ArrowheadSystem.from_dto(query_result['provider'], trusted=True))
+        for query_result in _iter_items(query_response, 'serviceQueryData')
+    )
+
+
 @core_service_error_handler
 def process_service_register(service_register_response: Response):
     """ Handles service registration responses """
@@ -109,6 +139,72 @@ def process_orchestration(orchestration_response: Response, method='') -> List[O
     return extracted_rules
 
 
+@core_service_error_handler
+def iter_orchestration(orchestration_response: Response, method='') -> Iterator[OrchestrationRule]:
+    """
+    Lazy version of :py:func:`process_orchestration`.
+
+    Orchestration rules are created directly from the decoded JSON, one orchestration result at a time,
+    without building the intermediate
+    :py:class:`~arrowhead_client.client.core_service_forms.client.OrchestrationResponseList`.
+    If :code:`ijson` is installed, the payload is also decoded incrementally.
+
+    Args:
+        orchestration_response: Response object from orchestration.
+        method: Method
+    Returns:
+        Iterator of OrchestrationRules found in the orchestration response.
+    Raises:
+        errors.OrchestrationError: If return status is 400, raised immediately.
+    """
+    if orchestration_response.status_code == 400:
+        raise errors.OrchestrationError(orchestration_response.read_json()[constants.Misc.ERROR_MESSAGE])
+
+    return (
+        _orchestration_rule_from_dto(orchestration_result, method)
+        for orchestration_result in _iter_items(orchestration_response, 'response')
+    )
+
+
+@core_service_error_handler
+def process_event_publish(event_publish_response: Response) -> None:
+    """ Handles event publish responses """
+    if event_publish_response.status_code == 400:
+        raise errors.CoreServiceInputError(
+                event_publish_response.read_json()[constants.Misc.ERROR_MESSAGE]
+        )
+    elif int(event_publish_response.status_code) >= 300:
+        raise errors.CoreServiceNotAvailableError(
+                f'Event Handler responded with status {event_publish_response.status_code}'
+        )
+
+
+@core_service_error_handler
+def process_event_subscribe(event_subscribe_response: Response) -> None:
+    """ Handles event subscribe responses """
+    if event_subscribe_response.status_code == 400:
+        raise errors.CoreServiceInputError(
+                event_subscribe_response.read_json()[constants.Misc.ERROR_MESSAGE]
+        )
+    elif int(event_subscribe_response.status_code) >= 300:
+        raise errors.CoreServiceNotAvailableError(
+                f'Event Handler responded with status {event_subscribe_response.status_code}'
+        )
+
+
+@core_service_error_handler
+def process_event_unsubscribe(event_unsubscribe_response: Response) -> None:
+    """ Handles event unsubscribe responses """
+    if event_unsubscribe_response.status_code == 400:
+        raise errors.CoreServiceInputError(
+                event_unsubscribe_response.read_json()[constants.Misc.ERROR_MESSAGE]
+        )
+    elif int(event_unsubscribe_response.status_code) >= 300:
+        raise errors.CoreServiceNotAvailableError(
+                f'Event Handler responded with status {event_unsubscribe_response.status_code}'
+        )
+
+
 @core_service_error_handler
 def process_publickey(publickey_response: Response) -> str:
     encoded_key = publickey_response.payload.decode()
@@ -164,3 +260,37 @@ def _extract_service(query_data: client_forms.OrchestrationResponse) -> Service:
     )
 
     return service
+
+
+def _iter_items(response: Response, key: str) -> Iterator[Dict[str, Any]]:
+    """ Yields the items of the list ``key`` in the JSON object of ``response``. """
+    if ijson is not None:
+        yield from ijson.items(io.BytesIO(response.payload), f'{key}.item', use_float=True)
+    else:
+        yield from response.read_json()[key]
+
+
+def _service_from_dto(service_dto: Dict[str, Any], service_definition: str, access_policy: str) -> Service:
+    return Service(
+            service_definition=service_definition,
+            service_uri=service_dto.get('serviceUri', ''),
+            interface=ServiceInterface.from_str(service_dto['interfaces'][0]['interfaceName']),
+            access_policy=access_policy,
+            metadata=service_dto.get('metadata'),
+            version=service_dto.get('version'),
+    )
+
+
+def _orchestration_rule_from_dto(orchestration_result: Dict[str, Any], method) -> OrchestrationRule:
+    service = _service_from_dto(
+            orchestration_result,
+            orchestration_result['service']['serviceDefinition'],
+            orchestration_result['secure'],
+    )
+    system = ArrowheadSystem.from_dto(orchestration_result['provider'], trusted=True)
+
+    interface = orchestration_result['interfaces'][0]['interfaceName']
+    auth_tokens = orchestration_result.get('authorizationTokens')
+    auth_token = auth_tokens.get(interface, '') if auth_tokens else ''
+
+    return OrchestrationRule(service, system, method, auth_token)
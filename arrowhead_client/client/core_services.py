@@ -51,12 +51,33 @@ class CoreServices(CoreConfig, Enum):
         'GET', 'HTTP', 'JSON',
         constants.CoreSystem.AUTHORIZATION.value,
     )
+    EVENT_PUBLISH = (
+        'event-publish',
+        'eventhandler/publish',
+        'POST', 'HTTP', 'JSON',
+        constants.CoreSystem.EVENT_HANDLER.value,
+    )
+    EVENT_SUBSCRIBE = (
+        'event-subscribe',
+        'eventhandler/subscribe',
+        'POST', 'HTTP', 'JSON',
+        constants.CoreSystem.EVENT_HANDLER.value,
+    )
+    EVENT_UNSUBSCRIBE = (
+        'event-unsubscribe',
+        'eventhandler/unsubscribe',
+        'DELETE', 'HTTP', 'JSON',
+        constants.CoreSystem.EVENT_HANDLER.value,
+    )
 
 
 def get_core_rules(config: Dict, secure: bool) -> List[OrchestrationRule]:
     """
     Get orchestration rules for core services.
 
+    Core services of systems that are missing from ``config`` are left out, so that configurations written
+    before a core system was supported keep working.
+
     Args:
         config: Configuration dictionary.
         secure: True if ssl is enabled, False otherwise.
@@ -65,7 +86,8 @@ def get_core_rules(config: Dict, secure: bool) -> List[OrchestrationRule]:
     """
 
     rules = [_extract_rule(core_service, config, secure)
-             for core_service in CoreServices]
+             for core_service in CoreServices
+             if core_service.system in config]
 
     return rules
 
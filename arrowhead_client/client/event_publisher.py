@@ -0,0 +1,334 @@
+"""
+Event publisher module
+
+Buffers events published to the Event Handler and sends them in the background.
+
+Events are collected into batches, a batch is sent when it holds ``batch_size`` events or when its first event has
+waited for ``flush_interval`` seconds, whichever comes first. The Event Handler accepts one event per request, so
+the events of a batch are sent as concurrent requests over the kept-alive connections of the consumer, with at most
+``max_in_flight`` requests in progress. The next batch is collected while the previous one is still being sent.
+
+At most ``max_pending`` events are buffered, in addition to the batch being sent. When the Event Handler falls
+behind and the buffer is full, publishing waits for room in the buffer, which slows the publishers down to the rate
+the Event Handler can handle instead of letting the buffer grow without bounds.
+"""
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 0.05
+DEFAULT_MAX_PENDING = 10000
+DEFAULT_MAX_IN_FLIGHT = 8
+
+Event = Dict[str, Any]
+
+
+class PublisherStats(NamedTuple):
+    """
+    Event publisher statistics.
+
+    Attributes:
+        published: Number of events accepted by the Event Handler.
+        failed: Number of events whose request failed, or that the Event Handler rejected.
+        pending: Number of events buffered or in flight.
+    """
+    published: int
+    failed: int
+    pending: int
+
+
+class _PublisherBase:
+    def __init__(
+            self,
+            batch_size: int,
+            flush_interval: float,
+            max_pending: int,
+            max_in_flight: int,
+            logger: Any,
+    ):
+        if batch_size < 1:
+            raise ValueError('batch_size must be a positive integer')
+        if max_pending < 1:
+            raise ValueError('max_pending must be a positive integer')
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be a positive integer')
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_in_flight = max_in_flight
+        self._logger = logger
+        self._published = 0
+        self._failed = 0
+        self._pending = 0
+        # Number of callers waiting in flush(), batches are sent without waiting for the flush interval meanwhile
+        self._flushing = 0
+
+    def _record(self, error: Optional[BaseException]) -> None:
+        self._pending -= 1
+        if error is None:
+            self._published += 1
+            return
+
+        self._failed += 1
+        if self._logger is not None:
+            self._logger.warning(f'Publishing event failed: {error}')
+
+
+class AsyncEventPublisher(_PublisherBase):
+    """
+    Publishes events from an event loop.
+
+    The background task is started by the first :py:meth:`publish`, and must be stopped with :py:meth:`close`
+    before the event loop is closed.
+
+    Args:
+        send: Coroutine function that sends one event and raises an error if the Event Handler rejects it.
+        batch_size: Maximum number of events sent in one batch.
+        flush_interval: Maximum time in seconds that an event waits for its batch to fill.
+        max_pending: Maximum number of buffered events.
+        max_in_flight: Maximum number of requests in progress at the same time.
+        logger: Optional. Logger used to report failed events.
+    """
+
+    def __init__(
+            self,
+            send: Callable[[Event], Awaitable[Any]],
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+            max_pending: int = DEFAULT_MAX_PENDING,
+            max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+            logger: Any = None,
+    ):
+        super().__init__(batch_size, flush_interval, max_pending, max_in_flight, logger)
+        self._send_event = send
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._requests: Set[asyncio.Future] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stats(self) -> PublisherStats:
+        return PublisherStats(self._published, self._failed, self._pending)
+
+    async def publish(self, event: Event) -> None:
+        """
+        Buffers ``event`` for publishing, waits while the buffer is full.
+        """
+        if self._task is None or self._task.done():
+            self._start()
+
+        # Counted before waiting for room, so that events waiting for the buffer are reported as pending
+        self._pending += 1
+        try:
+            await self._queue.put(event)  # type: ignore
+        except BaseException:
+            self._pending -= 1
+            raise
+        if self._queue.qsize() >= self.batch_size:  # type: ignore
+            self._batch_ready.set()  # type: ignore
+
+    async def flush(self) -> None:
+        """ Sends all buffered events and waits until their requests have finished. """
+        if self._queue is None:
+            return
+
+        self._flushing += 1
+        self._batch_ready.set()  # type: ignore
+        try:
+            await self._queue.join()
+        finally:
+            self._flushing -= 1
+
+    async def close(self) -> None:
+        """ Flushes the buffered events and stops the background task. """
+        if self._task is None:
+            return
+
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _start(self) -> None:
+        # Created here so that they are bound to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._batch_ready = asyncio.Event()
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]  # type: ignore
+            if not self._flushing and self._queue.qsize() + 1 < self.batch_size:  # type: ignore
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)  # type: ignore
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_ready.clear()  # type: ignore
+
+            while len(batch) < self.batch_size and not self._queue.empty():  # type: ignore
+                batch.append(self._queue.get_nowait())  # type: ignore
+
+            for event in batch:
+                await self._in_flight.acquire()  # type: ignore
+                request = asyncio.ensure_future(self._send(event))
+                self._requests.add(request)
+                request.add_done_callback(self._requests.discard)
+
+    async def _send(self, event: Event) -> None:
+        try:
+            await self._send_event(event)
+        except Exception as e:
+            self._record(e)
+        else:
+            self._record(None)
+        finally:
+            self._in_flight.release()  # type: ignore
+            self._queue.task_done()  # type: ignore
+
+
+class EventPublisher(_PublisherBase):
+    """
+    Publishes events from a background thread.
+
+    The background thread is started by the first :py:meth:`publish`. Requests are sent by a pool of
+    ``max_in_flight`` threads.
+
+    Args:
+        send: Function that sends one event and raises an error if the Event Handler rejects it.
+        batch_size: Maximum number of events sent in one batch.
+        flush_interval: Maximum time in seconds that an event waits for its batch to fill.
+        max_pending: Maximum number of buffered events.
+        max_in_flight: Maximum number of requests in progress at the same time.
+        logger: Optional. Logger used to report failed events.
+        name: Name prefix of the background threads.
+    """
+
+    def __init__(
+            self,
+            send: Callable[[Event], Any],
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+            max_pending: int = DEFAULT_MAX_PENDING,
+            max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+            logger: Any = None,
+            name: str = 'event-publisher',
+    ):
+        super().__init__(batch_size, flush_interval, max_pending, max_in_flight, logger)
+        self.name = name
+        self._send_event = send
+        self._queue: 'queue.Queue[Optional[Event]]' = queue.Queue(maxsize=max_pending)
+        self._batch_ready = threading.Event()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._stats_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def stats(self) -> PublisherStats:
+        return PublisherStats(self._published, self._failed, self._pending)
+
+    def publish(self, event: Event, timeout: Optional[float] = None) -> None:
+        """
+        Buffers ``event`` for publishing, blocks while the buffer is full.
+
+        Args:
+            event: Event publish form.
+            timeout: Maximum time in seconds to wait for room in the buffer, ``None`` waits forever.
+        Raises:
+            queue.Full: If the buffer is still full after ``timeout`` seconds.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+
+        # Counted before the event is queued, it could otherwise be sent and counted as finished first
+        with self._stats_lock:
+            self._pending += 1
+        try:
+            self._queue.put(event, timeout=timeout)
+        except BaseException:
+            with self._stats_lock:
+                self._pending -= 1
+            raise
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    def flush(self) -> None:
+        """ Sends all buffered events and waits until their requests have finished. """
+        with self._stats_lock:
+            self._flushing += 1
+        self._batch_ready.set()
+        try:
+            self._queue.join()
+        finally:
+            with self._stats_lock:
+                self._flushing -= 1
+
+    def close(self) -> None:
+        """ Flushes the buffered events and stops the background threads. """
+        if self._thread is None:
+            return
+
+        self.flush()
+        self._queue.put(None)
+        self._batch_ready.set()
+        self._thread.join()
+        self._thread = None
+        self._executor.shutdown()  # type: ignore
+        self._executor = None
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix=self.name)
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                return
+            if not self._flushing and self._queue.qsize() + 1 < self.batch_size:
+                self._batch_ready.wait(self.flush_interval)
+            self._batch_ready.clear()
+
+            batch: List[Optional[Event]] = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for event in batch:
+                if event is None:
+                    self._queue.task_done()
+                    return
+                self._in_flight.acquire()
+                self._executor.submit(self._send, event)  # type: ignore
+
+    def _send(self, event: Event) -> None:
+        try:
+            self._send_event(event)
+        except Exception as e:
+            error: Optional[Exception] = e
+        else:
+            error = None
+        finally:
+            self._in_flight.release()
+
+        with self._stats_lock:
+            self._record(error)
+        self._queue.task_done()
@@ -0,0 +1,209 @@
+"""
+Event subscriber module
+
+Receives the events that the Event Handler delivers to the notify URI of a subscription, and passes them to the
+event handlers of the subscriber.
+
+Notifications are acknowledged as soon as they are decoded and buffered, the handlers run in a pool of ``workers``
+tasks that take events from the buffer. A slow handler therefore only delays other events, never the response to the
+Event Handler. Notifications are decoded straight from JSON into :py:class:`Event` tuples, without a pydantic model,
+since they arrive at a high rate and their few fields are easily checked by hand.
+
+At most ``max_pending`` events are buffered. A notification arriving while the buffer is full is answered with
+status 503, so that the Event Handler sees that the subscriber falls behind, instead of the subscriber using more and
+more memory.
+"""
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Union
+
+from arrowhead_client.codec import JsonCodec, get_json_codec
+
+DEFAULT_NOTIFY_URI = 'events/notify'
+DEFAULT_MAX_PENDING = 1000
+DEFAULT_WORKERS = 4
+
+
+class Event(NamedTuple):
+    """
+    Event received from the Event Handler.
+
+    Attributes:
+        event_type: Event type.
+        payload: Event payload.
+        time_stamp: Time of the event as :code:`'YYYY-MM-DD hh:mm:ss'`.
+        metadata: Event metadata, or ``None`` if the event has none.
+    """
+    event_type: str
+    payload: str
+    time_stamp: str
+    metadata: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_dto(cls, dto: Dict[str, Any]) -> 'Event':
+        """
+        Creates an event from an Event Handler notification.
+
+        Raises:
+            ValueError: If a required field is missing or has the wrong type.
+        """
+        try:
+            event_type = dto['eventType']
+            payload = dto['payload']
+            time_stamp = dto['timeStamp']
+        except (KeyError, TypeError):
+            raise ValueError('Notification requires eventType, payload, and timeStamp') from None
+        if not isinstance(event_type, str) or not isinstance(payload, str) or not isinstance(time_stamp, str):
+            raise ValueError('eventType, payload, and timeStamp must be strings')
+        metadata = dto.get('metaData')
+        if metadata is not None and not isinstance(metadata, dict):
+            raise ValueError('metaData must be an object')
+
+        return cls(event_type, payload, time_stamp, metadata)
+
+
+EventHandler = Callable[[Event], Union[None, Awaitable[None]]]
+
+
+class ReceiverStats(NamedTuple):
+    """
+    Event receiver statistics.
+
+    Attributes:
+        received: Number of notifications accepted into the buffer.
+        handled: Number of events whose handlers finished.
+        failed: Number of events whose handler raised an error.
+        rejected: Number of notifications rejected because they could not be decoded or the buffer was full.
+        pending: Number of events buffered or being handled.
+    """
+    received: int
+    handled: int
+    failed: int
+    rejected: int
+    pending: int
+
+
+class EventReceiver:
+    """
+    Buffers received events and passes them to their handlers.
+
+    Handlers are either coroutine functions, which run in the event loop, or plain functions, which run in the
+    default executor so that they do not block the event loop. Events of types without a handler are acknowledged
+    and dropped. The worker tasks are started by the first notification, and must be stopped with
+    :py:meth:`close` before the event loop is closed.
+
+    Args:
+        json_codec: JSON codec or library name used to decode notifications,
+                    see :py:func:`~arrowhead_client.codec.get_json_codec`.
+        max_pending: Maximum number of buffered events.
+        workers: Number of events handled at the same time.
+        logger: Optional. Logger used to report handler errors.
+    """
+
+    def __init__(
+            self,
+            json_codec: Union[None, str, JsonCodec] = None,
+            max_pending: int = DEFAULT_MAX_PENDING,
+            workers: int = DEFAULT_WORKERS,
+            logger: Any = None,
+    ):
+        if max_pending < 1:
+            raise ValueError('max_pending must be a positive integer')
+        if workers < 1:
+            raise ValueError('workers must be a positive integer')
+        self.json_codec = get_json_codec(json_codec)
+        self.max_pending = max_pending
+        self.workers = workers
+        self.handlers: Dict[str, List[EventHandler]] = {}
+        self._logger = logger
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._received = 0
+        self._handled = 0
+        self._failed = 0
+        self._rejected = 0
+        self._pending = 0
+
+    @property
+    def stats(self) -> ReceiverStats:
+        return ReceiverStats(self._received, self._handled, self._failed, self._rejected, self._pending)
+
+    def add_handler(self, event_type: str, handler: EventHandler) -> None:
+        """ Calls ``handler`` with every received event of ``event_type``. """
+        self.handlers.setdefault(event_type, []).append(handler)
+
+    def remove_handlers(self, event_type: str) -> None:
+        """ Removes all handlers of ``event_type``. """
+        self.handlers.pop(event_type, None)
+
+    def receive(self, body: bytes) -> int:
+        """
+        Decodes and buffers one notification, must be called from the event loop.
+
+        Args:
+            body: Request body of the notification.
+        Returns:
+            HTTP status of the response to the Event Handler: 200 if the event was buffered or has no handler,
+            400 if the notification is invalid, and 503 if the buffer is full.
+        """
+        try:
+            event = Event.from_dto(self.json_codec.loads(body))
+        except ValueError as e:
+            self._rejected += 1
+            if self._logger is not None:
+                self._logger.warning(f'Invalid event notification: {e}')
+            return 400
+
+        if event.event_type not in self.handlers:
+            return 200
+
+        if not self._tasks:
+            self._start()
+        try:
+            self._queue.put_nowait(event)  # type: ignore
+        except asyncio.QueueFull:
+            self._rejected += 1
+            return 503
+
+        self._received += 1
+        self._pending += 1
+        return 200
+
+    async def join(self) -> None:
+        """ Waits until all buffered events have been handled. """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """ Handles the buffered events and stops the worker tasks. """
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def _start(self) -> None:
+        # Created here so that the queue is bound to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = {asyncio.ensure_future(self._work()) for _ in range(self.workers)}
+
+    async def _work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await self._queue.get()  # type: ignore
+            try:
+                for handler in self.handlers.get(event.event_type, ()):
+                    if inspect.iscoroutinefunction(handler):
+                        await handler(event)  # type: ignore
+                    else:
+                        await loop.run_in_executor(None, handler, event)
+            except Exception as e:
+                self._failed += 1
+                if self._logger is not None:
+                    self._logger.warning(f'Handler of event \'{event.event_type}\' failed: {e}')
+            else:
+                self._handled += 1
+            finally:
+                self._pending -= 1
+                self._queue.task_done()  # type: ignore
@@ -1,14 +1,11 @@
 from arrowhead_client.client.client_sync import ArrowheadClientSync
 from arrowhead_client.client.client_async import ArrowheadClientAsync
-from arrowhead_client.provider.implementations.httpprovider import FlaskProvider
-from arrowhead_client.consumer.implementations.requests_consumer import RequestsConsumer
-from arrowhead_client.provider.implementations.fastapi_provider import FastapiProvider as AsyncHttpProvider
-from arrowhead_client.consumer.implementations.aiohttp_consumer import AiohttpConsumer
+from arrowhead_client.imports import LazyAttribute
 
 
 class SyncClient(ArrowheadClientSync):
     """
-    Asynchronous ArrowheadClient implementation for HTTP and Websockets services.
+    Synchronous ArrowheadClient implementation for HTTP and Websockets services.
 
     Example::
 
@@ -35,8 +32,9 @@ class SyncClient(ArrowheadClientSync):
             return "ECHO"
 
     """
-    __arrowhead_provider__ = FlaskProvider
-    __arrowhead_consumer__ = RequestsConsumer
+    # Imported on first use, so that importing this module does not import Flask and requests
+    __arrowhead_provider__ = LazyAttribute('arrowhead_client.provider.implementations.httpprovider:FlaskProvider')
+    __arrowhead_consumer__ = LazyAttribute('arrowhead_client.consumer.implementations.requests_consumer:RequestsConsumer')
 
 
 class AsyncClient(ArrowheadClientAsync):
@@ -68,5 +66,6 @@ class AsyncClient(ArrowheadClientAsync):
             return "ECHO"
 
     """
-    __arrowhead_provider__ = AsyncHttpProvider
-    __arrowhead_consumer__ = AiohttpConsumer
+    # Imported on first use, so that importing this module does not import FastAPI, uvicorn and aiohttp
+    __arrowhead_provider__ = LazyAttribute('arrowhead_client.provider.implementations.fastapi_provider:FastapiProvider')
+    __arrowhead_consumer__ = LazyAttribute('arrowhead_client.consumer.implementations.aiohttp_consumer:AiohttpConsumer')
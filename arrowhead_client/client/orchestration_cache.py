@@ -0,0 +1,113 @@
+"""
+Orchestration cache module
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_ORCHESTRATION_TTL = 60.0
+
+
+class OrchestrationEntry:
+    """
+    Orchestration request for a service definition, remembered so that it can be refreshed.
+
+    Args:
+        service_definition: Requested service definition.
+        method: Method used to consume the service.
+        orchestration_form: Orchestration form sent to the Orchestrator, as returned by ``OrchestrationForm.dto()``.
+    """
+
+    def __init__(
+            self,
+            service_definition: str,
+            method: str,
+            orchestration_form: Dict,
+    ):
+        self.service_definition = service_definition
+        self.method = method
+        self.orchestration_form = orchestration_form
+        self.fetched_at: Optional[float] = None
+
+    def same_request(self, other: 'OrchestrationEntry') -> bool:
+        """ ``True`` if ``other`` sends the same request to the Orchestrator. """
+        return self.service_definition == other.service_definition and \
+               self.method == other.method and \
+               self.orchestration_form == other.orchestration_form
+
+
+class OrchestrationCache:
+    """
+    Keeps track of when the orchestration rules of each service definition were fetched.
+
+    The rules themselves are stored in the client's
+    :py:class:`~arrowhead_client.rules.OrchestrationRuleContainer`, this class only decides when they need to be
+    refreshed.
+
+    Args:
+        ttl: Time in seconds before orchestration results are refreshed. ``None`` or ``0`` disables the cache,
+             in which case every orchestration lookup is sent to the Orchestrator.
+        timer: Clock used to measure the age of entries, defaults to :py:func:`time.monotonic`.
+    """
+
+    def __init__(
+            self,
+            ttl: Optional[float] = DEFAULT_ORCHESTRATION_TTL,
+            timer: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.timer = timer
+        self._entries: Dict[str, OrchestrationEntry] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.ttl)
+
+    @property
+    def refresh_interval(self) -> float:
+        """ How often, in seconds, background refreshers check for stale entries. """
+        return max(self.ttl / 2, 0.1) if self.ttl else 0.0
+
+    def lookup(self, entry: OrchestrationEntry) -> Optional[OrchestrationEntry]:
+        """
+        Returns the fetched entry that sends the same request as ``entry``, or ``None`` if it must be fetched first.
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            cached = self._entries.get(entry.service_definition)
+
+        if cached is None or cached.fetched_at is None or not cached.same_request(entry):
+            return None
+
+        return cached
+
+    def is_stale(self, entry: OrchestrationEntry) -> bool:
+        """ ``True`` if ``entry`` has never been fetched or is older than the time to live. """
+        return entry.fetched_at is None or self.timer() - entry.fetched_at >= self.ttl  # type: ignore
+
+    def mark_fetched(self, entry: OrchestrationEntry) -> None:
+        """ Stores ``entry`` as freshly fetched. """
+        entry.fetched_at = self.timer()
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[entry.service_definition] = entry
+
+    def stale_entries(self) -> List[OrchestrationEntry]:
+        """ Returns all entries that need to be refreshed. """
+        with self._lock:
+            entries = list(self._entries.values())
+
+        return [entry for entry in entries if self.is_stale(entry)]
+
+    def discard(self, service_definition: str) -> None:
+        """ Stops refreshing ``service_definition``. """
+        with self._lock:
+            self._entries.pop(service_definition, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
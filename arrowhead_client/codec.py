@@ -0,0 +1,241 @@
+"""
+============
+Codec Module
+============
+
+JSON codecs used to encode and decode payloads.
+
+Every consumer and provider holds a :py:class:`JsonCodec`, chosen when the client is created with
+:py:func:`get_json_codec`. By default the fastest installed library is used, :code:`orjson` if it is installed
+and the standard library :py:mod:`json` module otherwise.
+
+Batches of WebSocket records are sent in binary frames encoded by a :py:class:`BinaryCodec`, chosen with
+:py:func:`get_binary_codec`. Batches are encoded as JSON unless MessagePack or CBOR is requested explicitly.
+They are more compact and faster to decode than JSON, but the format is not negotiated with the provider,
+so both sides must be configured with the same format and have its library installed. A provider decodes
+the binary frames of a batch with the ``loads`` method of the same codec.
+"""
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Type, Union
+
+from arrowhead_client import constants
+
+
+class JsonCodec:
+    """
+    JSON codec based on the standard library :py:mod:`json` module.
+
+    Subclasses use other JSON libraries, all of them raise a :py:class:`ValueError` on invalid input.
+    """
+    name = constants.JsonLibrary.STDLIB.value
+
+    def dumps(self, obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """
+        Encodes ``obj`` as UTF-8 encoded JSON.
+
+        Args:
+            obj: Object to encode.
+            default: Function called with objects that cannot be encoded, must return an encodable object.
+        Returns:
+            JSON bytes.
+        """
+        return json.dumps(obj, default=default, separators=(',', ':')).encode()
+
+    def dumps_str(self, obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        """ Encodes ``obj`` as a JSON string. """
+        return self.dumps(obj, default).decode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        Decodes JSON bytes or string.
+
+        Raises:
+            ValueError: If ``data`` is not valid JSON.
+        """
+        return json.loads(data)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+
+class OrjsonCodec(JsonCodec):
+    """ JSON codec based on :code:`orjson`. """
+    name = constants.JsonLibrary.ORJSON.value
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        # orjson only accepts str keys by default, which rejects str enum keys such as constants.Misc.ERROR_MESSAGE
+        return self._orjson.dumps(obj, default=default, option=self._orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    """ JSON codec based on :code:`ujson`. """
+    name = constants.JsonLibrary.UJSON.value
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        if default is None:
+            return self._ujson.dumps(obj).encode()
+        return self._ujson.dumps(obj, default=default).encode()
+
+    def dumps_str(self, obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        if default is None:
+            return self._ujson.dumps(obj)
+        return self._ujson.dumps(obj, default=default)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._ujson.loads(data)
+
+
+_codecs = {
+    constants.JsonLibrary.ORJSON.value: OrjsonCodec,
+    constants.JsonLibrary.UJSON.value: UjsonCodec,
+    constants.JsonLibrary.STDLIB.value: JsonCodec,
+}
+
+
+def get_json_codec(codec: Union[None, str, JsonCodec] = None) -> JsonCodec:
+    """
+    Factory function for JSON codecs.
+
+    Args:
+        codec: Either a codec instance, which is returned as-is, one of :code:`'orjson'`, :code:`'ujson'`,
+               or :code:`'json'`, or ``None`` to use :code:`orjson` if it is installed and :code:`json` otherwise.
+    Returns:
+        JsonCodec instance.
+    Raises:
+        ValueError: If ``codec`` is not a supported library.
+        ImportError: If the requested library is not installed.
+    """
+    if isinstance(codec, JsonCodec):
+        return codec
+
+    return _cached_json_codec(codec.lower() if isinstance(codec, str) else None)
+
+
+@lru_cache(maxsize=None)
+def _cached_json_codec(name: Optional[str]) -> JsonCodec:
+    if name is None:
+        try:
+            return OrjsonCodec()
+        except ImportError:
+            return JsonCodec()
+
+    if name not in _codecs:
+        raise ValueError(
+                f'{name} is not a supported JSON library. '
+                f'Supported libraries are {set(library.value for library in constants.JsonLibrary)}'
+        )
+
+    return _codecs[name]()
+
+
+class BinaryCodec:
+    """
+    Binary codec that encodes records as UTF-8 encoded JSON with a :py:class:`JsonCodec`.
+
+    Subclasses use more compact formats, all of them raise a :py:class:`ValueError` on invalid input.
+
+    Args:
+        json_codec: JSON codec or library name, see :py:func:`get_json_codec`.
+    """
+    name = constants.BinaryFormat.JSON.value
+
+    def __init__(self, json_codec: Union[None, str, JsonCodec] = None):
+        self.json_codec = get_json_codec(json_codec)
+
+    def dumps(self, obj: Any) -> bytes:
+        """ Encodes ``obj`` as bytes. """
+        return self.json_codec.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        """
+        Decodes bytes.
+
+        Raises:
+            ValueError: If ``data`` is not valid in the format of the codec.
+        """
+        return self.json_codec.loads(data)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+
+class MsgpackCodec(BinaryCodec):
+    """ Binary codec based on :code:`msgpack`. """
+    name = constants.BinaryFormat.MSGPACK.value
+
+    def __init__(self, json_codec: Union[None, str, JsonCodec] = None):
+        import msgpack  # type: ignore
+        self._msgpack = msgpack
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+
+class CborCodec(BinaryCodec):
+    """ Binary codec based on :code:`cbor2`. """
+    name = constants.BinaryFormat.CBOR.value
+
+    def __init__(self, json_codec: Union[None, str, JsonCodec] = None):
+        import cbor2  # type: ignore
+        self._cbor2 = cbor2
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._cbor2.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self._cbor2.loads(data)
+
+
+_binary_codecs: Dict[str, Type[BinaryCodec]] = {
+    constants.BinaryFormat.MSGPACK.value: MsgpackCodec,
+    constants.BinaryFormat.CBOR.value: CborCodec,
+    constants.BinaryFormat.JSON.value: BinaryCodec,
+}
+
+
+def get_binary_codec(
+        codec: Union[None, str, BinaryCodec] = None,
+        json_codec: Union[None, str, JsonCodec] = None,
+) -> BinaryCodec:
+    """
+    Factory function for binary codecs.
+
+    Args:
+        codec: Either a codec instance, which is returned as-is, one of :code:`'msgpack'`, :code:`'cbor'`,
+               or :code:`'json'`, or ``None`` for JSON.
+        json_codec: JSON codec used by the JSON format.
+    Returns:
+        BinaryCodec instance.
+    Raises:
+        ValueError: If ``codec`` is not a supported format.
+        ImportError: If the library of the requested format is not installed.
+    """
+    if isinstance(codec, BinaryCodec):
+        return codec
+
+    if codec is None:
+        return BinaryCodec(json_codec)
+
+    name = codec.lower()
+    if name not in _binary_codecs:
+        raise ValueError(
+                f'{name} is not a supported binary format. '
+                f'Supported formats are {set(binary_format.value for binary_format in constants.BinaryFormat)}'
+        )
+
+    return _binary_codecs[name](json_codec)
@@ -49,6 +49,56 @@ class CoreSystem(str, Enum):
     AUTHORIZATION = 'authorization'
     EVENT_HANDLER = 'event_handler'
 
+
+class LoadBalancing(str, Enum):
+    """Load balancing strategies"""
+    ROUND_ROBIN = 'ROUND_ROBIN'
+    LEAST_OUTSTANDING = 'LEAST_OUTSTANDING'
+    LATENCY_EWMA = 'LATENCY_EWMA'
+    POWER_OF_TWO_CHOICES = 'POWER_OF_TWO_CHOICES'
+
+
+class JsonLibrary(str, Enum):
+    """JSON libraries"""
+    ORJSON = 'orjson'
+    UJSON = 'ujson'
+    STDLIB = 'json'
+
+
+class BinaryFormat(str, Enum):
+    """Binary formats of batched WebSocket messages"""
+    MSGPACK = 'msgpack'
+    CBOR = 'cbor'
+    JSON = 'json'
+
+
+class WsgiServer(str, Enum):
+    """WSGI servers used by the Flask provider"""
+    THREADED = 'THREADED'
+    GEVENT = 'GEVENT'
+
+
+class SpanKind(str, Enum):
+    """Tracing span kinds"""
+    INTERNAL = 'INTERNAL'
+    CLIENT = 'CLIENT'
+    SERVER = 'SERVER'
+
+
+class SpanStatus(str, Enum):
+    """Tracing span status codes"""
+    UNSET = 'UNSET'
+    OK = 'OK'
+    ERROR = 'ERROR'
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+
 class OrchestrationFlags(Flag):
     MATCHMAKING = auto()
     METADATA_SEARCH = auto()
@@ -1,6 +1,14 @@
+from arrowhead_client.imports import lazy_module_attributes, lazy_module_dir
 from .base import BaseConsumer
-from .implementations.requests_consumer import RequestsConsumer
-from .implementations.aiohttp_consumer import AiohttpConsumer
+
+# Implementations are imported on first access, so that requests and aiohttp are only imported when used
+_IMPLEMENTATIONS = {
+    'RequestsConsumer': 'arrowhead_client.consumer.implementations.requests_consumer:RequestsConsumer',
+    'AiohttpConsumer': 'arrowhead_client.consumer.implementations.aiohttp_consumer:AiohttpConsumer',
+}
+
+__getattr__ = lazy_module_attributes(globals(), _IMPLEMENTATIONS)
+__dir__ = lazy_module_dir(globals(), _IMPLEMENTATIONS)
 
 __all__ = [
     'BaseConsumer',
@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
+from typing import Union
 
 from arrowhead_client.abc import ProtocolMixin
+from arrowhead_client.codec import JsonCodec, get_json_codec
+from arrowhead_client.metrics import Metrics, get_metrics
+from arrowhead_client.tracing import Span, Tracer, get_tracer
 from arrowhead_client.response import Response, ConnectionResponse
 from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client import constants
 
 
 class BaseConsumer(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
@@ -13,6 +18,9 @@ class BaseConsumer(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
         keyfile: Certificate keyfile.
         certfile: Certificate certfile.
         cafile: Certificate authority file.
+        json_codec: JSON codec or library name, see :py:func:`~arrowhead_client.codec.get_json_codec`.
+        metrics: Request metrics, see :py:func:`~arrowhead_client.metrics.get_metrics`. Disabled by default.
+        tracer: Tracer, see :py:func:`~arrowhead_client.tracing.get_tracer`. Disabled by default.
     """
 
     def __init__(
@@ -20,10 +28,16 @@ class BaseConsumer(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
             keyfile,
             certfile,
             cafile,
+            json_codec: Union[None, str, JsonCodec] = None,
+            metrics: Union[None, bool, Metrics] = None,
+            tracer: Union[None, bool, Tracer] = None,
     ):
         self.keyfile = keyfile
         self.certfile = certfile
         self.cafile = cafile
+        self.json_codec = get_json_codec(json_codec)
+        self.metrics = get_metrics(metrics)
+        self.tracer = get_tracer(tracer)
 
     @abstractmethod
     def consume_service(
@@ -55,6 +69,27 @@ class BaseConsumer(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
         """
         raise NotImplementedError
 
+    def _request_span(self, rule: OrchestrationRule, url: str) -> Span:
+        """ Starts the client span of a request sent to ``url`` according to ``rule``. """
+        if not self.tracer.enabled:
+            return self.tracer.start_span('')
+
+        return self.tracer.start_span(
+                f'{rule.method} {rule.service_definition}',
+                constants.SpanKind.CLIENT,
+                {
+                    'http.method': rule.method,
+                    'http.url': url,
+                    'arrowhead.service_definition': rule.service_definition,
+                    'arrowhead.provider': rule.system_name,
+                },
+        )
+
+    def close(self) -> None:
+        """
+        Closes the connections kept open by the consumer, new connections are opened when needed.
+        """
+
     async def async_startup(self):
         raise NotImplementedError
 
@@ -1,16 +1,79 @@
 import ssl
+from typing import Any, List, Mapping, NamedTuple, Optional, Sequence, Sized, Union
 
 import aiohttp
 
+from arrowhead_client.codec import BinaryCodec, JsonCodec, get_binary_codec, get_json_codec
 from arrowhead_client.consumer.base import BaseConsumer
-from arrowhead_client.response import Response, ConnectionResponse
+from arrowhead_client.metrics import Metrics
+from arrowhead_client.tracing import Tracer
+from arrowhead_client.resilience import Timeout
+from arrowhead_client.response import (
+    DEFAULT_BATCH_WINDOW,
+    DEFAULT_HIGH_WATERMARK,
+    DEFAULT_MAX_BATCH_SIZE,
+    BatchConnectionResponse,
+    Response,
+)
 from arrowhead_client.rules import OrchestrationRule
 from arrowhead_client import constants
 
+DEFAULT_POOL_LIMIT = 100
+DEFAULT_POOL_LIMIT_PER_HOST = 0
+DEFAULT_KEEPALIVE_TIMEOUT = 15.0
+DEFAULT_DNS_CACHE_TTL = 10
+# Largest LZ77 window of permessage-deflate, used when compression is enabled with True
+DEFLATE_WINDOW_BITS = 15
+
+
+class PoolStats(NamedTuple):
+    """
+    Connection pool statistics of an :py:class:`AiohttpConsumer`.
+
+    The totals are counted by the consumer through aiohttp's tracing signals. aiohttp has no public interface for
+    the current state of the pool, so ``active``, ``idle``, and ``waiting`` are best-effort values read from the
+    private attributes of the connector. They are ``None`` if the installed aiohttp version does not have them.
+
+    Attributes:
+        limit: Maximum number of connections, ``0`` means no limit.
+        limit_per_host: Maximum number of connections to the same endpoint, ``0`` means no limit.
+        active: Connections currently used by a request.
+        idle: Open connections kept alive for reuse.
+        waiting: Requests currently waiting for a free connection.
+        acquire_waits: Total number of requests that had to wait for a free connection.
+        created: Total number of connections opened.
+        reused: Total number of requests served by a kept-alive connection.
+    """
+    limit: int
+    limit_per_host: int
+    active: Optional[int]
+    idle: Optional[int]
+    waiting: Optional[int]
+    acquire_waits: int
+    created: int
+    reused: int
+
 
 class AiohttpConsumer(BaseConsumer, protocol=constants.Protocol.HTTP):
     """
     Asynchronous consumer based on AioHttp.
+
+    All requests share one connection pool, which is created during :py:meth:`async_startup`.
+    Use :py:meth:`pool_stats` to see how well the pool fits the traffic.
+
+    Args:
+        keyfile: Certificate keyfile.
+        certfile: Certificate certfile.
+        cafile: Certificate authority file.
+        pool_limit: Maximum number of simultaneous connections, ``0`` means no limit.
+        pool_limit_per_host: Maximum number of simultaneous connections to the same endpoint, ``0`` means no limit.
+        keepalive_timeout: Time in seconds that idle connections are kept open for reuse.
+        dns_cache_ttl: Time in seconds that resolved addresses are cached, ``None`` caches them forever.
+        connector: Connector used instead of the default :py:class:`aiohttp.TCPConnector`,
+                   the pool arguments are ignored when it is given. The consumer does not close it.
+        json_codec: JSON codec or library name, see :py:func:`~arrowhead_client.codec.get_json_codec`.
+        metrics: Request metrics, see :py:func:`~arrowhead_client.metrics.get_metrics`. Disabled by default.
+        tracer: Tracer, see :py:func:`~arrowhead_client.tracing.get_tracer`. Disabled by default.
     """
 
     def __init__(
@@ -18,105 +81,305 @@ class AiohttpConsumer(BaseConsumer, protocol=constants.Protocol.HTTP):
             keyfile: str,
             certfile: str,
             cafile: str,
+            pool_limit: int = DEFAULT_POOL_LIMIT,
+            pool_limit_per_host: int = DEFAULT_POOL_LIMIT_PER_HOST,
+            keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+            dns_cache_ttl: Optional[int] = DEFAULT_DNS_CACHE_TTL,
+            connector: Optional[aiohttp.BaseConnector] = None,
+            json_codec: Union[None, str, JsonCodec] = None,
+            metrics: Union[None, bool, Metrics] = None,
+            tracer: Union[None, bool, Tracer] = None,
     ):
-        super().__init__(keyfile, certfile, cafile)
+        super().__init__(keyfile, certfile, cafile, json_codec, metrics, tracer)
         if keyfile and certfile and cafile:
             self.ssl_context = ssl.create_default_context(cafile=cafile)
             self.ssl_context.load_cert_chain(certfile, keyfile)
         else:
             self.ssl_context = ssl.create_default_context()
 
+        self.pool_limit = pool_limit
+        self.pool_limit_per_host = pool_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connector = connector
+        self._owns_connector = connector is None
+        self._acquire_waits = 0
+        self._created = 0
+        self._reused = 0
+
         self.http_session: aiohttp.ClientSession
 
     async def async_startup(self):
-        self.http_session = aiohttp.ClientSession()
+        if self.connector is None:
+            # The SSL context is given to the connector once instead of to every request
+            self.connector = aiohttp.TCPConnector(
+                    ssl=self.ssl_context,
+                    limit=self.pool_limit,
+                    limit_per_host=self.pool_limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.dns_cache_ttl,
+            )
+
+        # A connector given by the caller is left open when the session is closed, so that it can be used again
+        self.http_session = aiohttp.ClientSession(
+                connector=self.connector,
+                connector_owner=self._owns_connector,
+                trace_configs=[self._pool_trace_config()],
+        )
+
+    def _pool_trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_connection_queued_start(session, context, params):
+            self._acquire_waits += 1
+
+        async def on_connection_create_end(session, context, params):
+            self._created += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self._reused += 1
+
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+
+        return trace_config
+
+    def pool_stats(self) -> PoolStats:
+        """
+        Returns statistics of the connection pool, all counts are zero before :py:meth:`async_startup`.
+        """
+        connector = self.connector
+        if connector is None:
+            return PoolStats(self.pool_limit, self.pool_limit_per_host, 0, 0, 0, 0, 0, 0)
+
+        return PoolStats(
+                limit=connector.limit,
+                limit_per_host=connector.limit_per_host,
+                active=_pool_size(getattr(connector, '_acquired', None)),
+                idle=_pool_size(getattr(connector, '_conns', None)),
+                waiting=_pool_size(getattr(connector, '_waiters', None)),
+                acquire_waits=self._acquire_waits,
+                created=self._created,
+                reused=self._reused,
+        )
 
     async def async_shutdown(self):
         await self.http_session.close()
+        if self._owns_connector:
+            # Closing the session closes the connector, a new one is created if the consumer is started again
+            self.connector = None
 
     async def consume_service(  # type: ignore
             self,
             rule: OrchestrationRule,
             **kwargs,
     ) -> Response:
-        headers = kwargs.get('headers', {})
+        headers = kwargs.pop('headers', {})
         if rule.secure:
             auth_header = {'Authorization': f'Bearer {rule.authorization_token}'}
             headers = {**headers, **auth_header}
 
-        async with self.http_session.request(
-                rule.method,
-                f'{http(rule.secure)}{rule.endpoint}',
-                headers=headers,
-                ssl=self.ssl_context,
-                **kwargs,
-        ) as resp:
-            status_code = resp.status
-            raw_response = await resp.read()
+        timeout = kwargs.get('timeout')
+        if isinstance(timeout, Timeout):
+            kwargs['timeout'] = aiohttp.ClientTimeout(sock_connect=timeout.connect, sock_read=timeout.read)
+
+        json_body = kwargs.pop('json', None)
+        if json_body is not None:
+            kwargs['data'] = self.json_codec.dumps(json_body)
+            headers = {'Content-Type': 'application/json', **headers}
 
-        return Response(raw_response, rule.payload_type, status_code)
+        url = f'{http(rule.secure)}{rule.endpoint}'
+        with self._request_span(rule, url) as span, self.metrics.consumer_request(rule) as timer:
+            async with self.http_session.request(
+                    rule.method,
+                    url,
+                    headers=self.tracer.inject(headers),
+                    **kwargs,
+            ) as resp:
+                status_code = resp.status
+                raw_response = await resp.read()
+            timer.status = status_code
+            span.set_attribute('http.status_code', status_code)
+
+        return Response(raw_response, rule.payload_type, status_code, codec=self.json_codec)
 
     async def connect(
             self,
             rule: OrchestrationRule,
+            batch_codec: Union[None, str, BinaryCodec] = None,
+            batch_window: float = DEFAULT_BATCH_WINDOW,
+            max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+            compress: Union[bool, int] = False,
+            high_watermark: int = DEFAULT_HIGH_WATERMARK,
+            low_watermark: Optional[int] = None,
             **kwargs,
     ) -> "WebSocketResponse":
-        headers = kwargs.get('headers', {})
+        """
+        Opens a WebSocket connection to the provider of ``rule``.
+
+        Args:
+            rule: Orchestration rule.
+            batch_codec: Codec or format name of batched records, see :py:func:`~arrowhead_client.codec.get_binary_codec`.
+            batch_window: Time in seconds that records sent with :py:meth:`WebSocketResponse.send_record` are collected
+                          into one batch.
+            max_batch_size: Maximum number of records in one batch.
+            compress: If ``True``, the permessage-deflate extension is offered to the provider. An integer offers it
+                      with that LZ77 window size in bits, between 9 and 15.
+            high_watermark: Number of messages in the send queue at which queueing more messages waits,
+                            see :py:meth:`~arrowhead_client.response.ConnectionResponse.enqueue`.
+            low_watermark: Number of messages in the send queue at which waiting producers resume.
+        Returns:
+            WebSocket connection.
+        """
+        headers = kwargs.pop('headers', {})
         if rule.secure:
             auth_header = {'Authorization': f'Bearer {rule.authorization_token}'}
             headers = {**headers, **auth_header}
 
         connection = await self.http_session.ws_connect(
                 f'{ws(rule.secure)}{rule.endpoint}',
-                ssl=self.ssl_context,
-                headers=headers,
+                headers=self.tracer.inject(headers),
+                compress=DEFLATE_WINDOW_BITS if compress is True else int(compress),
                 **kwargs,
         )
 
-        return WebSocketResponse(connection, rule.payload_type)
+        return WebSocketResponse(
+                connection,
+                rule.payload_type,
+                self.json_codec,
+                batch_codec=get_binary_codec(batch_codec, self.json_codec),
+                batch_window=batch_window,
+                max_batch_size=max_batch_size,
+                high_watermark=high_watermark,
+                low_watermark=low_watermark,
+        )
+
+
+class WebSocketResponse(BatchConnectionResponse):
+    """
+    WebSocket connection opened by :py:meth:`AiohttpConsumer.connect`.
+
+    Besides single messages, sent with :py:meth:`send` and received with :py:meth:`receive`, the connection sends
+    and receives batches of records, see :py:class:`~arrowhead_client.response.BatchConnectionResponse`.
+    A batch is encoded by ``batch_codec`` in one binary frame.
 
+    Args:
+        connector: aiohttp WebSocket connection.
+        payload_type: Payload type of single messages.
+        codec: JSON codec of single messages.
+        batch_codec: Codec of batches, see :py:func:`~arrowhead_client.codec.get_binary_codec`.
+        batch_window: Time in seconds that records are collected into one batch.
+        max_batch_size: Maximum number of records in one batch.
+        high_watermark: Number of queued messages at which :py:meth:`enqueue` and :py:meth:`send_record` wait.
+        low_watermark: Number of queued messages at which waiting producers resume.
+    """
 
-class WebSocketResponse(ConnectionResponse):
     def __init__(
             self,
             connector: aiohttp.ClientWebSocketResponse,
             payload_type,
+            codec: Optional[JsonCodec] = None,
+            batch_codec: Optional[BinaryCodec] = None,
+            batch_window: float = DEFAULT_BATCH_WINDOW,
+            max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+            high_watermark: int = DEFAULT_HIGH_WATERMARK,
+            low_watermark: Optional[int] = None,
     ):
-        super().__init__(connector)
+        super().__init__(connector, high_watermark, low_watermark, batch_window, max_batch_size)
         self.payload_type = payload_type
+        self.codec = codec or get_json_codec()
+        self.batch_codec = batch_codec or get_binary_codec(json_codec=self.codec)
 
     async def send(self, data):
         if self.payload_type == constants.Payload.JSON:
-            return await self._connector.send_json(data)
+            return await self._connector.send_json(data, dumps=self.codec.dumps_str)
         elif self.payload_type == constants.Payload.TEXT:
             return await self._connector.send_str(data)
         else:
             return await self._connector.send_bytes(data)
 
     async def receive(self):
-        # TODO: This try clause is a janky solution to fix an error that occurs when connection is closed
-        # while a message is awaited that is not of the correct type. There is definetly a better solution
-        # to this but it is unclear at the moment.
-        try:
-            if self.payload_type == constants.Payload.JSON:
-                res = await self._connector.receive_json()
-            elif self.payload_type == constants.Payload.TEXT:
-                res = await self._connector.receive_str()
-            else:
-                res = await self._connector.receive_bytes()
-        except TypeError as e:
-            if str(e) == 'Received message 8:1000 is not str':
-                return
-            raise e
+        """
+        Receives one message, decoded according to the payload type.
+
+        Returns:
+            The message, or ``None`` if the connection was closed.
+        Raises:
+            ValueError: If a JSON message is not valid JSON.
+        """
+        message = await self._connector.receive()
+        if message.type not in _DATA_MESSAGES:
+            return _closed_or_raise(message)
+
+        if self.payload_type == constants.Payload.JSON:
+            return self.codec.loads(message.data)
+        elif self.payload_type == constants.Payload.TEXT and message.type == aiohttp.WSMsgType.BINARY:
+            return message.data.decode()
+        elif self.payload_type not in (constants.Payload.JSON, constants.Payload.TEXT) \
+                and message.type == aiohttp.WSMsgType.TEXT:
+            return message.data.encode()
+
+        return message.data
+
+    async def send_batch(self, records: Sequence[Any]) -> None:
+        """ Sends ``records`` as one batch. """
+        await self._connector.send_bytes(self.batch_codec.dumps(list(records)))
+
+    async def receive_batch(self) -> Optional[List[Any]]:
+        """
+        Receives one batch.
+
+        Batches in text frames are decoded as JSON, for providers that do not send binary frames.
+
+        Returns:
+            List of records, or ``None`` if the connection was closed.
+        Raises:
+            ValueError: If the frame is not a valid batch.
+        """
+        message = await self._connector.receive()
+        if message.type == aiohttp.WSMsgType.BINARY:
+            records = self.batch_codec.loads(message.data)
+        elif message.type == aiohttp.WSMsgType.TEXT:
+            records = self.codec.loads(message.data)
         else:
-            return res
+            return _closed_or_raise(message)
+
+        if not isinstance(records, list):
+            raise ValueError(f'Expected a batch of records, received {type(records).__name__}')
+
+        return records
 
     async def close(self):
-        return await self._connector.close()
+        """ Sends the queued messages and closes the connection. """
+        try:
+            if not self._connector.closed and self._send_error is None:
+                await self.flush()
+        finally:
+            await self._stop_sender()
+            await self._connector.close()
 
     def closed(self):
         return self._connector.closed
 
+    @property
+    def close_code(self) -> Optional[int]:
+        return self._connector.close_code
+
+
+_DATA_MESSAGES = (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY)
+
+
+def _closed_or_raise(message: aiohttp.WSMessage) -> None:
+    """
+    Handles a message that carries no data, which is a close message, or an error when the connection failed.
+    Pings and pongs are answered by aiohttp and never returned by ``receive``.
+    """
+    if message.type == aiohttp.WSMsgType.ERROR:
+        raise message.data
+
+    return None
+
 
 def http(secure: str) -> str:
     if secure == constants.Security.INSECURE:
@@ -128,3 +391,18 @@ def ws(secure: str) -> str:
     if secure == constants.Security.INSECURE:
         return 'ws://'
     return 'wss://'
+
+
+def _pool_size(pool: Any) -> Optional[int]:
+    """
+    Number of connections or waiters in a private pool attribute of an aiohttp connector, either a collection or a
+    mapping of endpoints to collections. Returns ``None`` if the attribute is missing or has an unknown type.
+    """
+    if isinstance(pool, Mapping):
+        if not all(isinstance(per_host, Sized) for per_host in pool.values()):
+            return None
+        return sum(len(per_host) for per_host in pool.values())
+    if isinstance(pool, Sized):
+        return len(pool)
+
+    return None
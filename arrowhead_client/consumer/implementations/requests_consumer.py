@@ -1,14 +1,43 @@
+import threading
+import weakref
+from typing import Union
+
 import requests
+from requests.adapters import HTTPAdapter, DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE
 
+from arrowhead_client.cache import TTLCache
+from arrowhead_client.codec import JsonCodec
+from arrowhead_client.metrics import Metrics
+from arrowhead_client.tracing import Tracer
+from arrowhead_client.resilience import Timeout
 from arrowhead_client.consumer.base import BaseConsumer
 from arrowhead_client.response import Response
 from arrowhead_client.rules import OrchestrationRule
 from arrowhead_client import constants
 
+DEFAULT_AUTH_CACHE_SIZE = 256
+
 
 class RequestsConsumer(BaseConsumer, protocol=constants.Protocol.HTTP):
     """
     Consumer based on requests.
+
+    Each session mounts an :py:class:`requests.adapters.HTTPAdapter` sized by the pool arguments.
+    Set ``pool_maxsize`` to at least the number of threads consuming services at the same time,
+    otherwise connections are closed and reopened when the pool is full.
+
+    Args:
+        keyfile: Certificate keyfile.
+        certfile: Certificate certfile.
+        cafile: Certificate authority file.
+        pool_connections: Number of hosts that connection pools are kept for.
+        pool_maxsize: Maximum number of connections kept open to each host.
+        pool_block: If ``True``, requests wait for a free connection instead of opening a new one when the pool is full.
+        thread_local_sessions: If ``True``, every thread uses its own session, which avoids sharing a
+                               :py:class:`requests.Session` between many worker threads.
+        json_codec: JSON codec or library name, see :py:func:`~arrowhead_client.codec.get_json_codec`.
+        metrics: Request metrics, see :py:func:`~arrowhead_client.metrics.get_metrics`. Disabled by default.
+        tracer: Tracer, see :py:func:`~arrowhead_client.tracing.get_tracer`. Disabled by default.
     """
 
     def __init__(
@@ -16,12 +45,63 @@ class RequestsConsumer(BaseConsumer, protocol=constants.Protocol.HTTP):
             keyfile: str,
             certfile: str,
             cafile: str,
+            pool_connections: int = DEFAULT_POOLSIZE,
+            pool_maxsize: int = DEFAULT_POOLSIZE,
+            pool_block: bool = DEFAULT_POOLBLOCK,
+            thread_local_sessions: bool = False,
+            json_codec: Union[None, str, JsonCodec] = None,
+            metrics: Union[None, bool, Metrics] = None,
+            tracer: Union[None, bool, Tracer] = None,
     ):
-        super().__init__(keyfile, certfile, cafile)
-        self.session = requests.Session()
-        self.session.verify = True
-        self.session.cert = (certfile, keyfile)
+        super().__init__(keyfile, certfile, cafile, json_codec, metrics, tracer)
         self.cafile = cafile
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.thread_local_sessions = thread_local_sessions
+        self._auth_cache = TTLCache(maxsize=DEFAULT_AUTH_CACHE_SIZE)
+        self._local = threading.local()
+        # Sessions of finished threads are dropped together with their thread-local storage
+        self._sessions: 'weakref.WeakSet[requests.Session]' = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
+        self._shared_session = None if thread_local_sessions else self._create_session()
+
+    @property
+    def session(self) -> requests.Session:
+        """ Session used by the current thread. """
+        if self._shared_session is not None:
+            return self._shared_session
+
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._create_session()
+
+        return session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.verify = self.cafile or False
+        session.cert = (self.certfile, self.keyfile)
+        adapter = HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+                pool_block=self.pool_block,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        with self._sessions_lock:
+            self._sessions.add(session)
+
+        return session
+
+    def _auth(self, token: str) -> 'ArrowheadTokenAuth':
+        auth = self._auth_cache.get(token)
+        if auth is None:
+            auth = ArrowheadTokenAuth(token)
+            self._auth_cache.set(token, auth)
+
+        return auth
 
     def consume_service(
             self,
@@ -30,15 +110,42 @@ class RequestsConsumer(BaseConsumer, protocol=constants.Protocol.HTTP):
     ) -> Response:
         """ Consume registered provided_service """
 
-        service_response = self.session.request(
-                rule.method,
-                url=f'{http(rule.secure)}{rule.endpoint}',
-                auth=ArrowheadTokenAuth(rule.authorization_token),
-                verify=self.cafile,
-                **kwargs
+        timeout = kwargs.get('timeout')
+        if isinstance(timeout, Timeout):
+            kwargs['timeout'] = (timeout.connect, timeout.read)
+
+        json_body = kwargs.pop('json', None)
+        if json_body is not None:
+            kwargs['data'] = self.json_codec.dumps(json_body)
+            kwargs['headers'] = {'Content-Type': 'application/json', **kwargs.get('headers', {})}
+
+        url = f'{http(rule.secure)}{rule.endpoint}'
+        with self._request_span(rule, url) as span, self.metrics.consumer_request(rule) as timer:
+            if self.tracer.enabled:
+                kwargs['headers'] = self.tracer.inject(kwargs.get('headers') or {})
+            service_response = self.session.request(
+                    rule.method,
+                    url=url,
+                    auth=self._auth(rule.authorization_token),
+                    **kwargs
+            )
+            timer.status = service_response.status_code
+            span.set_attribute('http.status_code', service_response.status_code)
+
+        return Response(
+                service_response.content,
+                rule.payload_type,
+                service_response.status_code,
+                codec=self.json_codec,
         )
 
-        return Response(service_response.content, rule.payload_type, service_response.status_code)
+    def close(self) -> None:
+        """ Closes the sessions of all threads. """
+        with self._sessions_lock:
+            sessions = list(self._sessions)
+
+        for session in sessions:
+            session.close()
 
 
 def http(secure: str) -> str:
@@ -4,13 +4,19 @@ DTO Module
 
 Contains the :py:class:`~arrowhead_client.dto.DTOMixin` class.
 """
+import json
 import re
 from abc import ABC
+from collections import deque
 from datetime import datetime, timedelta
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple, Type
 
 from pydantic.v1 import BaseModel
 from pydantic.v1.json import timedelta_isoformat, isoformat
 
+from arrowhead_client.codec import get_json_codec
 from arrowhead_client.service import ServiceInterface
 
 
@@ -48,6 +54,57 @@ def to_snake_case(variable_name: str) -> str:
            '_'.join([camel.lower() for camel in split_camel]) + trailing_underscore
 
 
+def json_dumps(value: Any, *, default: Callable[[Any], Any], **kwargs) -> str:
+    """
+    Encodes DTOs with the default JSON codec.
+    Formatting options like ``indent`` are only supported by the standard library, which is used when they are given.
+    """
+    if kwargs:
+        return json.dumps(value, default=default, **kwargs)
+
+    return get_json_codec().dumps_str(value, default=default)
+
+
+def json_loads(data: Any) -> Any:
+    """ Decodes JSON with the default JSON codec. """
+    return get_json_codec().loads(data)
+
+
+_missing = object()
+_scalar_types = (str, int, float, bool, type(None))
+_sequence_types = (list, tuple, set, frozenset, deque)
+
+
+@lru_cache(maxsize=None)
+def _field_table(model: Type[BaseModel]) -> Tuple[Tuple[str, str, bool, Any], ...]:
+    """
+    Returns ``(name, alias, has_default, default)`` for every field of ``model``, computed once per class.
+    """
+    return tuple(
+            (name, field.alias, not field.required, field.default)
+            for name, field in model.__fields__.items()
+    )
+
+
+def _dto_value(value: Any) -> Any:
+    if isinstance(value, _scalar_types):
+        return value
+    if isinstance(value, DTOMixin):
+        return value.dto()
+    if isinstance(value, BaseModel):
+        return value.dict(exclude_defaults=True, exclude_none=True, by_alias=True)
+    if isinstance(value, dict):
+        return {key: _dto_value(item) for key, item in value.items()}
+    if isinstance(value, _sequence_types):
+        items = (_dto_value(item) for item in value)
+        # Named tuples are created from positional arguments
+        return value.__class__(*items) if hasattr(value, '_fields') else value.__class__(items)
+    if isinstance(value, Enum):
+        return value.value
+
+    return value
+
+
 class DTOMixin(ABC, BaseModel):
     """
     Mixin to create data-transfer objects from class.
@@ -70,14 +127,49 @@ class DTOMixin(ABC, BaseModel):
             timedelta: timedelta_isoformat,
             ServiceInterface: lambda i: 'hello',
         }
-
-    def dto(self, **kwargs):
-        return self.dict(
-                exclude_defaults=True,
-                exclude_none=True,
-                by_alias=True,
-                **kwargs,
-        )
+        json_dumps = json_dumps
+        json_loads = json_loads
+
+    @classmethod
+    def _create(cls, trusted: bool = False, **values):
+        """
+        Creates an instance from keyword arguments.
+
+        Args:
+            trusted: If ``True``, the values are stored without validation, see :py:meth:`pydantic.BaseModel.construct`.
+                     Only use it for values created by the library itself that are known to be valid.
+        """
+        if trusted:
+            return cls.construct(**values)
+
+        return cls(**values)
+
+    def dto(self, **kwargs) -> Dict[str, Any]:
+        """
+        Returns the data-transfer object form of the instance, a dictionary with camelCase keys
+        where unset optional fields are left out.
+
+        Keyword arguments are passed to :py:meth:`pydantic.BaseModel.dict`.
+        Without keyword arguments, the result is computed with field tables cached per class, which gives the same
+        result as ``dict(exclude_defaults=True, exclude_none=True, by_alias=True)`` but is considerably faster.
+        """
+        if kwargs:
+            return self.dict(
+                    exclude_defaults=True,
+                    exclude_none=True,
+                    by_alias=True,
+                    **kwargs,
+            )
+
+        values = self.__dict__
+        dto = {}
+        for name, alias, has_default, default in _field_table(self.__class__):
+            value = values.get(name, _missing)
+            if value is None or value is _missing or (has_default and value == default):
+                continue
+            dto[alias] = _dto_value(value)
+
+        return dto
 
     def json(
             self,
@@ -32,3 +32,11 @@ class CoreServiceNotAvailableError(ArrowheadError):
 
 class NoAvailableServicesError(ArrowheadError):
     pass
+
+
+class ConnectionClosedError(ArrowheadError):
+    """ Exception raised when a connection is used after it was closed. """
+
+
+class CircuitOpenError(NoAvailableServicesError):
+    """ Exception raised when the circuit breakers of all providers of a service are open. """
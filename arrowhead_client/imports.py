@@ -0,0 +1,113 @@
+"""
+==============
+Imports Module
+==============
+
+Helpers for importing optional implementations on first use.
+
+The consumer and provider implementations depend on large third party packages, like FastAPI, uvicorn, Flask,
+and aiohttp. These are only imported when an implementation is actually used, so that a program using only
+:py:class:`~arrowhead_client.client.implementations.SyncClient`, or only a consumer, does not pay the import time
+of the packages it never uses.
+
+Implementations are given as :code:`'module:attribute'` strings, for example
+:code:`'arrowhead_client.provider.implementations.httpprovider:FlaskProvider'`.
+"""
+import importlib
+from typing import Any, Callable, Dict, List, Optional
+
+
+def import_string(path: str) -> Any:
+    """
+    Imports an attribute of a module.
+
+    Args:
+        path: Module and attribute name separated by a colon, :code:`'module:attribute'`.
+    Returns:
+        The imported attribute.
+    Raises:
+        ImportError: If the module or the attribute can not be imported.
+    """
+    module_name, _, attribute = path.partition(':')
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, attribute)
+    except AttributeError:
+        raise ImportError(f'Module \'{module_name}\' has no attribute \'{attribute}\'') from None
+
+
+class LazyAttribute:
+    """
+    Class attribute that is imported the first time it is accessed.
+
+    Args:
+        path: Import path of the attribute, :code:`'module:attribute'`.
+
+    Example::
+
+        class SyncClient(ArrowheadClientSync):
+            __arrowhead_provider__ = LazyAttribute(
+                    'arrowhead_client.provider.implementations.httpprovider:FlaskProvider'
+            )
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._value: Optional[Any] = None
+
+    def __get__(self, instance, owner) -> Any:
+        if self._value is None:
+            self._value = import_string(self.path)
+        return self._value
+
+    def __repr__(self) -> str:
+        return f'LazyAttribute({self.path!r})'
+
+
+def lazy_module_attributes(
+        module_globals: Dict[str, Any],
+        attributes: Dict[str, str],
+) -> Callable[[str], Any]:
+    """
+    Creates a module level :code:`__getattr__` function (:pep:`562`) that imports attributes on first access.
+
+    Imported attributes are stored in the module namespace, so that :code:`__getattr__` is called at most once
+    per attribute.
+
+    Args:
+        module_globals: Namespace of the module, :code:`globals()`.
+        attributes: Import paths of the lazy attributes by attribute name.
+    Returns:
+        The :code:`__getattr__` function of the module.
+
+    Example::
+
+        __getattr__ = lazy_module_attributes(globals(), {
+            'FlaskProvider': 'arrowhead_client.provider.implementations.httpprovider:FlaskProvider',
+        })
+    """
+    module_name = module_globals['__name__']
+
+    def __getattr__(name: str) -> Any:
+        try:
+            path = attributes[name]
+        except KeyError:
+            raise AttributeError(f'module \'{module_name}\' has no attribute \'{name}\'') from None
+
+        value = import_string(path)
+        module_globals[name] = value
+        return value
+
+    return __getattr__
+
+
+def lazy_module_dir(module_globals: Dict[str, Any], attributes: Dict[str, str]) -> Callable[[], List[str]]:
+    """
+    Creates a module level :code:`__dir__` function (:pep:`562`) that lists the lazy attributes
+    before they are imported.
+    """
+
+    def __dir__() -> List[str]:
+        return sorted({*module_globals, *attributes})
+
+    return __dir__
@@ -0,0 +1,198 @@
+"""
+=====================
+Load Balancing Module
+=====================
+
+Strategies used to pick a provider when the orchestrator returns more than one provider for a service definition.
+"""
+from __future__ import annotations
+
+import itertools
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Sequence, Union
+
+from arrowhead_client import constants
+
+if TYPE_CHECKING:
+    from arrowhead_client.rules import OrchestrationRule
+
+
+class LoadBalancingStrategy(ABC):
+    """
+    Abstract class for load balancing strategies.
+
+    Every strategy keeps track of the number of outstanding requests and an exponentially weighted moving
+    average (EWMA) of the latency of each provider, which subclasses can use to select a provider.
+    Providers are identified by the endpoint of their orchestration rule.
+
+    Args:
+        decay: Weight of the newest latency sample in the moving average, between 0 and 1.
+        failure_penalty: Latency in seconds recorded for failed requests that fail faster than this.
+    """
+
+    def __init__(self, decay: float = 0.3, failure_penalty: float = 1.0):
+        if not 0 < decay <= 1:
+            raise ValueError('decay must be in the interval (0, 1]')
+        self.decay = decay
+        self.failure_penalty = failure_penalty
+        self._lock = threading.Lock()
+        self._outstanding: Dict[str, int] = defaultdict(int)
+        self._latency: Dict[str, float] = {}
+
+    @abstractmethod
+    def select(self, rules: Sequence[OrchestrationRule]) -> OrchestrationRule:
+        """
+        Selects one of the given orchestration rules.
+
+        Args:
+            rules: Non-empty sequence of orchestration rules for the same service definition.
+        Returns:
+            The selected orchestration rule.
+        """
+
+    def outstanding(self, rule: OrchestrationRule) -> int:
+        """ Number of requests in progress to the provider of ``rule``. """
+        return self._outstanding.get(rule.endpoint, 0)
+
+    def latency(self, rule: OrchestrationRule) -> Optional[float]:
+        """ Moving average of the latency of the provider of ``rule``, ``None`` if it has not been used yet. """
+        return self._latency.get(rule.endpoint)
+
+    def on_request_start(self, rule: OrchestrationRule) -> None:
+        """ Called when a request to the provider of ``rule`` is sent. """
+        with self._lock:
+            self._outstanding[rule.endpoint] += 1
+
+    def on_request_end(self, rule: OrchestrationRule, latency: float, success: bool = True) -> None:
+        """
+        Called when a request to the provider of ``rule`` is finished.
+
+        Args:
+            rule: Orchestration rule used by the request.
+            latency: Request latency in seconds.
+            success: ``False`` if the request raised an error.
+        """
+        if not success:
+            latency = max(latency, self.failure_penalty)
+
+        with self._lock:
+            self._outstanding[rule.endpoint] = max(self._outstanding[rule.endpoint] - 1, 0)
+            previous = self._latency.get(rule.endpoint)
+            self._latency[rule.endpoint] = latency if previous is None else \
+                self.decay * latency + (1 - self.decay) * previous
+
+    @contextmanager
+    def track(self, rule: OrchestrationRule) -> Iterator[None]:
+        """
+        Context manager that records a request to the provider of ``rule``.
+
+        Example::
+
+            with strategy.track(rule):
+                response = consumer.consume_service(rule)
+        """
+        self.on_request_start(rule)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.on_request_end(rule, time.perf_counter() - start, success=False)
+            raise
+        else:
+            self.on_request_end(rule, time.perf_counter() - start)
+
+
+class RoundRobinStrategy(LoadBalancingStrategy):
+    """
+    Cycles through the providers of each service definition in order.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counters: Dict[str, Iterator[int]] = defaultdict(itertools.count)
+
+    def select(self, rules: Sequence[OrchestrationRule]) -> OrchestrationRule:
+        counter = self._counters[rules[0].service_definition]
+        return rules[next(counter) % len(rules)]
+
+
+class LeastOutstandingStrategy(LoadBalancingStrategy):
+    """
+    Selects the provider with the fewest requests in progress, ties are broken at random.
+    """
+
+    def select(self, rules: Sequence[OrchestrationRule]) -> OrchestrationRule:
+        fewest = min(self.outstanding(rule) for rule in rules)
+        return random.choice([rule for rule in rules if self.outstanding(rule) == fewest])
+
+
+class LatencyEWMAStrategy(LoadBalancingStrategy):
+    """
+    Selects the provider with the lowest moving average latency.
+
+    Providers that have not been used yet are selected first, so that every provider gets a latency estimate.
+    """
+
+    def select(self, rules: Sequence[OrchestrationRule]) -> OrchestrationRule:
+        unmeasured = [rule for rule in rules if self.latency(rule) is None]
+        if unmeasured:
+            return random.choice(unmeasured)
+
+        return min(rules, key=lambda rule: self.latency(rule))  # type: ignore
+
+
+class PowerOfTwoChoicesStrategy(LoadBalancingStrategy):
+    """
+    Picks two providers at random and selects the least loaded of them.
+
+    The load of a provider is its number of outstanding requests, weighted by its moving average latency
+    when one is known.
+    """
+
+    def select(self, rules: Sequence[OrchestrationRule]) -> OrchestrationRule:
+        if len(rules) == 1:
+            return rules[0]
+
+        first, second = random.sample(list(rules), 2)
+        return min(first, second, key=self._load)
+
+    def _load(self, rule: OrchestrationRule) -> float:
+        latency = self.latency(rule)
+        return (self.outstanding(rule) + 1) * (latency if latency is not None else 0.0)
+
+
+def get_load_balancing_strategy(
+        strategy: Union[str, LoadBalancingStrategy] = constants.LoadBalancing.ROUND_ROBIN,
+        **kwargs,
+) -> LoadBalancingStrategy:
+    """
+    Factory function for load balancing strategies.
+
+    Args:
+        strategy: Either a strategy instance, which is returned as-is, or one of :code:`ROUND_ROBIN`,
+                  :code:`LEAST_OUTSTANDING`, :code:`LATENCY_EWMA`, or :code:`POWER_OF_TWO_CHOICES`.
+        **kwargs: Keyword arguments passed to the strategy.
+    Returns:
+        Initialized LoadBalancingStrategy instance.
+    """
+    if isinstance(strategy, LoadBalancingStrategy):
+        return strategy
+
+    strategies = {
+        constants.LoadBalancing.ROUND_ROBIN.value: RoundRobinStrategy,
+        constants.LoadBalancing.LEAST_OUTSTANDING.value: LeastOutstandingStrategy,
+        constants.LoadBalancing.LATENCY_EWMA.value: LatencyEWMAStrategy,
+        constants.LoadBalancing.POWER_OF_TWO_CHOICES.value: PowerOfTwoChoicesStrategy,
+    }
+    if isinstance(strategy, str) and strategy.upper() in strategies:
+        return strategies[strategy.upper()](**kwargs)  # type: ignore
+
+    raise ValueError(
+            f'{strategy} is not a valid load balancing strategy. '
+            f'Valid strategies are {set(name.value for name in constants.LoadBalancing)}'
+    )
@@ -1,8 +1,128 @@
+"""
+===========
+Logs Module
+===========
+
+Loggers of Arrowhead systems, which write to ``~/.arrowhead_system_logs/<system name>.log`` by default.
+
+Log files are rotated when they reach ``max_bytes``. With ``queued=True``, log records are put on a queue and
+written by a background thread, so that logging never blocks on file I/O, which matters for the event loop of
+asynchronous clients. With ``json_format=True``, every record is written as one JSON object per line.
+
+Calling :py:func:`get_logger` again with the same name replaces the handlers added by the previous call,
+instead of adding more handlers that would write every record several times.
+"""
+import atexit
+import copy
+import datetime
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import weakref
 from pathlib import Path
+from typing import Optional, Union
+
+from arrowhead_client.codec import get_json_codec
 
 FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+DEFAULT_LOG_DIR = Path.home() / '.arrowhead_system_logs'
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+# Attributes of every log record, everything else was given in the ``extra`` argument of the log call
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_queue_handlers: 'weakref.WeakSet[LogQueueHandler]' = weakref.WeakSet()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as single line JSON objects.
+
+    Every object has the keys ``time``, ``level``, ``logger``, ``message``, ``process``, and ``thread``, and
+    ``exception`` if an exception was logged. Values given in the ``extra`` argument of the log call are added
+    as additional keys.
+
+    Example output::
+
+        {"time":"2021-03-01T12:00:00.000+00:00","level":"INFO","logger":"example","message":"Started",...}
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.codec = get_json_codec()
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(
+                    timespec='milliseconds',
+            ),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+
+        return self.codec.dumps_str(entry, default=str)
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler whose records are written by a :py:class:`logging.handlers.QueueListener` thread.
+
+    Unlike :py:class:`logging.handlers.QueueHandler`, records are not formatted before they are queued, only their
+    message and exception text are resolved, so the handlers of the listener can still format them freely.
+
+    Args:
+        handlers: Handlers that write the records in the background thread.
+    """
+
+    def __init__(self, *handlers: logging.Handler):
+        super().__init__(queue.SimpleQueue())
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self._running = True
+        _queue_handlers.add(self)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = FORMATTER.formatException(record.exc_info)
+        record.exc_info = None
+
+        return record
+
+    def close(self) -> None:
+        """ Writes the queued records and stops the background thread. """
+        if self._running:
+            self._running = False
+            self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        _queue_handlers.discard(self)
+        super().close()
+
+    def _restart(self) -> None:
+        # The listener thread does not survive a fork, and the queue may have been locked by another thread
+        self.queue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(
+                self.queue,
+                *self.listener.handlers,
+                respect_handler_level=True,
+        )
+        self.listener.start()
 
 
 def get_console_handler():
@@ -11,20 +131,61 @@ def get_console_handler():
     return console_handler
 
 
-def get_file_handler(filename):
-    file_handler = logging.FileHandler(filename)
-    file_handler.setFormatter(FORMATTER)
+def get_file_handler(
+        filename,
+        max_bytes: int = 0,
+        backup_count: int = 0,
+        formatter: Optional[logging.Formatter] = None,
+) -> logging.Handler:
+    """
+    Creates a handler writing to ``filename``.
+
+    Args:
+        filename: Log file path.
+        max_bytes: Size in bytes at which the file is rotated, ``0`` never rotates the file.
+        backup_count: Number of rotated files kept.
+        formatter: Formatter of the handler, defaults to :py:data:`FORMATTER`.
+    Returns:
+        File handler.
+    """
+    if max_bytes:
+        file_handler: logging.Handler = logging.handlers.RotatingFileHandler(
+                filename,
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+        )
+    else:
+        file_handler = logging.FileHandler(filename)
+    file_handler.setFormatter(formatter or FORMATTER)
     return file_handler
 
 
-def get_logger(logger_name, level):
-    log_dir = Path.home() / '.arrowhead_system_logs'
-    if not log_dir.is_dir():
-        Path.mkdir(log_dir)
-    log_file_path = Path(log_dir / f'{logger_name}.log')
+def get_logger(
+        logger_name: str,
+        level: str,
+        log_dir: Union[None, str, Path] = None,
+        queued: bool = False,
+        json_format: bool = False,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+) -> logging.Logger:
+    """
+    Creates or reconfigures the logger of a system.
 
-    if not log_file_path.exists():
-        log_file_path.touch()
+    Args:
+        logger_name: Logger name, also used as the log file name.
+        level: :code:`'debug'` logs everything, any other value logs records of level INFO and above.
+        log_dir: Directory of the log file, defaults to ``~/.arrowhead_system_logs``.
+        queued: If ``True``, records are written by a background thread instead of the thread that logs them.
+        json_format: If ``True``, records are written as JSON lines, see :py:class:`JsonFormatter`.
+        max_bytes: Size in bytes at which the log file is rotated, ``0`` never rotates it.
+        backup_count: Number of rotated log files kept.
+    Returns:
+        The logger.
+    """
+    log_dir = Path(log_dir) if log_dir is not None else DEFAULT_LOG_DIR
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_file_path = log_dir / f'{logger_name}.log'
 
     logger = logging.getLogger(logger_name)
     if level.lower() == 'debug':
@@ -32,9 +193,38 @@ def get_logger(logger_name, level):
     else:
         logger.setLevel(logging.INFO)
 
-    logger.addHandler(get_file_handler(log_file_path))
+    for handler in list(logger.handlers):
+        if getattr(handler, 'arrowhead_handler', False):
+            logger.removeHandler(handler)
+            handler.close()
+
+    handler = get_file_handler(
+            log_file_path,
+            max_bytes,
+            backup_count,
+            JsonFormatter() if json_format else FORMATTER,
+    )
+    if queued:
+        handler = LogQueueHandler(handler)
+    handler.arrowhead_handler = True  # type: ignore
+    logger.addHandler(handler)
 
     logger.propagate = False
 
     logger.info('-------- New instance --------')
     return logger
+
+
+def _restart_queue_handlers() -> None:
+    for handler in list(_queue_handlers):
+        handler._restart()
+
+
+def _close_queue_handlers() -> None:
+    for handler in list(_queue_handlers):
+        handler.close()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_queue_handlers)
+atexit.register(_close_queue_handlers)
@@ -0,0 +1,381 @@
+"""
+==============
+Metrics Module
+==============
+
+Request metrics of consumers and providers, exported in the Prometheus text format.
+
+Metrics are disabled by default. Consumers and providers then hold the shared :py:data:`NULL_METRICS`,
+whose hooks do nothing, so the instrumented code paths only pay for one method call per request.
+Pass ``metrics=True``, or a :py:class:`Metrics` instance, to :py:meth:`ArrowheadClient.create` to enable them;
+the provider then serves the collected metrics at :code:`GET /metrics`.
+
+The following metrics are collected:
+
+=================================================== ========= ========================================
+Name                                                Type      Labels
+=================================================== ========= ========================================
+``arrowhead_consumer_request_duration_seconds``     histogram ``service``, ``provider``
+``arrowhead_consumer_requests_in_flight``           gauge     ``service``, ``provider``
+``arrowhead_consumer_responses_total``              counter   ``service``, ``provider``, ``status``
+``arrowhead_provider_request_duration_seconds``     histogram ``service``
+``arrowhead_provider_requests_in_flight``           gauge     ``service``
+``arrowhead_provider_responses_total``              counter   ``service``, ``status``
+``arrowhead_provider_authorization_failures_total`` counter   ``service``
+=================================================== ========= ========================================
+
+The ``status`` label is the HTTP status code, or ``error`` if the request raised an error before a response was
+received. Metrics are kept per process, so a provider running several worker processes reports the metrics of the
+worker that happens to serve the scrape.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from arrowhead_client.rules import OrchestrationRule
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_METRICS_PATH = 'metrics'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+Labels = Tuple[str, ...]
+
+
+class Metric:
+    """
+    Base class for metrics with a fixed set of label names.
+
+    Args:
+        name: Metric name.
+        documentation: Help text of the metric.
+        labelnames: Names of the labels, values are given in the same order when the metric is updated.
+    """
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterator[Tuple[str, Labels, Tuple[Tuple[str, str], ...], float]]:
+        """
+        Yields the samples of the metric as tuples of the sample name, label values,
+        additional labels, and value.
+        """
+        raise NotImplementedError
+
+    def expose(self) -> List[str]:
+        """ Returns the metric in the Prometheus text format, one line per item. """
+        lines = [
+            f'# HELP {self.name} {_escape_help(self.documentation)}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+        for sample_name, labelvalues, extra_labels, value in self.samples():
+            labels = [*zip(self.labelnames, labelvalues), *extra_labels]
+            label_string = ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels)
+            lines.append(f'{sample_name}{{{label_string}}} {_format_value(value)}' if labels else
+                         f'{sample_name} {_format_value(value)}')
+
+        return lines
+
+
+class Counter(Metric):
+    """ Monotonically increasing count, for example of responses. """
+    type = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labelvalues: Labels, amount: float = 1) -> None:
+        """ Increases the count of ``labelvalues`` by ``amount``. """
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, labelvalues: Labels) -> float:
+        """ Current count of ``labelvalues``. """
+        return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+
+        for labelvalues, value in values:
+            yield self.name, labelvalues, (), value
+
+
+class Gauge(Counter):
+    """ Value that goes up and down, for example the number of requests in progress. """
+    type = 'gauge'
+
+    def dec(self, labelvalues: Labels, amount: float = 1) -> None:
+        """ Decreases the value of ``labelvalues`` by ``amount``. """
+        self.inc(labelvalues, -amount)
+
+    def set(self, labelvalues: Labels, value: float) -> None:
+        """ Sets the value of ``labelvalues``. """
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values, for example latencies, counted in cumulative buckets.
+
+    Args:
+        name: Metric name.
+        documentation: Help text of the metric.
+        labelnames: Names of the labels.
+        buckets: Upper bounds of the buckets in increasing order, a :code:`+Inf` bucket is always added.
+    """
+    type = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        if list(buckets) != sorted(buckets):
+            raise ValueError('buckets must be in increasing order')
+        self.buckets = tuple(float(bucket) for bucket in buckets if bucket != float('inf'))
+        # Per label values: counts of each bucket and the +Inf bucket, and the sum of the observations
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labelvalues: Labels, value: float) -> None:
+        """ Records ``value`` for ``labelvalues``. """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, labelvalues: Labels) -> int:
+        """ Number of values observed for ``labelvalues``. """
+        entry = self._values.get(labelvalues)
+        return sum(entry[0]) if entry is not None else 0
+
+    def samples(self):
+        with self._lock:
+            values = [(labelvalues, list(counts), total[0]) for labelvalues, (counts, total) in self._values.items()]
+
+        for labelvalues, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', labelvalues, (('le', _format_value(bound)),), cumulative
+            yield f'{self.name}_sum', labelvalues, (), total
+            yield f'{self.name}_count', labelvalues, (), cumulative
+
+
+class RequestTimer:
+    """
+    Context manager that measures one request.
+
+    Entering it increases the in-flight gauge, exiting it decreases the gauge and records the latency and status.
+    Set :py:attr:`status` to the response status code before exiting, requests without a status are
+    counted as ``error``.
+    """
+    __slots__ = ('status', '_metrics', '_labels', '_start')
+
+    def __init__(self, metrics: Tuple[Histogram, Gauge, Counter], labels: Labels):
+        self.status: Optional[int] = None
+        self._metrics = metrics
+        self._labels = labels
+        self._start = 0.0
+
+    def __enter__(self) -> 'RequestTimer':
+        self._metrics[1].inc(self._labels)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        latency, in_flight, responses = self._metrics
+        latency.observe(self._labels, time.perf_counter() - self._start)
+        responses.inc((*self._labels, str(self.status) if self.status is not None else 'error'))
+        in_flight.dec(self._labels)
+
+
+class _NullRequestTimer:
+    __slots__ = ('status',)
+
+    def __enter__(self) -> '_NullRequestTimer':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NULL_REQUEST_TIMER = _NullRequestTimer()
+
+
+class Metrics:
+    """
+    Collects the request metrics of a consumer and a provider.
+
+    Args:
+        buckets: Latency histogram buckets in seconds.
+        namespace: Prefix of the metric names.
+
+    Example::
+
+        metrics = Metrics()
+        client = SyncClient.create('example_client', '127.0.0.1', 5678, metrics=metrics)
+
+        ...
+
+        print(metrics.exposition())
+    """
+    enabled = True
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, namespace: str = 'arrowhead'):
+        self.consumer_latency = Histogram(
+                f'{namespace}_consumer_request_duration_seconds',
+                'Time until the response of a consumed service is received.',
+                ('service', 'provider'),
+                buckets,
+        )
+        self.consumer_in_flight = Gauge(
+                f'{namespace}_consumer_requests_in_flight',
+                'Consumer requests waiting for a response.',
+                ('service', 'provider'),
+        )
+        self.consumer_responses = Counter(
+                f'{namespace}_consumer_responses_total',
+                'Responses received by the consumer, by status code.',
+                ('service', 'provider', 'status'),
+        )
+        self.provider_latency = Histogram(
+                f'{namespace}_provider_request_duration_seconds',
+                'Time spent serving a request to a provided service.',
+                ('service',),
+                buckets,
+        )
+        self.provider_in_flight = Gauge(
+                f'{namespace}_provider_requests_in_flight',
+                'Requests to provided services currently being served.',
+                ('service',),
+        )
+        self.provider_responses = Counter(
+                f'{namespace}_provider_responses_total',
+                'Responses sent by the provider, by status code.',
+                ('service', 'status'),
+        )
+        self.provider_authorization_failures = Counter(
+                f'{namespace}_provider_authorization_failures_total',
+                'Requests to provided services rejected by the access policy.',
+                ('service',),
+        )
+
+    @property
+    def metrics(self) -> List[Metric]:
+        """ All collected metrics. """
+        return [
+            self.consumer_latency,
+            self.consumer_in_flight,
+            self.consumer_responses,
+            self.provider_latency,
+            self.provider_in_flight,
+            self.provider_responses,
+            self.provider_authorization_failures,
+        ]
+
+    def consumer_request(self, rule: OrchestrationRule) -> RequestTimer:
+        """
+        Returns a timer for a request sent according to ``rule``.
+
+        Example::
+
+            with metrics.consumer_request(rule) as timer:
+                response = session.request(...)
+                timer.status = response.status_code
+        """
+        return RequestTimer(
+                (self.consumer_latency, self.consumer_in_flight, self.consumer_responses),
+                (rule.service_definition, rule.system_name),
+        )
+
+    def provider_request(self, service_definition: str) -> RequestTimer:
+        """ Returns a timer for a request to the provided service ``service_definition``. """
+        return RequestTimer(
+                (self.provider_latency, self.provider_in_flight, self.provider_responses),
+                (service_definition,),
+        )
+
+    def authorization_failure(self, service_definition: str) -> None:
+        """ Counts a request to ``service_definition`` rejected by its access policy. """
+        self.provider_authorization_failures.inc((service_definition,))
+
+    def exposition(self) -> str:
+        """ Returns all metrics in the Prometheus text format. """
+        return '\n'.join(line for metric in self.metrics for line in metric.expose()) + '\n'
+
+
+class NullMetrics(Metrics):
+    """
+    Metrics that are not collected, used when metrics are disabled.
+    """
+    enabled = False
+
+    def __init__(self):
+        pass
+
+    @property
+    def metrics(self) -> List[Metric]:
+        return []
+
+    def consumer_request(self, rule: OrchestrationRule) -> RequestTimer:
+        return _NULL_REQUEST_TIMER  # type: ignore
+
+    def provider_request(self, service_definition: str) -> RequestTimer:
+        return _NULL_REQUEST_TIMER  # type: ignore
+
+    def authorization_failure(self, service_definition: str) -> None:
+        pass
+
+    def exposition(self) -> str:
+        return ''
+
+
+NULL_METRICS = NullMetrics()
+
+
+def get_metrics(metrics: Union[None, bool, Metrics] = None) -> Metrics:
+    """
+    Factory function for metrics.
+
+    Args:
+        metrics: Either a :py:class:`Metrics` instance, which is returned as-is, ``True`` to collect metrics in a
+                 new instance, or ``None`` or ``False`` to disable metrics.
+    Returns:
+        Metrics instance.
+    """
+    if isinstance(metrics, Metrics):
+        return metrics
+    if metrics:
+        return Metrics()
+
+    return NULL_METRICS
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', r'\\').replace('\n', r'\n')
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
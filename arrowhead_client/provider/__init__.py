@@ -1,6 +1,14 @@
+from arrowhead_client.imports import lazy_module_attributes, lazy_module_dir
 from .base import BaseProvider
-from .implementations.httpprovider import FlaskProvider
-from .implementations.fastapi_provider import FastapiProvider
+
+# Implementations are imported on first access, so that Flask and FastAPI are only imported when used
+_IMPLEMENTATIONS = {
+    'FlaskProvider': 'arrowhead_client.provider.implementations.httpprovider:FlaskProvider',
+    'FastapiProvider': 'arrowhead_client.provider.implementations.fastapi_provider:FastapiProvider',
+}
+
+__getattr__ = lazy_module_attributes(globals(), _IMPLEMENTATIONS)
+__dir__ = lazy_module_dir(globals(), _IMPLEMENTATIONS)
 
 __all__ = [
     'BaseProvider',
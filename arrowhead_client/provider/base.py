@@ -1,15 +1,50 @@
+import socket
 from abc import ABC, abstractmethod
-from typing import Callable
+from typing import Callable, List, Optional, Union
 
 from arrowhead_client.abc import ProtocolMixin
+from arrowhead_client.codec import JsonCodec, get_json_codec
+from arrowhead_client.metrics import Metrics, get_metrics
+from arrowhead_client.tracing import Span, Tracer, get_tracer
+from arrowhead_client import constants
+from arrowhead_client.provider.prefork import DEFAULT_WORKERS, PreforkServer
 from arrowhead_client.rules import RegistrationRule
+from arrowhead_client.security.access_policy import AccessPolicy
 
 
 class BaseProvider(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
-    """Abstract base class for providers"""
+    """
+    Abstract base class for providers
 
-    def __init__(self, cafile: str):
+    Args:
+        cafile: Certificate authority file.
+        json_codec: JSON codec or library name, see :py:func:`~arrowhead_client.codec.get_json_codec`.
+        workers: Number of worker processes serving requests, see :py:class:`~arrowhead_client.provider.prefork.PreforkServer`.
+        reuse_port: If ``True``, every worker binds its own socket with :code:`SO_REUSEPORT`.
+        metrics: Request metrics, see :py:func:`~arrowhead_client.metrics.get_metrics`. When enabled, they are
+                 served at :code:`GET /metrics`.
+        tracer: Tracer, see :py:func:`~arrowhead_client.tracing.get_tracer`. When enabled, requests to provided
+                services are traced, continuing the trace of the consumer.
+    """
+
+    def __init__(
+            self,
+            cafile: str,
+            json_codec: Union[None, str, JsonCodec] = None,
+            workers: int = DEFAULT_WORKERS,
+            reuse_port: bool = False,
+            metrics: Union[None, bool, Metrics] = None,
+            tracer: Union[None, bool, Tracer] = None,
+    ):
+        if workers < 1:
+            raise ValueError('workers must be a positive integer')
         self.cafile = cafile
+        self.json_codec = get_json_codec(json_codec)
+        self.workers = workers
+        self.reuse_port = reuse_port
+        self.metrics = get_metrics(metrics)
+        self.tracer = get_tracer(tracer)
+        self._worker_startup_routines: List[Callable] = []
 
     @abstractmethod
     def add_provided_service(self, rule: RegistrationRule, ) -> None:
@@ -39,6 +74,21 @@ class BaseProvider(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
             cafile: certificate authority file
         """
 
+    def add_event_route(self, uri: str, receive: Callable[[bytes], int], access_policy: AccessPolicy) -> None:
+        """
+        Serves the notify URI of event subscriptions.
+
+        Notifications are POST requests from the Event Handler, and they are answered with an empty response.
+        Notifications from consumers that ``access_policy`` does not authorize are answered with status 403.
+
+        Args:
+            uri: Notify URI.
+            receive: Function called in the event loop with the request body of every notification,
+                     returns the HTTP status of the response. It must not block.
+            access_policy: Access policy of the notify URI.
+        """
+        raise NotImplementedError
+
     def add_startup_routine(self, func: Callable):
         """
         Schedules ``func`` to be called during startup.
@@ -56,3 +106,54 @@ class BaseProvider(ProtocolMixin, ABC, protocol='<PROTOCOL>'):
             func: Function executed during shutdown, must not take any arguments.
         """
         raise NotImplementedError
+
+    def add_worker_startup_routine(self, func: Callable):
+        """
+        Schedules ``func`` to be called in every worker process before it starts serving.
+
+        Worker routines are only called when the provider runs more than one worker process, and they are called
+        in addition to the startup routines. Use them to reset state that must not be shared between processes,
+        like open connections and background threads.
+
+        Args:
+            func: Function executed in each worker, must not take any arguments.
+        """
+        self._worker_startup_routines.append(func)
+
+    def _run_worker_startup_routines(self):
+        for func in self._worker_startup_routines:
+            func()
+
+    def _run_workers(self, address: str, port: int, serve: Callable[[socket.socket], None]) -> None:
+        """ Calls ``serve`` with a listening socket in each of the :code:`workers` worker processes. """
+        PreforkServer(
+                serve,
+                workers=self.workers,
+                reuse_port=self.reuse_port,
+                on_worker_start=self._run_worker_startup_routines,
+        ).run(address, port)
+
+
+def provider_span(tracer: Tracer, rule: RegistrationRule, method: str, traceparent: Optional[str]) -> Span:
+    """
+    Starts the server span of a request to the service provided according to ``rule``.
+
+    Args:
+        tracer: Tracer of the provider.
+        rule: Registration rule of the requested service.
+        method: HTTP method of the request.
+        traceparent: ``traceparent`` header sent by the consumer, the span continues the consumer's trace.
+    """
+    if not tracer.enabled:
+        return tracer.start_span('')
+
+    return tracer.start_span(
+            f'{method} /{rule.service_uri}',
+            constants.SpanKind.SERVER,
+            {
+                'http.method': method,
+                'http.route': f'/{rule.service_uri}',
+                'arrowhead.service_definition': rule.service_definition,
+            },
+            parent=tracer.extract(traceparent),
+    )
@@ -1,51 +1,265 @@
-from typing import Mapping, Dict, Callable
-import json
+import ssl
+from typing import Any, Mapping, Dict, Callable, Optional, Type, Union
 
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+from starlette.responses import Response as StarletteResponse
 import uvicorn  # type: ignore
+from uvicorn.protocols.http.auto import AutoHTTPProtocol  # type: ignore
+from uvicorn.protocols.websockets.auto import AutoWebSocketsProtocol  # type: ignore
 
-from arrowhead_client.provider.base import BaseProvider
+from arrowhead_client.codec import JsonCodec, get_json_codec
+from arrowhead_client.metrics import CONTENT_TYPE, DEFAULT_METRICS_PATH, NULL_METRICS, Metrics, RequestTimer
+from arrowhead_client.tracing import NULL_TRACER, Span, Tracer
+from arrowhead_client.provider.base import BaseProvider, provider_span
+from arrowhead_client.provider.prefork import DEFAULT_WORKERS
 from arrowhead_client.rules import RegistrationRule
-from arrowhead_client.security.access_policy import TokenAccessPolicy
+from arrowhead_client.security.access_policy import AccessPolicy
 from arrowhead_client import constants
 
 
-class ArrowheadAccessPolicyMiddleware(BaseHTTPMiddleware):
+class ArrowheadAccessPolicyMiddleware:
+    """
+    ASGI middleware that enforces the access policies of the provided services.
+
+    The registration rule of a request is looked up by path in ``policy_map``, requests to other paths are
+    passed on untouched. The consumer certificate is read from the ASGI TLS extension, see
+    :py:func:`consumer_certificate`, and the token from the ``Authorization`` header. Unauthorized HTTP
+    requests are answered with status 403 and unauthorized WebSocket handshakes are closed.
+
+    This is a plain ASGI middleware rather than a Starlette ``BaseHTTPMiddleware``, so authorized requests
+    reach the application without any extra tasks or buffering, and streaming responses work as usual.
+
+    If ``metrics`` are enabled, the middleware also records the latency and status of HTTP requests to the
+    provided services, and counts rejected requests. If the ``tracer`` is enabled, every request to a provided
+    service is handled in a server span that continues the trace in the ``traceparent`` header.
+
+    Args:
+        app: ASGI application.
+        policy_map: Dictionary mapping service URIs to registration rules.
+        json_codec: Codec used to render error messages.
+        metrics: Request metrics, disabled by default.
+        tracer: Tracer, disabled by default.
+    """
+
     def __init__(
             self,
             app,
             policy_map: Mapping[str, RegistrationRule],
+            json_codec: JsonCodec = None,
+            metrics: Metrics = NULL_METRICS,
+            tracer: Tracer = NULL_TRACER,
     ):
-        super().__init__(app)
+        self.app = app
         self.policy_map = policy_map
+        self.json_codec = json_codec or get_json_codec()
+        self.metrics = metrics
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] not in ('http', 'websocket'):
+            return await self.app(scope, receive, send)
+
+        rule = self.policy_map.get(scope['path'].strip('/'))
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        if not self.tracer.enabled and (not self.metrics.enabled or scope['type'] != 'http'):
+            return await self._dispatch(rule, scope, receive, send)
+
+        # WebSocket connections are long lived, so only their handshake is traced and they are not timed
+        metrics = self.metrics if scope['type'] == 'http' else NULL_METRICS
+        method = scope.get('method', 'GET')
+        with provider_span(self.tracer, rule, method, _header(scope, b'traceparent')) as span, \
+                metrics.provider_request(rule.service_definition) as timer:
+            await self._dispatch(rule, scope, receive, _status_recorder(send, timer, span))
+
+    async def _dispatch(self, rule: RegistrationRule, scope, receive, send):
+        if rule.is_authorized(consumer_certificate(scope), _header(scope, b'authorization')):
+            return await self.app(scope, receive, send)
+
+        self.metrics.authorization_failure(rule.service_definition)
+        current_span = self.tracer.current_span()
+        if current_span is not None:
+            current_span.set_attribute('arrowhead.authorized', False)
+
+        if scope['type'] == 'websocket':
+            # Closing before the handshake is accepted makes the server reject it with status 403
+            return await send({'type': 'websocket.close', 'code': 1008})
+
+        body = self.json_codec.dumps({
+            constants.Misc.ERROR_MESSAGE:
+                f'Not authorized to consume service {rule.service_definition}@{rule.authority}/{rule.service_uri}'
+        })
+        await send({
+            'type': 'http.response.start',
+            'status': 403,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def _status_recorder(send, timer: RequestTimer, span: Span):
+    """ Wraps the ASGI ``send`` callable to store the response status in ``timer`` and ``span``. """
+
+    async def send_and_record_status(message):
+        if message['type'] == 'http.response.start':
+            timer.status = message['status']
+            span.set_attribute('http.status_code', message['status'])
+        await send(message)
+
+    return send_and_record_status
+
+
+def consumer_certificate(scope) -> str:
+    """
+    Returns the PEM client certificate of an ASGI connection.
+
+    The certificate is read from the ``tls`` extension of the ASGI scope, which is provided by servers that
+    implement the ASGI TLS extension and by :py:class:`TLSExtensionProtocol` when running under uvicorn.
+
+    Args:
+        scope: ASGI connection scope.
+    Returns:
+        PEM certificate string, or an empty string if the consumer did not present a certificate.
+    """
+    tls = (scope.get('extensions') or {}).get('tls') or {}
+    chain = tls.get('client_cert_chain')
+
+    return chain[0] if chain else ''
+
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+
+    return ''
+
+
+class TLSExtensionMiddleware:
+    """
+    ASGI middleware that adds the ASGI TLS extension to the scope of every request on one TLS connection.
 
-    async def dispatch(self, request: Request, call_next):
-        path = request.scope['path'].strip('/')
-        if path not in self.policy_map:
-            return await call_next(request)
-        # TODO: Replace these with actual request values when uvicorn implements client-certs or when you try running a reverse proxy
-        consumer_cert = 'consumer_cert'
-        auth_str = 'auth_str'
+    Args:
+        app: ASGI application.
+        ssl_object: :py:class:`ssl.SSLObject` of the connection.
+    """
 
-        if isinstance(self.policy_map[path].access_policy, TokenAccessPolicy):
-            return Response(content=json.dumps({constants.Misc.ERROR_MESSAGE: 'Token access policy not supported'}),
-                            status_code=501)
-        if not self.policy_map[path].is_authorized(consumer_cert, auth_str):
-            return Response(content=f'{{"{constants.Misc.ERROR_MESSAGE}": "WIP"}}', status_code=403)
+    def __init__(self, app, ssl_object: ssl.SSLObject):
+        self.app = app
+        peer_cert = ssl_object.getpeercert(binary_form=True)
+        version = ssl_object.version()
+        self.tls = {
+            'server_cert': None,
+            'client_cert_chain': [ssl.DER_cert_to_PEM_cert(peer_cert)] if peer_cert else [],
+            'client_cert_name': None,
+            'client_cert_error': None,
+            'tls_version': _TLS_VERSIONS.get(version) if version else None,
+            'cipher_suite': None,
+        }
 
-        return await call_next(request)
+    async def __call__(self, scope, receive, send):
+        if scope['type'] in ('http', 'websocket'):
+            scope['extensions'] = {**(scope.get('extensions') or {}), 'tls': self.tls}
+
+        return await self.app(scope, receive, send)
+
+
+_TLS_VERSIONS = {
+    'TLSv1': 0x0301,
+    'TLSv1.1': 0x0302,
+    'TLSv1.2': 0x0303,
+    'TLSv1.3': 0x0304,
+}
+
+
+class TLSExtensionProtocol:
+    """
+    Mixin for uvicorn protocol classes that provides the ASGI TLS extension.
+
+    uvicorn does not implement the TLS extension, so this mixin wraps the application of every TLS connection
+    in a :py:class:`TLSExtensionMiddleware` as soon as the handshake is finished.
+    """
+
+    def connection_made(self, transport, *args, **kwargs):
+        super().connection_made(transport, *args, **kwargs)  # type: ignore
+        ssl_object = transport.get_extra_info('ssl_object')
+        if ssl_object is not None:
+            self.app = TLSExtensionMiddleware(self.app, ssl_object)  # type: ignore
+
+
+def with_tls_extension(protocol_class: Optional[type]) -> Optional[type]:
+    """ Returns a subclass of the uvicorn ``protocol_class`` that provides the ASGI TLS extension. """
+    if protocol_class is None:
+        return None
+
+    return type(protocol_class.__name__, (TLSExtensionProtocol, protocol_class), {})
+
+
+class CodecJSONResponse(JSONResponse):
+    """ JSON response rendered with a :py:class:`~arrowhead_client.codec.JsonCodec`. """
+    codec: JsonCodec = get_json_codec()
+
+    def render(self, content: Any) -> bytes:
+        return self.codec.dumps(content)
+
+
+def json_response_class(codec: JsonCodec) -> Type[CodecJSONResponse]:
+    """ Returns a subclass of :py:class:`CodecJSONResponse` that renders with ``codec``. """
+    return type('CodecJSONResponse', (CodecJSONResponse,), {'codec': codec})
 
 
 class FastapiProvider(BaseProvider, protocol=constants.Protocol.HTTP):
+    """
+    Provider based on FastAPI and uvicorn.
+
+    uvicorn uses uvloop and httptools when they are installed. With more than one worker, the workers are
+    forked from the process calling :py:meth:`run_forever`, since uvicorn can only start its own workers
+    from an import string.
+
+    Args:
+        cafile: Certificate authority file.
+        app_name: Not used.
+        json_codec: JSON codec or library name, see :py:func:`~arrowhead_client.codec.get_json_codec`.
+        workers: Number of worker processes.
+        reuse_port: If ``True``, every worker binds its own socket with :code:`SO_REUSEPORT`.
+        metrics: Request metrics, see :py:func:`~arrowhead_client.metrics.get_metrics`. When enabled, they are
+                 served at :code:`GET /metrics`.
+        tracer: Tracer, see :py:func:`~arrowhead_client.tracing.get_tracer`. Disabled by default.
+        ws_per_message_deflate: If ``True``, the permessage-deflate extension is accepted when a WebSocket consumer
+                                offers it.
+    """
+
     def __init__(
             self,
             cafile: str,
             app_name: str = '',
+            json_codec: Union[None, str, JsonCodec] = None,
+            workers: int = DEFAULT_WORKERS,
+            reuse_port: bool = False,
+            metrics: Union[None, bool, Metrics] = None,
+            tracer: Union[None, bool, Tracer] = None,
+            ws_per_message_deflate: bool = True,
     ):
-        super().__init__(cafile)
-        self.app = FastAPI()
+        super().__init__(cafile, json_codec, workers, reuse_port, metrics, tracer)
+        self.ws_per_message_deflate = ws_per_message_deflate
+        self.app = FastAPI(default_response_class=json_response_class(self.json_codec))
         self.policy_map: Dict[str, RegistrationRule] = {}
+        if self.metrics.enabled:
+            self.app.add_api_route(
+                    path=f'/{DEFAULT_METRICS_PATH}',
+                    endpoint=self._metrics_endpoint,
+                    methods=['GET'],
+                    include_in_schema=False,
+            )
+
+    def _metrics_endpoint(self) -> StarletteResponse:
+        return StarletteResponse(self.metrics.exposition(), media_type=CONTENT_TYPE)
 
     def add_provided_service(self, rule: RegistrationRule, ) -> None:
         self.policy_map[rule.service_uri] = rule
@@ -62,6 +276,21 @@ class FastapiProvider(BaseProvider, protocol=constants.Protocol.HTTP):
                     endpoint=rule.func,
             )
 
+    def add_event_route(self, uri: str, receive: Callable[[bytes], int], access_policy: AccessPolicy) -> None:
+        # A plain Starlette route, the notification is decoded by receive instead of a FastAPI body model
+        async def notify_endpoint(request: Request) -> StarletteResponse:
+            # The notify URI is not a provided service, so it is not checked by ArrowheadAccessPolicyMiddleware
+            if not access_policy.is_authorized(consumer_certificate(request.scope), request.headers.get('authorization', '')):
+                return StarletteResponse(
+                        self.json_codec.dumps({constants.Misc.ERROR_MESSAGE: f'Not authorized to deliver events to {uri}'}),
+                        status_code=403,
+                        media_type='application/json',
+                )
+
+            return StarletteResponse(status_code=receive(await request.body()))
+
+        self.app.add_route(f'/{uri}', notify_endpoint, methods=['POST'], include_in_schema=False)
+
     def run_forever(
             self,
             address: str,
@@ -69,17 +298,37 @@ class FastapiProvider(BaseProvider, protocol=constants.Protocol.HTTP):
             keyfile: str,
             certfile: str,
     ):
-        self.app.add_middleware(ArrowheadAccessPolicyMiddleware, policy_map=self.policy_map)
+        self.app.add_middleware(
+                ArrowheadAccessPolicyMiddleware,
+                policy_map=self.policy_map,
+                json_codec=self.json_codec,
+                metrics=self.metrics,
+                tracer=self.tracer,
+        )
+
+        protocols = {'http': with_tls_extension(AutoHTTPProtocol)}
+        if AutoWebSocketsProtocol is not None:
+            protocols['ws'] = with_tls_extension(AutoWebSocketsProtocol)
 
-        uvicorn.run(
+        config = uvicorn.Config(
                 self.app,
                 host=address,
                 port=port,
                 ssl_keyfile=keyfile,
                 ssl_certfile=certfile,
                 ssl_ca_certs=self.cafile,
+                # Consumers without certificates are still let through to the access policies,
+                # so that services with the UNRESTRICTED access policy keep working
+                ssl_cert_reqs=ssl.CERT_OPTIONAL if self.cafile else ssl.CERT_NONE,
+                ws_per_message_deflate=self.ws_per_message_deflate,
+                **protocols,
         )
 
+        if self.workers == 1:
+            uvicorn.Server(config).run()
+        else:
+            self._run_workers(address, port, lambda sock: uvicorn.Server(config).run(sockets=[sock]))
+
     def add_startup_routine(self, func: Callable):
         self.app.add_event_handler('startup', func)
 
@@ -1,33 +1,87 @@
-from functools import partial
-from flask import Flask, request
+import socket
 import ssl
+from functools import partial
+from typing import Dict, Optional, Union
+
+from flask import Flask, g, request
+from werkzeug.serving import make_server
 
-from arrowhead_client.provider.base import BaseProvider
+from arrowhead_client.codec import JsonCodec
+from arrowhead_client.metrics import CONTENT_TYPE, DEFAULT_METRICS_PATH, Metrics
+from arrowhead_client.tracing import Tracer
+from arrowhead_client.provider.base import BaseProvider, provider_span
+from arrowhead_client.provider.prefork import DEFAULT_WORKERS, bind_socket
 from arrowhead_client.rules import RegistrationRule
 from arrowhead_client.request import Request
 from arrowhead_client import errors
 from arrowhead_client import constants
 
 
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:  # Flask < 2.2 has no JSON providers
+    DefaultJSONProvider = None
+
+
 class FlaskProvider(BaseProvider, protocol=constants.Protocol.HTTP):
-    """ Class for provided_service provision """
+    """
+    Provider based on Flask.
+
+    Requests are served by a threaded WSGI server, or by gevent when ``wsgi_server`` is :code:`GEVENT`.
+    gevent only helps if the standard library is monkey patched, see :code:`gevent.monkey`.
 
-    def __init__(self, cafile: str, app_name: str = '') -> None:
-        super().__init__(cafile)
+    Args:
+        cafile: Certificate authority file.
+        app_name: Name of the Flask app.
+        json_codec: JSON codec or library name, see :py:func:`~arrowhead_client.codec.get_json_codec`.
+        workers: Number of worker processes.
+        reuse_port: If ``True``, every worker binds its own socket with :code:`SO_REUSEPORT`.
+        wsgi_server: Either :code:`THREADED` or :code:`GEVENT`.
+        metrics: Request metrics, see :py:func:`~arrowhead_client.metrics.get_metrics`. When enabled, they are
+                 served at :code:`GET /metrics`.
+        tracer: Tracer, see :py:func:`~arrowhead_client.tracing.get_tracer`. Disabled by default.
+    """
+
+    def __init__(
+            self,
+            cafile: str,
+            app_name: str = '',
+            json_codec: Union[None, str, JsonCodec] = None,
+            workers: int = DEFAULT_WORKERS,
+            reuse_port: bool = False,
+            wsgi_server: str = constants.WsgiServer.THREADED,
+            metrics: Union[None, bool, Metrics] = None,
+            tracer: Union[None, bool, Tracer] = None,
+    ) -> None:
+        super().__init__(cafile, json_codec, workers, reuse_port, metrics, tracer)
+        if wsgi_server.upper() not in {server.value for server in constants.WsgiServer}:
+            raise ValueError(
+                    f'{wsgi_server} is not a valid WSGI server. '
+                    f'Valid servers are {set(server.value for server in constants.WsgiServer)}'
+            )
+        self.wsgi_server = wsgi_server.upper()
         self.app_name = __name__ or app_name
         self.app = Flask(app_name)
+        self._service_rules: Dict[str, RegistrationRule] = {}
+        if DefaultJSONProvider is not None:
+            self.app.json = CodecJSONProvider(self.app, self.json_codec)
 
         @self.app.errorhandler(500)
         def internal_error(error):
             return {constants.Misc.ERROR_MESSAGE: 'Internal issue'}, 500
 
+        if self.metrics.enabled:
+            self._add_metrics_hooks()
+        if self.tracer.enabled:
+            self._add_tracing_hooks()
+
     def add_provided_service(self, rule: RegistrationRule) -> None:
         """ Add provided_service to provider system"""
 
         def func_with_access_policy(request):
             """Register provided_service with Flask app."""
             auth_string = request.headers.get('authorization')
-            consumer_cert_str = request.headers.environ.get('SSL_CLIENT_CERT')
+            consumer_cert_str = request.headers.environ.get('SSL_CLIENT_CERT') or ''
 
             try:
                 is_authorized = rule.is_authorized(
@@ -38,13 +92,17 @@ class FlaskProvider(BaseProvider, protocol=constants.Protocol.HTTP):
                 is_authorized = False
 
             if not is_authorized:
+                self.metrics.authorization_failure(rule.service_definition)
+                current_span = self.tracer.current_span()
+                if current_span is not None:
+                    current_span.set_attribute('arrowhead.authorized', False)
                 return {constants.Misc.ERROR_MESSAGE:
                             f'Not authorized to consume service '
                             f'{rule.service_definition}@{rule.authority}/'
                             f'{rule.service_uri}'}, 403
 
             # TODO: Make the payload easily accessible from the RegistrationRule, so it doesn't rely on the _provided_service member
-            ar_request = make_arrowhead_request(request, rule._provided_service.interface.payload)
+            ar_request = make_arrowhead_request(request, rule._provided_service.interface.payload, self.json_codec)
             return rule.func(ar_request)
 
         self.app.add_url_rule(
@@ -53,6 +111,61 @@ class FlaskProvider(BaseProvider, protocol=constants.Protocol.HTTP):
                 methods=[rule.method],
                 view_func=partial(func_with_access_policy, request)
         )
+        self._service_rules[rule.service_definition] = rule
+
+    def _add_metrics_hooks(self) -> None:
+        """ Times the requests to provided services and serves the metrics. """
+        metrics = self.metrics
+
+        @self.app.before_request
+        def start_request_timer():
+            if request.endpoint in self._service_rules:
+                g.arrowhead_request_timer = metrics.provider_request(request.endpoint).__enter__()
+
+        @self.app.after_request
+        def record_status(response):
+            timer = g.get('arrowhead_request_timer')
+            if timer is not None:
+                timer.status = response.status_code
+            return response
+
+        # Teardown functions also run when the request fails, unlike after_request functions
+        @self.app.teardown_request
+        def stop_request_timer(error):
+            timer = g.pop('arrowhead_request_timer', None)
+            if timer is not None:
+                timer.__exit__(None, None, None)
+
+        self.app.add_url_rule(
+                rule=f'/{DEFAULT_METRICS_PATH}',
+                endpoint='arrowhead_metrics',
+                methods=['GET'],
+                view_func=lambda: (metrics.exposition(), 200, {'Content-Type': CONTENT_TYPE}),
+        )
+
+    def _add_tracing_hooks(self) -> None:
+        """ Handles the requests to provided services in server spans. """
+        tracer = self.tracer
+
+        @self.app.before_request
+        def start_span():
+            rule = self._service_rules.get(request.endpoint)  # type: ignore
+            if rule is not None:
+                span = provider_span(tracer, rule, request.method, request.headers.get('traceparent'))
+                g.arrowhead_span = span.__enter__()
+
+        @self.app.after_request
+        def record_span_status(response):
+            span = g.get('arrowhead_span')
+            if span is not None:
+                span.set_attribute('http.status_code', response.status_code)
+            return response
+
+        @self.app.teardown_request
+        def end_span(error):
+            span = g.pop('arrowhead_span', None)
+            if span is not None:
+                span.__exit__(type(error) if error is not None else None, error, None)
 
     def run_forever(
             self,
@@ -70,16 +183,87 @@ class FlaskProvider(BaseProvider, protocol=constants.Protocol.HTTP):
         else:
             ssl_context = None  # type: ignore
 
-        self.app.run(
-                host=address,
-                port=port,
-                ssl_context=ssl_context,
-        )
+        def serve(sock: socket.socket):
+            self._serve_wsgi(sock, address, port, ssl_context)
+
+        if self.workers == 1:
+            sock = bind_socket(address, port)
+            try:
+                serve(sock)
+            finally:
+                sock.close()
+        else:
+            self._run_workers(address, port, serve)
+
+    def _serve_wsgi(
+            self,
+            sock: socket.socket,
+            address: str,
+            port: int,
+            ssl_context: Optional[ssl.SSLContext],
+    ) -> None:
+        if self.wsgi_server == constants.WsgiServer.GEVENT:
+            from gevent.pywsgi import WSGIServer  # type: ignore
+
+            ssl_args = {'ssl_context': ssl_context} if ssl_context is not None else {}
+            WSGIServer(sock, self.app, handler_class=client_cert_handler_class(), **ssl_args).serve_forever()
+        else:
+            server = make_server(address, port, self.app, threaded=True, ssl_context=ssl_context, fd=sock.fileno())
+            try:
+                server.serve_forever()
+            finally:
+                server.server_close()
+
+
+def peer_certificate(sock) -> str:
+    """
+    Returns the PEM certificate of the peer of a TLS socket, or an empty string if there is none.
 
+    Args:
+        sock: Connected socket, certificates are only read from :py:class:`ssl.SSLSocket` objects.
+    """
+    getpeercert = getattr(sock, 'getpeercert', None)
+    peer_cert = getpeercert(binary_form=True) if getpeercert is not None else None
 
-def make_arrowhead_request(request, payload_type) -> Request:
+    return ssl.DER_cert_to_PEM_cert(peer_cert) if peer_cert else ''
+
+
+def client_cert_handler_class():
+    """
+    Returns a gevent WSGI handler class that puts the client certificate into the :code:`SSL_CLIENT_CERT` environ
+    variable, like the werkzeug server does, so that the access policies can read it.
+    """
+    from gevent.pywsgi import WSGIHandler  # type: ignore
+
+    class ClientCertWSGIHandler(WSGIHandler):
+        def get_environ(self):
+            environ = super().get_environ()
+            consumer_cert = peer_certificate(self.socket)
+            if consumer_cert:
+                environ['SSL_CLIENT_CERT'] = consumer_cert
+            return environ
+
+    return ClientCertWSGIHandler
+
+
+def make_arrowhead_request(request, payload_type, codec: JsonCodec = None) -> Request:
     # Makes sure that the body of a get request is ignored
     if request.method == 'GET':
-        return Request(b'{}', payload_type)
+        return Request(b'{}', payload_type, codec=codec)
+
+    return Request(request.data, payload_type, codec=codec)
+
+
+if DefaultJSONProvider is not None:
+    class CodecJSONProvider(DefaultJSONProvider):
+        """ Flask JSON provider that encodes and decodes with a :py:class:`~arrowhead_client.codec.JsonCodec`. """
+
+        def __init__(self, app: Flask, codec: JsonCodec):
+            super().__init__(app)
+            self.codec = codec
+
+        def dumps(self, obj, **kwargs) -> str:
+            return self.codec.dumps_str(obj, default=kwargs.get('default', self.default))
 
-    return Request(request.data, payload_type)
+        def loads(self, s, **kwargs):
+            return self.codec.loads(s)
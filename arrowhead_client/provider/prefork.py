@@ -0,0 +1,210 @@
+"""
+======================
+Pre-fork Server Module
+======================
+
+Serves a provider from several worker processes.
+
+The master process binds the listening socket, forks the workers, and restarts workers that crash or are killed.
+Workers that exit cleanly are not restarted, and the master returns when all of them have exited.
+Everything the master did before forking, like registering the provided services with the Service Registry,
+is done exactly once, while every worker accepts connections on the inherited socket.
+"""
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_WORKERS = 1
+DEFAULT_BACKLOG = 2048
+DEFAULT_GRACEFUL_TIMEOUT = 10.0
+MIN_WORKER_LIFETIME = 1.0
+
+
+def bind_socket(
+        address: str,
+        port: int,
+        reuse_port: bool = False,
+        backlog: Optional[int] = DEFAULT_BACKLOG,
+) -> socket.socket:
+    """
+    Creates a TCP socket that can be inherited by worker processes.
+
+    Args:
+        address: Address to bind.
+        port: Port to bind.
+        reuse_port: Sets :code:`SO_REUSEPORT`, so that several sockets can be bound to the same address and port.
+        backlog: Maximum number of connections waiting to be accepted, ``None`` binds the socket without listening.
+    Returns:
+        Bound socket.
+    Raises:
+        ValueError: If ``reuse_port`` is given but :code:`SO_REUSEPORT` is not supported on this platform.
+    """
+    family = socket.AF_INET6 if ':' in address else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            sock.close()
+            raise ValueError('SO_REUSEPORT is not supported on this platform')
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((address, port))
+    if backlog is not None:
+        sock.listen(backlog)
+    sock.set_inheritable(True)
+
+    return sock
+
+
+class PreforkServer:
+    """
+    Master process that runs a server in several forked worker processes.
+
+    Args:
+        serve: Function that serves connections from the given listening socket until the worker is terminated.
+        workers: Number of worker processes.
+        reuse_port: If ``True``, every worker binds its own socket with :code:`SO_REUSEPORT`, which lets the
+                    kernel spread new connections evenly between the workers. Otherwise all workers accept
+                    connections from one socket bound by the master.
+        on_worker_start: Optional. Function called in every worker process before it starts serving.
+        graceful_timeout: Time in seconds that workers get to finish after being told to stop, before they are killed.
+        logger: Optional. Logger used to report worker starts and exits.
+
+    Example::
+
+        server = PreforkServer(lambda sock: make_server(sock).serve_forever(), workers=4)
+        server.run('0.0.0.0', 8080)
+    """
+
+    def __init__(
+            self,
+            serve: Callable[[socket.socket], None],
+            workers: int,
+            reuse_port: bool = False,
+            on_worker_start: Optional[Callable[[], None]] = None,
+            graceful_timeout: float = DEFAULT_GRACEFUL_TIMEOUT,
+            logger=None,
+    ):
+        if workers < 1:
+            raise ValueError('workers must be a positive integer')
+        self.serve = serve
+        self.workers = workers
+        self.reuse_port = reuse_port
+        self.on_worker_start = on_worker_start
+        self.graceful_timeout = graceful_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self._pids: Dict[int, Tuple[int, float]] = {}
+
+    @property
+    def worker_pids(self) -> List[int]:
+        """ Process ids of the running workers. """
+        return list(self._pids)
+
+    def run(self, address: str, port: int) -> None:
+        """
+        Binds ``address`` and ``port``, starts the workers, and supervises them until interrupted or until all of
+        them have exited cleanly. Workers that exit with a non-zero status are restarted.
+
+        :code:`SIGTERM` and :code:`SIGINT` stop the workers and return from this method.
+
+        Raises:
+            RuntimeError: If the platform does not support :py:func:`os.fork`, or if a worker crashes right after
+                          it was started, which usually means that it can not start at all.
+        """
+        if not hasattr(os, 'fork'):
+            raise RuntimeError('Worker processes require os.fork, which is not available on this platform')
+
+        # With SO_REUSEPORT the master binds a socket without listening on it, which keeps the port reserved
+        # between worker restarts without the kernel handing any connections to the master
+        sock = bind_socket(address, port, self.reuse_port, backlog=None if self.reuse_port else DEFAULT_BACKLOG)
+        previous_sigterm = signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+        try:
+            for worker_id in range(self.workers):
+                self._spawn(worker_id, sock, address, port)
+
+            while self._pids:
+                pid, status = os.wait()
+                if pid not in self._pids:
+                    continue
+                worker_id, started_at = self._pids.pop(pid)
+                exit_code = _exit_code(status)
+                if exit_code == 0:
+                    self.logger.info(f'Worker {pid} exited')
+                    continue
+                if time.monotonic() - started_at < MIN_WORKER_LIFETIME:
+                    raise RuntimeError(f'Worker {pid} exited with status {exit_code} right after starting')
+                self.logger.warning(f'Worker {pid} exited with status {exit_code}, restarting')
+                self._spawn(worker_id, sock, address, port)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous_sigterm)
+            self.stop()
+            sock.close()
+
+    def stop(self) -> None:
+        """ Terminates all workers and waits for them to exit. """
+        for pid in self._pids:
+            _kill(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while self._pids and time.monotonic() < deadline:
+            for pid in list(self._pids):
+                if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                    del self._pids[pid]
+            time.sleep(0.05)
+
+        for pid in list(self._pids):
+            self.logger.warning(f'Worker {pid} did not stop in time, killing it')
+            _kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self._pids.clear()
+
+    def _spawn(self, worker_id: int, sock: socket.socket, address: str, port: int) -> None:
+        pid = os.fork()
+        if pid != 0:
+            self._pids[pid] = (worker_id, time.monotonic())
+            self.logger.info(f'Started worker {pid}')
+            return
+
+        # Worker process, must never return into the code of the master
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, _raise_system_exit)
+            signal.signal(signal.SIGINT, _raise_system_exit)
+            if self.reuse_port:
+                sock.close()
+                sock = bind_socket(address, port, reuse_port=True)
+            if self.on_worker_start is not None:
+                self.on_worker_start()
+            self.serve(sock)
+        except SystemExit:
+            pass
+        except BaseException:
+            self.logger.exception(f'Worker {os.getpid()} crashed')
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+
+def _kill(pid: int, sig: int) -> None:
+    try:
+        os.kill(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _raise_system_exit(signum, frame):
+    raise SystemExit(0)
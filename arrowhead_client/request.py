@@ -1,8 +1,8 @@
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 from dataclasses import dataclass, field
-import json
 
 from arrowhead_client import constants
+from arrowhead_client.codec import JsonCodec, get_json_codec
 
 
 @dataclass
@@ -11,6 +11,7 @@ class Request:
     payload_type: str
     status: Union[str, int] = ''
     query: Dict = field(default_factory=dict)
+    codec: Optional[JsonCodec] = field(default=None, repr=False, compare=False)
 
     # _request_object: Any
 
@@ -19,7 +20,7 @@ class Request:
             raise RuntimeError(f'Body type must be \'{constants.Payload.JSON}\' '
                                f'to use read_json(), current type is {self.payload_type}')
 
-        return json.loads(self.body)
+        return (self.codec or get_json_codec()).loads(self.body)
 
     def read_string(self):
         return self.body.decode()
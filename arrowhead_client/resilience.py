@@ -0,0 +1,342 @@
+"""
+=================
+Resilience Module
+=================
+
+Timeouts, retries, and circuit breakers for consumed services.
+
+Resilience is configured with a :py:class:`ResiliencePolicy`, either one for all services or one per service
+definition, given to :py:meth:`ArrowheadClient.create` as ``resilience``. A policy can set:
+
+* A :py:class:`Timeout` for connecting to the provider and for reading its response.
+* A :py:class:`RetryPolicy`, which retries requests with idempotent methods that failed or received one of the
+  retryable status codes, after an exponential backoff with full jitter.
+* A circuit breaker per provider, which opens after ``failure_threshold`` consecutive failures.
+  While the breaker of a provider is open, requests go to the other providers found by orchestration.
+  When the breakers of all providers are open, the client looks up the service in the Orchestrator again,
+  and raises :py:class:`~arrowhead_client.errors.CircuitOpenError` if that does not return a usable provider.
+  After ``reset_timeout`` seconds, one trial request is let through, which closes the breaker if it succeeds.
+
+Resilience is disabled by default, in which case requests are sent exactly once, without a timeout.
+
+Example::
+
+    client = SyncClient.create(
+            'example_client', '127.0.0.1', 5678,
+            resilience={
+                'temperature': ResiliencePolicy(
+                        timeout=Timeout(connect=1.0, read=5.0),
+                        retry=RetryPolicy(max_attempts=3),
+                        failure_threshold=5,
+                ),
+            },
+    )
+"""
+import random
+import threading
+import time
+from typing import Callable, Collection, Dict, List, Mapping, NamedTuple, Optional, Sequence, Union
+
+from arrowhead_client import constants
+from arrowhead_client.rules import OrchestrationRule
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+DEFAULT_RETRY_STATUSES = frozenset({502, 503, 504})
+DEFAULT_FAILURE_STATUSES = frozenset({500, 502, 503, 504})
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF = 0.1
+DEFAULT_MAX_BACKOFF = 10.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+class Timeout(NamedTuple):
+    """
+    Request timeouts in seconds, ``None`` waits forever.
+
+    Attributes:
+        connect: Time to establish a connection to the provider.
+        read: Time to wait for data from the provider once connected.
+    """
+    connect: Optional[float] = None
+    read: Optional[float] = None
+
+
+class RetryPolicy:
+    """
+    Decides if and when a failed request is sent again.
+
+    Only requests with idempotent methods are retried, since a request that timed out might still have been
+    processed by the provider.
+
+    Args:
+        max_attempts: Maximum number of times a request is sent, including the first attempt.
+        backoff: Upper bound in seconds of the delay before the first retry, doubled for every further retry.
+        max_backoff: Upper bound in seconds of the delay before any retry.
+        retry_statuses: Response status codes that are retried.
+        methods: Methods that are retried, given in uppercase.
+    """
+
+    def __init__(
+            self,
+            max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+            backoff: float = DEFAULT_BACKOFF,
+            max_backoff: float = DEFAULT_MAX_BACKOFF,
+            retry_statuses: Collection[int] = DEFAULT_RETRY_STATUSES,
+            methods: Collection[str] = IDEMPOTENT_METHODS,
+    ):
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be a positive integer')
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    def should_retry(self, method: str, attempt: int, status: Optional[int] = None) -> bool:
+        """
+        Returns ``True`` if a request should be sent again.
+
+        Args:
+            method: Request method.
+            attempt: Number of times the request has been sent.
+            status: Response status code, ``None`` if the request raised an error.
+        """
+        if attempt >= self.max_attempts or method.upper() not in self.methods:
+            return False
+
+        return status is None or status in self.retry_statuses
+
+    def delay(self, attempt: int) -> float:
+        """
+        Returns a random delay in seconds before retrying a request that has been sent ``attempt`` times.
+
+        Spreading the retries of many clients at random keeps them from hitting a recovering provider at once.
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Stops requests to a provider that keeps failing.
+
+    The breaker opens after ``failure_threshold`` consecutive failures. An open breaker rejects all requests
+    until ``reset_timeout`` seconds have passed, then it becomes half-open and lets one trial request through.
+    The breaker closes if the trial request succeeds and opens again if it fails.
+
+    Args:
+        failure_threshold: Number of consecutive failures that open the breaker.
+        reset_timeout: Time in seconds that the breaker stays open.
+        timer: Clock used to measure the open time, defaults to :py:func:`time.monotonic`.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+            reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+            timer: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be a positive integer')
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timer = timer
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> constants.CircuitState:
+        if self._opened_at is None:
+            return constants.CircuitState.CLOSED
+        if self.timer() - self._opened_at < self.reset_timeout:
+            return constants.CircuitState.OPEN
+
+        return constants.CircuitState.HALF_OPEN
+
+    def available(self) -> bool:
+        """ ``True`` if a request would currently be let through. """
+        state = self.state
+        return state == constants.CircuitState.CLOSED or \
+            (state == constants.CircuitState.HALF_OPEN and not self._trial_in_progress)
+
+    def allow_request(self) -> bool:
+        """
+        Returns ``True`` if a request may be sent.
+        In the half-open state, only the first caller is allowed to send the trial request.
+        """
+        with self._lock:
+            state = self.state
+            if state == constants.CircuitState.CLOSED:
+                return True
+            if state == constants.CircuitState.HALF_OPEN and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+
+            return False
+
+    def record_success(self) -> None:
+        """ Closes the breaker. """
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def release_trial(self) -> None:
+        """
+        Lets another request through as the trial request, after a trial request that ended without an outcome,
+        for example because it was cancelled.
+        """
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        """ Counts a failure, and opens the breaker if the threshold is reached or the trial request failed. """
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_progress or self.failures >= self.failure_threshold:
+                self._opened_at = self.timer()
+            self._trial_in_progress = False
+
+
+class ResiliencePolicy:
+    """
+    Resilience settings of a consumed service.
+
+    Args:
+        timeout: Optional. Connect and read timeouts of every request.
+        retry: Optional. Retry policy, requests are sent once if it is not given.
+        failure_threshold: Optional. Number of consecutive failures of a provider that open its circuit breaker.
+                           Circuit breakers are not used if it is not given.
+        reset_timeout: Time in seconds that a circuit breaker stays open.
+        failure_statuses: Response status codes counted as provider failures by the circuit breaker,
+                          in addition to requests that raised an error.
+    """
+
+    def __init__(
+            self,
+            timeout: Optional[Timeout] = None,
+            retry: Optional[RetryPolicy] = None,
+            failure_threshold: Optional[int] = None,
+            reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+            failure_statuses: Collection[int] = DEFAULT_FAILURE_STATUSES,
+    ):
+        self.timeout = timeout
+        self.retry = retry
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_statuses = frozenset(failure_statuses)
+
+    @property
+    def enabled(self) -> bool:
+        return self.timeout is not None or self.retry is not None or self.failure_threshold is not None
+
+    def is_failure(self, status: Optional[int]) -> bool:
+        """ ``True`` if a response with ``status``, or ``None`` for an error, counts as a provider failure. """
+        return status is None or status in self.failure_statuses
+
+
+DISABLED_POLICY = ResiliencePolicy()
+
+
+class Resilience:
+    """
+    Resilience policies of all consumed services and the circuit breakers of their providers.
+
+    Args:
+        default: Policy of services without their own policy, defaults to a policy that does nothing.
+        services: Policies by service definition.
+        timer: Clock used by the circuit breakers, defaults to :py:func:`time.monotonic`.
+    """
+
+    def __init__(
+            self,
+            default: Optional[ResiliencePolicy] = None,
+            services: Optional[Mapping[str, ResiliencePolicy]] = None,
+            timer: Callable[[], float] = time.monotonic,
+    ):
+        self.default = default or DISABLED_POLICY
+        self.services = dict(services or {})
+        self.timer = timer
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def policy(self, service_definition: str) -> ResiliencePolicy:
+        """ Returns the policy of ``service_definition``. """
+        return self.services.get(service_definition, self.default)
+
+    def breaker(self, rule: OrchestrationRule) -> Optional[CircuitBreaker]:
+        """
+        Returns the circuit breaker of the provider of ``rule``,
+        or ``None`` if the policy of the service does not use circuit breakers.
+        """
+        policy = self.policy(rule.service_definition)
+        if policy.failure_threshold is None:
+            return None
+
+        with self._lock:
+            breaker = self._breakers.get(rule.endpoint)
+            if breaker is None:
+                breaker = self._breakers[rule.endpoint] = CircuitBreaker(
+                        policy.failure_threshold,
+                        policy.reset_timeout,
+                        self.timer,
+                )
+
+        return breaker
+
+    def available(self, rules: Sequence[OrchestrationRule]) -> List[OrchestrationRule]:
+        """ Returns the rules whose providers are not blocked by an open circuit breaker. """
+        return [rule for rule in rules if _breaker_available(self.breaker(rule))]
+
+    def record(self, rule: OrchestrationRule, status: Optional[int]) -> None:
+        """
+        Records the outcome of a request to the provider of ``rule`` in its circuit breaker.
+
+        Args:
+            rule: Orchestration rule used by the request.
+            status: Response status code, ``None`` if the request raised an error.
+        """
+        breaker = self.breaker(rule)
+        if breaker is None:
+            return
+
+        if self.policy(rule.service_definition).is_failure(status):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def release(self, rule: OrchestrationRule) -> None:
+        """
+        Releases the trial request of the circuit breaker of the provider of ``rule``,
+        when a request ended without either a response or an error, for example because it was cancelled.
+        """
+        breaker = self.breaker(rule)
+        if breaker is not None:
+            breaker.release_trial()
+
+
+def _breaker_available(breaker: Optional[CircuitBreaker]) -> bool:
+    return breaker is None or breaker.available()
+
+
+def get_resilience(
+        resilience: Union[None, ResiliencePolicy, Mapping[str, ResiliencePolicy], Resilience] = None,
+) -> Resilience:
+    """
+    Factory function for resilience settings.
+
+    Args:
+        resilience: Either a :py:class:`Resilience` instance, which is returned as-is, a :py:class:`ResiliencePolicy`
+                    used for all services, a mapping of service definitions to policies, or ``None`` to
+                    disable resilience.
+    Returns:
+        Resilience instance.
+    """
+    if isinstance(resilience, Resilience):
+        return resilience
+    if isinstance(resilience, ResiliencePolicy):
+        return Resilience(default=resilience)
+
+    return Resilience(services=resilience)
@@ -1,19 +1,29 @@
-from typing import Union, Dict
-from dataclasses import dataclass
-import json
+import asyncio
+from collections import deque
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, List, Union, Dict, Optional, Sequence
+from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 
 from arrowhead_client import constants
+from arrowhead_client.codec import JsonCodec, get_json_codec
+
+DEFAULT_HIGH_WATERMARK = 1000
+DEFAULT_BATCH_WINDOW = 0.01
+DEFAULT_MAX_BATCH_SIZE = 1000
 
 
 @dataclass
 class Response:
     """
     Class for storing responses from systems
+
+    The ``codec`` decodes JSON payloads, the default codec is used if it is not given.
     """
     payload: bytes
     payload_type: str
     status_code: Union[str, int]
+    codec: Optional[JsonCodec] = field(default=None, repr=False, compare=False)
 
     def read_json(self) -> Dict:
         if self.payload_type != constants.Payload.JSON:
@@ -21,8 +31,8 @@ class Response:
                                f'current type is {self.payload_type}')
 
         try:
-            return json.loads(self.payload)
-        except json.JSONDecodeError as e:
+            return (self.codec or get_json_codec()).loads(self.payload)
+        except ValueError as e:
             raise RuntimeError(f'Payload of type \'{constants.Payload.JSON}\' '
                                f'is unable to be decoded. Current payload is:\n'
                                f' {self.payload.decode()}') from e
@@ -31,16 +41,65 @@ class Response:
         return self.payload.decode()
 
 
+@dataclass
+class ConsumeResult:
+    """
+    Result of one of the items consumed by :py:meth:`~arrowhead_client.client.ArrowheadClientAsync.consume_many`.
+
+    Either ``response`` or ``error`` is set, depending on whether consuming the item succeeded.
+    """
+    index: int
+    service_definition: str
+    response: Optional[Response] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class ConnectionResponse(ABC):
     """
     Adapter for websockets
+
+    Messages are sent either with :py:meth:`send`, which waits until the message is written, or with
+    :py:meth:`enqueue`, which puts the message in a send queue and returns at once. A background task sends the
+    queued messages in order. When the queue reaches ``high_watermark`` messages, :py:meth:`enqueue` waits until
+    the task has drained it to ``low_watermark`` messages, so a fast producer is slowed down to the rate of the
+    connection instead of buffering without bounds.
+
+    Received messages are iterated with :code:`async for`, which ends when the connection is closed.
+
+    Args:
+        connector: Connection object of the consumer implementation.
+        high_watermark: Number of queued messages at which :py:meth:`enqueue` starts to wait.
+        low_watermark: Number of queued messages at which waiting producers resume, defaults to a quarter of
+                       ``high_watermark``.
+
+    Example::
+
+        async with await client.connect('sensor-stream') as connection:
+            async for message in connection:
+                await connection.enqueue(process(message))
     """
 
     def __init__(
             self,
             connector,
+            high_watermark: int = DEFAULT_HIGH_WATERMARK,
+            low_watermark: Optional[int] = None,
     ):
+        if low_watermark is None:
+            low_watermark = high_watermark // 4
+        if not 0 <= low_watermark < high_watermark:
+            raise ValueError('Watermarks must satisfy 0 <= low_watermark < high_watermark')
         self._connector = connector
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self._send_queue: Deque[Callable[[], Awaitable[Any]]] = deque()
+        self._writable: Optional[asyncio.Event] = None
+        self._sender: Optional[asyncio.Future] = None
+        self._send_error: Optional[BaseException] = None
 
     @abstractmethod
     async def send(self, data):
@@ -48,14 +107,187 @@ class ConnectionResponse(ABC):
 
     @abstractmethod
     async def receive(self):
-        pass
+        """ Receives one message, returns ``None`` if the connection was closed. """
 
     @abstractmethod
     async def close(self):
         pass
 
+    @abstractmethod
+    def closed(self) -> bool:
+        """ ``True`` if the connection is closed. """
+
+    @property
+    def close_code(self) -> Optional[int]:
+        """ Close code sent by the other end, ``None`` if the connection is open or the protocol has none. """
+        return None
+
+    @property
+    def queued(self) -> int:
+        """ Number of messages in the send queue. """
+        return len(self._send_queue)
+
+    async def enqueue(self, data) -> None:
+        """
+        Queues ``data`` to be sent by the background task, waits while the queue is above the watermarks.
+
+        Raises:
+            Exception: The error that stopped the background task, if sending a queued message failed.
+                       The messages queued after it are discarded.
+        """
+        self._queue_call(partial(self.send, data))
+        await self._writable.wait()  # type: ignore
+        self._raise_send_error()
+
+    async def drain(self) -> None:
+        """
+        Waits until all queued messages have been sent.
+
+        Raises:
+            Exception: The error that stopped the background task.
+        """
+        if self._sender is not None:
+            await asyncio.wait({self._sender})
+        self._raise_send_error()
+
+    def _queue_call(self, call: Callable[[], Awaitable[Any]]) -> None:
+        """ Queues ``call``, which sends one message, without waiting for room in the queue. """
+        self._raise_send_error()
+        if self._writable is None:
+            # Created here so that it is bound to the running event loop
+            self._writable = asyncio.Event()
+            self._writable.set()
+        self._send_queue.append(call)
+        if len(self._send_queue) >= self.high_watermark:
+            self._writable.clear()
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.ensure_future(self._send_queued())
+
+    async def _send_queued(self) -> None:
+        try:
+            while self._send_queue:
+                await self._send_queue[0]()
+                self._send_queue.popleft()
+                if len(self._send_queue) <= self.low_watermark:
+                    self._writable.set()  # type: ignore
+        except Exception as e:
+            self._send_error = e
+            self._send_queue.clear()
+            self._writable.set()  # type: ignore
+
+    def _raise_send_error(self) -> None:
+        if self._send_error is not None:
+            raise self._send_error
+
+    async def _stop_sender(self) -> None:
+        """ Discards the queued messages and stops the background task. """
+        self._send_queue.clear()
+        if self._sender is not None and not self._sender.done():
+            self._sender.cancel()
+            await asyncio.wait({self._sender})
+        if self._writable is not None:
+            self._writable.set()
+
+    def __aiter__(self) -> 'ConnectionResponse':
+        return self
+
+    async def __anext__(self):
+        message = await self.receive()
+        if message is None and self.closed():
+            raise StopAsyncIteration
+
+        return message
+
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close()
+
+
+class BatchConnectionResponse(ConnectionResponse):
+    """
+    Connection that also sends and receives batches of records.
+
+    A batch is a list of records sent as one message, which saves the framing and encoding overhead of one message
+    per record on high rate streams. Records given to :py:meth:`send_record` are collected for ``batch_window``
+    seconds, or until ``max_batch_size`` records are collected, and then put in the send queue as one batch.
+
+    Args:
+        connector: Connection object of the consumer implementation.
+        high_watermark: Number of queued messages at which :py:meth:`enqueue` and :py:meth:`send_record` wait.
+        low_watermark: Number of queued messages at which waiting producers resume.
+        batch_window: Time in seconds that records are collected into one batch.
+        max_batch_size: Maximum number of records in one batch.
+    """
+
+    def __init__(
+            self,
+            connector,
+            high_watermark: int = DEFAULT_HIGH_WATERMARK,
+            low_watermark: Optional[int] = None,
+            batch_window: float = DEFAULT_BATCH_WINDOW,
+            max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be a positive integer')
+        super().__init__(connector, high_watermark, low_watermark)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._batch: List[Any] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    @abstractmethod
+    async def send_batch(self, records: Sequence[Any]) -> None:
+        """ Sends ``records`` as one batch. """
+
+    @abstractmethod
+    async def receive_batch(self) -> Optional[List[Any]]:
+        """ Receives one batch, returns ``None`` if the connection was closed. """
+
+    async def iter_records(self) -> AsyncIterator[Any]:
+        """ Yields the records of received batches until the connection is closed. """
+        while True:
+            records = await self.receive_batch()
+            if records is None:
+                return
+            for record in records:
+                yield record
+
+    async def send_record(self, record: Any) -> None:
+        """
+        Adds ``record`` to the current batch.
+
+        The batch is queued when it holds ``max_batch_size`` records, or ``batch_window`` seconds after its first
+        record was added, and then sent by the background task of the send queue, see :py:meth:`enqueue`.
+        Waits while the send queue is above the watermarks.
+        """
+        self._raise_send_error()
+        self._batch.append(record)
+        if len(self._batch) >= self.max_batch_size:
+            self._queue_batch()
+            await self._writable.wait()  # type: ignore
+            self._raise_send_error()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush_later)
+
+    async def flush(self) -> None:
+        """ Queues the current batch and waits until all queued messages have been sent. """
+        self._queue_batch()
+        await self.drain()
+
+    def _queue_batch(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._batch:
+            return
+
+        batch, self._batch = self._batch, []
+        self._queue_call(partial(self.send_batch, batch))
+
+    def _flush_later(self) -> None:
+        self._flush_handle = None
+        if self._send_error is None:
+            # Otherwise the error is raised by the next call to send_record
+            self._queue_batch()
@@ -3,12 +3,13 @@
 Rules Module
 ============
 """
-from typing import Optional, Iterator, Callable, Dict
+from typing import Optional, Iterator, Callable, Dict, Iterable, List
 from collections.abc import MutableMapping
 
 from arrowhead_client.system import ArrowheadSystem
 from arrowhead_client.service import Service
 from arrowhead_client.security.access_policy import AccessPolicy
+from arrowhead_client.load_balancing import LoadBalancingStrategy, RoundRobinStrategy
 from arrowhead_client import errors
 from arrowhead_client.types import Version, Metadata
 
@@ -178,21 +179,28 @@ class OrchestrationRuleContainer(MutableMapping):
     """
     Orchestration Rule Container.
 
-    This class is a thin wrapper around a dictionary, except for the :py:meth:`OrchestrationRuleContainer.store` method.
+    This class is a thin wrapper around a dictionary that maps service definitions to all orchestration rules,
+    one per provider, found for that service definition.
+    Looking up a service definition returns its first rule, and has no side effects.
+    Use :py:meth:`select` to pick the provider of a request with the load balancing ``strategy``.
+
+    Args:
+        strategy: Load balancing strategy, defaults to :py:class:`~arrowhead_client.load_balancing.RoundRobinStrategy`.
     """
 
-    def __init__(self):
-        self._rulecontainer: Dict[str, OrchestrationRule] = {}
+    def __init__(self, strategy: LoadBalancingStrategy = None):
+        self._rulecontainer: Dict[str, List[OrchestrationRule]] = {}
+        self.strategy = strategy or RoundRobinStrategy()
 
     def __getitem__(self, key: str) -> OrchestrationRule:
-        return self._rulecontainer[key]
+        return self._rulecontainer[key][0]
 
     def __setitem__(
             self,
             key: str,
             item: OrchestrationRule
     ) -> None:
-        self._rulecontainer[key] = item
+        self._rulecontainer[key] = [item]
 
     def __delitem__(self, key: str) -> None:
         del self._rulecontainer[key]
@@ -203,14 +211,58 @@ class OrchestrationRuleContainer(MutableMapping):
     def __len__(self) -> int:
         return len(self._rulecontainer)
 
+    def select(self, key: str) -> Optional[OrchestrationRule]:
+        """
+        Selects the provider of a request with the load balancing strategy.
+
+        Args:
+            key: Service definition.
+        Returns:
+            Orchestration rule of the selected provider, or ``None`` if there are no rules for ``key``.
+        """
+        rules = self._rulecontainer.get(key)
+        if not rules:
+            return None
+
+        return self.strategy.select(rules)
+
+    def providers(self, key: str) -> List[OrchestrationRule]:
+        """
+        Returns all orchestration rules stored for a service definition.
+
+        Args:
+            key: Service definition.
+        Returns:
+            List of orchestration rules, empty if there are none.
+        """
+        return list(self._rulecontainer.get(key, []))
+
     def store(self, item: OrchestrationRule):
         """
-        Takes an OrchestrationRule and stores it with the key ``item.service_definition``
+        Takes an OrchestrationRule and stores it with the key ``item.service_definition``,
+        next to the rules of other providers.
+        A stored rule with the same endpoint is replaced.
 
         Args:
             item: OrchestrationRule to be stored.
         """
-        self._rulecontainer[item.service_definition] = item
+        rules = [rule for rule in self._rulecontainer.get(item.service_definition, [])
+                 if rule.endpoint != item.endpoint]
+        self._rulecontainer[item.service_definition] = rules + [item]
+
+    def replace(self, key: str, items: Iterable[OrchestrationRule]):
+        """
+        Replaces all rules stored with the key ``key``.
+        If ``items`` is empty, the stored rules are kept, so that an orchestration that returns no providers does
+        not remove the known ones. Use :code:`del container[key]` to remove them.
+
+        Args:
+            key: Service definition.
+            items: OrchestrationRules to be stored.
+        """
+        rules = list(items)
+        if rules:
+            self._rulecontainer[key] = rules
 
 
 class RegistrationRuleContainer:
@@ -4,18 +4,20 @@ Access Policy module.
 
 """
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import TYPE_CHECKING, Any, Optional, Tuple
 
-# Not used because the CertificateAccessPolicy is disabled, see comment there.
-from cryptography import x509  # noqa: F401
-from cryptography.hazmat.backends import default_backend  # noqa: F401
-
-from arrowhead_client.security.access_token import AccessToken
-from arrowhead_client.security.utils import cert_cn
+from arrowhead_client.cache import TTLCache, CacheInfo
+from arrowhead_client.security.utils import cert_cn, cert_info
 from arrowhead_client.service import Service
 from arrowhead_client import errors
 from arrowhead_client import constants
 
+# jwcrypto is imported by TokenAccessPolicy when the first token is verified, it is not needed by other policies
+if TYPE_CHECKING:
+    from arrowhead_client.security.access_token import AccessToken
+
+DEFAULT_TOKEN_CACHE_SIZE = 1024
+
 
 class AccessPolicy(ABC):
     """
@@ -44,6 +46,11 @@ class TokenAccessPolicy(AccessPolicy):
         provided_service: Service instance.
         provider_keyfile: Provider keyfile path.
         auth_info: Public key of the Authorization system in the local cloud.
+        token_cache_size: Maximum number of verified tokens kept in the token cache, ``0`` disables the cache.
+
+    The provider and Authorization keys are parsed once, the first time a token is checked.
+    Verified tokens are cached by their raw authorization header until they expire,
+    the cache statistics are available through :py:meth:`TokenAccessPolicy.cache_info`.
     """
 
     def __init__(
@@ -51,11 +58,42 @@ class TokenAccessPolicy(AccessPolicy):
             provided_service: Service,
             provider_keyfile: str,
             auth_info: str,
+            token_cache_size: int = DEFAULT_TOKEN_CACHE_SIZE,
     ) -> None:
         # TODO: don't store a reference to the provided_service, store only the interface and service definition
         self.provided_service = provided_service
         self.provider_keyfile = provider_keyfile
         self.auth_info = auth_info
+        self._keys: Optional[Tuple[Any, Any]] = None
+        self._token_cache = TTLCache(maxsize=token_cache_size)
+
+    @property
+    def keys(self) -> Tuple[Any, Any]:
+        """ Tuple of the provider private JWK and the Authorization public JWK """
+        if self._keys is None:
+            from arrowhead_client.security.access_token import load_authorization_key, load_provider_key
+
+            self._keys = (
+                load_provider_key(self.provider_keyfile),
+                load_authorization_key(self.auth_info),
+            )
+        return self._keys
+
+    def cache_info(self) -> CacheInfo:
+        """ Hit and miss statistics of the token cache. """
+        return self._token_cache.cache_info()
+
+    def _get_token(self, auth_header: str) -> 'AccessToken':
+        token = self._token_cache.get(auth_header)
+        if token is not None:
+            return token
+
+        from arrowhead_client.security.access_token import AccessToken
+
+        token = AccessToken.from_keys(auth_header, *self.keys)
+        self._token_cache.set(auth_header, token, expires_at=token.expires_at)
+
+        return token
 
     def is_authorized(
             self,
@@ -78,11 +116,7 @@ class TokenAccessPolicy(AccessPolicy):
             return False
 
         try:
-            token = AccessToken.from_string(
-                    auth_header,
-                    self.provider_keyfile,
-                    self.auth_info
-            )
+            token = self._get_token(auth_header)
         except errors.InvalidTokenError:
             return False
 
@@ -113,19 +147,49 @@ class CertificateAccessPolicy(AccessPolicy):
             :code:`True` if given a valid PEM certificate, False otherwise.
         """
         try:
-            # TODO: This code is disabled because the certificate is not retrievable when using FastAPI
-            # without a reverse proxy, due to the ASGI standard.
-            # cert = x509.load_pem_x509_certificate(
-            #        consumer_cert_str.encode(),
-            #        default_backend()
-            # )
-            pass
+            cert_info(consumer_cert_str)
         except ValueError:
             return False
 
         return True
 
 
+class SystemAccessPolicy(AccessPolicy):
+    """
+    Access policy that only authorizes one system, identified by the system name that starts the common name of its
+    certificate, like :code:`event_handler` in :code:`event_handler.testcloud.aitia.arrowhead.eu`.
+
+    Used for the routes that only a core system calls, like the notify URI of event subscriptions.
+
+    Args:
+        system_name: Name of the authorized system.
+    """
+
+    def __init__(self, system_name: str) -> None:
+        self.system_name = system_name
+
+    def is_authorized(
+            self,
+            consumer_cert_str: str,
+            *args,
+            **kwargs,
+    ) -> bool:
+        """
+        Checks that the consumer certificate belongs to the authorized system.
+
+        Args:
+            consumer_cert_str: PEM certificate string.
+        Returns:
+            :code:`True` if the certificate belongs to the system, False otherwise.
+        """
+        try:
+            consumer_cn = cert_cn(consumer_cert_str)
+        except ValueError:
+            return False
+
+        return consumer_cn.split('.')[0] == self.system_name
+
+
 class UnrestrictedAccessPolicy(AccessPolicy):
     """
     Access policy used when :py:enum:mem:`~arrowhead_client.constants.AccessPolicy.UNRESTRICTED` is specified.
@@ -160,6 +224,7 @@ def get_access_policy(
         provided_service: Service instance.
         privatekey: Provider keyfile path.
         authorization_key: Authorization core system public key.
+        token_cache_size: Optional. Size of the token cache used by the token access policy.
     Returns:
         Initialized AccessPolicy instance.
     """
@@ -171,7 +236,8 @@ def get_access_policy(
         return TokenAccessPolicy(
                 provided_service,
                 privatekey,
-                kwargs['authorization_key']
+                kwargs['authorization_key'],
+                kwargs.get('token_cache_size', DEFAULT_TOKEN_CACHE_SIZE),
         )
     else:
         raise ValueError(
@@ -1,5 +1,6 @@
 import json
 import time
+from typing import Optional
 
 from jwcrypto import jwk, jwt  # type: ignore
 
@@ -14,15 +15,18 @@ class AccessToken:
         consumer_id: Consumer CN
         interface_id: Provided service interface description
         service_id: Provided service definition
+        expires_at: Token expiry as a unix timestamp, ``None`` if the token does not expire.
     """
 
     def __init__(self,
                  consumer_id: str,
                  interface_id: str,
-                 service_id: str, ) -> None:
+                 service_id: str,
+                 expires_at: Optional[float] = None, ) -> None:
         self.consumer_id = consumer_id
         self.interface_id = interface_id
         self.service_id = service_id
+        self.expires_at = expires_at
 
     @classmethod
     def from_string(
@@ -44,6 +48,31 @@ class AccessToken:
             ValueError: Malformed authorization header.
             RuntimeError: Invalid token claims.
         """
+        return cls.from_keys(
+                auth_string,
+                load_provider_key(provider_keyfile),
+                load_authorization_key(auth_authorization_info),
+        )
+
+    @classmethod
+    def from_keys(
+            cls,
+            auth_string: str,
+            provider_key: jwk.JWK,
+            authorization_key: jwk.JWK,
+    ) -> 'AccessToken':
+        """
+        Creates an AccessToken from the given authorization header, using already parsed keys.
+
+        Args:
+            auth_string: the AUTHORIZATION string.
+            provider_key: Provider private key, see :py:func:`load_provider_key`.
+            authorization_key: Authorization system public key, see :py:func:`load_authorization_key`.
+        Returns:
+            An AccessToken constructed from the information in the authentication header.
+        Raises:
+            InvalidTokenError: Malformed authorization header or invalid token claims.
+        """
         try:
             bearer, token_string = auth_string.split()
         except ValueError as e:
@@ -54,19 +83,10 @@ class AccessToken:
         if bearer != 'Bearer':
             raise errors.InvalidTokenError('Malformed authorization header')
 
-        # Generate jwk for provider private key
-        with open(provider_keyfile, 'rb') as keyfile:
-            jwk_privatekey = jwk.JWK.from_pem(keyfile.read())
-
-        # Generate jwk for authorization public key
-        jwk_authkey = jwk.JWK.from_pem(
-                auth_authorization_info.encode()
-        )
-
         # Decrypt, sign, and extract claims from token
-        decrypted_token = jwt.JWT(key=jwk_privatekey, jwt=token_string)
+        decrypted_token = jwt.JWT(key=provider_key, jwt=token_string)
         try:
-            signed_token = jwt.JWT(key=jwk_authkey, jwt=decrypted_token.claims)
+            signed_token = jwt.JWT(key=authorization_key, jwt=decrypted_token.claims)
         except jwt.JWException as e:
             raise errors.InvalidTokenError from e
 
@@ -77,12 +97,42 @@ class AccessToken:
             raise errors.InvalidTokenError('JWT not yet issued')
         if token_claims['iss'] != 'Authorization':
             raise errors.InvalidTokenError('JWT not issued by Authorization system')
+        expires_at = token_claims.get('exp')
+        # jwcrypto accepts tokens up to a minute past their expiry, expired tokens are rejected here without leeway
+        if expires_at is not None and expires_at <= now:
+            raise errors.InvalidTokenError('JWT has expired')
         # TODO: Implement checks for other standard claims.
 
         new_access_token = cls(
                 consumer_id=token_claims['cid'],
                 interface_id=token_claims['iid'],
                 service_id=token_claims['sid'],
+                expires_at=expires_at,
         )
 
         return new_access_token
+
+
+def load_provider_key(provider_keyfile: str) -> jwk.JWK:
+    """
+    Reads the provider private key from a PEM keyfile.
+
+    Args:
+        provider_keyfile: Provider keyfile path.
+    Returns:
+        Provider private key as a JWK.
+    """
+    with open(provider_keyfile, 'rb') as keyfile:
+        return jwk.JWK.from_pem(keyfile.read())
+
+
+def load_authorization_key(auth_authorization_info: str) -> jwk.JWK:
+    """
+    Parses the Authorization system public key.
+
+    Args:
+        auth_authorization_info: Authorization system public key as a PEM string.
+    Returns:
+        Authorization system public key as a JWK.
+    """
+    return jwk.JWK.from_pem(auth_authorization_info.encode())
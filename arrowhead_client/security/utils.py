@@ -1,33 +1,122 @@
+import hashlib
 from base64 import b64encode, b64decode
-from typing import Optional
+from datetime import timezone
+from typing import TYPE_CHECKING, Optional, NamedTuple, Tuple
 
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from arrowhead_client.cache import TTLCache
 
+# cryptography is imported by the functions that use it, it is only needed when certificates are actually used
+if TYPE_CHECKING:
+    from cryptography import x509
+    from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
 
 # TODO: Implement this https://blog.cyberreboot.org/using-pkcs-12-formatted-certificates-in-python-fd98362f90ba to reduce file io and use pkcs12
 
-def cert_cn(cert_string: str) -> str:
+DEFAULT_CERTIFICATE_CACHE_SIZE = 512
+
+
+class CertificateInfo(NamedTuple):
+    """
+    Parsed certificate subject information.
+
+    Attributes:
+        common_names: Common names in the certificate subject.
+        subject_alt_names: Subject alternative names.
+        not_valid_after: Certificate expiry as a unix timestamp.
+    """
+    common_names: Tuple[str, ...]
+    subject_alt_names: Tuple[str, ...]
+    not_valid_after: float
+
+
+certificate_cache = TTLCache(maxsize=DEFAULT_CERTIFICATE_CACHE_SIZE)
+"""
+Cache of :py:class:`CertificateInfo` shared by all access policies, keyed by certificate fingerprint.
+Entries are evicted when the certificate expires.
+"""
+
+
+def cert_fingerprint(cert_string: str) -> str:
+    """ SHA-256 fingerprint of a PEM certificate string. """
+    return hashlib.sha256(cert_string.strip().encode()).hexdigest()
+
+
+def cert_info(cert_string: str) -> CertificateInfo:
+    """
+    Returns the subject information of a PEM certificate.
+
+    Parsed certificates are kept in :py:data:`certificate_cache` until they expire.
+
+    Args:
+        cert_string: PEM certificate string.
+    Returns:
+        Parsed certificate information.
+    Raises:
+        ValueError: If ``cert_string`` is not a valid PEM certificate.
+    """
+    fingerprint = cert_fingerprint(cert_string)
+    info = certificate_cache.get(fingerprint)
+    if info is not None:
+        return info
+
+    from cryptography import x509
+    from cryptography.hazmat.backends import default_backend
+
     cert = x509.load_pem_x509_certificate(
             cert_string.encode(),
             default_backend()
     )
-    common_names = cert.subject.get_attributes_for_oid(x509.NameOID.COMMON_NAME)
+    info = CertificateInfo(
+            common_names=tuple(
+                    attribute.value
+                    for attribute in cert.subject.get_attributes_for_oid(x509.NameOID.COMMON_NAME)
+            ),
+            subject_alt_names=_subject_alt_names(cert),
+            not_valid_after=_not_valid_after(cert),
+    )
+    certificate_cache.set(fingerprint, info, expires_at=info.not_valid_after)
+
+    return info
+
+
+def cert_cn(cert_string: str) -> str:
+    common_names = cert_info(cert_string).common_names
     # TODO: Are these checks necessary anymore?
     if len(common_names) > 1:
         raise RuntimeError('Multiple common names in cert, expected 1.')
     elif len(common_names) == 0:
         raise RuntimeError('No common name in cert, expected 1.')
 
-    common_name = common_names[0].value
+    common_name = common_names[0]
     if common_name == '':
         raise RuntimeError('Common name is empty')
     return common_name
 
 
-def extract_cert(certfile: str) -> x509.Certificate:
+def _subject_alt_names(cert: 'x509.Certificate') -> Tuple[str, ...]:
+    from cryptography import x509
+
+    try:
+        extension = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName)
+    except x509.ExtensionNotFound:
+        return ()
+
+    return tuple(str(general_name.value) for general_name in extension.value)
+
+
+def _not_valid_after(cert: 'x509.Certificate') -> float:
+    # not_valid_after_utc was added in cryptography 42, older versions return a naive UTC datetime
+    not_valid_after = getattr(cert, 'not_valid_after_utc', None)
+    if not_valid_after is None:
+        not_valid_after = cert.not_valid_after.replace(tzinfo=timezone.utc)
+
+    return not_valid_after.timestamp()
+
+
+def extract_cert(certfile: str) -> 'x509.Certificate':
+    from cryptography import x509
+    from cryptography.hazmat.backends import default_backend
+
     with open(certfile, 'rb') as crt:
         # Read certificate from cert file
         cert = x509.load_pem_x509_certificate(
@@ -38,7 +127,7 @@ def extract_cert(certfile: str) -> x509.Certificate:
     return cert
 
 
-def extract_publickey(certfile: str) -> Optional[RSAPublicKey]:
+def extract_publickey(certfile: str) -> Optional['RSAPublicKey']:
     if not certfile:
         return None
 
@@ -51,10 +140,12 @@ def extract_publickey(certfile: str) -> Optional[RSAPublicKey]:
     return publickey  # type: ignore
 
 
-def create_authentication_info(publickey: Optional[RSAPublicKey]) -> str:
+def create_authentication_info(publickey: Optional['RSAPublicKey']) -> str:
     if not publickey:
         return ''
 
+    from cryptography.hazmat.primitives import serialization
+
     # Get byte encoding for public key
     public_bytes = publickey.public_bytes(
             encoding=serialization.Encoding.DER,
@@ -66,6 +157,9 @@ def create_authentication_info(publickey: Optional[RSAPublicKey]) -> str:
 
 
 def der_to_pem(der64: str) -> str:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+
     publickey = serialization.load_der_public_key(b64decode(der64), backend=default_backend())
     pem_string = publickey.public_bytes(
             encoding=serialization.Encoding.PEM,
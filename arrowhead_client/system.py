@@ -73,8 +73,9 @@ class ArrowheadSystem(DTOMixin):
         )
 
     @classmethod
-    def from_dto(cls, system_dto: Dict):
-        return cls(
+    def from_dto(cls, system_dto: Dict, trusted: bool = False):
+        return cls._create(
+                trusted,
                 system_name=str(system_dto['systemName']),
                 address=str(system_dto['address']),
                 port=int(system_dto['port']),
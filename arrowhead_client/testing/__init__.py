@@ -0,0 +1,10 @@
+"""
+Tools for testing and benchmarking Arrowhead systems without the Arrowhead core systems.
+"""
+from .core_systems import FakeCoreSystems
+from .providers import NullProvider
+
+__all__ = [
+    'FakeCoreSystems',
+    'NullProvider',
+]
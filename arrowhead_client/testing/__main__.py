@@ -0,0 +1,53 @@
+"""
+Runs the fake core systems in their own process.
+
+Example::
+
+    python -m arrowhead_client.testing --port 8443 --latency 0.005 --populate temperature:1000
+"""
+import argparse
+
+from arrowhead_client.testing.core_systems import FakeCoreSystems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve fake Arrowhead core systems.')
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum random seconds added to the latency.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail.')
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--keyfile', default='')
+    parser.add_argument('--certfile', default='')
+    parser.add_argument('--cafile', default='')
+    parser.add_argument(
+            '--populate',
+            action='append',
+            default=[],
+            metavar='SERVICE_DEFINITION:PROVIDERS',
+            help='Registers generated providers of a service, can be given several times.',
+    )
+    args = parser.parse_args(argv)
+
+    core_systems = FakeCoreSystems(
+            address=args.address,
+            port=args.port,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            keyfile=args.keyfile,
+            certfile=args.certfile,
+            cafile=args.cafile,
+    )
+    for population in args.populate:
+        service_definition, _, providers = population.rpartition(':')
+        core_systems.populate(service_definition, int(providers))
+
+    print(f'Serving fake core systems on {core_systems.address}:{core_systems.port}', flush=True)
+    core_systems.run_forever()
+
+
+if __name__ == '__main__':
+    main()
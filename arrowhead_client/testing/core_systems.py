@@ -0,0 +1,502 @@
+"""
+=================
+Fake Core Systems
+=================
+
+In-process stand-ins for the Service Registry, Orchestrator, Authorization, and Event Handler core systems, so that clients
+can be tested and benchmarked without the Arrowhead core systems, docker, or a network.
+
+Example::
+
+    from arrowhead_client.client.implementations import SyncClient
+    from arrowhead_client.testing import FakeCoreSystems
+
+    with FakeCoreSystems(latency=0.005) as core_systems:
+        core_systems.populate('temperature', providers=1000)
+
+        client = SyncClient.create('test_client', '127.0.0.1', 1337, config=core_systems.config)
+        client.add_orchestration_rule('temperature', 'GET')
+"""
+import copy
+import random
+import ssl
+import threading
+import time
+from base64 import b64encode
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from arrowhead_client.client.core_services import CoreServices
+from arrowhead_client.client.core_system_defaults import default_config
+from arrowhead_client.codec import JsonCodec, get_json_codec
+from arrowhead_client import constants
+
+FAKE_CORE_SYSTEMS = (
+    constants.CoreSystem.SERVICE_REGISTRY,
+    constants.CoreSystem.ORCHESTRATOR,
+    constants.CoreSystem.AUTHORIZATION,
+    constants.CoreSystem.EVENT_HANDLER,
+)
+
+
+class FakeCoreSystems:
+    """
+    Serves the core services in :py:class:`~arrowhead_client.client.core_services.CoreServices` from a
+    threaded HTTP server.
+
+    All core systems share one address and port, use :py:attr:`config` as the client config to reach them.
+    Registered services are kept in memory, and service queries and orchestration requests are answered with
+    every registered provider of the requested service definition. Published events and event subscriptions are
+    recorded in :py:attr:`published_events` and :py:attr:`subscriptions`.
+
+    Args:
+        address: Address to bind.
+        port: Port to bind, ``0`` picks a free port.
+        latency: Time in seconds added to every response.
+        jitter: Upper bound of a uniformly distributed random time in seconds added to the latency.
+        error_rate: Fraction of requests, between 0 and 1, that are answered with ``error_status``.
+        error_status: HTTP status of the randomly injected errors.
+        keyfile: Optional. Server keyfile, the core systems are served over HTTPS if given together with ``certfile``.
+        certfile: Optional. Server certfile.
+        cafile: Optional. Certificate authority file used to verify client certificates.
+        seed: Optional. Seed for the random latency and error injection.
+        json_codec: JSON codec or library name, see :py:func:`~arrowhead_client.codec.get_json_codec`.
+    """
+
+    def __init__(
+            self,
+            address: str = '127.0.0.1',
+            port: int = 0,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            error_status: int = 500,
+            keyfile: str = '',
+            certfile: str = '',
+            cafile: str = '',
+            seed: Optional[int] = None,
+            json_codec: Optional[JsonCodec] = None,
+    ):
+        if not 0 <= error_rate <= 1:
+            raise ValueError('error_rate must be in the interval [0, 1]')
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.json_codec = get_json_codec(json_codec)
+        # Number of requests received for each core service definition
+        self.requests: Counter = Counter()
+        self.published_events: List[Dict[str, Any]] = []
+        self.subscriptions: List[Dict[str, Any]] = []
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._services: Dict[str, List[Dict[str, Any]]] = {}
+        self._injected_errors: Deque[Tuple[Optional[str], int, str]] = deque()
+        self._ids = iter(range(1, 2 ** 31))
+        self._publickey_b64: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._server = ThreadingHTTPServer((address, port), _make_handler(self))
+        self._server.daemon_threads = True
+        if keyfile and certfile:
+            ssl_context = ssl.create_default_context(purpose=ssl.Purpose.CLIENT_AUTH)
+            ssl_context.load_cert_chain(certfile, keyfile)
+            if cafile:
+                ssl_context.load_verify_locations(cafile)
+                ssl_context.verify_mode = ssl.CERT_OPTIONAL
+            self._server.socket = ssl_context.wrap_socket(self._server.socket, server_side=True)
+
+        self._routes = {
+            (service.method, service.uri): (service.service_definition, getattr(self, f'_{service.name.lower()}'))
+            for service in CoreServices
+            if service.system in FAKE_CORE_SYSTEMS
+        }
+
+    @property
+    def address(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def config(self) -> Dict:
+        """ Client config where all faked core systems point to this server. """
+        config = copy.deepcopy(default_config)
+        for system in FAKE_CORE_SYSTEMS:
+            config[system.value] = {'system_name': system.value, 'address': self.address, 'port': self.port}
+
+        return config
+
+    @property
+    def publickey(self) -> str:
+        """ Base64 encoded DER public key returned by the Authorization public key service. """
+        if self._publickey_b64 is None:
+            from cryptography.hazmat.primitives import serialization
+            from cryptography.hazmat.primitives.asymmetric import rsa
+
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            self._publickey_b64 = b64encode(private_key.public_key().public_bytes(
+                    encoding=serialization.Encoding.DER,
+                    format=serialization.PublicFormat.SubjectPublicKeyInfo,
+            )).decode()
+
+        return self._publickey_b64
+
+    def start(self) -> 'FakeCoreSystems':
+        """ Starts serving in a background thread. """
+        self._thread = threading.Thread(
+                target=self._server.serve_forever,
+                kwargs={'poll_interval': 0.05},
+                name=f'fake-core-systems-{self.port}',
+                daemon=True,
+        )
+        self._thread.start()
+
+        return self
+
+    def run_forever(self) -> None:
+        """ Serves in the current thread until interrupted. """
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        """ Stops the background thread started by :py:meth:`start` and closes the server. """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeCoreSystems':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def populate(
+            self,
+            service_definition: str,
+            providers: int,
+            interface: str = 'HTTP-INSECURE-JSON',
+            service_uri: str = '',
+            secure: str = constants.Security.INSECURE,
+            metadata: Optional[Dict[str, str]] = None,
+            address: str = '127.0.0.1',
+            first_port: int = 20000,
+    ) -> None:
+        """
+        Registers ``providers`` generated providers of ``service_definition``, to produce large query and
+        orchestration results.
+
+        The providers are named ``<service_definition>_provider_<n>`` and listen on consecutive ports
+        starting at ``first_port``.
+        """
+        for number in range(providers):
+            self._register({
+                'serviceDefinition': service_definition,
+                'serviceUri': service_uri or service_definition,
+                'interfaces': [interface],
+                'providerSystem': {
+                    'systemName': f'{service_definition}_provider_{number}',
+                    'address': address,
+                    'port': first_port + number,
+                    'authenticationInfo': '',
+                },
+                'secure': secure,
+                'metadata': metadata,
+                'version': 1,
+            })
+
+    def fail_next(
+            self,
+            service_definition: Optional[str] = None,
+            status: int = 500,
+            count: int = 1,
+            message: str = 'Injected error',
+    ) -> None:
+        """
+        Answers the next ``count`` requests with ``status``.
+
+        Args:
+            service_definition: Core service definition, like :code:`orchestration-service`, that fails.
+                                ``None`` fails requests to any core service.
+            status: HTTP status of the error.
+            count: Number of failing requests.
+            message: Error message in the response.
+        """
+        with self._lock:
+            self._injected_errors.extend([(service_definition, status, message)] * count)
+
+    def registered(self, service_definition: str) -> List[Dict[str, Any]]:
+        """ Service registry entries of ``service_definition``. """
+        with self._lock:
+            return list(self._services.get(service_definition, []))
+
+    def clear(self) -> None:
+        """ Removes all registered services, events, subscriptions, injected errors and request counts. """
+        with self._lock:
+            self._services.clear()
+            self.published_events.clear()
+            self.subscriptions.clear()
+            self._injected_errors.clear()
+            self.requests.clear()
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: bytes) -> Tuple[int, Any]:
+        """
+        Handles one request.
+
+        Returns:
+            Tuple of HTTP status and response, which is JSON encoded unless it is a string.
+        """
+        route = self._routes.get((method, path.strip('/')))
+        if route is None:
+            return 404, _error(f'No core service at {method} {path}', 404)
+        service_definition, handler = route
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._lock:
+            self.requests[service_definition] += 1
+            injected = self._pop_injected_error(service_definition)
+        if injected is not None:
+            status, message = injected
+            return status, _error(message, status)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self.error_status, _error('Random error', self.error_status)
+
+        try:
+            form = self.json_codec.loads(body) if body else {}
+        except ValueError:
+            return 400, _error('Request body is not valid JSON', 400)
+
+        return handler(form, query)
+
+    def _pop_injected_error(self, service_definition: str) -> Optional[Tuple[int, str]]:
+        for i, (failing_service, status, message) in enumerate(self._injected_errors):
+            if failing_service is None or failing_service == service_definition:
+                del self._injected_errors[i]
+                return status, message
+
+        return None
+
+    def _service_register(self, form: Dict[str, Any], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        try:
+            return 201, self._register(form)
+        except KeyError as e:
+            return 400, _error(f'Missing field {e}', 400)
+        except ValueError as e:
+            return 400, _error(str(e), 400)
+
+    def _register(self, form: Dict[str, Any]) -> Dict[str, Any]:
+        service_definition = form['serviceDefinition']
+        provider = form['providerSystem']
+        with self._lock:
+            entries = self._services.setdefault(service_definition, [])
+            for entry in entries:
+                if _same_provider(entry['provider'], provider['systemName'], provider['address'], provider['port']):
+                    raise ValueError(
+                            f'Service {service_definition} with provider {provider["systemName"]} already exists.'
+                    )
+
+            now = _timestamp()
+            entry = {
+                'id': next(self._ids),
+                'serviceDefinition': {
+                    'id': next(self._ids),
+                    'serviceDefinition': service_definition,
+                    'createdAt': now,
+                    'updatedAt': now,
+                },
+                'provider': {
+                    'id': next(self._ids),
+                    'systemName': provider['systemName'],
+                    'address': provider['address'],
+                    'port': provider['port'],
+                    'authenticationInfo': provider.get('authenticationInfo') or '',
+                    'createdAt': now,
+                    'updatedAt': now,
+                },
+                'serviceUri': form.get('serviceUri', ''),
+                'endOfValidity': form.get('endOfValidity') or '',
+                'secure': form.get('secure') or constants.Security.INSECURE.value,
+                'metadata': form.get('metadata'),
+                'version': form.get('version'),
+                'interfaces': [
+                    {'id': next(self._ids), 'interfaceName': interface, 'createdAt': now, 'updatedAt': now}
+                    for interface in form['interfaces']
+                ],
+                'createdAt': now,
+                'updatedAt': now,
+            }
+            entries.append(entry)
+
+        return entry
+
+    def _service_unregister(self, form: Dict[str, Any], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        try:
+            service_definition = query['service_definition'][0]
+            system_name = query['system_name'][0]
+            address = query['address'][0]
+            port = int(query['port'][0])
+        except (KeyError, ValueError):
+            return 400, _error('service_definition, system_name, address, and port are required', 400)
+
+        with self._lock:
+            entries = self._services.get(service_definition, [])
+            remaining = [entry for entry in entries if not _same_provider(entry['provider'], system_name, address, port)]
+            if len(remaining) == len(entries):
+                return 400, _error(f'Service {service_definition} of {system_name} is not registered', 400)
+            self._services[service_definition] = remaining
+
+        return 200, ''
+
+    def _service_query(self, form: Dict[str, Any], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        entries = self._matching_entries(form)
+        if entries is None:
+            return 400, _error('serviceDefinitionRequirement is required', 400)
+
+        return 200, {'serviceQueryData': entries, 'unfilteredHits': len(entries)}
+
+    def _orchestration(self, form: Dict[str, Any], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        entries = self._matching_entries(form.get('requestedService') or {})
+        if entries is None:
+            return 400, _error('requestedService.serviceDefinitionRequirement is required', 400)
+
+        return 200, {'response': [
+            {
+                'provider': entry['provider'],
+                'service': entry['serviceDefinition'],
+                'serviceUri': entry['serviceUri'],
+                'secure': entry['secure'],
+                'metadata': entry['metadata'],
+                'interfaces': entry['interfaces'],
+                'version': entry['version'],
+                'authorizationTokens': {},
+                'warnings': [],
+            }
+            for entry in entries
+        ]}
+
+    def _publickey(self, form: Dict[str, Any], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        return 200, self.publickey
+
+    def _event_publish(self, form: Dict[str, Any], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        missing = [field for field in ('eventType', 'payload', 'source', 'timeStamp') if not form.get(field)]
+        if missing:
+            return 400, _error(f'Missing fields {", ".join(missing)}', 400)
+
+        with self._lock:
+            self.published_events.append(form)
+
+        return 200, ''
+
+    def _event_subscribe(self, form: Dict[str, Any], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        missing = [field for field in ('eventType', 'notifyUri', 'subscriberSystem') if not form.get(field)]
+        if missing:
+            return 400, _error(f'Missing fields {", ".join(missing)}', 400)
+
+        with self._lock:
+            self.subscriptions.append(form)
+
+        return 200, ''
+
+    def _event_unsubscribe(self, form: Dict[str, Any], query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        try:
+            event_type = query['event_type'][0]
+            system_name = query['system_name'][0]
+            address = query['address'][0]
+            port = int(query['port'][0])
+        except (KeyError, ValueError):
+            return 400, _error('event_type, system_name, address, and port are required', 400)
+
+        with self._lock:
+            self.subscriptions = [
+                subscription for subscription in self.subscriptions
+                if not _same_subscription(subscription, event_type, system_name, address, port)
+            ]
+
+        return 200, ''
+
+    def _matching_entries(self, query_form: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        service_definition = query_form.get('serviceDefinitionRequirement')
+        if not service_definition:
+            return None
+        interfaces = {interface for interface in query_form.get('interfaceRequirements') or [] if interface}
+
+        with self._lock:
+            entries = list(self._services.get(service_definition, []))
+
+        if interfaces:
+            entries = [
+                entry for entry in entries
+                if any(interface['interfaceName'] in interfaces for interface in entry['interfaces'])
+            ]
+
+        return entries
+
+
+def _same_provider(provider: Dict[str, Any], system_name: str, address: str, port: int) -> bool:
+    return provider['systemName'] == system_name and \
+           provider['address'] == address and \
+           int(provider['port']) == int(port)
+
+
+def _same_subscription(subscription: Dict[str, Any], event_type: str, system_name: str, address: str, port: int) -> bool:
+    return subscription['eventType'] == event_type and \
+           _same_provider(subscription['subscriberSystem'], system_name, address, port)
+
+
+def _error(message: str, status: int) -> Dict[str, Any]:
+    return {
+        constants.Misc.ERROR_MESSAGE.value: message,
+        'errorCode': status,
+        'exceptionType': 'FAKE_CORE_SYSTEM',
+    }
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _make_handler(core_systems: FakeCoreSystems):
+    class FakeCoreSystemHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def _handle(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+
+            status, response = core_systems.handle(self.command, url.path, parse_qs(url.query), body)
+            if isinstance(response, str):
+                payload = response.encode()
+                content_type = 'text/plain'
+            else:
+                payload = core_systems.json_codec.dumps(response)
+                content_type = 'application/json'
+
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeCoreSystemHandler
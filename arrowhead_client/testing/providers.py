@@ -0,0 +1,40 @@
+"""
+Providers for clients that only consume services in tests and benchmarks.
+"""
+from typing import Callable, Dict
+
+from arrowhead_client.provider.base import BaseProvider
+from arrowhead_client.rules import RegistrationRule
+from arrowhead_client.security.access_policy import AccessPolicy
+from arrowhead_client import constants
+
+
+class NullProvider(BaseProvider, protocol=constants.Protocol.HTTP):
+    """
+    Provider that serves nothing.
+
+    Lets clients be created without starting, or installing, a web framework.
+    The receive functions of event routes are kept in :py:attr:`event_routes`, so that tests can deliver
+    notifications by calling them, and their access policies in :py:attr:`event_policies`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.event_routes: Dict[str, Callable[[bytes], int]] = {}
+        self.event_policies: Dict[str, AccessPolicy] = {}
+
+    def add_provided_service(self, rule: RegistrationRule) -> None:
+        pass
+
+    def add_event_route(self, uri: str, receive: Callable[[bytes], int], access_policy: AccessPolicy) -> None:
+        self.event_routes[uri] = receive
+        self.event_policies[uri] = access_policy
+
+    def run_forever(self, address: str, port: int, keyfile: str, certfile: str) -> None:
+        pass
+
+    def add_startup_routine(self, func: Callable):
+        pass
+
+    def add_shutdown_routine(self, func: Callable):
+        pass
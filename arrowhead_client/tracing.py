@@ -0,0 +1,352 @@
+"""
+==============
+Tracing Module
+==============
+
+Tracing spans that follow a request from the consumer, through the orchestration lookup, to the provider.
+
+Tracing is disabled by default, in which case the shared :py:data:`NULL_TRACER` hands out a span that does nothing.
+Pass ``tracer=True``, or a :py:class:`Tracer`, to :py:meth:`ArrowheadClient.create` to enable it.
+The span that is active in the current thread or task is kept in a :py:mod:`contextvars` variable,
+so spans started while another span is active become its children, also across ``await``.
+
+Consumers send the trace context to providers in the W3C ``traceparent`` header, and providers continue the
+trace of the consumer, so that the spans of both sides end up in the same trace.
+
+Finished spans are handed to a :py:class:`SpanExporter`. The built-in :py:class:`InMemorySpanExporter` keeps them
+in memory, which is enough for tests and for inspecting traces without a collector.
+
+Example::
+
+    exporter = InMemorySpanExporter()
+    client = AsyncClient.create('example_client', '127.0.0.1', 5678, tracer=Tracer(exporter))
+
+    ...
+
+    for span in exporter.finished_spans():
+        print(span.name, span.duration)
+"""
+import contextvars
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Union
+
+from arrowhead_client import constants
+
+DEFAULT_MAX_SPANS = 10000
+TRACEPARENT_HEADER = 'traceparent'
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_INVALID_TRACE_ID = '0' * 32
+_INVALID_SPAN_ID = '0' * 16
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('arrowhead_span', default=None)
+
+
+class SpanContext(NamedTuple):
+    """
+    Identifies a span within a trace.
+
+    Attributes:
+        trace_id: 32 character hexadecimal trace id.
+        span_id: 16 character hexadecimal span id.
+        sampled: ``True`` if the trace is recorded.
+    """
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    def to_traceparent(self) -> str:
+        """ Returns the context formatted as a W3C ``traceparent`` header value. """
+        return f'00-{self.trace_id}-{self.span_id}-{"01" if self.sampled else "00"}'
+
+    @classmethod
+    def from_traceparent(cls, header: Optional[str]) -> Optional['SpanContext']:
+        """
+        Parses a W3C ``traceparent`` header value.
+
+        Returns:
+            The span context, or ``None`` if the header is missing or invalid.
+        """
+        if not header:
+            return None
+
+        match = _TRACEPARENT.match(header.strip().lower())
+        if match is None:
+            return None
+
+        trace_id, span_id, flags = match.groups()
+        if trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+            return None
+
+        return cls(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+class Span:
+    """
+    One timed operation within a trace.
+
+    Spans are created by :py:meth:`Tracer.start_span` and used as context managers. Entering a span makes it
+    the current span, exiting it ends the span, records the exception that was raised, if any, and restores the
+    previous current span.
+
+    Attributes:
+        name: Span name.
+        context: Trace and span id of this span.
+        parent_id: Span id of the parent span, ``None`` for the root span of a trace.
+        kind: :code:`INTERNAL`, :code:`CLIENT` for outgoing requests, or :code:`SERVER` for incoming requests.
+        attributes: Attributes describing the operation.
+        status: :code:`UNSET`, :code:`OK`, or :code:`ERROR`.
+        start_time: Start time in seconds since the epoch.
+        end_time: End time in seconds since the epoch, ``None`` until the span has ended.
+    """
+
+    def __init__(
+            self,
+            tracer: 'Tracer',
+            name: str,
+            context: SpanContext,
+            parent_id: Optional[str],
+            kind: constants.SpanKind,
+            attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = constants.SpanStatus.UNSET
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self._tracer = tracer
+        self._start = time.perf_counter()
+        self._token: Optional[contextvars.Token] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """ Duration in seconds, ``None`` until the span has ended. """
+        return self.end_time - self.start_time if self.end_time is not None else None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_status(self, status: constants.SpanStatus) -> None:
+        self.status = status
+
+    def record_exception(self, exception: BaseException) -> None:
+        """ Marks the span as failed by ``exception``. """
+        self.status = constants.SpanStatus.ERROR
+        self.attributes['exception.type'] = type(exception).__name__
+        self.attributes['exception.message'] = str(exception)
+
+    def end(self) -> None:
+        """ Ends the span and exports it, ending a span twice has no effect. """
+        if self.end_time is not None:
+            return
+
+        self.end_time = self.start_time + (time.perf_counter() - self._start)
+        self._tracer.exporter.export(self)
+
+    def __enter__(self) -> 'Span':
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_val is not None:
+            self.record_exception(exc_val)
+        self.end()
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+
+    def __repr__(self) -> str:
+        return f'Span({self.name!r}, trace_id={self.context.trace_id}, span_id={self.context.span_id})'
+
+
+class _NullSpan:
+    """ Span returned when tracing is disabled. """
+    context = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_status(self, status: constants.SpanStatus) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class SpanExporter(ABC):
+    """
+    Abstract class for span exporters, which receive every span when it ends.
+    """
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        """ Exports a finished span, must not block. """
+
+
+class InMemorySpanExporter(SpanExporter):
+    """
+    Keeps finished spans in memory.
+
+    Args:
+        maxlen: Maximum number of spans kept, the oldest spans are dropped first. ``None`` keeps all spans.
+    """
+
+    def __init__(self, maxlen: Optional[int] = DEFAULT_MAX_SPANS):
+        self._spans: Deque[Span] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def finished_spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        """
+        Returns the finished spans in the order they ended.
+
+        Args:
+            trace_id: Optional. Only return the spans of this trace.
+        """
+        with self._lock:
+            spans = list(self._spans)
+
+        if trace_id is None:
+            return spans
+        return [span for span in spans if span.context.trace_id == trace_id]
+
+    def clear(self) -> None:
+        """ Drops all stored spans. """
+        with self._lock:
+            self._spans.clear()
+
+
+class Tracer:
+    """
+    Creates spans and propagates the trace context.
+
+    Args:
+        exporter: Exporter receiving the finished spans, defaults to a new :py:class:`InMemorySpanExporter`.
+    """
+    enabled = True
+
+    def __init__(self, exporter: Optional[SpanExporter] = None):
+        self.exporter = exporter if exporter is not None else InMemorySpanExporter()
+
+    def start_span(
+            self,
+            name: str,
+            kind: constants.SpanKind = constants.SpanKind.INTERNAL,
+            attributes: Optional[Dict[str, Any]] = None,
+            parent: Optional[SpanContext] = None,
+    ) -> Span:
+        """
+        Creates a span, use it as a context manager to make it the current span and end it.
+
+        Args:
+            name: Span name.
+            kind: Span kind.
+            attributes: Optional. Initial span attributes.
+            parent: Optional. Context of the parent span, for example received from a consumer.
+                    Defaults to the context of the current span.
+        Returns:
+            The new span.
+        """
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+
+        if parent is None:
+            context = SpanContext(_random_id(128), _random_id(64))
+            parent_id = None
+        else:
+            context = SpanContext(parent.trace_id, _random_id(64), parent.sampled)
+            parent_id = parent.span_id
+
+        return Span(self, name, context, parent_id, kind, attributes)
+
+    def current_span(self) -> Optional[Span]:
+        """ Returns the current span, or ``None`` if there is no active span. """
+        return _current_span.get()
+
+    def inject(self, headers: Dict[str, str]) -> Dict[str, str]:
+        """
+        Returns a copy of ``headers`` with the ``traceparent`` header of the current span added.
+
+        ``headers`` is returned unchanged if there is no current span.
+        """
+        current = _current_span.get()
+        if current is None:
+            return headers
+
+        return {**headers, TRACEPARENT_HEADER: current.context.to_traceparent()}
+
+    def extract(self, traceparent: Optional[str]) -> Optional[SpanContext]:
+        """ Parses the trace context received in a ``traceparent`` header. """
+        return SpanContext.from_traceparent(traceparent)
+
+
+class NullTracer(Tracer):
+    """
+    Tracer that records nothing, used when tracing is disabled.
+    """
+    enabled = False
+
+    def __init__(self):
+        self.exporter = None  # type: ignore
+
+    def start_span(self, name, kind=constants.SpanKind.INTERNAL, attributes=None, parent=None) -> Span:
+        return _NULL_SPAN  # type: ignore
+
+    def current_span(self) -> Optional[Span]:
+        return None
+
+    def inject(self, headers: Dict[str, str]) -> Dict[str, str]:
+        return headers
+
+    def extract(self, traceparent: Optional[str]) -> Optional[SpanContext]:
+        return None
+
+
+NULL_TRACER = NullTracer()
+
+
+def get_tracer(tracer: Union[None, bool, Tracer] = None) -> Tracer:
+    """
+    Factory function for tracers.
+
+    Args:
+        tracer: Either a :py:class:`Tracer` instance, which is returned as-is, ``True`` to record spans with a new
+                tracer and :py:class:`InMemorySpanExporter`, or ``None`` or ``False`` to disable tracing.
+    Returns:
+        Tracer instance.
+    """
+    if isinstance(tracer, Tracer):
+        return tracer
+    if tracer:
+        return Tracer()
+
+    return NULL_TRACER
+
+
+def _random_id(bits: int) -> str:
+    # The all zero id is invalid
+    return f'{random.getrandbits(bits) or 1:0{bits // 4}x}'
@@ -0,0 +1,113 @@
+"""
+Shared fixtures of the benchmarks.
+
+Every benchmark runs against local stand-ins, like the echo provider below and
+:py:class:`~arrowhead_client.testing.FakeCoreSystems`, so no network or Arrowhead core systems are needed.
+Run ``tox -e benchmarks``, or ``pytest benchmarks --benchmark-json=benchmark.json``, to store the results in
+a machine readable file that can be compared between releases with ``pytest-benchmark compare``.
+"""
+import json
+import multiprocessing
+import socket
+import subprocess
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+PAYLOAD = json.dumps({'value': 42}).encode()
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_echo(port_queue):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+
+    raise TimeoutError(f'Nothing is listening on port {port}')
+
+
+@pytest.fixture(scope='session')
+def echo_rule():
+    """ Orchestration rule of an echo provider running in its own process. """
+    # The provider runs in its own process so that it does not compete with the consumers for the GIL
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_echo, args=(port_queue,), daemon=True)
+    server.start()
+
+    yield OrchestrationRule(
+            Service('echo', 'echo', ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+            ArrowheadSystem.make('echo_provider', '127.0.0.1', port_queue.get(timeout=10), ''),
+            'GET',
+            authorization_token='token',
+    )
+
+    server.terminate()
+    server.join()
+
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    """ Records the library version and commit, so that results can be tracked between releases. """
+    output_json['arrowhead_client'] = {
+        'version': _version(),
+        'commit': _git_commit(),
+    }
+
+
+def _version() -> str:
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:  # Python 3.7
+        return ''
+
+    try:
+        return version('arrowhead-client')
+    except PackageNotFoundError:
+        return ''
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'],
+                capture_output=True,
+                text=True,
+                check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
@@ -0,0 +1,111 @@
+"""
+Verification of Authorization system tokens: :py:meth:`AccessToken.from_string`, which reads and parses the
+keys on every call, :py:meth:`AccessToken.from_keys` with parsed keys, and
+:py:meth:`TokenAccessPolicy.is_authorized`, which caches verified tokens.
+"""
+import datetime
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509 import NameOID
+from jwcrypto import jwk, jwt  # type: ignore
+
+from arrowhead_client.security.access_policy import TokenAccessPolicy
+from arrowhead_client.security.access_token import AccessToken, load_authorization_key, load_provider_key
+from arrowhead_client.service import Service, ServiceInterface
+
+CONSUMER = 'benchmark_consumer'
+SERVICE_DEFINITION = 'benchmark_service'
+INTERFACE = 'HTTP-SECURE-JSON'
+
+
+def generate_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def private_pem(private_key) -> bytes:
+    return private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+def consumer_certificate() -> str:
+    private_key = generate_key()
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, f'{CONSUMER}.testcloud.arrowhead.eu')])
+    now = datetime.datetime.utcnow()
+    cert = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(
+            private_key.public_key(),
+    ).serial_number(
+            x509.random_serial_number(),
+    ).not_valid_before(now).not_valid_after(
+            now + datetime.timedelta(days=1),
+    ).sign(private_key, hashes.SHA256())
+
+    return cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+@pytest.fixture(scope='module')
+def token_variables(tmp_path_factory):
+    provider_key = generate_key()
+    authorization_key = generate_key()
+
+    now = int(time.time())
+    claims = {
+        'jti': 'benchmark', 'iss': 'Authorization', 'iat': now - 10, 'nbf': now - 10,
+        'cid': CONSUMER, 'sid': SERVICE_DEFINITION, 'iid': INTERFACE, 'exp': now + 3600,
+    }
+    signed_token = jwt.JWT(header={'alg': 'RS512'}, claims=claims)
+    signed_token.make_signed_token(jwk.JWK.from_pem(private_pem(authorization_key)))
+    encrypted_token = jwt.JWT(
+            header={'alg': 'RSA-OAEP-256', 'enc': 'A256CBC-HS512', 'cty': 'JWT'},
+            claims=signed_token.serialize(),
+    )
+    encrypted_token.make_encrypted_token(jwk.JWK.from_pem(private_pem(provider_key)))
+
+    provider_keyfile = tmp_path_factory.mktemp('keys') / 'provider.key'
+    provider_keyfile.write_bytes(private_pem(provider_key))
+    auth_info = authorization_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+
+    return f'Bearer {encrypted_token.serialize()}', str(provider_keyfile), auth_info
+
+
+def test_from_string(benchmark, token_variables):
+    benchmark.group = 'access token'
+
+    token = benchmark(AccessToken.from_string, *token_variables)
+
+    assert token.consumer_id == CONSUMER
+
+
+def test_from_keys(benchmark, token_variables):
+    benchmark.group = 'access token'
+    auth_string, provider_keyfile, auth_info = token_variables
+    keys = load_provider_key(provider_keyfile), load_authorization_key(auth_info)
+
+    token = benchmark(AccessToken.from_keys, auth_string, *keys)
+
+    assert token.consumer_id == CONSUMER
+
+
+@pytest.mark.parametrize('token_cache_size', [0, 256], ids=['uncached', 'cached'])
+def test_token_access_policy(benchmark, token_variables, token_cache_size):
+    benchmark.group = 'access token'
+    auth_string, provider_keyfile, auth_info = token_variables
+    access_policy = TokenAccessPolicy(
+            Service(SERVICE_DEFINITION, 'benchmark/service', ServiceInterface.from_str(INTERFACE)),
+            provider_keyfile,
+            auth_info,
+            token_cache_size=token_cache_size,
+    )
+
+    is_authorized = benchmark(access_policy.is_authorized, consumer_certificate(), auth_string)
+
+    assert is_authorized
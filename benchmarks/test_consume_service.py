@@ -0,0 +1,113 @@
+"""
+Latency and throughput of ``consume_service`` for the sync and async clients, consuming a local echo provider.
+
+The latency benchmarks time one request at a time, the throughput benchmarks time rounds of concurrent
+requests and store the requests per second of each case in ``extra_info``.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from arrowhead_client.client.implementations import AsyncClient, SyncClient
+from arrowhead_client.consumer.implementations.aiohttp_consumer import AiohttpConsumer
+from arrowhead_client.consumer.implementations.requests_consumer import RequestsConsumer
+from arrowhead_client.logs import get_logger
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.testing import NullProvider
+
+REQUESTS_PER_ROUND = 256
+CONCURRENCY = [1, 8, 32]
+
+
+@pytest.fixture(scope='module')
+def sync_client(echo_rule):
+    test_client = SyncClient(
+            ArrowheadSystem.make('benchmark_client', '127.0.0.1', 1337),
+            RequestsConsumer('', '', '', pool_maxsize=max(CONCURRENCY)),
+            NullProvider(''),
+            get_logger('benchmark_client', 'info'),
+    )
+    test_client.orchestration_rules.store(echo_rule)
+
+    yield test_client
+
+    test_client.consumer.close()
+
+
+@pytest.fixture
+def async_client(echo_rule):
+    test_client = AsyncClient(
+            ArrowheadSystem.make('benchmark_client', '127.0.0.1', 1337),
+            AiohttpConsumer('', '', ''),
+            NullProvider(''),
+            get_logger('benchmark_client', 'info'),
+            orchestration_ttl=None,
+    )
+    test_client.orchestration_rules.store(echo_rule)
+
+    return test_client
+
+
+def test_sync_latency(benchmark, sync_client):
+    benchmark.group = 'consume_service latency'
+
+    response = benchmark(sync_client.consume_service, 'echo')
+
+    assert response.status_code == 200
+
+
+def test_async_latency(benchmark, async_client):
+    benchmark.group = 'consume_service latency'
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(async_client.consumer.async_startup())
+
+    response = benchmark(lambda: loop.run_until_complete(async_client.consume_service('echo')))
+
+    loop.run_until_complete(async_client.consumer.async_shutdown())
+    loop.close()
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('concurrency', CONCURRENCY)
+def test_sync_throughput(benchmark, sync_client, concurrency):
+    benchmark.group = 'consume_service throughput'
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def run_round():
+        return list(executor.map(lambda _: sync_client.consume_service('echo').status_code, range(REQUESTS_PER_ROUND)))
+
+    statuses = benchmark.pedantic(run_round, rounds=3, warmup_rounds=1)
+
+    executor.shutdown()
+    assert statuses == [200] * REQUESTS_PER_ROUND
+    benchmark.extra_info['concurrency'] = concurrency
+    # The statistics are missing when benchmarking is disabled, like with --benchmark-disable
+    if benchmark.stats is not None:
+        benchmark.extra_info['requests_per_second'] = REQUESTS_PER_ROUND / benchmark.stats.stats.mean
+
+
+@pytest.mark.parametrize('concurrency', CONCURRENCY)
+def test_async_throughput(benchmark, async_client, concurrency):
+    benchmark.group = 'consume_service throughput'
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(async_client.consumer.async_startup())
+
+    async def run_round():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def consume():
+            async with semaphore:
+                return (await async_client.consume_service('echo')).status_code
+
+        return await asyncio.gather(*[consume() for _ in range(REQUESTS_PER_ROUND)])
+
+    statuses = benchmark.pedantic(lambda: loop.run_until_complete(run_round()), rounds=3, warmup_rounds=1)
+
+    loop.run_until_complete(async_client.consumer.async_shutdown())
+    loop.close()
+    assert statuses == [200] * REQUESTS_PER_ROUND
+    benchmark.extra_info['concurrency'] = concurrency
+    # The statistics are missing when benchmarking is disabled, like with --benchmark-disable
+    if benchmark.stats is not None:
+        benchmark.extra_info['requests_per_second'] = REQUESTS_PER_ROUND / benchmark.stats.stats.mean
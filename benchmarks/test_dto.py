@@ -0,0 +1,71 @@
+"""
+Serialization of the core service forms sent most often, comparing :code:`DTOMixin.dto()`
+with the pydantic :code:`dict()` call it replaces.
+"""
+import pytest
+
+import arrowhead_client.client.core_service_forms.client as forms
+from arrowhead_client.constants import OrchestrationFlags
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+system = ArrowheadSystem.make('benchmark_system', '127.0.0.1', 5678)
+service = Service(
+        service_definition='benchmark_service',
+        service_uri='benchmark/service',
+        interface=ServiceInterface('HTTP', 'SECURE', 'JSON'),
+        access_policy='CERTIFICATE',
+        metadata={'unit': 'celsius'},
+        version=1,
+)
+
+
+def make_orchestration_form(trusted=False):
+    return forms.OrchestrationForm.make(system, service, OrchestrationFlags.OVERRIDE_STORE, trusted=trusted)
+
+
+def make_registration_form(trusted=False):
+    return forms.ServiceRegistrationForm.make(service, system, trusted=trusted)
+
+
+FORMS = {
+    'orchestration': make_orchestration_form,
+    'registration': make_registration_form,
+}
+
+
+def pydantic_dict(form):
+    return form.dict(exclude_defaults=True, exclude_none=True, by_alias=True)
+
+
+@pytest.mark.parametrize('form', FORMS.keys())
+def test_pydantic_dict(benchmark, form):
+    benchmark.group = f'{form} serialization'
+    benchmark(pydantic_dict, FORMS[form]())
+
+
+@pytest.mark.parametrize('form', FORMS.keys())
+def test_dto(benchmark, form):
+    benchmark.group = f'{form} serialization'
+    instance = FORMS[form]()
+
+    assert benchmark(instance.dto) == pydantic_dict(instance)
+
+
+@pytest.mark.parametrize('form', FORMS.keys())
+def test_make_and_pydantic_dict(benchmark, form):
+    benchmark.group = f'{form} make and serialize'
+    benchmark(lambda: pydantic_dict(FORMS[form]()))
+
+
+@pytest.mark.parametrize('form', FORMS.keys())
+def test_make_and_dto(benchmark, form):
+    benchmark.group = f'{form} make and serialize'
+    benchmark(lambda: FORMS[form]().dto())
+
+
+@pytest.mark.parametrize('form', FORMS.keys())
+def test_make_trusted_and_dto(benchmark, form):
+    benchmark.group = f'{form} make and serialize'
+
+    assert benchmark(lambda: FORMS[form](trusted=True).dto()) == pydantic_dict(FORMS[form]())
@@ -0,0 +1,133 @@
+"""
+Requests per second of a FastapiProvider served by uvicorn, with the access policy checked by the
+``BaseHTTPMiddleware`` used before and by the ASGI middleware used now.
+
+Run with ``pytest benchmarks/test_fastapi_provider.py``, the requests per second of each case are stored in
+``extra_info``.
+"""
+import asyncio
+import multiprocessing
+import socket
+
+import aiohttp
+import pytest
+import uvicorn  # type: ignore
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from arrowhead_client.codec import get_json_codec
+from arrowhead_client.provider.implementations.fastapi_provider import ArrowheadAccessPolicyMiddleware, FastapiProvider
+from arrowhead_client.rules import RegistrationRule
+from arrowhead_client.security.access_policy import UnrestrictedAccessPolicy
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client import constants
+
+REQUESTS_PER_ROUND = 2000
+CONCURRENCY = 64
+
+
+class BaseHTTPAccessPolicyMiddleware(BaseHTTPMiddleware):
+    """ The access policy middleware as it was implemented before, kept here as the baseline. """
+
+    def __init__(self, app, policy_map, json_codec=None):
+        super().__init__(app)
+        self.policy_map = policy_map
+        self.json_codec = json_codec or get_json_codec()
+
+    async def dispatch(self, request, call_next):
+        path = request.scope['path'].strip('/')
+        if path not in self.policy_map:
+            return await call_next(request)
+
+        if not self.policy_map[path].is_authorized('consumer_cert', 'auth_str'):
+            return Response(content=f'{{"{constants.Misc.ERROR_MESSAGE}": "WIP"}}', status_code=403)
+
+        return await call_next(request)
+
+
+MIDDLEWARES = {
+    'base_http_middleware': BaseHTTPAccessPolicyMiddleware,
+    'asgi_middleware': ArrowheadAccessPolicyMiddleware,
+}
+
+
+def echo():
+    return {'value': 42}
+
+
+def serve(middleware: str, port: int):
+    provider = FastapiProvider('')
+    provider.add_provided_service(RegistrationRule(
+            Service('echo', 'echo', ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+            ArrowheadSystem.make('echo_provider', '127.0.0.1', port, ''),
+            'GET',
+            echo,
+            UnrestrictedAccessPolicy(),
+    ))
+    provider.app.add_middleware(
+            MIDDLEWARES[middleware],
+            policy_map=provider.policy_map,
+            json_codec=provider.json_codec,
+    )
+    uvicorn.run(provider.app, host='127.0.0.1', port=port, log_level='error', access_log=False)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(url: str):
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    return
+            except aiohttp.ClientConnectionError:
+                await asyncio.sleep(0.1)
+
+    raise RuntimeError(f'{url} did not start')
+
+
+@pytest.fixture(scope='module', params=MIDDLEWARES.keys())
+def provider_url(request):
+    # The provider runs in its own process so that it does not share an event loop with the client
+    port = free_port()
+    server = multiprocessing.Process(target=serve, args=(request.param, port), daemon=True)
+    server.start()
+    url = f'http://127.0.0.1:{port}/echo'
+    asyncio.run(wait_for_server(url))
+
+    yield request.param, url
+
+    server.terminate()
+    server.join()
+
+
+async def run_round(url: str):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=CONCURRENCY)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def request():
+            async with semaphore:
+                async with session.get(url) as response:
+                    await response.read()
+                    return response.status
+
+        return await asyncio.gather(*[request() for _ in range(REQUESTS_PER_ROUND)])
+
+
+def test_provider_throughput(benchmark, provider_url):
+    middleware, url = provider_url
+
+    statuses = benchmark.pedantic(lambda: asyncio.run(run_round(url)), rounds=5, warmup_rounds=1)
+
+    assert statuses == [200] * REQUESTS_PER_ROUND
+    benchmark.extra_info['middleware'] = middleware
+    # The statistics are missing when benchmarking is disabled, like with --benchmark-disable
+    if benchmark.stats is not None:
+        benchmark.extra_info['requests_per_second'] = REQUESTS_PER_ROUND / benchmark.stats.stats.mean
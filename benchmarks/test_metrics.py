@@ -0,0 +1,40 @@
+"""
+Overhead of the request metrics hooks per request, with metrics disabled and enabled.
+"""
+import pytest
+
+from arrowhead_client.metrics import NULL_METRICS, Metrics
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+rule = OrchestrationRule(
+        Service('echo', 'echo', ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+        ArrowheadSystem.make('echo_provider', '127.0.0.1', 1337, ''),
+        'GET',
+)
+
+METRICS = {
+    'disabled': NULL_METRICS,
+    'enabled': Metrics(),
+}
+
+
+def record_request(metrics):
+    with metrics.consumer_request(rule) as timer:
+        timer.status = 200
+
+
+@pytest.mark.parametrize('metrics', METRICS.keys())
+def test_consumer_request_overhead(benchmark, metrics):
+    benchmark.group = 'metrics overhead'
+    benchmark(record_request, METRICS[metrics])
+
+
+def test_exposition(benchmark):
+    metrics = Metrics()
+    for number in range(100):
+        with metrics.provider_request(f'service_{number}') as timer:
+            timer.status = 200
+
+    benchmark(metrics.exposition)
@@ -0,0 +1,78 @@
+"""
+Parse time of orchestration responses of growing size, comparing :py:func:`process_orchestration`
+with the lazy :py:func:`iter_orchestration`, and the full ``add_orchestration_rule`` round trip against
+:py:class:`~arrowhead_client.testing.FakeCoreSystems`.
+"""
+import pytest
+
+from arrowhead_client.client import core_service_responses as responses
+from arrowhead_client.client.core_services import CoreServices
+from arrowhead_client.client.implementations import SyncClient
+from arrowhead_client.codec import get_json_codec
+from arrowhead_client.response import Response
+from arrowhead_client.testing import FakeCoreSystems
+
+SIZES = [1, 10, 100, 1000]
+
+json_codec = get_json_codec()
+
+
+def orchestration_payload(providers: int) -> bytes:
+    core_systems = FakeCoreSystems()
+    core_systems.populate('temperature', providers=providers)
+    orchestration = CoreServices.ORCHESTRATION
+    status, response = core_systems.handle(
+            orchestration.method,
+            orchestration.uri,
+            {},
+            json_codec.dumps({'requestedService': {'serviceDefinitionRequirement': 'temperature'}}),
+    )
+    assert status == 200
+
+    return json_codec.dumps(response)
+
+
+def parse_eager(payload: bytes):
+    return responses.process_orchestration(Response(payload, 'JSON', 200), 'GET')
+
+
+def parse_lazy(payload: bytes):
+    return list(responses.iter_orchestration(Response(payload, 'JSON', 200), 'GET'))
+
+
+PARSERS = {
+    'process_orchestration': parse_eager,
+    'iter_orchestration': parse_lazy,
+}
+
+
+@pytest.mark.parametrize('parser', PARSERS.keys())
+@pytest.mark.parametrize('size', SIZES)
+def test_parse_orchestration(benchmark, parser, size):
+    benchmark.group = f'parse orchestration of {size} providers'
+    payload = orchestration_payload(size)
+
+    rules = benchmark(PARSERS[parser], payload)
+
+    assert len(rules) == size
+    benchmark.extra_info['payload_bytes'] = len(payload)
+
+
+@pytest.mark.parametrize('size', [1, 100])
+def test_add_orchestration_rule(benchmark, size):
+    benchmark.group = 'add_orchestration_rule'
+
+    with FakeCoreSystems() as core_systems:
+        core_systems.populate('temperature', providers=size)
+        test_client = SyncClient.create(
+                'benchmark_client', '127.0.0.1', 1337,
+                config=core_systems.config,
+                orchestration_ttl=None,
+        )
+        test_client.setup()
+
+        benchmark(test_client.add_orchestration_rule, 'temperature', 'GET')
+
+        test_client.consumer.close()
+
+    assert len(test_client.orchestration_rules.providers('temperature')) == size
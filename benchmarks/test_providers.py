@@ -0,0 +1,95 @@
+"""
+Requests per second of the Flask and FastAPI providers, served by their ``run_forever`` methods
+with one and with several worker processes.
+
+Each provider runs in its own process and is loaded by an aiohttp client with many concurrent requests,
+the requests per second of each case are stored in ``extra_info``.
+"""
+import asyncio
+import multiprocessing
+
+import aiohttp
+import pytest
+
+from arrowhead_client.provider.implementations.fastapi_provider import FastapiProvider
+from arrowhead_client.provider.implementations.httpprovider import FlaskProvider
+from arrowhead_client.rules import RegistrationRule
+from arrowhead_client.security.access_policy import UnrestrictedAccessPolicy
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+from conftest import free_port, wait_for_port
+
+REQUESTS_PER_ROUND = 2000
+CONCURRENCY = 64
+WORKERS = [1, 2]
+
+
+def fastapi_echo():
+    return {'value': 42}
+
+
+def flask_echo(request):
+    return {'value': 42}
+
+
+PROVIDERS = {
+    'fastapi': (FastapiProvider, fastapi_echo),
+    'flask': (FlaskProvider, flask_echo),
+}
+
+
+def serve(provider_name: str, workers: int, port: int):
+    provider_class, func = PROVIDERS[provider_name]
+    provider = provider_class('', workers=workers)
+    provider.add_provided_service(RegistrationRule(
+            Service('echo', 'echo', ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+            ArrowheadSystem.make('echo_provider', '127.0.0.1', port, ''),
+            'GET',
+            func,
+            UnrestrictedAccessPolicy(),
+    ))
+    provider.run_forever('127.0.0.1', port, '', '')
+
+
+@pytest.fixture(scope='module', params=[(name, workers) for name in PROVIDERS for workers in WORKERS],
+                ids=lambda param: f'{param[0]}-{param[1]}')
+def provider_url(request):
+    provider_name, workers = request.param
+    port = free_port()
+    server = multiprocessing.Process(target=serve, args=(provider_name, workers, port), daemon=True)
+    server.start()
+    wait_for_port(port)
+
+    yield provider_name, workers, f'http://127.0.0.1:{port}/echo'
+
+    server.terminate()
+    server.join()
+
+
+async def run_round(url: str):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=CONCURRENCY)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def request():
+            async with semaphore:
+                async with session.get(url) as response:
+                    await response.read()
+                    return response.status
+
+        return await asyncio.gather(*[request() for _ in range(REQUESTS_PER_ROUND)])
+
+
+def test_provider_throughput(benchmark, provider_url):
+    provider_name, workers, url = provider_url
+    benchmark.group = 'provider throughput'
+
+    statuses = benchmark.pedantic(lambda: asyncio.run(run_round(url)), rounds=5, warmup_rounds=1)
+
+    assert statuses == [200] * REQUESTS_PER_ROUND
+    benchmark.extra_info['provider'] = provider_name
+    benchmark.extra_info['workers'] = workers
+    # The statistics are missing when benchmarking is disabled, like with --benchmark-disable
+    if benchmark.stats is not None:
+        benchmark.extra_info['requests_per_second'] = REQUESTS_PER_ROUND / benchmark.stats.stats.mean
@@ -0,0 +1,43 @@
+"""
+Throughput of RequestsConsumer when several threads share one consumer.
+
+Run with ``pytest benchmarks/test_requests_consumer.py``, the requests per second of each case are stored in
+``extra_info``.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from arrowhead_client.consumer.implementations.requests_consumer import RequestsConsumer
+
+REQUESTS_PER_ROUND = 256
+
+CONSUMER_OPTIONS = {
+    'default': {},
+    'pool_64': {'pool_maxsize': 64},
+    'thread_local': {'thread_local_sessions': True},
+}
+
+
+@pytest.mark.parametrize('threads', [1, 2, 4, 8, 16, 32, 64])
+@pytest.mark.parametrize('options', CONSUMER_OPTIONS.keys())
+def test_requests_consumer_throughput(benchmark, echo_rule, threads, options):
+    consumer = RequestsConsumer('', '', '', **CONSUMER_OPTIONS[options])
+    executor = ThreadPoolExecutor(max_workers=threads)
+
+    def consume():
+        return consumer.consume_service(echo_rule).status_code
+
+    def run_round():
+        return list(executor.map(lambda _: consume(), range(REQUESTS_PER_ROUND)))
+
+    statuses = benchmark.pedantic(run_round, rounds=3, warmup_rounds=1)
+
+    executor.shutdown()
+    consumer.close()
+
+    assert statuses == [200] * REQUESTS_PER_ROUND
+    benchmark.extra_info['threads'] = threads
+    # The statistics are missing when benchmarking is disabled, like with --benchmark-disable
+    if benchmark.stats is not None:
+        benchmark.extra_info['requests_per_second'] = REQUESTS_PER_ROUND / benchmark.stats.stats.mean
@@ -34,10 +34,10 @@ async def main(consumer):
         connection = await consumer.connect('websocket_test')
 
         async with connection:
-            while not connection.closed():
-                await connection.send({'Q': 'Are WebSockets supported?'})
-                print(await connection.receive())
-            await connection.close()
+            for _ in range(3):
+                await connection.enqueue({'Q': 'Are WebSockets supported?'})
+            async for message in connection:
+                print(message)
 
 
 async def print_response(consumer, service_definition, **kwargs):
@@ -0,0 +1,284 @@
+import asyncio
+import json
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from arrowhead_client.consumer.implementations.aiohttp_consumer import AiohttpConsumer
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+
+async def slow_handler(request):
+    await asyncio.sleep(0.05)
+    return web.json_response({'ok': True})
+
+
+def make_rule(port):
+    return OrchestrationRule(
+            Service('slow', 'slow', ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+            ArrowheadSystem.make('provider', '127.0.0.1', port, ''),
+            'GET',
+    )
+
+
+def test_pool_stats():
+    async def consume():
+        app = web.Application()
+        app.router.add_get('/slow', slow_handler)
+        consumer = AiohttpConsumer('', '', '', pool_limit=2)
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+            rule = make_rule(server.port)
+            responses = await asyncio.gather(*[consumer.consume_service(rule) for _ in range(6)])
+            stats = consumer.pool_stats()
+            await consumer.async_shutdown()
+
+        return responses, stats
+
+    responses, stats = asyncio.run(consume())
+
+    assert all(response.read_json() == {'ok': True} for response in responses)
+    assert stats.limit == 2
+    assert stats.active == 0
+    assert stats.idle == 2
+    assert stats.created == 2
+    assert stats.reused == 4
+    assert stats.acquire_waits == 4
+
+
+def test_pool_stats_before_startup():
+    consumer = AiohttpConsumer('', '', '', pool_limit=10, pool_limit_per_host=5)
+
+    stats = consumer.pool_stats()
+
+    assert (stats.limit, stats.limit_per_host, stats.active, stats.idle) == (10, 5, 0, 0)
+
+
+def test_pool_stats_without_connector_internals():
+    class Connector:
+        limit = 10
+        limit_per_host = 5
+
+    consumer = AiohttpConsumer('', '', '', connector=Connector())
+
+    stats = consumer.pool_stats()
+
+    assert (stats.limit, stats.active, stats.idle, stats.waiting) == (10, None, None, None)
+
+
+def test_restart_with_given_connector():
+    async def consume():
+        app = web.Application()
+        app.router.add_get('/slow', slow_handler)
+        connector = aiohttp.TCPConnector()
+        consumer = AiohttpConsumer('', '', '', connector=connector)
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+            await consumer.async_shutdown()
+            await consumer.async_startup()
+            response = await consumer.consume_service(make_rule(server.port))
+            await consumer.async_shutdown()
+
+        closed = connector.closed
+        await connector.close()
+
+        return response, consumer.connector is connector, closed
+
+    response, kept, closed = asyncio.run(consume())
+
+    assert response.read_json() == {'ok': True}
+    assert kept
+    assert not closed
+
+
+async def echo_handler(request):
+    return web.json_response({
+        'content_type': request.content_type,
+        'body': await request.json(),
+    })
+
+
+def test_json_body():
+    async def consume():
+        app = web.Application()
+        app.router.add_post('/echo', echo_handler)
+        consumer = AiohttpConsumer('', '', '', json_codec='json')
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+            rule = OrchestrationRule(
+                    Service('echo', 'echo', ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+                    ArrowheadSystem.make('provider', '127.0.0.1', server.port, ''),
+                    'POST',
+            )
+            response = await consumer.consume_service(rule, json={'values': [1, 2, 3]})
+            await consumer.async_shutdown()
+
+        return response
+
+    response = asyncio.run(consume())
+
+    assert response.codec is not None
+    assert response.read_json() == {'content_type': 'application/json', 'body': {'values': [1, 2, 3]}}
+
+
+def make_ws_rule(port, service_uri):
+    return OrchestrationRule(
+            Service(service_uri, service_uri, ServiceInterface('WS', 'INSECURE', 'JSON')),
+            ArrowheadSystem.make('provider', '127.0.0.1', port, ''),
+            'GET',
+    )
+
+
+def run_websocket(handler, client, **connect_kwargs):
+    """ Connects to a WebSocket server running ``handler`` and returns the result of ``client(connection)``. """
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/stream', handler)
+        consumer = AiohttpConsumer('', '', '')
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+            connection = await consumer.connect(make_ws_rule(server.port, 'stream'), **connect_kwargs)
+            result = await client(connection)
+            await connection.close()
+            await consumer.async_shutdown()
+
+        return result
+
+    return asyncio.run(run())
+
+
+def test_websocket_batches():
+    frames = []
+
+    async def collect(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            frames.append((message.type, message.data))
+        return ws
+
+    async def client(connection):
+        await connection.send_batch([{'value': 1}, {'value': 2}])
+        for value in range(10):
+            await connection.send_record({'value': value})
+        await connection.flush()
+
+    run_websocket(collect, client, batch_codec='json')
+
+    assert [message_type for message_type, _ in frames] == [aiohttp.WSMsgType.BINARY] * 2
+    assert json.loads(frames[0][1]) == [{'value': 1}, {'value': 2}]
+    assert json.loads(frames[1][1]) == [{'value': value} for value in range(10)]
+
+
+def test_websocket_batch_window_and_size():
+    frames = []
+
+    async def collect(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            frames.append(json.loads(message.data))
+        return ws
+
+    async def client(connection):
+        for value in range(5):
+            await connection.send_record(value)
+        # The batch window sends the first five records
+        await asyncio.sleep(0.05)
+        for value in range(5, 12):
+            await connection.send_record(value)
+
+    run_websocket(collect, client, batch_codec='json', batch_window=0.01, max_batch_size=4)
+
+    # The last batch is sent when the connection is closed
+    assert frames == [[0, 1, 2, 3], [4], [5, 6, 7, 8], [9, 10, 11]]
+
+
+def test_websocket_receive_batches():
+    async def stream(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_bytes(json.dumps([1, 2, 3]).encode())
+        await ws.send_str(json.dumps([4, 5]))
+        await ws.close()
+        return ws
+
+    async def client(connection):
+        return [record async for record in connection.iter_records()]
+
+    assert run_websocket(stream, client, batch_codec='json') == [1, 2, 3, 4, 5]
+
+
+def test_websocket_compression():
+    extensions = []
+
+    async def stream(request):
+        extensions.append(request.headers.get('Sec-WebSocket-Extensions', ''))
+        ws = web.WebSocketResponse(compress=True)
+        await ws.prepare(request)
+        await ws.send_bytes(json.dumps(list(range(1000))).encode())
+        await ws.close()
+        return ws
+
+    async def client(connection):
+        return [record async for record in connection.iter_records()]
+
+    assert run_websocket(stream, client, batch_codec='json', compress=True) == list(range(1000))
+    assert 'permessage-deflate' in extensions[0]
+
+
+def test_websocket_iteration_until_close():
+    async def echo(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for _ in range(3):
+            message = await ws.receive_json()
+            await ws.send_json({'echo': message['value']})
+        await ws.close()
+        return ws
+
+    async def client(connection):
+        for value in range(3):
+            await connection.enqueue({'value': value})
+        messages = [message async for message in connection]
+
+        return messages, await connection.receive()
+
+    messages, after_close = run_websocket(echo, client)
+
+    assert messages == [{'echo': 0}, {'echo': 1}, {'echo': 2}]
+    assert after_close is None
+
+
+def test_websocket_payload_types():
+    async def stream(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_bytes(b'binary')
+        await ws.send_str('text')
+        await ws.close()
+        return ws
+
+    async def run(service_interface):
+        app = web.Application()
+        app.router.add_get('/stream', stream)
+        consumer = AiohttpConsumer('', '', '')
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+            rule = OrchestrationRule(
+                    Service('stream', 'stream', service_interface),
+                    ArrowheadSystem.make('provider', '127.0.0.1', server.port, ''),
+                    'GET',
+            )
+            async with await consumer.connect(rule) as connection:
+                messages = [message async for message in connection]
+            await consumer.async_shutdown()
+
+        return messages
+
+    assert asyncio.run(run(ServiceInterface('WS', 'INSECURE', 'TEXT'))) == ['binary', 'text']
+    assert asyncio.run(run(ServiceInterface('WS', 'INSECURE', 'BINARY'))) == [b'binary', b'text']
@@ -0,0 +1,74 @@
+import pytest
+
+from arrowhead_client.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def timer():
+    return FakeTimer()
+
+
+def test_hit_and_miss(timer):
+    cache = TTLCache(maxsize=2, timer=timer)
+
+    assert cache.get('a') is None
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+
+    info = cache.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.currsize == 1
+
+
+def test_lru_eviction(timer):
+    cache = TTLCache(maxsize=2, timer=timer)
+
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    assert len(cache) == 2
+
+
+def test_expiry(timer):
+    cache = TTLCache(maxsize=10, ttl=10, timer=timer)
+
+    cache.set('default', 1)
+    cache.set('explicit', 2, expires_at=timer.now + 5)
+    cache.set('expired', 3, expires_at=timer.now - 1)
+
+    assert 'expired' not in cache
+    assert cache.get('explicit') == 2
+
+    timer.now += 6
+    assert cache.get('explicit') is None
+    assert cache.get('default') == 1
+
+    timer.now += 5
+    assert cache.expire() == 1
+    assert len(cache) == 0
+
+
+def test_disabled_cache(timer):
+    cache = TTLCache(maxsize=0, timer=timer)
+    cache.set('a', 1)
+
+    assert cache.get('a') is None
+
+
+def test_negative_size():
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=-1)
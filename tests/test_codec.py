@@ -0,0 +1,138 @@
+import datetime
+
+import pytest
+
+from arrowhead_client import codec
+from arrowhead_client import constants
+from arrowhead_client.provider.implementations.httpprovider import FlaskProvider
+from arrowhead_client.request import Request
+from arrowhead_client.rules import RegistrationRule
+from arrowhead_client.security.access_policy import CertificateAccessPolicy
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.response import Response
+
+LIBRARIES = ['json', 'orjson', 'ujson']
+
+
+@pytest.fixture(params=LIBRARIES)
+def json_codec(request):
+    pytest.importorskip(request.param)
+    return codec.get_json_codec(request.param)
+
+
+def test_round_trip(json_codec):
+    data = {'sensor': 'temperature', 'values': [1, 2.5, None, True], 'unit': '°C'}
+
+    encoded = json_codec.dumps(data)
+
+    assert isinstance(encoded, bytes)
+    assert json_codec.loads(encoded) == data
+    assert json_codec.loads(json_codec.dumps_str(data)) == data
+
+
+def test_default(json_codec):
+    encoded = json_codec.dumps({'date': datetime.date(2021, 1, 1)}, default=str)
+
+    assert json_codec.loads(encoded) == {'date': '2021-01-01'}
+
+
+def test_enum_keys(json_codec):
+    encoded = json_codec.dumps({constants.Misc.ERROR_MESSAGE: 'error'})
+
+    assert json_codec.loads(encoded) == {constants.Misc.ERROR_MESSAGE.value: 'error'}
+
+
+def test_enum_keyed_error_body(json_codec):
+    provider = FlaskProvider('', json_codec=json_codec)
+    provider.add_provided_service(RegistrationRule(
+            Service('cert', 'cert', ServiceInterface('HTTP', 'SECURE', 'JSON')),
+            ArrowheadSystem.make('test_provider', '127.0.0.1', 1337),
+            'GET',
+            lambda request: {'value': 42},
+            CertificateAccessPolicy(),
+    ))
+
+    response = provider.app.test_client().get('/cert')
+
+    assert response.status_code == 403
+    assert constants.Misc.ERROR_MESSAGE.value in json_codec.loads(response.data)
+
+
+def test_invalid_json(json_codec):
+    with pytest.raises(ValueError):
+        json_codec.loads(b'{"unterminated": ')
+
+
+def test_get_json_codec():
+    stdlib_codec = codec.get_json_codec('JSON')
+
+    assert type(stdlib_codec) is codec.JsonCodec
+    assert codec.get_json_codec(stdlib_codec) is stdlib_codec
+    assert codec.get_json_codec('json') is stdlib_codec
+
+
+def test_default_codec_prefers_orjson():
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        assert type(codec.get_json_codec()) is codec.JsonCodec
+    else:
+        assert isinstance(codec.get_json_codec(), codec.OrjsonCodec)
+
+
+def test_unsupported_library():
+    with pytest.raises(ValueError):
+        codec.get_json_codec('simplejson')
+
+
+def test_payloads_use_codec(json_codec):
+    response = Response(b'{"a": 1}', 'JSON', 200, codec=json_codec)
+    request = Request(b'[1, 2]', 'JSON', codec=json_codec)
+
+    assert response.read_json() == {'a': 1}
+    assert request.read_json() == [1, 2]
+    assert response == Response(b'{"a": 1}', 'JSON', 200)
+
+
+BINARY_FORMATS = {'json': 'json', 'msgpack': 'msgpack', 'cbor': 'cbor2'}
+
+
+@pytest.fixture(params=list(BINARY_FORMATS))
+def binary_codec(request):
+    pytest.importorskip(BINARY_FORMATS[request.param])
+    return codec.get_binary_codec(request.param)
+
+
+def test_binary_round_trip(binary_codec):
+    records = [{'sensor': 'temperature', 'value': 21.5, 'unit': '°C'}, [1, None, True], 'text']
+
+    encoded = binary_codec.dumps(records)
+
+    assert isinstance(encoded, bytes)
+    assert binary_codec.loads(encoded) == records
+
+
+def test_invalid_binary(binary_codec):
+    with pytest.raises(ValueError):
+        binary_codec.loads(b'\xc1')
+
+
+def test_get_binary_codec():
+    json_codec = codec.get_json_codec('json')
+    binary_codec = codec.get_binary_codec('JSON', json_codec)
+
+    assert type(binary_codec) is codec.BinaryCodec
+    assert binary_codec.json_codec is json_codec
+    assert codec.get_binary_codec(binary_codec) is binary_codec
+    with pytest.raises(ValueError):
+        codec.get_binary_codec('protobuf')
+
+
+def test_default_binary_codec_is_json():
+    json_codec = codec.get_json_codec('json')
+    binary_codec = codec.get_binary_codec(json_codec=json_codec)
+
+    # Compact formats are only used when requested, since the format is not negotiated with the provider
+    assert binary_codec.name == 'json'
+    assert binary_codec.json_codec is json_codec
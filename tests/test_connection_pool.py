@@ -0,0 +1,399 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from arrowhead_client import errors
+from arrowhead_client.client.connection_pool import ConnectionPool, PoolStats
+from arrowhead_client.client.implementations import AsyncClient
+from arrowhead_client.consumer.implementations.aiohttp_consumer import AiohttpConsumer
+from arrowhead_client.logs import get_logger
+from arrowhead_client.resilience import RetryPolicy
+from arrowhead_client.response import ConnectionResponse
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.testing import FakeCoreSystems, NullProvider
+
+NO_BACKOFF = RetryPolicy(max_attempts=3, backoff=0)
+
+
+def make_rule(port=1337, service_uri='stream'):
+    return OrchestrationRule(
+            Service(service_uri, service_uri, ServiceInterface('WS', 'INSECURE', 'JSON')),
+            ArrowheadSystem.make('provider', '127.0.0.1', port, ''),
+            'GET',
+    )
+
+
+class FakeConnection(ConnectionResponse):
+    """ Connection that receives ``messages`` and is then closed with ``close_code``. """
+
+    def __init__(self, messages=(), close_code=None):
+        super().__init__(None)
+        self.messages = list(messages)
+        self.sent = []
+        self.is_closed = False
+        self._close_code = close_code
+
+    async def send(self, data):
+        if self.is_closed:
+            raise ConnectionResetError('Connection lost')
+        self.sent.append(data)
+
+    async def receive(self):
+        if self.messages:
+            return self.messages.pop(0)
+        self.is_closed = True
+        return None
+
+    async def close(self):
+        self.is_closed = True
+
+    def closed(self):
+        return self.is_closed
+
+    @property
+    def close_code(self):
+        return self._close_code
+
+
+class Opener:
+    """ Hands out ``connections`` in order, failing ``failures`` times first. """
+
+    def __init__(self, *connections, failures=0):
+        self.connections = list(connections)
+        self.failures = failures
+        self.opened = []
+        self.reorchestrated = []
+        self.ready = asyncio.Event()
+        self.ready.set()
+
+    async def open(self, service_definition, kwargs):
+        await self.ready.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionRefusedError('Provider is down')
+        self.opened.append(kwargs)
+        return make_rule(), self.connections.pop(0)
+
+    async def reorchestrate(self, service_definition):
+        self.reorchestrated.append(service_definition)
+        return True
+
+
+def test_connections_are_closed_by_default():
+    async def main():
+        connections = [FakeConnection(), FakeConnection()]
+        opener = Opener(*connections)
+        pool = ConnectionPool(opener.open, opener.reorchestrate)
+
+        for _ in connections:
+            connection = await pool.connect('stream')
+            await connection.close()
+
+        return [connection.is_closed for connection in connections], pool.stats
+
+    closed, stats = asyncio.run(main())
+
+    assert closed == [True, True]
+    assert stats == PoolStats(opened=2, reused=0, reconnects=0, idle=0)
+
+
+def test_reuse_released_connection():
+    async def main():
+        opener = Opener(FakeConnection(), FakeConnection())
+        pool = ConnectionPool(opener.open, opener.reorchestrate, max_idle=4)
+
+        first = await pool.connect('stream')
+        underlying = first.connection
+        await first.close()
+        second = await pool.connect('stream')
+        other = await pool.connect('stream', headers={'x': 'y'})
+        reused = second.connection is underlying
+        await second.close()
+        await other.close()
+
+        return pool.stats, reused, opener.opened
+
+    stats, reused, opened = asyncio.run(main())
+
+    assert reused
+    assert stats == PoolStats(opened=2, reused=1, reconnects=0, idle=2)
+    assert opened == [{'heartbeat': 30.0}, {'heartbeat': 30.0, 'headers': {'x': 'y'}}]
+
+
+def test_idle_connections_expire():
+    now = 0.0
+
+    async def main():
+        nonlocal now
+        connections = [FakeConnection() for _ in range(4)]
+        opener = Opener(*connections)
+        pool = ConnectionPool(opener.open, opener.reorchestrate, max_idle=2, idle_timeout=10, timer=lambda: now)
+
+        managed = [await pool.connect('stream') for _ in range(3)]
+        for connection in managed:
+            await connection.close()
+        # Only two idle connections are kept
+        assert [connection.is_closed for connection in connections[:3]] == [True, False, False]
+
+        now = 10.0
+        await pool.connect('stream')
+        assert all(connection.is_closed for connection in connections[:3])
+        await pool.close()
+
+        return pool.stats
+
+    assert asyncio.run(main()) == PoolStats(opened=4, reused=0, reconnects=0, idle=0)
+
+
+def test_idle_connection_to_unorchestrated_provider_is_closed():
+    orchestrated = True
+
+    async def main():
+        nonlocal orchestrated
+        connections = [FakeConnection(), FakeConnection()]
+        opener = Opener(*connections)
+        pool = ConnectionPool(
+                opener.open,
+                opener.reorchestrate,
+                max_idle=1,
+                is_orchestrated=lambda service_definition, rule: orchestrated,
+        )
+
+        first = await pool.connect('stream')
+        await first.close()
+        # The provider of the idle connection is orchestrated away
+        orchestrated = False
+        second = await pool.connect('stream')
+        reused = second.connection is connections[0]
+        await second.close()
+
+        return reused, connections[0].is_closed, pool.stats
+
+    reused, closed, stats = asyncio.run(main())
+
+    assert not reused
+    assert closed
+    assert stats == PoolStats(opened=2, reused=0, reconnects=0, idle=0)
+
+
+def test_reconnect_after_abnormal_close():
+    async def main():
+        opener = Opener(
+                FakeConnection(['a', 'b'], close_code=1011),
+                FakeConnection(['c'], close_code=1000),
+        )
+        pool = ConnectionPool(opener.open, opener.reorchestrate, reconnect=NO_BACKOFF)
+
+        connection = await pool.connect('stream')
+        opener.failures = 2
+        messages = [message async for message in connection]
+        await connection.close()
+
+        return messages, opener.reorchestrated, pool.stats
+
+    messages, reorchestrated, stats = asyncio.run(main())
+
+    assert messages == ['a', 'b', 'c']
+    # Orchestrated again before every attempt
+    assert reorchestrated == ['stream'] * 3
+    assert stats == PoolStats(opened=2, reused=0, reconnects=1, idle=0)
+
+
+def test_reconnect_gives_up():
+    async def main():
+        opener = Opener(FakeConnection(close_code=1006))
+        pool = ConnectionPool(opener.open, opener.reorchestrate, reconnect=NO_BACKOFF)
+
+        connection = await pool.connect('stream')
+        opener.failures = 10
+        with pytest.raises(ConnectionRefusedError):
+            await connection.receive()
+
+        return opener.reorchestrated
+
+    assert asyncio.run(main()) == ['stream'] * 3
+
+
+def test_messages_are_buffered_while_reconnecting():
+    async def main():
+        lost = FakeConnection()
+        lost.is_closed = True
+        replacement = FakeConnection()
+        opener = Opener(lost, replacement)
+        pool = ConnectionPool(opener.open, opener.reorchestrate, high_watermark=4, low_watermark=1)
+
+        connection = await pool.connect('stream')
+        opener.ready.clear()
+        with pytest.raises(asyncio.TimeoutError):
+            for value in range(10):
+                await asyncio.wait_for(connection.enqueue(value), 0.05)
+        queued = connection.queued
+
+        opener.ready.set()
+        await connection.drain()
+        await connection.close()
+
+        return queued, replacement.sent, lost.sent
+
+    queued, sent, lost_sent = asyncio.run(main())
+
+    assert queued == 4
+    assert sent == [0, 1, 2, 3]
+    assert lost_sent == []
+
+
+def test_normal_close_ends_iteration():
+    async def main():
+        opener = Opener(FakeConnection(['a'], close_code=1000))
+        pool = ConnectionPool(opener.open, opener.reorchestrate)
+
+        connection = await pool.connect('stream')
+        messages = [message async for message in connection]
+        with pytest.raises(errors.ConnectionClosedError):
+            await connection.send('b')
+        await connection.close()
+
+        return messages, pool.stats
+
+    messages, stats = asyncio.run(main())
+
+    assert messages == ['a']
+    # The closed connection is not kept for reuse
+    assert stats == PoolStats(opened=1, reused=0, reconnects=0, idle=0)
+
+
+def test_websocket_reconnect():
+    accepted = 0
+
+    async def stream(request):
+        nonlocal accepted
+        accepted += 1
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json({'connection': accepted})
+        async for message in ws:
+            if message.json() == 'drop':
+                await ws.close(code=1011)
+            else:
+                await ws.send_json({'echo': message.json()})
+        return ws
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/stream', stream)
+        consumer = AiohttpConsumer('', '', '')
+        reorchestrated = []
+
+        async def reorchestrate(service_definition):
+            reorchestrated.append(service_definition)
+            return True
+
+        async with TestServer(app, host='127.0.0.1') as server:
+            await consumer.async_startup()
+
+            async def open_connection(service_definition, kwargs):
+                rule = make_rule(server.port, service_definition)
+                return rule, await consumer.connect(rule, **kwargs)
+
+            pool = ConnectionPool(open_connection, reorchestrate, heartbeat=1, reconnect=NO_BACKOFF, max_idle=1)
+            async with await pool.connect('stream') as connection:
+                messages = [await connection.receive()]
+                await connection.send('drop')
+                messages.append(await connection.receive())
+                await connection.send(1)
+                messages.append(await connection.receive())
+
+            async with await pool.connect('stream') as connection:
+                await connection.send(2)
+                messages.append(await connection.receive())
+
+            await pool.close()
+            await consumer.async_shutdown()
+
+        return messages, reorchestrated, pool.stats
+
+    messages, reorchestrated, stats = asyncio.run(main())
+
+    assert messages == [{'connection': 1}, {'connection': 2}, {'echo': 1}, {'echo': 2}]
+    assert reorchestrated == ['stream']
+    assert stats == PoolStats(opened=2, reused=1, reconnects=1, idle=0)
+
+
+def test_client_connection_batches():
+    async def echo_batches(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            # Echo every batch with the records doubled
+            await ws.send_bytes(json.dumps([record * 2 for record in json.loads(message.data)]).encode())
+        return ws
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/stream', echo_batches)
+        test_client = AsyncClient(
+                ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+                consumer=AiohttpConsumer('', '', ''),
+                provider=NullProvider(''),
+                logger=get_logger('test_client', 'debug'),
+        )
+
+        async with TestServer(app, host='127.0.0.1') as server:
+            test_client.orchestration_rules.replace('stream', [make_rule(server.port)])
+            await test_client.consumer.async_startup()
+            async with await test_client.connect('stream', batch_codec='json', max_batch_size=2) as connection:
+                await connection.send_batch([1, 2])
+                batches = [await connection.receive_batch()]
+                for record in range(3):
+                    await connection.send_record(record)
+                await connection.flush()
+                batches.append(await connection.receive_batch())
+                batches.append(await connection.receive_batch())
+            await test_client.connection_pool.close()
+            await test_client.consumer.async_shutdown()
+
+        return batches
+
+    assert asyncio.run(main()) == [[2, 4], [0, 2], [4]]
+
+
+def test_client_connect_without_provider():
+    with FakeCoreSystems(seed=0) as core_systems:
+        test_client = AsyncClient(
+                ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+                consumer=AiohttpConsumer('', '', ''),
+                provider=NullProvider(''),
+                logger=get_logger('test_client', 'debug'),
+                config=core_systems.config,
+                connection_pool_options={'heartbeat': None},
+        )
+
+        async def main():
+            async with test_client:
+                with pytest.raises(errors.NoAvailableServicesError):
+                    await test_client.connect('stream')
+
+        asyncio.run(main())
+
+    assert test_client.connection_pool.heartbeat is None
+    assert test_client.connection_pool.stats == PoolStats(opened=0, reused=0, reconnects=0, idle=0)
+
+
+def test_client_checks_orchestrated_providers():
+    test_client = AsyncClient(
+            ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+            consumer=AiohttpConsumer('', '', ''),
+            provider=NullProvider(''),
+            logger=get_logger('test_client', 'debug'),
+    )
+    test_client.orchestration_rules.replace('stream', [make_rule(1337)])
+
+    assert test_client.connection_pool.max_idle == 0
+    assert test_client._is_orchestrated('stream', make_rule(1337))
+    assert not test_client._is_orchestrated('stream', make_rule(1338))
+    assert not test_client._is_orchestrated('other', make_rule(1337))
@@ -0,0 +1,20 @@
+import pytest
+
+from arrowhead_client.client.implementations import AsyncClient
+from arrowhead_client.logs import get_logger
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.testing import NullProvider
+
+
+@pytest.fixture
+def make_async_client():
+    def make(consumer=None, provider=None, **kwargs):
+        return AsyncClient(
+                ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+                consumer=consumer,
+                provider=provider or NullProvider(''),
+                logger=get_logger('test_client', 'debug'),
+                **kwargs,
+        )
+
+    return make
@@ -0,0 +1,117 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from arrowhead_client import errors
+from arrowhead_client.resilience import ResiliencePolicy, RetryPolicy
+from arrowhead_client.response import Response
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+
+class FakeConsumer:
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.endpoints = Counter()
+
+    async def consume_service(self, rule, delay=0.0, fail=False):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.endpoints[rule.endpoint] += 1
+        try:
+            await asyncio.sleep(delay)
+            if fail:
+                raise ConnectionError('Provider unavailable')
+        finally:
+            self.active -= 1
+
+        return Response(str(delay).encode(), 'TEXT', 200)
+
+
+class FailingProviderConsumer(FakeConsumer):
+    """ Consumer whose first provider is down. """
+
+    async def consume_service(self, rule, **kwargs):
+        return await super().consume_service(rule, fail=rule.endpoint.startswith('127.0.0.1:1330/'), **kwargs)
+
+
+def add_providers(test_client):
+    test_client.orchestration_rules.replace('test', [
+        OrchestrationRule(
+                Service('test', 'test', ServiceInterface('HTTP', 'INSECURE', 'TEXT')),
+                ArrowheadSystem.make(f'provider_{i}', '127.0.0.1', 1330 + i, ''),
+                'GET',
+        )
+        for i in range(3)
+    ])
+
+
+@pytest.fixture
+def test_client(make_async_client):
+    test_client = make_async_client(load_balancing='LATENCY_EWMA')
+    test_client.consumer = FakeConsumer()
+    add_providers(test_client)
+
+    return test_client
+
+
+def collect(test_client, items, **kwargs):
+    async def consume():
+        return [result async for result in test_client.consume_many(items, **kwargs)]
+
+    return asyncio.run(consume())
+
+
+def test_consume_many(test_client):
+    items = [('test', {'delay': 0.01 * (5 - i)}) for i in range(5)]
+
+    results = collect(test_client, items, concurrency_limit=5)
+
+    assert [result.index for result in results] == [4, 3, 2, 1, 0]
+    assert all(result.ok for result in results)
+    assert results[0].response.read_string() == '0.01'
+
+
+def test_consume_many_concurrency_limit(test_client):
+    results = collect(test_client, [('test', {'delay': 0.01})] * 20, concurrency_limit=4)
+
+    assert len(results) == 20
+    assert test_client.consumer.max_active == 4
+
+
+def test_consume_many_partial_failure(test_client):
+    items = [
+        ('test', {'fail': True}),
+        ('test', {'delay': 1.0}),
+        'missing',
+        'test',
+    ]
+
+    results = {result.index: result for result in collect(test_client, items, timeout=0.1)}
+
+    assert isinstance(results[0].error, ConnectionError)
+    assert isinstance(results[1].error, asyncio.TimeoutError)
+    assert isinstance(results[2].error, errors.NoAvailableServicesError)
+    assert results[3].ok
+
+
+def test_consume_many_spread_providers(test_client):
+    collect(test_client, ['test'] * 9, spread_providers=True)
+
+    assert sorted(test_client.consumer.endpoints.values()) == [3, 3, 3]
+
+
+def test_consume_many_spread_providers_with_circuit_breakers(make_async_client):
+    test_client = make_async_client(resilience=ResiliencePolicy(retry=RetryPolicy(backoff=0), failure_threshold=1))
+    test_client.consumer = FailingProviderConsumer()
+    add_providers(test_client)
+
+    results = collect(test_client, ['test'] * 9, concurrency_limit=1, spread_providers=True)
+
+    assert all(result.ok for result in results)
+    # The failed item is retried on another provider, and the open breaker keeps the others away from the first
+    assert test_client.consumer.endpoints['127.0.0.1:1330/test'] == 1
+    assert sum(test_client.consumer.endpoints.values()) == 10
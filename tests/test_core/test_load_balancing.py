@@ -0,0 +1,144 @@
+import pytest
+
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.rules import OrchestrationRule, OrchestrationRuleContainer
+from arrowhead_client import load_balancing as lb
+from arrowhead_client import constants
+
+consumed_service = Service(
+        'test',
+        'test',
+        ServiceInterface('HTTP', 'SECURE', 'JSON'),
+)
+
+
+@pytest.fixture
+def rules():
+    return [
+        OrchestrationRule(
+                consumed_service,
+                ArrowheadSystem.make(f'provider_{i}', '127.0.0.1', 1330 + i, ''),
+                'GET',
+        )
+        for i in range(3)
+    ]
+
+
+def test_round_robin(rules):
+    strategy = lb.RoundRobinStrategy()
+
+    selected = [strategy.select(rules) for _ in range(6)]
+
+    assert selected == rules + rules
+
+
+def test_least_outstanding(rules):
+    strategy = lb.LeastOutstandingStrategy()
+    strategy.on_request_start(rules[0])
+    strategy.on_request_start(rules[1])
+
+    assert strategy.select(rules) is rules[2]
+
+    strategy.on_request_end(rules[0], 0.1)
+    assert strategy.outstanding(rules[0]) == 0
+    assert strategy.select(rules) in (rules[0], rules[2])
+
+
+def test_latency_ewma(rules):
+    strategy = lb.LatencyEWMAStrategy(decay=0.5)
+    for rule, latency in zip(rules, (0.3, 0.1, 0.2)):
+        strategy.on_request_start(rule)
+        strategy.on_request_end(rule, latency)
+
+    assert strategy.select(rules) is rules[1]
+
+    strategy.on_request_start(rules[1])
+    strategy.on_request_end(rules[1], 0.5)
+    assert strategy.latency(rules[1]) == pytest.approx(0.3)
+    assert strategy.select(rules) is rules[2]
+
+
+def test_ewma_unmeasured_first(rules):
+    strategy = lb.LatencyEWMAStrategy()
+    strategy.on_request_start(rules[0])
+    strategy.on_request_end(rules[0], 0.001)
+
+    assert strategy.select(rules) in rules[1:]
+
+
+def test_power_of_two_choices(rules):
+    strategy = lb.PowerOfTwoChoicesStrategy()
+    for rule, latency in zip(rules, (0.1, 0.2, 0.3)):
+        strategy.on_request_start(rule)
+        strategy.on_request_end(rule, latency)
+
+    selected = {strategy.select(rules).system_name for _ in range(50)}
+
+    assert 'provider_2' not in selected
+    assert strategy.select(rules[:1]) is rules[0]
+
+
+def test_track_failure(rules):
+    strategy = lb.LatencyEWMAStrategy(failure_penalty=2.0)
+
+    with pytest.raises(RuntimeError):
+        with strategy.track(rules[0]):
+            assert strategy.outstanding(rules[0]) == 1
+            raise RuntimeError
+
+    assert strategy.outstanding(rules[0]) == 0
+    assert strategy.latency(rules[0]) == 2.0
+
+
+@pytest.mark.parametrize('name, true_class', [
+    (constants.LoadBalancing.ROUND_ROBIN, lb.RoundRobinStrategy),
+    ('least_outstanding', lb.LeastOutstandingStrategy),
+    ('LATENCY_EWMA', lb.LatencyEWMAStrategy),
+    (constants.LoadBalancing.POWER_OF_TWO_CHOICES, lb.PowerOfTwoChoicesStrategy),
+])
+def test_get_strategy(name, true_class):
+    assert isinstance(lb.get_load_balancing_strategy(name), true_class)
+
+
+def test_get_strategy_instance():
+    strategy = lb.LeastOutstandingStrategy()
+
+    assert lb.get_load_balancing_strategy(strategy) is strategy
+
+    with pytest.raises(ValueError):
+        lb.get_load_balancing_strategy('WRONG_NAME')
+
+
+def test_container_keeps_all_providers(rules):
+    rule_container = OrchestrationRuleContainer(lb.RoundRobinStrategy())
+
+    for rule in rules:
+        rule_container.store(rule)
+    rule_container.store(rules[0])
+
+    assert len(rule_container) == 1
+    assert rule_container.providers('test') == rules[1:] + rules[:1]
+    assert {rule_container.select('test').system_name for _ in range(3)} == \
+           {'provider_0', 'provider_1', 'provider_2'}
+    assert rule_container.select('other') is None
+
+    rule_container.replace('test', rules[:1])
+    assert rule_container.providers('test') == rules[:1]
+
+    # An empty orchestration result keeps the known providers
+    rule_container.replace('test', [])
+    assert rule_container.providers('test') == rules[:1]
+
+    del rule_container['test']
+    assert rule_container.get('test') is None
+    assert rule_container.providers('test') == []
+
+
+def test_container_lookup_does_not_select(rules):
+    rule_container = OrchestrationRuleContainer(lb.RoundRobinStrategy())
+    rule_container.replace('test', rules)
+
+    assert [rule_container['test'] for _ in range(3)] == [rules[0]] * 3
+    assert list(rule_container.values()) == [rules[0]]
+    assert [rule_container.select('test') for _ in range(3)] == rules
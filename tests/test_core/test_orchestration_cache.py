@@ -0,0 +1,179 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from arrowhead_client.client.implementations import SyncClient
+from arrowhead_client.constants import OrchestrationFlags
+from arrowhead_client.client.orchestration_cache import OrchestrationCache, OrchestrationEntry
+from arrowhead_client.response import Response
+
+orchestration_payload = json.dumps({
+    "response": [{
+        "provider": {
+            "id": 1,
+            "systemName": "test_provider",
+            "address": "127.0.0.1",
+            "port": 3456,
+            "authenticationInfo": "",
+            "createdAt": "string",
+            "updatedAt": "string"},
+        "service": {
+            "id": 1,
+            "serviceDefinition": "test",
+            "createdAt": "string",
+            "updatedAt": "string"},
+        "serviceUri": "test/provided_service",
+        "secure": "NOT_SECURE",
+        "metadata": {},
+        "interfaces": [{
+            "id": 1,
+            "createdAt": "string",
+            "interfaceName": "HTTP-INSECURE-JSON",
+            "updatedAt": "string"}
+        ],
+        "version": 0,
+        "authorizationTokens": {},
+        "warnings": []
+    }]
+}).encode()
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_lookup():
+    timer = FakeTimer()
+    cache = OrchestrationCache(ttl=10, timer=timer)
+    entry = OrchestrationEntry('test', 'GET', {'form': 1})
+
+    assert cache.lookup(entry) is None
+
+    cache.mark_fetched(entry)
+    assert cache.lookup(OrchestrationEntry('test', 'GET', {'form': 1})) is entry
+    assert cache.lookup(OrchestrationEntry('test', 'POST', {'form': 1})) is None
+    assert cache.lookup(OrchestrationEntry('test', 'GET', {'form': 2})) is None
+    assert not cache.is_stale(entry)
+
+    timer.now = 10
+    assert cache.is_stale(entry)
+    assert cache.stale_entries() == [entry]
+
+    cache.discard('test')
+    assert len(cache) == 0
+
+
+def test_cache_disabled():
+    cache = OrchestrationCache(ttl=None)
+    entry = OrchestrationEntry('test', 'GET', {})
+    cache.mark_fetched(entry)
+
+    assert not cache.enabled
+    assert cache.lookup(entry) is None
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize('ttl, expected_calls', [(60, 1), (None, 3)])
+def test_sync_orchestration_cache(ttl, expected_calls):
+    test_client = SyncClient.create('test_client', '127.0.0.1', 1337, orchestration_ttl=ttl)
+    calls = []
+
+    def consume_service(service_definition, **kwargs):
+        calls.append(service_definition)
+        return Response(orchestration_payload, 'JSON', 200)
+
+    test_client.consume_service = consume_service
+
+    threads = [threading.Thread(target=test_client.add_orchestration_rule, args=('test', 'GET')) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    test_client.stop_orchestration_refresher()
+
+    assert len(calls) == expected_calls
+    assert len(test_client.orchestration_rules.providers('test')) == 1
+
+
+def test_sync_stale_rule_restarts_refresher():
+    test_client = SyncClient.create('test_client', '127.0.0.1', 1337, orchestration_ttl=60)
+    now = [0.0]
+    test_client.orchestration_cache.timer = lambda: now[0]
+    refreshed = threading.Event()
+    calls = []
+
+    def consume_service(service_definition, **kwargs):
+        calls.append(service_definition)
+        if len(calls) > 1:
+            refreshed.set()
+        return Response(orchestration_payload, 'JSON', 200)
+
+    test_client.consume_service = consume_service
+
+    test_client.add_orchestration_rule('test', 'GET')
+    test_client.stop_orchestration_refresher()
+    now[0] = 61.0
+    test_client.add_orchestration_rule('test', 'GET')
+
+    try:
+        assert refreshed.wait(5)
+    finally:
+        test_client.stop_orchestration_refresher()
+
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize('ttl, expected_calls', [(60, 1), (None, 3)])
+def test_async_orchestration_cache(make_async_client, ttl, expected_calls):
+    test_client = make_async_client(orchestration_ttl=ttl)
+    calls = []
+
+    async def consume_service(service_definition, **kwargs):
+        calls.append(service_definition)
+        await asyncio.sleep(0.01)
+        return Response(orchestration_payload, 'JSON', 200)
+
+    test_client.consume_service = consume_service
+
+    async def orchestrate():
+        await asyncio.gather(*[test_client.add_orchestration_rule('test', 'GET') for _ in range(3)])
+
+    asyncio.run(orchestrate())
+
+    assert len(calls) == expected_calls
+    assert len(test_client.orchestration_rules.providers('test')) == 1
+
+
+def test_async_concurrent_orchestrations_with_different_forms(make_async_client):
+    test_client = make_async_client()
+    forms = []
+
+    async def consume_service(service_definition, **kwargs):
+        forms.append(kwargs['json'])
+        await asyncio.sleep(0.01)
+        return Response(orchestration_payload, 'JSON', 200)
+
+    test_client.consume_service = consume_service
+
+    async def orchestrate():
+        await asyncio.gather(
+                test_client.add_orchestration_rule('test', 'GET'),
+                test_client.add_orchestration_rule('test', 'GET'),
+                test_client.add_orchestration_rule('test', 'GET', orchestration_flags=OrchestrationFlags.MATCHMAKING),
+        )
+
+    asyncio.run(orchestrate())
+
+    # The identical requests share one fetch, the different one is sent after it
+    assert len(forms) == 2
+    assert forms[0]['orchestrationFlags'] != forms[1]['orchestrationFlags']
+    assert forms[1]['orchestrationFlags']['matchmaking']
+    assert test_client.orchestration_cache.lookup(
+            test_client._orchestration_entries['test'],
+    ).orchestration_form == forms[1]
@@ -2,6 +2,36 @@ from arrowhead_client.client.implementations import SyncClient
 from arrowhead_client.client import provided_service
 
 
+def test_provided_services_are_not_shared_between_subclasses():
+    class FirstClient(SyncClient):
+        @provided_service(
+            service_definition='first-service',
+            service_uri='first',
+            protocol='HTTP',
+            method='GET',
+            payload_format='JSON',
+            access_policy='NOT_SECURE',
+        )
+        def first_service(self, request):
+            return {}
+
+    class SecondClient(SyncClient):
+        @provided_service(
+            service_definition='second-service',
+            service_uri='second',
+            protocol='HTTP',
+            method='GET',
+            payload_format='JSON',
+            access_policy='NOT_SECURE',
+        )
+        def second_service(self, request):
+            return {}
+
+    assert FirstClient.__arrowhead_services__ == ['first_service']
+    assert SecondClient.__arrowhead_services__ == ['second_service']
+    assert SyncClient.__arrowhead_services__ == []
+
+
 def test_provided_service_insecure_with_service_descriptor():
     class CustomClient(SyncClient):
         def __init__(self, *args, format='', **kwargs):
@@ -112,3 +142,25 @@ def test_provided_service_secure_with_function_decorator():
     assert rule.service_definition == 'hello-arrowhead'
     assert rule.provided_service.interface.dto() == "HTTP-SECURE-JSON"
     assert rule.provided_service.access_policy == "CERTIFICATE"
+
+
+def test_token_cache_size_reaches_access_policy():
+    test_client = SyncClient.create('custom_client', '127.0.0.1', 1337, token_cache_size=16)
+
+    @test_client.provided_service(
+        service_definition='hello-arrowhead',
+        service_uri='hello',
+        protocol='HTTP',
+        method='GET',
+        payload_format='JSON',
+        access_policy='TOKEN',
+    )
+    def service_function(request):
+        return {}
+
+    test_client.auth_authentication_info = 'public key'
+    test_client._initialize_provided_services()
+
+    rule = list(test_client.registration_rules)[0]
+
+    assert rule.access_policy.cache_info().maxsize == 16
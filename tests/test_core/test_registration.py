@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from arrowhead_client import errors
+from arrowhead_client.client.implementations import SyncClient
+from arrowhead_client.response import Response
+from arrowhead_client.testing import NullProvider
+
+
+def add_services(test_client, count):
+    for i in range(count):
+        test_client.provided_service(
+                f'service_{i}', f'service/{i}', 'HTTP', 'GET', 'JSON', 'NOT_SECURE',
+        )(lambda request: None)
+
+
+def test_sync_registration():
+    test_client = SyncClient.create('test_client', '127.0.0.1', 1337, registration_concurrency=4)
+    add_services(test_client, 8)
+    active = []
+    max_active = []
+    lock = threading.Lock()
+
+    def register_service(service):
+        with lock:
+            active.append(service)
+            max_active.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(service)
+        if service.service_definition == 'service_3':
+            raise errors.CoreServiceInputError('Bad form')
+        if service.service_definition == 'service_5':
+            raise errors.CoreServiceInputError('Service service_5 already exists.')
+
+    test_client._register_service = register_service
+
+    results = test_client._register_all_services()
+
+    assert 1 < max(max_active) <= 4
+    assert isinstance(results.pop('service_3'), errors.CoreServiceInputError)
+    assert all(error is None for error in results.values())
+    assert [rule.is_provided for rule in test_client.registration_rules].count(False) == 1
+
+    test_client._unregister_service = lambda service: None
+    results = test_client._unregister_all_services()
+
+    assert len(results) == 7
+    assert not any(rule.is_provided for rule in test_client.registration_rules)
+
+
+def test_async_registration(make_async_client):
+    test_client = make_async_client(registration_concurrency=3)
+    add_services(test_client, 9)
+    active = []
+    max_active = []
+
+    async def register_service(service):
+        active.append(service)
+        max_active.append(len(active))
+        await asyncio.sleep(0.01)
+        active.remove(service)
+        if service.service_definition == 'service_0':
+            raise ConnectionError('Service registry unavailable')
+
+    async def unregister_service(service):
+        return Response(b'', 'JSON', 200)
+
+    test_client._register_service = register_service
+    test_client._unregister_service = unregister_service
+
+    results = asyncio.run(test_client._register_all_services())
+
+    assert max(max_active) == 3
+    assert isinstance(results['service_0'], ConnectionError)
+    assert sum(error is None for error in results.values()) == 8
+
+    results = asyncio.run(test_client._unregister_all_services())
+
+    assert len(results) == 8
+
+
+def test_registration_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        SyncClient.create('test_client', '127.0.0.1', 1337, registration_concurrency=0)
+
+
+class NullConsumer:
+    async def async_startup(self):
+        pass
+
+    async def async_shutdown(self):
+        pass
+
+
+def test_async_workers_register_once(make_async_client):
+    provider = NullProvider('', workers=3)
+    test_client = make_async_client(consumer=NullConsumer(), provider=provider)
+    add_services(test_client, 2)
+    registered = []
+    unregistered = []
+
+    async def register_service(service):
+        registered.append(service.service_definition)
+
+    async def unregister_service(service):
+        unregistered.append(service.service_definition)
+
+    test_client._register_service = register_service
+    test_client._unregister_service = unregister_service
+
+    async def worker_lifespan():
+        await test_client.client_setup()
+        await test_client.client_cleanup()
+
+    def run_workers(address, port, keyfile, certfile):
+        # Each worker runs the startup and shutdown routines of the app
+        for _ in range(provider.workers):
+            asyncio.run(worker_lifespan())
+        assert sorted(registered) == ['service_0', 'service_1']
+
+    provider.run_forever = run_workers
+
+    test_client.run_forever()
+
+    assert sorted(registered) == ['service_0', 'service_1']
+    assert sorted(unregistered) == ['service_0', 'service_1']
+
+
+def test_sync_worker_setup():
+    test_client = SyncClient.create('test_client', '127.0.0.1', 1337, provider_options={'workers': 2})
+    closed = []
+    test_client.consumer.close = lambda: closed.append(True)
+    lock_guard = test_client._orchestration_locks_guard
+
+    test_client.provider._run_worker_startup_routines()
+
+    assert test_client.provider.workers == 2
+    assert test_client._orchestration_locks_guard is not lock_guard
+    assert closed == [True]
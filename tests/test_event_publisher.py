@@ -0,0 +1,211 @@
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+from arrowhead_client.client.event_publisher import AsyncEventPublisher, EventPublisher, PublisherStats
+from arrowhead_client.client.implementations import AsyncClient, SyncClient
+from arrowhead_client.consumer.implementations.aiohttp_consumer import AiohttpConsumer
+from arrowhead_client.logs import get_logger
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.testing import FakeCoreSystems, NullProvider
+
+
+@pytest.fixture
+def core_systems():
+    with FakeCoreSystems(seed=0) as core_systems:
+        yield core_systems
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        EventPublisher(lambda event: None, batch_size=0)
+    with pytest.raises(ValueError):
+        AsyncEventPublisher(lambda event: None, max_in_flight=0)
+
+
+def test_sync_flush_sends_all_events():
+    sent = []
+    publisher = EventPublisher(sent.append, batch_size=10, flush_interval=10)
+
+    for i in range(25):
+        publisher.publish({'payload': i})
+    publisher.flush()
+
+    assert sorted(event['payload'] for event in sent) == list(range(25))
+    assert publisher.stats == PublisherStats(published=25, failed=0, pending=0)
+    publisher.close()
+
+
+def test_sync_flush_interval():
+    sent = threading.Event()
+    publisher = EventPublisher(lambda event: sent.set(), batch_size=100, flush_interval=0.01)
+
+    publisher.publish({'payload': 1})
+
+    assert sent.wait(5)
+    publisher.close()
+
+
+def test_sync_max_in_flight():
+    in_flight = []
+    lock = threading.Lock()
+    current = 0
+
+    def send(event):
+        nonlocal current
+        with lock:
+            current += 1
+            in_flight.append(current)
+        time.sleep(0.005)
+        with lock:
+            current -= 1
+
+    publisher = EventPublisher(send, batch_size=20, flush_interval=0, max_in_flight=3)
+    for i in range(40):
+        publisher.publish({'payload': i})
+    publisher.close()
+
+    assert max(in_flight) <= 3
+    assert publisher.stats.published == 40
+
+
+def test_sync_backpressure():
+    release = threading.Event()
+    publisher = EventPublisher(lambda event: release.wait(5), batch_size=1, flush_interval=0, max_pending=2, max_in_flight=1)
+
+    with pytest.raises(queue.Full):
+        for i in range(10):
+            publisher.publish({'payload': i}, timeout=0.05)
+    # One event in flight, one waiting for a request slot, and a full buffer
+    assert publisher.stats.pending == 4
+
+    release.set()
+    publisher.close()
+    assert publisher.stats == PublisherStats(published=4, failed=0, pending=0)
+
+
+def test_sync_failed_events_are_counted():
+    def send(event):
+        if event['payload'] % 2:
+            raise ConnectionError('Event Handler is down')
+
+    publisher = EventPublisher(send, flush_interval=0)
+    for i in range(10):
+        publisher.publish({'payload': i})
+    publisher.close()
+
+    assert publisher.stats == PublisherStats(published=5, failed=5, pending=0)
+
+
+def test_async_batching():
+    sent = []
+
+    async def send(event):
+        sent.append(event['payload'])
+
+    async def main():
+        publisher = AsyncEventPublisher(send, batch_size=10, flush_interval=10)
+        for i in range(10):
+            await publisher.publish({'payload': i})
+        # A full batch is sent without waiting for the flush interval
+        await asyncio.wait_for(publisher._queue.join(), 5)
+        await publisher.publish({'payload': 10})
+        await publisher.close()
+
+        return publisher.stats
+
+    assert asyncio.run(main()) == PublisherStats(published=11, failed=0, pending=0)
+    assert sorted(sent) == list(range(11))
+
+
+def test_async_backpressure():
+    async def main():
+        released = asyncio.Event()
+
+        async def send(event):
+            await released.wait()
+
+        publisher = AsyncEventPublisher(send, batch_size=1, flush_interval=0, max_pending=2, max_in_flight=1)
+        with pytest.raises(asyncio.TimeoutError):
+            for i in range(10):
+                await asyncio.wait_for(publisher.publish({'payload': i}), 0.05)
+        pending = publisher.stats.pending
+
+        released.set()
+        await publisher.close()
+
+        return pending, publisher.stats
+
+    pending, stats = asyncio.run(main())
+
+    assert pending == 4
+    assert stats == PublisherStats(published=4, failed=0, pending=0)
+
+
+def test_async_failed_events_are_counted():
+    async def send(event):
+        raise ConnectionError('Event Handler is down')
+
+    async def main():
+        publisher = AsyncEventPublisher(send, flush_interval=0)
+        await publisher.publish({'payload': 0})
+        await publisher.close()
+
+        return publisher.stats
+
+    assert asyncio.run(main()) == PublisherStats(published=0, failed=1, pending=0)
+
+
+def test_sync_client_publish_event(core_systems):
+    test_client = SyncClient.create(
+            'test_client', '127.0.0.1', 1337,
+            config=core_systems.config,
+            event_publisher_options={'flush_interval': 0.01},
+    )
+    test_client.setup()
+
+    for i in range(20):
+        test_client.publish_event('temperature', str(i), metadata={'unit': 'celsius'})
+    test_client.flush_events()
+    test_client.close_event_publisher()
+
+    assert len(core_systems.published_events) == 20
+    event = core_systems.published_events[0]
+    assert event['eventType'] == 'temperature'
+    assert event['metaData'] == {'unit': 'celsius'}
+    assert event['source']['systemName'] == 'test_client'
+    assert test_client.event_publisher.stats == PublisherStats(published=20, failed=0, pending=0)
+
+
+def test_sync_client_rejected_event(core_systems):
+    test_client = SyncClient.create('test_client', '127.0.0.1', 1337, config=core_systems.config)
+    test_client.setup()
+    core_systems.fail_next('event-publish', status=400)
+
+    test_client.publish_event('temperature', '21.5')
+    test_client.flush_events()
+
+    assert test_client.event_publisher.stats.failed == 1
+    test_client.close_event_publisher()
+
+
+def test_async_client_publish_event(core_systems):
+    test_client = AsyncClient(
+            ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+            consumer=AiohttpConsumer('', '', ''),
+            provider=NullProvider(''),
+            logger=get_logger('test_client', 'debug'),
+            config=core_systems.config,
+    )
+
+    async def publish():
+        async with test_client:
+            await asyncio.gather(*[test_client.publish_event('temperature', str(i)) for i in range(50)])
+            await test_client.flush_events()
+
+    asyncio.run(publish())
+
+    assert sorted(int(event['payload']) for event in core_systems.published_events) == list(range(50))
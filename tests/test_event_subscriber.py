@@ -0,0 +1,242 @@
+import asyncio
+import json
+
+import pytest
+from cryptography.hazmat.primitives.serialization import Encoding
+
+from arrowhead_client import errors
+from arrowhead_client.client.event_subscriber import Event, EventReceiver, ReceiverStats
+from arrowhead_client.client.implementations import AsyncClient
+from arrowhead_client.consumer.implementations.aiohttp_consumer import AiohttpConsumer
+from arrowhead_client.logs import get_logger
+from arrowhead_client.provider.implementations.fastapi_provider import FastapiProvider
+from arrowhead_client.security.access_policy import SystemAccessPolicy, UnrestrictedAccessPolicy
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.testing import FakeCoreSystems, NullProvider
+from tests.test_security import conftest
+
+
+def notification(event_type='temperature', payload='21.5', **extra):
+    return json.dumps({
+        'eventType': event_type,
+        'payload': payload,
+        'timeStamp': '2021-01-01 12:00:00',
+        **extra,
+    }).encode()
+
+
+def test_event_from_dto():
+    event = Event.from_dto({
+        'eventType': 'temperature',
+        'payload': '21.5',
+        'timeStamp': '2021-01-01 12:00:00',
+        'metaData': {'unit': 'celsius'},
+    })
+
+    assert event == Event('temperature', '21.5', '2021-01-01 12:00:00', {'unit': 'celsius'})
+
+
+@pytest.mark.parametrize('dto', [
+    {'payload': '21.5', 'timeStamp': '2021-01-01 12:00:00'},
+    {'eventType': 'temperature', 'payload': 21.5, 'timeStamp': '2021-01-01 12:00:00'},
+    {'eventType': 'temperature', 'payload': '21.5', 'timeStamp': '2021-01-01 12:00:00', 'metaData': []},
+    [],
+])
+def test_invalid_event(dto):
+    with pytest.raises(ValueError):
+        Event.from_dto(dto)
+
+
+def test_receive_and_handle():
+    received = []
+
+    async def handler(event):
+        received.append(event.payload)
+
+    async def main():
+        receiver = EventReceiver()
+        receiver.add_handler('temperature', handler)
+        statuses = [receiver.receive(notification(payload=str(i))) for i in range(10)]
+        statuses.append(receiver.receive(notification('humidity')))
+        statuses.append(receiver.receive(b'not json'))
+        await receiver.close()
+
+        return statuses, receiver.stats
+
+    statuses, stats = asyncio.run(main())
+
+    assert statuses == [200] * 11 + [400]
+    assert sorted(received, key=int) == [str(i) for i in range(10)]
+    assert stats == ReceiverStats(received=10, handled=10, failed=0, rejected=1, pending=0)
+
+
+def test_slow_handler_does_not_block_receive():
+    async def main():
+        released = asyncio.Event()
+
+        async def handler(event):
+            await released.wait()
+
+        receiver = EventReceiver(max_pending=2, workers=1)
+        receiver.add_handler('temperature', handler)
+        statuses = [receiver.receive(notification()) for _ in range(3)]
+        await asyncio.sleep(0)
+        # The worker has taken the first event, which makes room for one more
+        statuses += [receiver.receive(notification()) for _ in range(2)]
+        pending = receiver.stats.pending
+
+        released.set()
+        await receiver.close()
+
+        return statuses, pending, receiver.stats
+
+    statuses, pending, stats = asyncio.run(main())
+
+    assert statuses == [200, 200, 503, 200, 503]
+    assert pending == 3
+    assert stats == ReceiverStats(received=3, handled=3, failed=0, rejected=2, pending=0)
+
+
+def test_handler_errors_are_counted():
+    handled = []
+
+    def failing_handler(event):
+        raise RuntimeError('Handler failed')
+
+    async def main():
+        receiver = EventReceiver()
+        receiver.add_handler('temperature', failing_handler)
+        receiver.add_handler('humidity', handled.append)
+        receiver.receive(notification())
+        receiver.receive(notification('humidity'))
+        await receiver.close()
+
+        return receiver.stats
+
+    assert asyncio.run(main()) == ReceiverStats(received=2, handled=1, failed=1, rejected=0, pending=0)
+    assert [event.event_type for event in handled] == ['humidity']
+
+
+def pem_cert(common_name):
+    private_key, public_key = conftest.generate_keys()
+
+    return conftest.generate_cert(common_name, private_key, public_key).public_bytes(Encoding.PEM).decode()
+
+
+@pytest.mark.parametrize('access_policy, cert, status', [
+    (UnrestrictedAccessPolicy(), None, 200),
+    (SystemAccessPolicy('event_handler'), 'event_handler.testcloud.aitia.arrowhead.eu', 200),
+    (SystemAccessPolicy('event_handler'), 'consumer.testcloud.aitia.arrowhead.eu', 403),
+    (SystemAccessPolicy('event_handler'), None, 403),
+])
+def test_fastapi_event_route(access_policy, cert, status):
+    provider = FastapiProvider('')
+    bodies = []
+
+    def receive(body):
+        bodies.append(body)
+        return 200
+
+    provider.add_event_route('events/notify', receive, access_policy)
+    sent = []
+    request = [{'type': 'http.request', 'body': notification()[:10], 'more_body': True},
+               {'type': 'http.request', 'body': notification()[10:], 'more_body': False}]
+
+    async def receive_message():
+        return request.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': 'POST',
+        'path': '/events/notify',
+        'root_path': '',
+        'query_string': b'',
+        'headers': [(b'content-type', b'application/json')],
+        'extensions': {'tls': {'client_cert_chain': [pem_cert(cert)] if cert else []}},
+    }
+    asyncio.run(provider.app(scope, receive_message, send))
+
+    assert sent[0]['status'] == status
+    assert bodies == ([notification()] if status == 200 else [])
+
+
+def test_event_access_policy():
+    def make_client(**kwargs):
+        return AsyncClient(
+                ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+                consumer=None,
+                provider=NullProvider(''),
+                logger=get_logger('test_client', 'debug'),
+                **kwargs,
+        )
+
+    assert isinstance(make_client()._event_access_policy(), UnrestrictedAccessPolicy)
+    policy = make_client(keyfile='client.key', certfile='client.crt')._event_access_policy()
+    assert isinstance(policy, SystemAccessPolicy)
+    assert policy.system_name == 'event_handler'
+
+
+def test_subscribe_and_unsubscribe():
+    received = []
+
+    with FakeCoreSystems(seed=0) as core_systems:
+        test_client = AsyncClient(
+                ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+                consumer=AiohttpConsumer('', '', ''),
+                provider=NullProvider(''),
+                logger=get_logger('test_client', 'debug'),
+                config=core_systems.config,
+        )
+
+        async def main():
+            async with test_client:
+                await test_client.subscribe('temperature', received.append, metadata_filter={'unit': 'celsius'})
+                subscriptions = list(core_systems.subscriptions)
+
+                receive = test_client.provider.event_routes['events/notify']
+                assert isinstance(test_client.provider.event_policies['events/notify'], UnrestrictedAccessPolicy)
+                assert receive(notification()) == 200
+                await test_client.event_receiver.join()
+
+                await test_client.unsubscribe('temperature')
+                assert receive(notification()) == 200
+                await test_client.event_receiver.join()
+
+            return subscriptions
+
+        subscriptions = asyncio.run(main())
+
+        assert core_systems.subscriptions == []
+
+    (subscription,) = subscriptions
+    assert subscription['eventType'] == 'temperature'
+    assert subscription['notifyUri'] == 'events/notify'
+    assert subscription['filterMetaData'] == {'unit': 'celsius'}
+    assert subscription['subscriberSystem']['systemName'] == 'test_client'
+    assert [event.payload for event in received] == ['21.5']
+    assert test_client.subscriptions == {}
+
+
+def test_failed_subscription_removes_handler():
+    with FakeCoreSystems(seed=0) as core_systems:
+        core_systems.fail_next('event-subscribe', status=400)
+        test_client = AsyncClient(
+                ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+                consumer=AiohttpConsumer('', '', ''),
+                provider=NullProvider(''),
+                logger=get_logger('test_client', 'debug'),
+                config=core_systems.config,
+        )
+
+        async def main():
+            async with test_client:
+                with pytest.raises(errors.CoreServiceInputError):
+                    await test_client.subscribe('temperature', lambda event: None)
+
+        asyncio.run(main())
+
+    assert test_client.event_receiver.handlers == {}
+    assert test_client.subscriptions == {}
@@ -0,0 +1,155 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+from arrowhead_client import errors
+from arrowhead_client.client import core_service_responses as responses
+from arrowhead_client.client.core_service_forms.client import ServiceQueryForm
+from arrowhead_client.client.core_services import CoreServices
+from arrowhead_client.client.implementations import AsyncClient, SyncClient
+from arrowhead_client.consumer.implementations.aiohttp_consumer import AiohttpConsumer
+from arrowhead_client.logs import get_logger
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.testing import FakeCoreSystems, NullProvider
+
+
+@pytest.fixture
+def core_systems():
+    with FakeCoreSystems(seed=0) as core_systems:
+        yield core_systems
+
+
+def make_sync_client(core_systems):
+    test_client = SyncClient.create('test_client', '127.0.0.1', 1337, config=core_systems.config)
+    test_client.setup()
+
+    return test_client
+
+
+def query(test_client, service_definition):
+    query_form = ServiceQueryForm.make(Service(service_definition, '', ServiceInterface('HTTP', 'INSECURE', 'JSON')))
+    query_response = test_client.consume_service(
+            CoreServices.SERVICE_QUERY.service_definition,
+            json=query_form.dto(),
+    )
+
+    return responses.process_service_query(query_response)
+
+
+def test_register_query_unregister(core_systems):
+    test_client = make_sync_client(core_systems)
+    test_client.provided_service('echo', 'echo', 'HTTP', 'GET', 'JSON', 'NOT_SECURE')(lambda request: None)
+    test_client._initialize_provided_services()
+
+    assert test_client._register_all_services() == {'echo': None}
+    # Registering a service that already exists is reported as success by the client
+    test_client.registration_rules.retrieve('echo').is_provided = False
+    assert test_client._register_all_services() == {'echo': None}
+
+    (service, system), = query(test_client, 'echo')
+    assert service.service_uri == 'echo'
+    assert system == test_client.system
+
+    assert test_client._unregister_all_services() == {'echo': None}
+    assert core_systems.registered('echo') == []
+    assert core_systems.requests['service-register'] == 2
+
+
+def test_large_orchestration_results(core_systems):
+    core_systems.populate('temperature', providers=500)
+    test_client = make_sync_client(core_systems)
+
+    test_client.add_orchestration_rule('temperature', 'GET')
+    test_client.stop_orchestration_refresher()
+
+    rules = test_client.orchestration_rules.providers('temperature')
+    assert len(rules) == 500
+    assert len({rule.endpoint for rule in rules}) == 500
+    assert len(query(test_client, 'temperature')) == 500
+
+
+def test_injected_errors(core_systems):
+    test_client = make_sync_client(core_systems)
+    core_systems.fail_next('orchestration-service', status=500, message='Orchestrator is down')
+
+    with pytest.raises(errors.CoreServiceNotAvailableError, match='Orchestrator is down'):
+        test_client.add_orchestration_rule('temperature', 'GET')
+
+    # Only the next request fails
+    test_client.add_orchestration_rule('temperature', 'GET')
+    test_client.stop_orchestration_refresher()
+    assert core_systems.requests['orchestration-service'] == 2
+
+
+def test_error_rate():
+    with FakeCoreSystems(error_rate=1.0, error_status=400) as core_systems:
+        test_client = make_sync_client(core_systems)
+
+        with pytest.raises(errors.OrchestrationError):
+            test_client.add_orchestration_rule('temperature', 'GET')
+
+    with pytest.raises(ValueError):
+        FakeCoreSystems(error_rate=2)
+
+
+def test_latency():
+    with FakeCoreSystems(latency=0.05) as core_systems:
+        test_client = make_sync_client(core_systems)
+
+        start = time.perf_counter()
+        test_client.add_orchestration_rule('temperature', 'GET')
+        test_client.stop_orchestration_refresher()
+
+        assert time.perf_counter() - start >= 0.05
+
+
+def test_publickey(core_systems):
+    test_client = make_sync_client(core_systems)
+
+    publickey_response = test_client.consume_service(CoreServices.PUBLICKEY.service_definition)
+
+    assert responses.process_publickey(publickey_response).startswith('-----BEGIN PUBLIC KEY-----')
+
+
+def test_async_orchestration(core_systems):
+    core_systems.populate('temperature', providers=10)
+    test_client = AsyncClient(
+            ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+            consumer=AiohttpConsumer('', '', ''),
+            provider=NullProvider(''),
+            logger=get_logger('test_client', 'debug'),
+            config=core_systems.config,
+    )
+
+    async def orchestrate():
+        async with test_client:
+            await asyncio.gather(*[test_client.add_orchestration_rule('temperature', 'GET') for _ in range(5)])
+
+    asyncio.run(orchestrate())
+
+    assert len(test_client.orchestration_rules.providers('temperature')) == 10
+    assert core_systems.requests['orchestration-service'] == 1
+
+
+def test_subprocess():
+    process = subprocess.Popen(
+            [sys.executable, '-m', 'arrowhead_client.testing', '--port', '0', '--populate', 'temperature:3'],
+            stdout=subprocess.PIPE,
+            text=True,
+    )
+    try:
+        address, port = process.stdout.readline().split()[-1].rsplit(':', 1)
+        test_client = SyncClient.create('test_client', '127.0.0.1', 1337, config={
+            system: {'system_name': system, 'address': address, 'port': int(port)}
+            for system in ('service_registry', 'orchestrator', 'authorization')
+        })
+        test_client.setup()
+
+        assert len(query(test_client, 'temperature')) == 3
+    finally:
+        process.terminate()
+        process.wait(10)
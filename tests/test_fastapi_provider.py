@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+import ssl
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509 import NameOID
+
+from arrowhead_client.codec import get_json_codec
+from arrowhead_client.provider.implementations.fastapi_provider import (
+    ArrowheadAccessPolicyMiddleware,
+    TLSExtensionMiddleware,
+    consumer_certificate,
+)
+from arrowhead_client.rules import RegistrationRule
+from arrowhead_client.security.access_policy import CertificateAccessPolicy, UnrestrictedAccessPolicy
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+
+
+@pytest.fixture(scope='module')
+def consumer_cert():
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'consumer.testcloud.aitia.arrowhead.eu')])
+    now = datetime.datetime.utcnow()
+    cert = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(
+            key.public_key()
+    ).serial_number(
+            x509.random_serial_number()
+    ).not_valid_before(now).not_valid_after(
+            now + datetime.timedelta(days=1)
+    ).sign(key, hashes.SHA256())
+
+    return cert.public_bytes(serialization.Encoding.DER)
+
+
+def make_rule(service_uri, access_policy):
+    return RegistrationRule(
+            Service(service_uri, service_uri, ServiceInterface('HTTP', 'SECURE', 'JSON')),
+            ArrowheadSystem.make('test_provider', '127.0.0.1', 1337),
+            'GET',
+            lambda request: None,
+            access_policy,
+    )
+
+
+class App:
+    def __init__(self):
+        self.scopes = []
+
+    async def __call__(self, scope, receive, send):
+        self.scopes.append(scope)
+
+
+def run(middleware, scope):
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+def make_scope(path, scope_type='http', **extra):
+    return {'type': scope_type, 'path': path, 'headers': [(b'authorization', b'Bearer token')], **extra}
+
+
+@pytest.fixture
+def middleware():
+    policy_map = {
+        'open': make_rule('open', UnrestrictedAccessPolicy()),
+        'cert/service': make_rule('cert/service', CertificateAccessPolicy()),
+    }
+    return ArrowheadAccessPolicyMiddleware(App(), policy_map, get_json_codec('json'))
+
+
+@pytest.mark.parametrize('path', ['/unknown', '/open', '/open/'])
+def test_authorized_requests_pass(middleware, path):
+    sent = run(middleware, make_scope(path))
+
+    assert sent == []
+    assert len(middleware.app.scopes) == 1
+
+
+def test_missing_certificate_is_rejected(middleware):
+    sent = run(middleware, make_scope('/cert/service'))
+
+    assert middleware.app.scopes == []
+    assert sent[0]['type'] == 'http.response.start'
+    assert sent[0]['status'] == 403
+    assert b'cert/service' in sent[1]['body']
+    assert dict(sent[0]['headers'])[b'content-length'] == str(len(sent[1]['body'])).encode()
+
+
+def test_missing_certificate_closes_websocket(middleware):
+    sent = run(middleware, make_scope('/cert/service', scope_type='websocket'))
+
+    assert middleware.app.scopes == []
+    assert sent == [{'type': 'websocket.close', 'code': 1008}]
+
+
+def test_lifespan_passes(middleware):
+    run(middleware, {'type': 'lifespan'})
+
+    assert middleware.app.scopes == [{'type': 'lifespan'}]
+
+
+class FakeSSLObject:
+    def __init__(self, der_cert):
+        self.der_cert = der_cert
+
+    def getpeercert(self, binary_form=False):
+        return self.der_cert
+
+    def version(self):
+        return 'TLSv1.3'
+
+
+def test_tls_extension_certificate(middleware, consumer_cert):
+    app = TLSExtensionMiddleware(middleware, FakeSSLObject(consumer_cert))
+
+    sent = run(app, make_scope('/cert/service', extensions={'http.response.trailers': {}}))
+
+    assert sent == []
+    scope, = middleware.app.scopes
+    assert consumer_certificate(scope) == ssl.DER_cert_to_PEM_cert(consumer_cert)
+    assert scope['extensions']['tls']['tls_version'] == 0x0304
+    assert 'http.response.trailers' in scope['extensions']
+
+
+def test_tls_extension_without_certificate(middleware):
+    app = TLSExtensionMiddleware(middleware, FakeSSLObject(None))
+
+    sent = run(app, make_scope('/cert/service'))
+
+    assert sent[0]['status'] == 403
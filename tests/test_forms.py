@@ -69,3 +69,38 @@ def test_orchestration_form():
     }
 
     assert set(orchestration_form.dto().keys()) == valid_keys
+
+
+def legacy_dto(form):
+    return form.dict(exclude_defaults=True, exclude_none=True, by_alias=True)
+
+
+def test_fast_dto_matches_pydantic():
+    forms_to_check = [
+        forms.ServiceRegistrationForm.make(provided_service, provider_system),
+        forms.ServiceRegistrationForm.make(provided_service, provider_system, end_of_validity='dummy-date'),
+        forms.OrchestrationForm.make(requester_system, provided_service, OrchestrationFlags.MATCHMAKING),
+        forms.OrchestrationForm.make(requester_system, provided_service, preferred_providers={'test': 'test'}),
+        forms.ServiceQueryForm.make(provided_service, max_version_requirement=2),
+        forms.OrchestrationFlagsForm.make(),
+    ]
+
+    for form in forms_to_check:
+        assert form.dto() == legacy_dto(form)
+
+
+def test_trusted_forms():
+    orchestration_form = forms.OrchestrationForm.make(
+            requester_system,
+            provided_service,
+            OrchestrationFlags.OVERRIDE_STORE | OrchestrationFlags.PING_PROVIDERS,
+            trusted=True,
+    )
+    registration_form = forms.ServiceRegistrationForm.make(provided_service, provider_system, trusted=True)
+
+    assert orchestration_form.dto() == forms.OrchestrationForm.make(
+            requester_system,
+            provided_service,
+            OrchestrationFlags.OVERRIDE_STORE | OrchestrationFlags.PING_PROVIDERS,
+    ).dto()
+    assert registration_form.dto() == forms.ServiceRegistrationForm.make(provided_service, provider_system).dto()
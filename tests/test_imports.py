@@ -0,0 +1,124 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from arrowhead_client.imports import LazyAttribute, import_string
+
+HEAVY_PACKAGES = ['aiohttp', 'cryptography', 'fastapi', 'flask', 'jwcrypto', 'requests', 'starlette', 'uvicorn']
+IMPLEMENTATIONS = [
+    'arrowhead_client.provider.implementations.httpprovider',
+    'arrowhead_client.provider.implementations.fastapi_provider',
+    'arrowhead_client.consumer.implementations.requests_consumer',
+    'arrowhead_client.consumer.implementations.aiohttp_consumer',
+]
+
+
+def run_isolated(code):
+    """ Runs ``code`` in a fresh interpreter and returns the heavy packages it imported. """
+    script = (
+        f'import sys\n'
+        f'{code}\n'
+        f'import json\n'
+        f'print(json.dumps(sorted(set({HEAVY_PACKAGES!r}) & {{name.split(".")[0] for name in sys.modules}})))\n'
+    )
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+
+    return set(json.loads(output.splitlines()[-1]))
+
+
+def import_time(code, repeat=3):
+    """
+    Returns the time in microseconds spent importing ``arrowhead_client`` modules in a fresh interpreter running
+    ``code``, as reported by :code:`python -X importtime`.
+
+    Only the cumulative times of the modules imported by ``code`` itself are counted, so interpreter startup
+    is left out, and the best of ``repeat`` runs is returned.
+    """
+    def run_once():
+        report = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', code],
+                check=True,
+                capture_output=True,
+                text=True,
+        ).stderr
+        total = 0
+        for line in report.splitlines():
+            fields = line.split('|')
+            # Modules imported directly by the code are not indented
+            if len(fields) == 3 and fields[2].startswith(' arrowhead_client'):
+                total += int(fields[1])
+
+        return total
+
+    return min(run_once() for _ in range(repeat))
+
+
+@pytest.mark.parametrize('module', [
+    'arrowhead_client.client',
+    'arrowhead_client.client.implementations',
+    'arrowhead_client.consumer',
+    'arrowhead_client.provider',
+    'arrowhead_client.security.access_policy',
+])
+def test_import_loads_no_implementations(module):
+    assert run_isolated(f'import {module}') == set()
+
+
+def test_sync_client_loads_only_sync_implementations():
+    loaded = run_isolated(
+            'from arrowhead_client.client import SyncClient\n'
+            'SyncClient.__arrowhead_provider__, SyncClient.__arrowhead_consumer__'
+    )
+
+    assert {'flask', 'requests'} <= loaded
+    assert loaded.isdisjoint({'aiohttp', 'fastapi', 'uvicorn'})
+
+
+def test_async_client_loads_only_async_implementations():
+    loaded = run_isolated(
+            'from arrowhead_client.client import AsyncClient\n'
+            'AsyncClient.__arrowhead_provider__, AsyncClient.__arrowhead_consumer__'
+    )
+
+    assert {'aiohttp', 'fastapi'} <= loaded
+    assert loaded.isdisjoint({'flask', 'requests'})
+
+
+def test_consumer_only_loads_consumer():
+    loaded = run_isolated('from arrowhead_client.consumer import RequestsConsumer')
+
+    assert loaded == {'requests'}
+
+
+def test_import_time():
+    lazy = import_time('import arrowhead_client.client')
+    eager = import_time('\n'.join(['import arrowhead_client.client', *(f'import {name}' for name in IMPLEMENTATIONS)]))
+
+    assert 0 < lazy < eager / 2
+
+
+def test_lazy_module_attribute():
+    from arrowhead_client import provider
+    from arrowhead_client.provider.implementations.httpprovider import FlaskProvider
+
+    assert provider.FlaskProvider is FlaskProvider
+    assert 'FastapiProvider' in dir(provider)
+    with pytest.raises(AttributeError):
+        provider.MissingProvider
+
+
+def test_lazy_attribute():
+    class Example:
+        codec = LazyAttribute('arrowhead_client.codec:get_json_codec')
+
+    from arrowhead_client.codec import get_json_codec
+
+    assert Example.codec is get_json_codec
+    assert Example().codec is get_json_codec
+
+
+def test_import_string_missing_attribute():
+    with pytest.raises(ImportError):
+        import_string('arrowhead_client.codec:missing')
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import threading
+
+import pytest
+
+from arrowhead_client.logs import JsonFormatter, LogQueueHandler, get_logger
+
+
+@pytest.fixture
+def logger_name(request):
+    name = f'test_logs_{request.node.name}'
+    yield name
+
+    logger = logging.getLogger(name)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def read_log(log_dir, logger_name):
+    return (log_dir / f'{logger_name}.log').read_text().splitlines()
+
+
+def test_handlers_are_not_duplicated(tmp_path, logger_name):
+    get_logger(logger_name, 'debug', log_dir=tmp_path)
+    logger = get_logger(logger_name, 'info', log_dir=tmp_path, queued=True)
+    logger.debug('hidden')
+    logger.info('written once')
+    logger.handlers[0].close()
+
+    assert len(logger.handlers) == 1
+    assert [line.endswith('written once') for line in read_log(tmp_path, logger_name)] == [False, False, True]
+
+
+def test_other_handlers_are_kept(tmp_path, logger_name):
+    other_handler = logging.NullHandler()
+    logging.getLogger(logger_name).addHandler(other_handler)
+
+    logger = get_logger(logger_name, 'debug', log_dir=tmp_path)
+    get_logger(logger_name, 'debug', log_dir=tmp_path)
+
+    assert len(logger.handlers) == 2
+    assert other_handler in logger.handlers
+
+
+def test_queued_logging(tmp_path, logger_name):
+    logger = get_logger(logger_name, 'debug', log_dir=tmp_path, queued=True)
+    handler, = logger.handlers
+    written_by = []
+    file_handler, = handler.listener.handlers
+    file_handler.addFilter(lambda record: written_by.append(threading.current_thread()) or True)
+
+    for number in range(100):
+        logger.info('message %d', number)
+    handler.close()
+
+    lines = read_log(tmp_path, logger_name)
+    assert len(lines) == 101
+    assert lines[-1].endswith('message 99')
+    assert threading.current_thread() not in written_by
+
+
+def test_json_format(tmp_path, logger_name):
+    logger = get_logger(logger_name, 'debug', log_dir=tmp_path, queued=True, json_format=True)
+    try:
+        raise ValueError('bad value')
+    except ValueError:
+        logger.exception('failed %s', 'request', extra={'service_definition': 'echo'})
+    logger.handlers[0].close()
+
+    entry = json.loads(read_log(tmp_path, logger_name)[-1])
+    assert entry['level'] == 'ERROR'
+    assert entry['logger'] == logger_name
+    assert entry['message'] == 'failed request'
+    assert entry['service_definition'] == 'echo'
+    assert 'ValueError: bad value' in entry['exception']
+    assert entry['time'].endswith('+00:00')
+
+
+def test_json_formatter_serializes_unknown_types():
+    record = logging.LogRecord('test', logging.INFO, '', 0, 'message', (), None)
+    record.path = object()
+
+    assert json.loads(JsonFormatter().format(record))['path'].startswith('<object')
+
+
+def test_rotation(tmp_path, logger_name):
+    logger = get_logger(logger_name, 'debug', log_dir=tmp_path, max_bytes=1000, backup_count=2)
+    for number in range(100):
+        logger.info('message %d', number)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        f'{logger_name}.log', f'{logger_name}.log.1', f'{logger_name}.log.2',
+    ]
+    assert all(path.stat().st_size <= 1000 for path in tmp_path.iterdir())
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+def test_queued_logging_after_fork(tmp_path, logger_name):
+    logger = get_logger(logger_name, 'debug', log_dir=tmp_path, queued=True)
+
+    pid = os.fork()
+    if pid == 0:
+        logger.info('from child')
+        logger.handlers[0].close()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    logger.handlers[0].close()
+
+    assert read_log(tmp_path, logger_name)[-1].endswith('from child')
+
+
+def test_queue_handler_close_is_idempotent():
+    handler = LogQueueHandler(logging.NullHandler())
+    handler.close()
+    handler.close()
@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from arrowhead_client.client.core_services import CoreServices
+from arrowhead_client.client.implementations import SyncClient
+from arrowhead_client.metrics import NULL_METRICS, Counter, Histogram, Metrics, get_metrics
+from arrowhead_client.provider.implementations.fastapi_provider import ArrowheadAccessPolicyMiddleware
+from arrowhead_client.provider.implementations.httpprovider import FlaskProvider
+from arrowhead_client.rules import RegistrationRule
+from arrowhead_client.security.access_policy import CertificateAccessPolicy, UnrestrictedAccessPolicy
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.testing import FakeCoreSystems
+
+
+def make_rule(service_definition, access_policy, func=lambda request: {'value': 42}):
+    return RegistrationRule(
+            Service(service_definition, service_definition, ServiceInterface('HTTP', 'SECURE', 'JSON')),
+            ArrowheadSystem.make('test_provider', '127.0.0.1', 1337),
+            'GET',
+            func,
+            access_policy,
+    )
+
+
+def test_get_metrics():
+    metrics = Metrics()
+
+    assert get_metrics(metrics) is metrics
+    assert get_metrics(True).enabled
+    assert get_metrics() is NULL_METRICS
+    assert get_metrics(False) is NULL_METRICS
+
+
+def test_null_metrics():
+    with NULL_METRICS.provider_request('test') as timer:
+        timer.status = 200
+    NULL_METRICS.authorization_failure('test')
+
+    assert not NULL_METRICS.enabled
+    assert NULL_METRICS.exposition() == ''
+
+
+def test_counter_exposition():
+    counter = Counter('test_total', 'Test "counter".\nSecond line', ('service', 'status'))
+    counter.inc(('a"b', '200'))
+    counter.inc(('a"b', '200'), 2)
+
+    assert counter.value(('a"b', '200')) == 3
+    assert counter.expose() == [
+        '# HELP test_total Test "counter".\\nSecond line',
+        '# TYPE test_total counter',
+        'test_total{service="a\\"b",status="200"} 3',
+    ]
+
+
+def test_histogram_exposition():
+    histogram = Histogram('test_seconds', 'Test histogram.', ('service',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(('test',), value)
+
+    assert histogram.count(('test',)) == 4
+    assert histogram.expose()[2:] == [
+        'test_seconds_bucket{service="test",le="0.1"} 2',
+        'test_seconds_bucket{service="test",le="1"} 3',
+        'test_seconds_bucket{service="test",le="+Inf"} 4',
+        'test_seconds_sum{service="test"} 3.65',
+        'test_seconds_count{service="test"} 4',
+    ]
+
+
+def test_histogram_buckets_must_increase():
+    with pytest.raises(ValueError):
+        Histogram('test_seconds', 'Test histogram.', buckets=(1.0, 0.1))
+
+
+def test_request_timer():
+    metrics = Metrics()
+
+    with metrics.provider_request('test') as timer:
+        assert metrics.provider_in_flight.value(('test',)) == 1
+        timer.status = 200
+    with pytest.raises(RuntimeError):
+        with metrics.provider_request('test'):
+            raise RuntimeError
+
+    assert metrics.provider_in_flight.value(('test',)) == 0
+    assert metrics.provider_latency.count(('test',)) == 2
+    assert metrics.provider_responses.value(('test', '200')) == 1
+    assert metrics.provider_responses.value(('test', 'error')) == 1
+
+
+def test_consumer_metrics():
+    with FakeCoreSystems() as core_systems:
+        test_client = SyncClient.create('test_client', '127.0.0.1', 1337, config=core_systems.config, metrics=True)
+        test_client.setup()
+        service_query = CoreServices.SERVICE_QUERY.service_definition
+
+        test_client.consume_service(service_query, json={})
+
+    metrics = test_client.consumer.metrics
+    assert test_client.provider.metrics is metrics
+    assert metrics.consumer_latency.count((service_query, 'service_registry')) == 1
+    assert metrics.consumer_responses.value((service_query, 'service_registry', '400')) == 1
+    assert metrics.consumer_in_flight.value((service_query, 'service_registry')) == 0
+
+
+def test_flask_provider_metrics():
+    provider = FlaskProvider('', metrics=True)
+    provider.add_provided_service(make_rule('open', UnrestrictedAccessPolicy()))
+    provider.add_provided_service(make_rule('cert', CertificateAccessPolicy()))
+    flask_client = provider.app.test_client()
+
+    assert flask_client.get('/open').status_code == 200
+    assert flask_client.get('/cert').status_code == 403
+    assert flask_client.get('/missing').status_code == 404
+    exposition = flask_client.get('/metrics')
+
+    assert exposition.status_code == 200
+    assert exposition.content_type.startswith('text/plain')
+    assert 'arrowhead_provider_responses_total{service="open",status="200"} 1' in exposition.text
+    assert 'arrowhead_provider_responses_total{service="cert",status="403"} 1' in exposition.text
+    assert 'arrowhead_provider_authorization_failures_total{service="cert"} 1' in exposition.text
+    assert 'missing' not in exposition.text
+
+
+def test_flask_provider_without_metrics():
+    provider = FlaskProvider('')
+
+    assert provider.app.test_client().get('/metrics').status_code == 404
+
+
+def test_fastapi_middleware_metrics():
+    metrics = Metrics()
+
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 201, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    middleware = ArrowheadAccessPolicyMiddleware(
+            app,
+            {'open': make_rule('open', UnrestrictedAccessPolicy()), 'cert': make_rule('cert', CertificateAccessPolicy())},
+            metrics=metrics,
+    )
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        pass
+
+    for path in ('/open', '/cert', '/other'):
+        asyncio.run(middleware({'type': 'http', 'path': path, 'headers': []}, receive, send))
+
+    assert metrics.provider_responses.value(('open', '201')) == 1
+    assert metrics.provider_responses.value(('cert', '403')) == 1
+    assert metrics.provider_authorization_failures.value(('cert',)) == 1
+    assert metrics.provider_latency.count(('other',)) == 0
@@ -0,0 +1,180 @@
+import multiprocessing
+import os
+import signal
+import socket
+import ssl
+import time
+
+import pytest
+from cryptography.hazmat.primitives.serialization import Encoding
+
+from arrowhead_client.provider.implementations.httpprovider import (
+    FlaskProvider,
+    client_cert_handler_class,
+    peer_certificate,
+)
+from arrowhead_client.provider.prefork import PreforkServer, bind_socket
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='Worker processes require os.fork')
+
+WORKERS = 3
+worker_started = False
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def mark_started():
+    global worker_started
+    worker_started = True
+
+
+def serve(sock):
+    while True:
+        conn, _ = sock.accept()
+        with conn:
+            conn.sendall(f'{os.getpid()} {worker_started}'.encode())
+
+
+def run_master(port, reuse_port):
+    PreforkServer(serve, WORKERS, reuse_port=reuse_port, on_worker_start=mark_started).run('127.0.0.1', port)
+
+
+def ask_worker(port):
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as conn:
+        pid, started = conn.recv(64).decode().split()
+
+    return int(pid), started == 'True'
+
+
+def wait_for_port(port):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            return ask_worker(port)
+        except OSError:
+            time.sleep(0.05)
+
+    raise TimeoutError(f'Nothing is listening on port {port}')
+
+
+@pytest.mark.parametrize('reuse_port', [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not hasattr(socket, 'SO_REUSEPORT'), reason='No SO_REUSEPORT')),
+])
+def test_workers_share_port(reuse_port):
+    port = free_port()
+    master = multiprocessing.get_context('fork').Process(target=run_master, args=(port, reuse_port))
+    master.start()
+    try:
+        wait_for_port(port)
+        answers = [ask_worker(port) for _ in range(200)]
+    finally:
+        os.kill(master.pid, signal.SIGTERM)
+        master.join(15)
+
+    pids = {pid for pid, _ in answers}
+    assert master.exitcode == 0
+    assert 1 < len(pids) <= WORKERS
+    assert master.pid not in pids
+    assert all(started for _, started in answers)
+    # The workers were stopped together with the master
+    with pytest.raises(OSError):
+        ask_worker(port)
+
+
+def crash(sock):
+    raise RuntimeError('Worker can not start')
+
+
+def test_crashing_worker():
+    server = PreforkServer(crash, workers=2)
+
+    with pytest.raises(RuntimeError):
+        server.run('127.0.0.1', free_port())
+
+    assert server.worker_pids == []
+
+
+def run_clean_exit_master(port):
+    PreforkServer(lambda sock: None, workers=2).run('127.0.0.1', port)
+
+
+def test_clean_exit_is_not_restarted():
+    master = multiprocessing.get_context('fork').Process(target=run_clean_exit_master, args=(free_port(),))
+    master.start()
+    master.join(10)
+    if master.exitcode is None:
+        master.kill()
+        master.join()
+
+    assert master.exitcode == 0
+
+
+def test_invalid_workers():
+    with pytest.raises(ValueError):
+        PreforkServer(serve, workers=0)
+
+    with pytest.raises(ValueError):
+        FlaskProvider('', workers=0)
+
+    with pytest.raises(ValueError):
+        FlaskProvider('', wsgi_server='not_a_server')
+
+
+def test_single_worker_socket_is_closed(monkeypatch):
+    provider = FlaskProvider('')
+    served = []
+    monkeypatch.setattr(provider, '_serve_wsgi', lambda sock, *args: served.append(sock))
+
+    provider.run_forever('127.0.0.1', free_port(), '', '')
+
+    (sock,) = served
+    assert sock.fileno() == -1
+
+
+class FakeSSLSocket:
+    def __init__(self, der_cert):
+        self.der_cert = der_cert
+
+    def getpeercert(self, binary_form=False):
+        return self.der_cert
+
+
+@pytest.fixture(scope='module')
+def der_cert():
+    from tests.test_security import conftest
+
+    private_key, public_key = conftest.generate_keys()
+    return conftest.generate_cert('consumer.testcloud.aitia.arrowhead.eu', private_key, public_key).public_bytes(Encoding.DER)
+
+
+def test_peer_certificate(der_cert):
+    assert peer_certificate(FakeSSLSocket(der_cert)) == ssl.DER_cert_to_PEM_cert(der_cert)
+    assert peer_certificate(FakeSSLSocket(None)) == ''
+    with socket.socket() as sock:
+        assert peer_certificate(sock) == ''
+
+
+def test_gevent_handler_adds_client_certificate(monkeypatch, der_cert):
+    pywsgi = pytest.importorskip('gevent.pywsgi')
+    monkeypatch.setattr(pywsgi.WSGIHandler, 'get_environ', lambda self: {'REQUEST_METHOD': 'GET'})
+    handler_class = client_cert_handler_class()
+    handler = handler_class.__new__(handler_class)
+
+    handler.socket = FakeSSLSocket(der_cert)
+    assert handler.get_environ()['SSL_CLIENT_CERT'] == ssl.DER_cert_to_PEM_cert(der_cert)
+    handler.socket = FakeSSLSocket(None)
+    assert 'SSL_CLIENT_CERT' not in handler.get_environ()
+
+
+def test_bind_socket_without_listening():
+    sock = bind_socket('127.0.0.1', 0, backlog=None)
+    try:
+        with pytest.raises(OSError):
+            socket.create_connection(sock.getsockname(), timeout=1)
+    finally:
+        sock.close()
@@ -0,0 +1,45 @@
+import threading
+
+from arrowhead_client.consumer.implementations.requests_consumer import RequestsConsumer
+
+
+def test_pool_settings():
+    consumer = RequestsConsumer('', '', '', pool_connections=4, pool_maxsize=32, pool_block=True)
+
+    adapter = consumer.session.get_adapter('https://127.0.0.1')
+
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block
+    assert consumer.session.verify is False
+
+
+def test_shared_session():
+    consumer = RequestsConsumer('', '', 'ca.pem')
+    sessions = []
+
+    thread = threading.Thread(target=lambda: sessions.append(consumer.session))
+    thread.start()
+    thread.join()
+
+    assert sessions[0] is consumer.session
+    assert consumer.session.verify == 'ca.pem'
+
+
+def test_thread_local_sessions():
+    consumer = RequestsConsumer('', '', '', thread_local_sessions=True)
+    sessions = []
+
+    thread = threading.Thread(target=lambda: sessions.append(consumer.session))
+    thread.start()
+    thread.join()
+
+    assert sessions[0] is not consumer.session
+    assert consumer.session is consumer.session
+
+
+def test_auth_reuse():
+    consumer = RequestsConsumer('', '', '')
+
+    assert consumer._auth('token') is consumer._auth('token')
+    assert consumer._auth('token') is not consumer._auth('other_token')
@@ -0,0 +1,290 @@
+import asyncio
+
+import pytest
+
+from arrowhead_client import constants, errors
+from arrowhead_client.client.implementations import AsyncClient, SyncClient
+from arrowhead_client.client.orchestration_cache import OrchestrationEntry
+from arrowhead_client.logs import get_logger
+from arrowhead_client.resilience import (
+    CircuitBreaker,
+    Resilience,
+    ResiliencePolicy,
+    RetryPolicy,
+    Timeout,
+    get_resilience,
+)
+from arrowhead_client.response import Response
+from arrowhead_client.rules import OrchestrationRule
+from arrowhead_client.service import Service
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.testing import NullProvider
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_rule(port, method='GET'):
+    return OrchestrationRule(
+            Service.make('test', 'test', 'HTTP', 'NOT_SECURE', 'JSON'),
+            ArrowheadSystem.make(f'provider_{port}', '127.0.0.1', port),
+            method,
+    )
+
+
+class FakeConsumer:
+    """ Consumer whose providers answer with the status code given by port, or raise if the status is ``None``. """
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+
+    def consume_service(self, rule, **kwargs):
+        self.calls.append((rule.endpoint, kwargs))
+        status = self.statuses[int(rule.endpoint.split(':')[1].split('/')[0])]
+        if status is None:
+            raise ConnectionError('provider is down')
+        return Response(b'{}', 'JSON', status)
+
+    def close(self):
+        pass
+
+
+class AsyncFakeConsumer(FakeConsumer):
+    async def consume_service(self, rule, **kwargs):
+        return super().consume_service(rule, **kwargs)
+
+
+@pytest.fixture
+def make_client():
+    def make(statuses, policy, method='GET'):
+        client = SyncClient.create('test_client', '127.0.0.1', 1337, resilience=policy, orchestration_ttl=None)
+        client.consumer = FakeConsumer(statuses)
+        client.orchestration_rules.replace('test', [make_rule(port, method) for port in statuses])
+        return client
+
+    return make
+
+
+def test_retry_policy():
+    retry = RetryPolicy(max_attempts=3)
+
+    assert retry.should_retry('GET', 1)
+    assert retry.should_retry('get', 2, 503)
+    assert not retry.should_retry('GET', 3)
+    assert not retry.should_retry('GET', 1, 404)
+    assert not retry.should_retry('POST', 1)
+
+
+def test_retry_delay_is_bounded():
+    retry = RetryPolicy(backoff=0.1, max_backoff=0.3)
+
+    assert all(0 <= retry.delay(1) <= 0.1 for _ in range(100))
+    assert all(0 <= retry.delay(10) <= 0.3 for _ in range(100))
+
+
+def test_circuit_breaker():
+    timer = FakeTimer()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, timer=timer)
+
+    breaker.record_failure()
+    assert breaker.state == constants.CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.state == constants.CircuitState.OPEN
+    assert not breaker.allow_request()
+
+    timer.now = 10
+    assert breaker.state == constants.CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == constants.CircuitState.OPEN
+
+    timer.now = 20
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == constants.CircuitState.CLOSED
+    assert breaker.failures == 0
+
+
+def test_release_trial():
+    timer = FakeTimer()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, timer=timer)
+    breaker.record_failure()
+
+    timer.now = 10
+    assert breaker.allow_request()
+    breaker.release_trial()
+
+    assert breaker.state == constants.CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == constants.CircuitState.CLOSED
+
+
+def test_get_resilience():
+    policy = ResiliencePolicy(timeout=Timeout(1, 2))
+    resilience = Resilience()
+
+    assert get_resilience(resilience) is resilience
+    assert get_resilience(policy).policy('any') is policy
+    assert get_resilience({'test': policy}).policy('test') is policy
+    assert not get_resilience({'test': policy}).policy('other').enabled
+    assert not get_resilience().default.enabled
+
+
+def test_timeout_is_passed_to_consumer(make_client):
+    client = make_client({1: 200}, ResiliencePolicy(timeout=Timeout(1.0, 5.0)))
+
+    client.consume_service('test')
+
+    assert client.consumer.calls[0][1]['timeout'] == Timeout(1.0, 5.0)
+
+
+def test_retry_fails_over_to_other_provider(make_client):
+    client = make_client({1: None, 2: 200}, ResiliencePolicy(retry=RetryPolicy(backoff=0)))
+
+    for _ in range(3):
+        assert client.consume_service('test').status_code == 200
+
+
+def test_retry_exhausted(make_client):
+    client = make_client({1: 503}, ResiliencePolicy(retry=RetryPolicy(max_attempts=3, backoff=0)))
+
+    assert client.consume_service('test').status_code == 503
+    assert len(client.consumer.calls) == 3
+
+
+def test_non_idempotent_method_is_not_retried(make_client):
+    client = make_client({1: None, 2: 200}, ResiliencePolicy(retry=RetryPolicy(backoff=0)), method='POST')
+
+    with pytest.raises(ConnectionError):
+        client.consume_service('test')
+    assert len(client.consumer.calls) == 1
+
+
+def test_open_breaker_fails_over(make_client):
+    client = make_client({1: 500, 2: 200}, ResiliencePolicy(failure_threshold=1))
+
+    statuses = [client.consume_service('test').status_code for _ in range(4)]
+
+    assert statuses.count(500) == 1
+    assert [endpoint for endpoint, _ in client.consumer.calls[-3:]] == ['127.0.0.1:2/test'] * 3
+
+
+def test_all_breakers_open_reorchestrates(make_client):
+    client = make_client({1: None}, ResiliencePolicy(failure_threshold=1))
+    client._orchestration_entries['test'] = OrchestrationEntry('test', 'GET', {})
+    orchestrations = []
+
+    def orchestrate(entry, force=False):
+        orchestrations.append(force)
+        client.orchestration_rules.replace('test', [make_rule(2)])
+
+    client._orchestrate = orchestrate
+    client.consumer.statuses[2] = 200
+
+    with pytest.raises(ConnectionError):
+        client.consume_service('test')
+
+    assert client.consume_service('test').status_code == 200
+    assert orchestrations == [True]
+
+
+def test_all_breakers_open(make_client):
+    client = make_client({1: None}, ResiliencePolicy(failure_threshold=1))
+
+    with pytest.raises(ConnectionError):
+        client.consume_service('test')
+    with pytest.raises(errors.CircuitOpenError):
+        client.consume_service('test')
+    assert len(client.consumer.calls) == 1
+
+
+def test_async_retry_fails_over():
+    client = AsyncClient(
+            ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+            consumer=AsyncFakeConsumer({1: None, 2: 200}),
+            provider=NullProvider(''),
+            logger=get_logger('test_client', 'debug'),
+            resilience=ResiliencePolicy(retry=RetryPolicy(backoff=0), failure_threshold=1),
+    )
+    client.orchestration_rules.replace('test', [make_rule(1), make_rule(2)])
+
+    async def consume():
+        return [(await client.consume_service('test')).status_code for _ in range(3)]
+
+    assert asyncio.run(consume()) == [200, 200, 200]
+    assert [endpoint for endpoint, _ in client.consumer.calls].count('127.0.0.1:1/test') == 1
+
+
+class InterruptedConsumer(FakeConsumer):
+    def consume_service(self, rule, **kwargs):
+        raise KeyboardInterrupt
+
+
+class HangingConsumer(FakeConsumer):
+    async def consume_service(self, rule, **kwargs):
+        await asyncio.sleep(60)
+
+
+def open_breaker(client, rule, timer):
+    breaker = client.resilience.breaker(rule)
+    breaker.record_failure()
+    timer.now = 10
+
+    return breaker
+
+
+def test_interrupted_trial_is_released():
+    timer = FakeTimer()
+    client = SyncClient.create(
+            'test_client', '127.0.0.1', 1337,
+            resilience=Resilience(ResiliencePolicy(failure_threshold=1, reset_timeout=10), timer=timer),
+            orchestration_ttl=None,
+    )
+    client.consumer = InterruptedConsumer({1: 200})
+    client.orchestration_rules.replace('test', [make_rule(1)])
+    breaker = open_breaker(client, make_rule(1), timer)
+
+    with pytest.raises(KeyboardInterrupt):
+        client.consume_service('test')
+
+    assert breaker.state == constants.CircuitState.HALF_OPEN
+    assert breaker.available()
+
+
+def test_async_cancelled_trial_is_released():
+    timer = FakeTimer()
+    client = AsyncClient(
+            ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+            consumer=HangingConsumer({1: 200}),
+            provider=NullProvider(''),
+            logger=get_logger('test_client', 'debug'),
+            resilience=Resilience(ResiliencePolicy(failure_threshold=1, reset_timeout=10), timer=timer),
+    )
+    client.orchestration_rules.replace('test', [make_rule(1)])
+    breaker = open_breaker(client, make_rule(1), timer)
+
+    async def consume():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.consume_service('test'), 0.05)
+
+    asyncio.run(consume())
+
+    assert breaker.state == constants.CircuitState.HALF_OPEN
+    assert breaker.available()
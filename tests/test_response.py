@@ -1,7 +1,8 @@
+import asyncio
 import pytest
 import json
 
-from arrowhead_client.response import Response
+from arrowhead_client.response import ConnectionResponse, Response
 
 true_string = b'{"dummy": "data"}'
 
@@ -27,3 +28,82 @@ def test_string():
     response = Response(true_string, 'JSON', 200,)
 
     assert response.read_string() == '{"dummy": "data"}'
+
+
+class QueueConnection(ConnectionResponse):
+    """ Connection whose sends wait until ``released`` is set, and fail for messages equal to ``'fail'``. """
+
+    def __init__(self, **kwargs):
+        super().__init__(None, **kwargs)
+        self.sent = []
+        self.released = asyncio.Event()
+
+    async def send(self, data):
+        await self.released.wait()
+        if data == 'fail':
+            raise ConnectionResetError('Connection lost')
+        self.sent.append(data)
+
+    async def receive(self):
+        return None
+
+    async def close(self):
+        await self._stop_sender()
+
+    def closed(self):
+        return True
+
+
+def test_invalid_watermarks():
+    with pytest.raises(ValueError):
+        QueueConnection(high_watermark=10, low_watermark=10)
+
+
+def test_enqueue_watermarks():
+    async def main():
+        connection = QueueConnection(high_watermark=4, low_watermark=1)
+        for i in range(3):
+            await connection.enqueue(i)
+
+        blocked = asyncio.ensure_future(connection.enqueue(3))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert connection.queued == 4
+
+        connection.released.set()
+        await blocked
+        await connection.drain()
+
+        return connection
+
+    connection = asyncio.run(main())
+
+    assert connection.sent == [0, 1, 2, 3]
+    assert connection.queued == 0
+
+
+def test_send_error_is_raised():
+    async def main():
+        connection = QueueConnection()
+        connection.released.set()
+        await connection.enqueue('fail')
+        await connection.enqueue('discarded')
+
+        with pytest.raises(ConnectionResetError):
+            await connection.drain()
+        with pytest.raises(ConnectionResetError):
+            await connection.enqueue('after failure')
+
+        return connection
+
+    connection = asyncio.run(main())
+
+    assert connection.sent == []
+    assert connection.queued == 0
+
+
+def test_iteration_ends_when_closed():
+    async def main():
+        return [message async for message in QueueConnection()]
+
+    assert asyncio.run(main()) == []
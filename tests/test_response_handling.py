@@ -9,6 +9,14 @@ from arrowhead_client.service import Service
 from arrowhead_client.system import ArrowheadSystem
 
 
+@pytest.fixture(params=['json', 'ijson'])
+def streaming_parser(request, monkeypatch):
+    if request.param == 'ijson':
+        monkeypatch.setattr(csr, 'ijson', pytest.importorskip('ijson'))
+    else:
+        monkeypatch.setattr(csr, 'ijson', None)
+
+
 @pytest.fixture
 def error_response(request) -> Response:
     error_code = request.param
@@ -57,11 +65,24 @@ class TestServiceRegistry:
         assert test_service == true_service
         assert test_system == true_system
 
+    def test_lazy_query_response(self, query_response, streaming_parser):
+        lazy_results = csr.iter_service_query(query_response)
+
+        assert not isinstance(lazy_results, list)
+        for (lazy_service, lazy_system), (service, system) in zip(
+                lazy_results,
+                csr.process_service_query(query_response),
+        ):
+            assert vars(lazy_service) == vars(service)
+            assert lazy_system == system
+
     def test_bad_query_response(self):
         bad_response = Response(b'{"errorMessage": "Could not query Service Registry"}', 'JSON', 400,)
 
         with pytest.raises(errors.CoreServiceInputError):
             csr.process_service_query(bad_response)
+        with pytest.raises(errors.CoreServiceInputError):
+            csr.iter_service_query(bad_response)
 
     @pytest.mark.parametrize('error_response, expectation', [
         (400, pytest.raises(errors.CoreServiceInputError)),
@@ -93,6 +114,19 @@ class TestOrchestrator:
         assert first_rule.authorization_token == 'h983u43h9834p'
         assert first_rule.access_policy == 'TOKEN'
 
+    def test_lazy_orchestration_response(self, orchestration_data, streaming_parser):
+        orchestrator_response = Response(json.dumps(orchestration_data).encode(), 'JSON', 200,)
+
+        lazy_rules = list(csr.iter_orchestration(orchestrator_response, 'GET'))
+        rules = csr.process_orchestration(orchestrator_response, 'GET')
+
+        assert len(lazy_rules) == len(rules)
+        for lazy_rule, rule in zip(lazy_rules, rules):
+            assert vars(lazy_rule._consumed_service) == vars(rule._consumed_service)
+            assert lazy_rule._provider_system == rule._provider_system
+            assert lazy_rule.authorization_token == rule.authorization_token
+            assert lazy_rule.method == rule.method
+
     def test_bad_orchestration_response(self):
         orchestrator_response = Response(b'{"errorMessage": ""}', 'JSON', 400)
 
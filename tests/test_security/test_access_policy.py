@@ -68,7 +68,15 @@ class TestTokenAccessPolicy:
            'claims': generate_claims('39hu209cp239c', 'Authorization', now - 200, now - 300, cid, sid, iid, now + 2000),
            'bad_claims': generate_claims('39hu209cp239c', 'Authorization', now - 200, now - 300, 'bad_consumer', sid, iid, now + 2000),
            'response': False
-       }]
+       }],
+        'test_token_cache': [{
+            'claims': generate_claims('39hu209cp239c', 'Authorization', now - 200, now - 300, cid, sid, iid, now + 2000),
+            'response': True
+        }],
+        'test_token_cache_expiry': [{
+            'claims': generate_claims('39hu209cp239c', 'Authorization', now - 200, now - 300, cid, sid, iid, now + 2000),
+            'response': True
+        }],
     }
 
     def test_valid_token(self, token_test_variables, access_policy_service, response):
@@ -118,6 +126,32 @@ class TestTokenAccessPolicy:
 
         assert test_policy.is_authorized(bad_consumer_cert_str, auth_string) == response
 
+    def test_token_cache(self, token_test_variables, access_policy_service, response):
+        auth_string, provider_keyfile, a_pub_key, claims = token_test_variables
+        provided_service, consumer_cert_str = access_policy_service
+
+        test_policy = ap.TokenAccessPolicy(provided_service, provider_keyfile, auth_info=a_pub_key)
+
+        for _ in range(3):
+            assert test_policy.is_authorized(consumer_cert_str, auth_string) == response
+
+        cache_info = test_policy.cache_info()
+        assert cache_info.misses == 1
+        assert cache_info.hits == 2
+        assert cache_info.currsize == 1
+
+    def test_token_cache_expiry(self, token_test_variables, access_policy_service, response):
+        auth_string, provider_keyfile, a_pub_key, claims = token_test_variables
+        provided_service, consumer_cert_str = access_policy_service
+
+        test_policy = ap.TokenAccessPolicy(provided_service, provider_keyfile, auth_info=a_pub_key)
+        assert test_policy.is_authorized(consumer_cert_str, auth_string) == response
+
+        # Tokens are evicted when they expire
+        test_policy._token_cache.timer = lambda: claims['exp'] + 1
+        assert test_policy.cache_info().currsize == 1
+        assert auth_string not in test_policy._token_cache
+
 class TestCertificateAccessPolicy:
     now = time.time()
 
@@ -152,8 +186,7 @@ class TestCertificateAccessPolicy:
 
         test_policy = ap.CertificateAccessPolicy()
 
-        # TODO: fix CertificateAccessPolicy and make this test do something again
-        #assert test_policy.is_authorized(bad_cert, auth_string) == response
+        assert test_policy.is_authorized(bad_cert, auth_string) == response
 
 
 class TestUnrestrictedAccessPolicy:
@@ -42,6 +42,9 @@ class TestAccessToken:
             'token_test_variables': generate_claims('93pc239pc203', 'auth', now - 2000, now - 300, cid, sid, iid, now + 3000 )
         }, {
             'token_test_variables': generate_claims('93pc239pc203', 'Authorization', now - 2000, now - 300, cid, sid, iid, now - 3000)
+        }, {
+            # Expired within the leeway of jwcrypto
+            'token_test_variables': generate_claims('93pc239pc203', 'Authorization', now - 2000, now - 300, cid, sid, iid, now - 1)
         }]
     }
 
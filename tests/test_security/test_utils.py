@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from contextlib import nullcontext
 
@@ -102,3 +104,38 @@ def test_cert_to_authentication_info(provider_variables):
     test_authentication_info = utils.cert_to_authentication_info(certfile)
 
     assert test_authentication_info == authentication_info
+
+
+def test_cert_info(provider_variables):
+    *_, common_name, _, certfile, _, = provider_variables
+
+    with open(certfile, 'rb') as cf:
+        cert_string = cf.read().decode()
+
+    utils.certificate_cache.clear()
+    first_info = utils.cert_info(cert_string)
+    second_info = utils.cert_info(cert_string)
+
+    assert first_info is second_info
+    assert first_info.common_names == (common_name,)
+    assert first_info.subject_alt_names == ('localhost',)
+    assert utils.certificate_cache.cache_info().hits == 1
+    assert utils.certificate_cache.cache_info().misses == 1
+
+
+def test_cert_info_expiry(provider_variables):
+    *_, certfile, _, = provider_variables
+
+    with open(certfile, 'rb') as cf:
+        cert_string = cf.read().decode()
+
+    utils.certificate_cache.clear()
+    info = utils.cert_info(cert_string)
+    fingerprint = utils.cert_fingerprint(cert_string)
+    assert fingerprint in utils.certificate_cache
+
+    utils.certificate_cache.timer = lambda: info.not_valid_after + 1
+    try:
+        assert fingerprint not in utils.certificate_cache
+    finally:
+        utils.certificate_cache.timer = time.time
@@ -0,0 +1,246 @@
+import asyncio
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from arrowhead_client.client.implementations import AsyncClient
+from arrowhead_client.consumer.implementations.aiohttp_consumer import AiohttpConsumer
+from arrowhead_client.consumer.implementations.requests_consumer import RequestsConsumer
+from arrowhead_client.logs import get_logger
+from arrowhead_client.provider.implementations.fastapi_provider import ArrowheadAccessPolicyMiddleware
+from arrowhead_client.provider.implementations.httpprovider import FlaskProvider
+from arrowhead_client.rules import OrchestrationRule, RegistrationRule
+from arrowhead_client.security.access_policy import CertificateAccessPolicy, UnrestrictedAccessPolicy
+from arrowhead_client.service import Service, ServiceInterface
+from arrowhead_client.system import ArrowheadSystem
+from arrowhead_client.testing import FakeCoreSystems, NullProvider
+from arrowhead_client.tracing import NULL_TRACER, InMemorySpanExporter, SpanContext, Tracer, get_tracer
+from arrowhead_client import constants
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+TRACEPARENT = f'00-{TRACE_ID}-{PARENT_ID}-01'
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer(exporter)
+
+
+def make_rule(service_definition, access_policy):
+    return RegistrationRule(
+            Service(service_definition, service_definition, ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+            ArrowheadSystem.make('test_provider', '127.0.0.1', 1337),
+            'GET',
+            lambda request: {'value': 42},
+            access_policy,
+    )
+
+
+def test_get_tracer(tracer):
+    assert get_tracer(tracer) is tracer
+    assert get_tracer(True).enabled
+    assert get_tracer() is NULL_TRACER
+    assert get_tracer(False) is NULL_TRACER
+
+
+@pytest.mark.parametrize('traceparent, expected', [
+    (TRACEPARENT, SpanContext(TRACE_ID, PARENT_ID, True)),
+    (f'00-{TRACE_ID}-{PARENT_ID}-00', SpanContext(TRACE_ID, PARENT_ID, False)),
+    (TRACEPARENT.upper(), SpanContext(TRACE_ID, PARENT_ID, True)),
+    (f'00-{"0" * 32}-{PARENT_ID}-01', None),
+    (f'00-{TRACE_ID}-{"0" * 16}-01', None),
+    (f'01-{TRACE_ID}-{PARENT_ID}-01', None),
+    ('garbage', None),
+    ('', None),
+    (None, None),
+])
+def test_traceparent(traceparent, expected):
+    assert SpanContext.from_traceparent(traceparent) == expected
+
+
+def test_traceparent_roundtrip():
+    context = SpanContext(TRACE_ID, PARENT_ID)
+
+    assert SpanContext.from_traceparent(context.to_traceparent()) == context
+
+
+def test_nested_spans(tracer, exporter):
+    with tracer.start_span('parent') as parent:
+        assert tracer.current_span() is parent
+        with tracer.start_span('child', constants.SpanKind.CLIENT) as child:
+            headers = tracer.inject({'accept': 'application/json'})
+        assert tracer.current_span() is parent
+    assert tracer.current_span() is None
+
+    assert [span.name for span in exporter.finished_spans()] == ['child', 'parent']
+    assert parent.parent_id is None
+    assert child.parent_id == parent.context.span_id
+    assert child.context.trace_id == parent.context.trace_id
+    assert child.duration <= parent.duration
+    assert headers == {'accept': 'application/json', 'traceparent': child.context.to_traceparent()}
+    assert tracer.inject({}) == {}
+
+
+def test_span_records_exception(tracer, exporter):
+    with pytest.raises(ValueError):
+        with tracer.start_span('failing'):
+            raise ValueError('bad value')
+
+    span, = exporter.finished_spans()
+    assert span.status == constants.SpanStatus.ERROR
+    assert span.attributes['exception.type'] == 'ValueError'
+    assert span.attributes['exception.message'] == 'bad value'
+
+
+def test_spans_in_tasks(tracer, exporter):
+    async def child(name):
+        with tracer.start_span(name):
+            await asyncio.sleep(0.01)
+
+    async def parent():
+        with tracer.start_span('parent') as span:
+            await asyncio.gather(child('first'), child('second'))
+        return span
+
+    parent_span = asyncio.run(parent())
+
+    assert {span.name for span in exporter.finished_spans(parent_span.context.trace_id)} == \
+           {'first', 'second', 'parent'}
+    assert all(span.parent_id == parent_span.context.span_id for span in exporter.finished_spans()[:2])
+
+
+def test_null_tracer():
+    with NULL_TRACER.start_span('test') as span:
+        span.set_attribute('key', 'value')
+        assert NULL_TRACER.current_span() is None
+
+    assert NULL_TRACER.inject({}) == {}
+    assert NULL_TRACER.extract(TRACEPARENT) is None
+
+
+def test_in_memory_exporter_maxlen():
+    exporter = InMemorySpanExporter(maxlen=2)
+    tracer = Tracer(exporter)
+    for name in ('first', 'second', 'third'):
+        with tracer.start_span(name):
+            pass
+
+    assert [span.name for span in exporter.finished_spans()] == ['second', 'third']
+    exporter.clear()
+    assert exporter.finished_spans() == []
+
+
+def test_flask_provider_spans(tracer, exporter):
+    provider = FlaskProvider('', tracer=tracer)
+    provider.add_provided_service(make_rule('open', UnrestrictedAccessPolicy()))
+    provider.add_provided_service(make_rule('cert', CertificateAccessPolicy()))
+    flask_client = provider.app.test_client()
+
+    flask_client.get('/open', headers={'traceparent': TRACEPARENT})
+    flask_client.get('/cert')
+    flask_client.get('/missing')
+
+    open_span, cert_span = exporter.finished_spans()
+    assert open_span.name == 'GET /open'
+    assert open_span.kind == constants.SpanKind.SERVER
+    assert open_span.context.trace_id == TRACE_ID
+    assert open_span.parent_id == PARENT_ID
+    assert open_span.attributes['http.status_code'] == 200
+    assert cert_span.parent_id is None
+    assert cert_span.attributes['http.status_code'] == 403
+    assert cert_span.attributes['arrowhead.authorized'] is False
+
+
+def test_fastapi_middleware_spans(tracer, exporter):
+    async def app(scope, receive, send):
+        with tracer.start_span('handler'):
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+
+    middleware = ArrowheadAccessPolicyMiddleware(
+            app,
+            {'open': make_rule('open', UnrestrictedAccessPolicy())},
+            tracer=tracer,
+    )
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        pass
+
+    scope = {'type': 'http', 'method': 'GET', 'path': '/open', 'headers': [(b'traceparent', TRACEPARENT.encode())]}
+    asyncio.run(middleware(scope, receive, send))
+
+    handler_span, server_span = exporter.finished_spans()
+    assert server_span.name == 'GET /open'
+    assert server_span.parent_id == PARENT_ID
+    assert server_span.attributes['http.status_code'] == 200
+    assert handler_span.parent_id == server_span.context.span_id
+
+
+def test_trace_propagation(tracer, exporter):
+    provider = FlaskProvider('', tracer=tracer)
+    provider.add_provided_service(make_rule('open', UnrestrictedAccessPolicy()))
+    server = make_server('127.0.0.1', 0, provider.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    consumer = RequestsConsumer('', '', '', tracer=tracer)
+    rule = OrchestrationRule(
+            Service('open', 'open', ServiceInterface('HTTP', 'INSECURE', 'JSON')),
+            ArrowheadSystem.make('test_provider', '127.0.0.1', server.server_port),
+            'GET',
+    )
+
+    try:
+        response = consumer.consume_service(rule)
+    finally:
+        server.shutdown()
+        consumer.close()
+
+    assert response.status_code == 200
+    server_span, client_span = exporter.finished_spans()
+    assert client_span.kind == constants.SpanKind.CLIENT
+    assert client_span.attributes['http.status_code'] == 200
+    assert server_span.context.trace_id == client_span.context.trace_id
+    assert server_span.parent_id == client_span.context.span_id
+
+
+def test_async_orchestration_spans(tracer, exporter):
+    with FakeCoreSystems() as core_systems:
+        core_systems.populate('temperature', providers=2)
+        test_client = AsyncClient(
+                ArrowheadSystem.make('test_client', '127.0.0.1', 1337),
+                consumer=AiohttpConsumer('', '', '', tracer=tracer),
+                provider=NullProvider(''),
+                logger=get_logger('test_client', 'debug'),
+                config=core_systems.config,
+                tracer=tracer,
+        )
+
+        async def orchestrate():
+            async with test_client:
+                await test_client.add_orchestration_rule('temperature', 'GET')
+                await test_client.add_orchestration_rule('temperature', 'GET')
+
+        asyncio.run(orchestrate())
+
+    spans = {span.context.span_id: span for span in exporter.finished_spans()}
+    request_span, = [span for span in spans.values() if span.kind == constants.SpanKind.CLIENT]
+    consume_span = spans[request_span.parent_id]
+    first_orchestration = spans[consume_span.parent_id]
+
+    assert request_span.name == 'POST orchestration-service'
+    assert request_span.attributes['http.status_code'] == 200
+    assert consume_span.name == 'consume_service'
+    assert first_orchestration.name == 'add_orchestration_rule'
+    assert first_orchestration.attributes['arrowhead.orchestration_cache'] == 'miss'
+    assert first_orchestration.parent_id is None
+    assert [span.attributes['arrowhead.orchestration_cache'] for span in spans.values()
+            if span.name == 'add_orchestration_rule'] == ['miss', 'hit']